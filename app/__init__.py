@@ -3,12 +3,35 @@ Inicializa la aplicación Flask y registra los blueprints.
 """
 
 from flask import Flask
+from .compression import init_compression
+from .cli import register_commands
+from .extensions import init_services
+from .rate_limit import init_rate_limit
+from .tracing import init_tracing
 from .routes.routes import bp
 from .routes.ai_routes import ai_bp
+from .routes.project_routes import projects_bp
 
-def create_app():
+def create_app(config=None):
+    """
+    Crea la aplicación con sus servicios compartidos (ver app/extensions.py).
+
+    Args:
+        config (dict, opcional): Valores de app.config que prevalecen sobre las variables de entorno, por
+            ejemplo {'TASKS_DATA_PATH': ...} o {'TASK_REPOSITORY': repositorio, 'AI_SERVICE': servicio}.
+    Returns:
+        flask.Flask: Aplicación.
+    """
     app = Flask(__name__)
+    if config:
+        app.config.update(config)
+    # Primero, para que el span de cada petición cubra también los rechazos por límite de peticiones
+    init_tracing(app)
+    init_services(app)
     app.register_blueprint(bp)
     app.register_blueprint(ai_bp)
+    app.register_blueprint(projects_bp)
+    init_rate_limit(app)
+    init_compression(app)
+    register_commands(app)
     return app
-
@@ -0,0 +1,165 @@
+"""
+Comandos de línea de órdenes de Flask (flask --app run.py <comando>) para operaciones masivas sobre las tareas.
+"""
+import json
+import os
+import click
+from flask.cli import with_appcontext
+from app.extensions import get_services
+from app.repositories.factory import STORAGE_BACKENDS, create_repository
+from app.services import columnar_io, maintenance
+
+
+@click.command('export-tasks')
+@click.argument('path')
+@click.option('--format', 'fmt', type=click.Choice(columnar_io.FORMATS), default=None,
+              help='Formato de salida; por defecto se deduce de la extensión (.parquet, .arrow).')
+@click.option('--batch-size', type=int, default=columnar_io.DEFAULT_BATCH_SIZE, show_default=True,
+              help='Tareas por lote (grupo de filas en Parquet).')
+@with_appcontext
+def export_tasks_command(path, fmt, batch_size):
+    """Exporta todas las tareas a un fichero Parquet o Arrow."""
+    fmt = fmt or columnar_io.detect_format(path)
+    try:
+        count = columnar_io.write_tasks(get_services().task_manager.iter_all(), path, fmt=fmt, batch_size=batch_size)
+    except RuntimeError as e:
+        raise click.ClickException(str(e))
+    click.echo(f"Exportadas {count} tareas a {path} ({fmt})")
+
+
+@click.command('import-tasks')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(columnar_io.FORMATS), default=None,
+              help='Formato de entrada; por defecto se deduce de la extensión.')
+@click.option('--mode', type=click.Choice(columnar_io.IMPORT_MODES), default='merge', show_default=True,
+              help="'merge' sustituye las tareas con el mismo id y añade el resto; 'replace' sustituye todas.")
+@click.option('--batch-size', type=int, default=columnar_io.DEFAULT_BATCH_SIZE, show_default=True,
+              help='Filas por lote de lectura.')
+@with_appcontext
+def import_tasks_command(path, fmt, mode, batch_size):
+    """Importa tareas desde un fichero Parquet o Arrow."""
+    services = get_services()
+    try:
+        count = columnar_io.import_tasks(services.repository, path, fmt=fmt, mode=mode, batch_size=batch_size)
+    except (RuntimeError, ValueError) as e:
+        raise click.ClickException(str(e))
+    services.request_index_rebuild()
+    click.echo(f"Importadas {count} tareas desde {path} ({mode})")
+
+
+def _progress(count):
+    click.echo(f"  ... {count} tareas", err=True)
+
+
+def _echo_json(data):
+    click.echo(json.dumps(data, ensure_ascii=False, indent=2))
+
+
+@click.command('migrate-storage')
+@click.option('--to', 'target_storage', type=click.Choice(STORAGE_BACKENDS), required=True,
+              help='Backend de destino.')
+@click.option('--to-path', default=None, help='Fichero de datos de destino; por defecto el mismo que el origen.')
+@click.option('--from', 'source_storage', type=click.Choice(STORAGE_BACKENDS), default=None,
+              help='Backend de origen; por defecto TASKS_STORAGE.')
+@click.option('--from-path', default=None, help='Fichero de datos de origen; por defecto TASKS_DATA_PATH.')
+@click.option('--shards', type=int, default=None, help="Número de shards del backend 'sharded'.")
+@click.option('--batch-size', type=int, default=maintenance.DEFAULT_BATCH_SIZE, show_default=True,
+              help='Tareas entre avisos de progreso.')
+@with_appcontext
+def migrate_storage_command(target_storage, to_path, source_storage, from_path, shards, batch_size):
+    """Copia todas las tareas de un backend de almacenamiento a otro."""
+    services = get_services()
+    source_storage = source_storage or services.setting('TASKS_STORAGE', 'json')
+    from_path = from_path or services.setting('TASKS_DATA_PATH')
+    if source_storage == target_storage and (to_path is None or to_path == from_path):
+        raise click.UsageError('El origen y el destino son el mismo almacenamiento')
+    source = create_repository(storage=source_storage, data_path=from_path, shards=services.setting('TASKS_SHARDS'))
+    target = create_repository(storage=target_storage, data_path=to_path or from_path, shards=shards,
+                               redistribute=True)
+    count = maintenance.migrate_storage(source, target, batch_size=batch_size, progress=_progress)
+    for repository in (source, target):
+        close = getattr(repository, 'close', None)
+        if close:
+            close()
+    click.echo(f"Migradas {count} tareas a '{target_storage}'. Actualiza TASKS_STORAGE para usar el nuevo backend.")
+
+
+@click.command('compact')
+@click.option('--shards', type=int, default=None,
+              help="Redistribuye el backend 'sharded' en este número de shards.")
+@click.option('--batch-size', type=int, default=maintenance.DEFAULT_BATCH_SIZE, show_default=True,
+              help='Tareas entre avisos de progreso.')
+@with_appcontext
+def compact_command(shards, batch_size):
+    """Reescribe el almacenamiento eliminando duplicados y temporales abandonados."""
+    services = get_services()
+    try:
+        result = maintenance.compact(services.repository, batch_size=batch_size, progress=_progress,
+                                     shards=shards)
+    except ValueError as e:
+        raise click.UsageError(str(e))
+    services.request_index_rebuild()
+    _echo_json(result)
+
+
+@click.command('verify-integrity')
+@click.option('--fix', is_flag=True, help='Elimina duplicados y recalcula token_usage con el ledger de uso.')
+@click.option('--ledger/--no-ledger', default=True, show_default=True,
+              help='Compara token_usage con el ledger de uso de IA.')
+@click.option('--batch-size', type=int, default=maintenance.DEFAULT_BATCH_SIZE, show_default=True,
+              help='Tareas entre avisos de progreso.')
+@with_appcontext
+@click.pass_context
+def verify_integrity_command(ctx, fix, ledger, batch_size):
+    """Comprueba ids, campos y consumo de tokens de las tareas (código de salida 1 si hay problemas)."""
+    services = get_services()
+    ledger_tokens = None
+    if ledger and os.path.exists(services.usage_ledger.filepath):
+        ledger_tokens = services.usage_ledger.tokens_by_task()
+    report = maintenance.verify_integrity(services.repository, ledger_tokens=ledger_tokens, fix=fix,
+                                          batch_size=batch_size, progress=_progress)
+    if report['fixed']:
+        services.request_index_rebuild()
+    _echo_json(report)
+    problems = report['missing_ids'] + report['duplicates'] + report['invalid_count'] + \
+        report['token_usage_mismatch_count']
+    if problems and not report['fixed']:
+        ctx.exit(1)
+
+
+@click.command('rebuild-indexes')
+@with_appcontext
+def rebuild_indexes_command():
+    """Regenera el snapshot en disco y pide a los workers en marcha que reconstruyan sus índices en memoria."""
+    services = get_services()
+    # Los índices en memoria viven en los workers: aquí solo se regenera el snapshot y se deja el aviso
+    result = maintenance.rebuild_indexes(services.repository, {})
+    result['stamp'] = services.request_index_rebuild()
+    _echo_json(result)
+
+
+@click.command('benchmark')
+@click.option('--sample', type=int, default=1000, show_default=True, help='Lecturas por id aleatorias.')
+@click.option('--query', default='tarea', show_default=True, help='Consulta para medir la búsqueda.')
+@click.option('--seed', type=int, default=None, help='Semilla para elegir los ids.')
+@with_appcontext
+def benchmark_command(sample, query, seed):
+    """Mide lecturas del almacenamiento configurado y la construcción de los índices."""
+    from app.services.search_index import SearchIndex
+    from app.services.similarity_index import SimilarityIndex
+    from app.services.task_stats import TaskStats
+    # Índices nuevos para no alterar los del proceso
+    indexes = {'stats': TaskStats(), 'search': SearchIndex(), 'similarity': SimilarityIndex()}
+    _echo_json(maintenance.benchmark(get_services().repository, indexes, sample=sample, query=query, seed=seed))
+
+
+def register_commands(app):
+    """
+    Registra los comandos en la CLI de la aplicación.
+
+    Args:
+        app (flask.Flask): Aplicación.
+    """
+    for command in (export_tasks_command, import_tasks_command, migrate_storage_command, compact_command,
+                    verify_integrity_command, rebuild_indexes_command, benchmark_command):
+        app.cli.add_command(command)
@@ -0,0 +1,85 @@
+"""
+Compresión de respuestas HTTP negociada con Accept-Encoding: brotli (si está instalado el paquete
+`brotli`) o gzip, para las respuestas JSON y de texto que superan un tamaño mínimo.
+"""
+import gzip
+import os
+from flask import request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Tipos de contenido que merece la pena comprimir
+COMPRESSIBLE_MIMETYPES = ('application/json', 'text/plain', 'text/html', 'text/csv')
+
+COMPRESSION_ENABLED = os.getenv('RESPONSE_COMPRESSION', 'true').lower() == 'true'
+# Por debajo de este tamaño (bytes) la compresión no compensa las cabeceras y el tiempo de CPU
+COMPRESSION_MIN_SIZE = int(os.getenv('RESPONSE_COMPRESSION_MIN_SIZE', '500'))
+GZIP_LEVEL = int(os.getenv('RESPONSE_COMPRESSION_GZIP_LEVEL', '6'))
+# Calidad moderada: las respuestas son dinámicas y la calidad máxima de brotli es muy lenta
+BROTLI_QUALITY = int(os.getenv('RESPONSE_COMPRESSION_BROTLI_QUALITY', '4'))
+
+
+def available_encodings():
+    """
+    Returns:
+        list[str]: Codificaciones soportadas, en orden de preferencia del servidor.
+    """
+    return ['br', 'gzip'] if brotli is not None else ['gzip']
+
+
+def compress(data, encoding):
+    """
+    Args:
+        data (bytes): Cuerpo de la respuesta.
+        encoding (str): 'br' o 'gzip'.
+    Returns:
+        bytes: Cuerpo comprimido.
+    """
+    if encoding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL)
+
+
+def compress_response(response):
+    """
+    Comprime la respuesta con la mejor codificación que acepte el cliente. Deja intactas las respuestas
+    en streaming (SSE), los ficheros, las ya codificadas, las de error sin cuerpo y las pequeñas.
+
+    Args:
+        response (flask.Response): Respuesta de la vista.
+    Returns:
+        flask.Response: La misma respuesta, comprimida si procede.
+    """
+    if (response.direct_passthrough or response.is_streamed or 'Content-Encoding' in response.headers
+            or response.status_code < 200 or response.status_code in (204, 304)
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = request.accept_encodings.best_match(available_encodings())
+    if encoding is None:
+        return response
+    data = response.get_data()
+    if len(data) < COMPRESSION_MIN_SIZE:
+        return response
+    # Las respuestas servidas desde la caché JSON reutilizan el cuerpo comprimido guardado junto a sus bytes
+    compressed_body = getattr(response, 'compressed_body', None)
+    if compressed_body is not None:
+        response.set_data(compressed_body(encoding, lambda: compress(data, encoding)))
+    else:
+        response.set_data(compress(data, encoding))
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+
+def init_compression(app):
+    """
+    Registra la compresión de respuestas en la aplicación (salvo con RESPONSE_COMPRESSION=false).
+
+    Args:
+        app (flask.Flask): Aplicación.
+    """
+    if COMPRESSION_ENABLED:
+        app.after_request(compress_response)
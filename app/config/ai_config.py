@@ -2,9 +2,12 @@
 Configuración para servicios de IA (OpenAI)
 """
 import os
+import threading
 from typing import Dict, Any, Optional
+import httpx
 from openai import OpenAI
 from dotenv import load_dotenv
+from app.lifecycle import register_shutdown
 
 # Cargar variables de entorno desde el .env del proyecto
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -16,6 +19,21 @@ class AIConfig:
     
     # API Key de OpenAI
     OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
+    # URL base alternativa (proxy o servidor compatible con OpenAI); None usa la API oficial
+    OPENAI_BASE_URL = os.getenv('OPENAI_BASE_URL') or None
+    
+    # Pool de conexiones HTTP compartido por todos los clientes OpenAI del proceso
+    HTTP_MAX_CONNECTIONS = int(os.getenv('OPENAI_HTTP_MAX_CONNECTIONS', '100'))
+    HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv('OPENAI_HTTP_MAX_KEEPALIVE_CONNECTIONS', '20'))
+    HTTP_KEEPALIVE_EXPIRY = float(os.getenv('OPENAI_HTTP_KEEPALIVE_EXPIRY', '30'))
+    HTTP2_ENABLED = os.getenv('OPENAI_HTTP2', 'false').lower() == 'true'
+    HTTP_CONNECT_TIMEOUT = float(os.getenv('OPENAI_HTTP_CONNECT_TIMEOUT', '5'))
+    HTTP_READ_TIMEOUT = float(os.getenv('OPENAI_HTTP_READ_TIMEOUT', '60'))
+    HTTP_MAX_RETRIES = int(os.getenv('OPENAI_MAX_RETRIES', '2'))
+    
+    # Registro de clientes por proceso: (api_key, base_url) -> OpenAI
+    _clients: Dict[tuple, OpenAI] = {}
+    _clients_lock = threading.Lock()
     
     # Modelos disponibles
     DEFAULT_MODEL = "gpt-4o-mini"
@@ -93,6 +111,37 @@ class AIConfig:
         Devuelve solo el plan de mitigación, sin repetir el análisis de riesgos ni añadir explicaciones adicionales."""
     }
     
+    # Salida estructurada (response_format json_schema) para categorize y estimate
+    STRUCTURED_OUTPUT_ENABLED = os.getenv('AI_STRUCTURED_OUTPUT', 'true').lower() == 'true'
+    
+    # Modelo local de respaldo para categorize/estimate (ver LocalFallbackAIService)
+    LOCAL_MODEL_ENABLED = os.getenv('AI_LOCAL_MODEL_ENABLED', 'false').lower() == 'true'
+    LOCAL_MODEL_MIN_CONFIDENCE = float(os.getenv('AI_LOCAL_MODEL_MIN_CONFIDENCE', '0.8'))
+    LOCAL_MODEL_MAX_LOG_STD = float(os.getenv('AI_LOCAL_MODEL_MAX_LOG_STD', '0.35'))
+    
+    # Ledger de uso de IA (SQLite)
+    USAGE_LEDGER_PATH = os.getenv(
+        'AI_USAGE_LEDGER_PATH',
+        os.path.join(PROJECT_ROOT, 'app', 'data', 'usage.db')
+    )
+    
+    # Control de admisión de las operaciones de IA (ver app/rate_limit.py): peticiones simultáneas por worker
+    # (0 = sin límite), peticiones que pueden esperar turno y segundos máximos de espera antes de responder 429
+    MAX_CONCURRENT_REQUESTS = int(os.getenv('AI_MAX_CONCURRENT_REQUESTS', '8'))
+    MAX_QUEUED_REQUESTS = int(os.getenv('AI_MAX_QUEUED_REQUESTS', '16'))
+    QUEUE_TIMEOUT = float(os.getenv('AI_QUEUE_TIMEOUT', '10'))
+    
+    # Enriquecimiento automático en segundo plano (ver EnrichmentScheduler)
+    ENRICHMENT_ENABLED = os.getenv('AI_ENRICHMENT_ENABLED', 'false').lower() == 'true'
+    ENRICHMENT_WINDOW = os.getenv('AI_ENRICHMENT_WINDOW', '')  # 'HH-HH' en hora local, p. ej. '22-6'
+    ENRICHMENT_BATCH_SIZE = int(os.getenv('AI_ENRICHMENT_BATCH_SIZE', '10'))
+    ENRICHMENT_CALLS_PER_MINUTE = float(os.getenv('AI_ENRICHMENT_CALLS_PER_MINUTE', '30'))
+    ENRICHMENT_INTERVAL = float(os.getenv('AI_ENRICHMENT_INTERVAL', '60'))
+    ENRICHMENT_LOCK_PATH = os.getenv(
+        'AI_ENRICHMENT_LOCK_PATH',
+        os.path.join(PROJECT_ROOT, 'app', 'data', 'enrichment.lock')
+    )
+    
     # Configuración de costos (USD por 1K tokens)
     TOKEN_COSTS = {
         'gpt-3.5-turbo': {'input': 0.0015, 'output': 0.002},
@@ -103,7 +152,9 @@ class AIConfig:
     @classmethod
     def get_client(cls) -> OpenAI:
         """
-        Obtiene el cliente configurado de OpenAI
+        Obtiene el cliente configurado de OpenAI. El cliente se crea una sola vez por proceso
+        (y por API key / URL base) y lo comparten todos los servicios, de modo que las conexiones
+        keep-alive y los handshakes TLS del pool HTTP se reutilizan entre peticiones e hilos.
         
         Returns:
             OpenAI: Cliente configurado
@@ -117,7 +168,54 @@ class AIConfig:
                 "Por favor configura tu API key en el archivo .env"
             )
         
-        return OpenAI(api_key=cls.OPENAI_API_KEY)
+        key = (cls.OPENAI_API_KEY, cls.OPENAI_BASE_URL)
+        client = cls._clients.get(key)
+        if client is None:
+            with cls._clients_lock:
+                client = cls._clients.get(key)
+                if client is None:
+                    client = OpenAI(
+                        api_key=cls.OPENAI_API_KEY,
+                        base_url=cls.OPENAI_BASE_URL,
+                        max_retries=cls.HTTP_MAX_RETRIES,
+                        http_client=cls.build_http_client()
+                    )
+                    if not cls._clients:
+                        register_shutdown(cls.close_clients)
+                    cls._clients[key] = client
+        return client
+    
+    @classmethod
+    def build_http_client(cls) -> httpx.Client:
+        """
+        Crea el cliente httpx con el pool de conexiones, keep-alive, HTTP/2 y timeouts configurados
+        
+        Returns:
+            httpx.Client: Cliente HTTP (seguro para uso concurrente desde varios hilos)
+        """
+        return httpx.Client(
+            limits=httpx.Limits(
+                max_connections=cls.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=cls.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=cls.HTTP_KEEPALIVE_EXPIRY
+            ),
+            timeout=httpx.Timeout(
+                cls.HTTP_READ_TIMEOUT,
+                connect=cls.HTTP_CONNECT_TIMEOUT
+            ),
+            http2=cls.HTTP2_ENABLED
+        )
+    
+    @classmethod
+    def close_clients(cls) -> None:
+        """
+        Cierra los clientes registrados y sus conexiones (al apagar el proceso o en pruebas)
+        """
+        with cls._clients_lock:
+            clients = list(cls._clients.values())
+            cls._clients.clear()
+        for client in clients:
+            client.close()
     
     @classmethod
     def get_model_params(cls, operation: str, model: str = None) -> Dict[str, Any]:
@@ -0,0 +1,307 @@
+"""
+Contenedor de servicios de la aplicación. create_app construye un ServiceContainer por aplicación con un solo
+repositorio, TaskManager, ChangeFeed, índices, cachés y servicio de IA, y lo guarda en
+app.extensions['services']; los blueprints y los comandos de la CLI lo obtienen con get_services().
+"""
+import os
+import tempfile
+import threading
+import time
+from flask import current_app
+from app.config.ai_config import AIConfig
+from app.lifecycle import register_shutdown
+from app.rate_limit import ConcurrencyLimiter
+from app.repositories.factory import create_repository
+from app.repositories.usage_ledger import UsageLedger
+from app.services.change_feed import ChangeFeed
+from app.services.json_cache import SerializedTaskCache
+from app.services.maintenance import unwrap_repository
+from app.services.project_registry import ProjectRegistry
+from app.services.search_index import SearchIndex
+from app.services.similarity_index import SimilarityIndex
+from app.services.task_manager import TaskManager
+from app.services.task_stats import TaskStats
+
+DEFAULT_PROJECTS_DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), 'data', 'projects'))
+
+
+class ServiceContainer:
+    """
+    Servicios compartidos por todos los blueprints de una aplicación. Los valores de configuración se
+    toman de app.config y, si no están, de las variables de entorno del mismo nombre. El servicio de IA,
+    el AITaskManager y el planificador de enriquecimiento se crean al usarse por primera vez, de modo que
+    un worker que no atiende peticiones de IA no carga el cliente de OpenAI ni el tokenizador.
+
+    Claves de configuración que admiten objetos ya construidos (útiles en pruebas):
+        TASK_REPOSITORY (ITaskRepository): Repositorio de tareas; por defecto, create_repository().
+        AI_SERVICE (OpenAIService o compatible): Servicio de IA; por defecto, OpenAIService().
+    """
+    def __init__(self, config=None):
+        """
+        Args:
+            config (Mapping, opcional): Configuración de la aplicación (app.config).
+        """
+        self.config = config or {}
+        self._lock = threading.Lock()
+        self.change_feed = ChangeFeed()
+        self.repository = self.config.get('TASK_REPOSITORY') or create_repository(
+            storage=self.setting('TASKS_STORAGE'),
+            data_path=self.setting('TASKS_DATA_PATH'),
+            shards=self.setting('TASKS_SHARDS'),
+            write_behind=self.setting('TASKS_WRITE_BEHIND')
+        )
+        self.task_manager = TaskManager(repository=self.repository, change_feed=self.change_feed)
+        # Estadísticas, búsqueda y similitud se construyen al usarse (ver _index): los comandos de la CLI no
+        # recorren todas las tareas para crearlos, y wsgi.py los construye al arrancar con build_indexes()
+        self._indexes = {}
+        self._index_lock = threading.Lock()
+        # Fichero que los comandos de la CLI reescriben para pedir a los workers que reconstruyan sus índices
+        self.index_stamp_path = self.setting('INDEX_REBUILD_STAMP_PATH') or self._default_stamp_path()
+        self._index_stamp = self._stamp_signature()
+        # JSON ya serializado de las tareas y de los listados (TASKS_JSON_CACHE=false para desactivarlo)
+        self.json_cache = None
+        if str(self.setting('TASKS_JSON_CACHE', 'true')).lower() == 'true':
+            self.json_cache = SerializedTaskCache(
+                max_projections=int(self.setting('TASKS_JSON_CACHE_MAX_PROJECTIONS', 8)),
+                source_signature=self.repository.source_signature,
+                max_views=int(self.setting('TASKS_JSON_CACHE_MAX_VIEWS', 32))
+            )
+        if self.json_cache is not None:
+            # Se llena con las lecturas: no hace falta recorrer las tareas para crearla
+            self.change_feed.subscribe(self.json_cache.apply)
+        self.project_registry = ProjectRegistry(
+            self.setting('PROJECTS_DATA_DIR') or DEFAULT_PROJECTS_DATA_DIR,
+            max_active=int(self.setting('PROJECTS_MAX_ACTIVE', 32)),
+            idle_seconds=float(self.setting('PROJECTS_IDLE_SECONDS', 600))
+        )
+        self.usage_ledger = UsageLedger(self.setting('AI_USAGE_LEDGER_PATH') or AIConfig.USAGE_LEDGER_PATH)
+        # Operaciones que llaman al modelo: como mucho MAX_CONCURRENT_REQUESTS a la vez por worker
+        self.ai_concurrency = ConcurrencyLimiter(
+            AIConfig.MAX_CONCURRENT_REQUESTS,
+            max_queued=AIConfig.MAX_QUEUED_REQUESTS,
+            queue_timeout=AIConfig.QUEUE_TIMEOUT
+        )
+        self._ai_service = self.config.get('AI_SERVICE')
+        self._ai_manager = None
+        self._enrichment_scheduler = None
+
+    def setting(self, name, default=None):
+        """
+        Args:
+            name (str): Clave de configuración.
+            default (opcional): Valor si no está en la configuración ni en el entorno.
+        Returns:
+            Valor de app.config, de la variable de entorno o el valor por defecto.
+        """
+        value = self.config.get(name)
+        if value is None:
+            value = os.getenv(name)
+        return default if value is None or value == '' else value
+
+    def _index(self, name, factory):
+        """
+        Devuelve un índice en memoria, construyéndolo con todas las tareas la primera vez. Se construye con el
+        write_lock del repositorio, el mismo con el que TaskManager guarda y publica cada cambio, de modo que
+        ninguna escritura queda fuera del recorrido inicial ni se aplica dos veces.
+
+        Args:
+            name (str): Nombre del índice.
+            factory (callable): Crea el índice vacío (con rebuild(tasks) y apply(event)).
+        Returns:
+            Índice suscrito al ChangeFeed.
+        """
+        self.check_index_stamp()
+        index = self._indexes.get(name)
+        if index is None:
+            with self.repository.write_lock(), self._index_lock:
+                index = self._indexes.get(name)
+                if index is None:
+                    index = factory()
+                    index.rebuild(self.task_manager.iter_all())
+                    self.change_feed.subscribe(index.apply)
+                    self._indexes[name] = index
+        return index
+
+    @property
+    def task_stats(self):
+        """TaskStats: Agregados de /tasks/stats."""
+        return self._index('stats', TaskStats)
+
+    @property
+    def search_index(self):
+        """SearchIndex: Índice invertido de /tasks/search."""
+        return self._index('search', SearchIndex)
+
+    @property
+    def similarity_index(self):
+        """SimilarityIndex: Vectores de /tasks/<id>/similar."""
+        return self._index('similarity', SimilarityIndex)
+
+    def _default_stamp_path(self):
+        """
+        Returns:
+            str: <fichero o directorio de datos>.reindex, junto al almacenamiento del repositorio más interno.
+        """
+        for layer in reversed(unwrap_repository(self.repository)):
+            path = getattr(layer, 'filepath', None) or getattr(layer, 'directory', None)
+            if path:
+                return f"{os.path.abspath(path)}.reindex"
+        return os.path.join(tempfile.gettempdir(), f'tasks-{os.getpid()}.reindex')
+
+    def _stamp_signature(self):
+        try:
+            stat = os.stat(self.index_stamp_path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns)
+
+    def request_index_rebuild(self):
+        """
+        Pide a todos los procesos que sirven la aplicación que reconstruyan sus índices en memoria (tras cambios
+        masivos hechos fuera de ellos: importación, compactación, corrección de integridad...) reescribiendo
+        el fichero index_stamp_path. Cada worker lo detecta en su siguiente acceso a un índice.
+
+        Returns:
+            str: Ruta del fichero de aviso.
+        """
+        directory, name = os.path.split(self.index_stamp_path)
+        fd, tmp_path = tempfile.mkstemp(prefix=f'.{name}.', suffix='.tmp', dir=directory or '.')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(str(time.time()))
+        os.replace(tmp_path, self.index_stamp_path)
+        # El proceso que pide la reconstrucción no necesita repetirla al ver su propio aviso
+        self._index_stamp = self._stamp_signature()
+        return self.index_stamp_path
+
+    def check_index_stamp(self):
+        """
+        Reconstruye los índices ya construidos si el fichero de aviso ha cambiado desde la última comprobación
+        (ver request_index_rebuild).
+        """
+        signature = self._stamp_signature()
+        if signature == self._index_stamp:
+            return
+        with self.repository.write_lock():
+            if signature != self._index_stamp:
+                self._index_stamp = signature
+                self.rebuild_indexes()
+
+    def build_indexes(self):
+        """
+        Construye ya los índices en memoria. wsgi.py lo llama al cargar la aplicación para que, con preload_app,
+        los workers compartan los índices construidos en el maestro y la primera petición no espere por ellos.
+        """
+        for name in ('task_stats', 'search_index', 'similarity_index'):
+            getattr(self, name)
+
+    def indexes(self):
+        """
+        Returns:
+            list: Índices en memoria ya construidos que siguen al ChangeFeed (estadísticas, búsqueda, similitud)
+                y la caché de JSON.
+        """
+        indexes = list(self._indexes.values())
+        if self.json_cache is not None:
+            indexes.append(self.json_cache)
+        return indexes
+
+    def rebuild_indexes(self):
+        """
+        Reconstruye los índices en memoria ya construidos y vacía la caché de JSON tras cambios masivos que no
+        pasan por el ChangeFeed, como una importación. Los que aún no se han usado se construirán con los
+        datos nuevos.
+        """
+        with self.repository.write_lock():
+            for index in self.indexes():
+                index.rebuild(self.task_manager.iter_all())
+
+    @property
+    def ai_service(self):
+        """
+        Servicio de IA compartido: OpenAIService o, con AI_LOCAL_MODEL_ENABLED, el modelo local con respaldo
+        en OpenAI (entrenado con las tareas actuales al crearlo).
+        """
+        if self._ai_service is None:
+            with self._lock:
+                if self._ai_service is None:
+                    from app.services.ai_service import OpenAIService
+                    service = OpenAIService()
+                    if AIConfig.LOCAL_MODEL_ENABLED:
+                        from app.services.local_ai_service import LocalFallbackAIService
+                        service = LocalFallbackAIService(
+                            service,
+                            min_confidence=AIConfig.LOCAL_MODEL_MIN_CONFIDENCE,
+                            max_log_std=AIConfig.LOCAL_MODEL_MAX_LOG_STD
+                        )
+                        service.train(self.task_manager.get_all())
+                    self._ai_service = service
+        return self._ai_service
+
+    @property
+    def ai_manager(self):
+        """
+        AITaskManager sobre el TaskManager compartido, para que los resultados de IA lleguen al ChangeFeed.
+        """
+        if self._ai_manager is None:
+            ai_service = self.ai_service
+            with self._lock:
+                if self._ai_manager is None:
+                    from app.services.ai_task_manager import AITaskManager
+                    self._ai_manager = AITaskManager(task_manager=self.task_manager, ai_service=ai_service,
+                                                     usage_ledger=self.usage_ledger)
+        return self._ai_manager
+
+    @property
+    def enrichment_scheduler(self):
+        """
+        Planificador del enriquecimiento automático (ver EnrichmentScheduler).
+        """
+        if self._enrichment_scheduler is None:
+            ai_manager = self.ai_manager
+            with self._lock:
+                if self._enrichment_scheduler is None:
+                    from app.services.enrichment_scheduler import EnrichmentScheduler, parse_window
+                    self._enrichment_scheduler = EnrichmentScheduler(
+                        ai_manager,
+                        window=parse_window(AIConfig.ENRICHMENT_WINDOW),
+                        batch_size=AIConfig.ENRICHMENT_BATCH_SIZE,
+                        calls_per_minute=AIConfig.ENRICHMENT_CALLS_PER_MINUTE,
+                        interval=AIConfig.ENRICHMENT_INTERVAL,
+                        lock_path=AIConfig.ENRICHMENT_LOCK_PATH
+                    )
+        return self._enrichment_scheduler
+
+    def close(self):
+        """
+        Detiene el enriquecimiento y guarda las escrituras pendientes (ledger de uso, proyectos y repositorio).
+        """
+        if self._enrichment_scheduler is not None:
+            self._enrichment_scheduler.stop()
+        self.usage_ledger.close()
+        self.project_registry.close()
+        if hasattr(self.repository, 'close'):
+            # Guarda las escrituras pendientes (p. ej. con TASKS_WRITE_BEHIND)
+            self.repository.close()
+
+
+def init_services(app):
+    """
+    Crea el contenedor de servicios de la aplicación con su configuración y registra su cierre.
+
+    Args:
+        app (flask.Flask): Aplicación.
+    Returns:
+        ServiceContainer: El contenedor, también disponible en app.extensions['services'].
+    """
+    services = ServiceContainer(app.config)
+    app.extensions['services'] = services
+    register_shutdown(services.close)
+    return services
+
+
+def get_services():
+    """
+    Returns:
+        ServiceContainer: Servicios de la aplicación en curso.
+    """
+    return current_app.extensions['services']
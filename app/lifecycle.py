@@ -0,0 +1,44 @@
+"""
+Registro de tareas de apagado: los componentes con escrituras pendientes (ledger de uso, buffers de
+repositorio, clientes HTTP) registran aquí su cierre para que el servidor lo ejecute al terminar cada worker.
+"""
+import atexit
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+_callbacks = []
+_lock = threading.Lock()
+
+
+def register_shutdown(callback):
+    """
+    Registra una función sin argumentos que se ejecutará al apagar el proceso.
+
+    Args:
+        callback (callable): Función de cierre (por ejemplo, UsageLedger.close).
+    Returns:
+        callable: La misma función, para poder usarlo como decorador.
+    """
+    with _lock:
+        _callbacks.append(callback)
+    return callback
+
+
+def shutdown():
+    """
+    Ejecuta las funciones registradas en orden inverso al de registro, una sola vez cada una.
+    Los errores se registran en el log sin interrumpir el resto de cierres.
+    """
+    with _lock:
+        callbacks = list(reversed(_callbacks))
+        _callbacks.clear()
+    for callback in callbacks:
+        try:
+            callback()
+        except Exception:
+            logger.exception("Error al ejecutar %r durante el apagado", callback)
+
+
+atexit.register(shutdown)
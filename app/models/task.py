@@ -19,8 +19,14 @@ class Task:
         risk_analysis (str): Análisis de riesgos generado por IA.
         risk_mitigation (str): Plan de mitigación de riesgos generado por IA.
         token_usage (int): Uso de tokens en la tarea.
+        project (str): Proyecto al que pertenece la tarea (None en la colección global).
+        ai_fingerprints (dict): Huella de las entradas de cada operación de IA en su última ejecución.
     """
-    def __init__(self, id=None, title=None, description=None, priority=None, effort_hours=None, status=None, assigned_to=None, category=None, risk_analysis=None, risk_mitigation=None, token_usage=0):
+    # Campos serializables, en el orden de to_dict
+    FIELDS = ('id', 'title', 'description', 'priority', 'effort_hours', 'status', 'assigned_to', 'category',
+              'risk_analysis', 'risk_mitigation', 'token_usage', 'project', 'ai_fingerprints')
+
+    def __init__(self, id=None, title=None, description=None, priority=None, effort_hours=None, status=None, assigned_to=None, category=None, risk_analysis=None, risk_mitigation=None, token_usage=0, project=None, ai_fingerprints=None):
         """
         Inicializa una nueva instancia de Task.
 
@@ -36,6 +42,8 @@ class Task:
             risk_analysis (str): Análisis de riesgos generado por IA.
             risk_mitigation (str): Plan de mitigación de riesgos generado por IA.
             token_usage (int): Uso de tokens en la tarea.
+            project (str): Proyecto al que pertenece la tarea.
+            ai_fingerprints (dict): Huella de las entradas de cada operación de IA ({'categorize': '...'}).
         """
         self.id = id
         self.title = title
@@ -48,14 +56,23 @@ class Task:
         self.risk_analysis = risk_analysis
         self.risk_mitigation = risk_mitigation
         self.token_usage = token_usage if token_usage is not None else 0
+        self.project = project
+        self.ai_fingerprints = dict(ai_fingerprints or {})
 
-    def to_dict(self):
+    def to_dict(self, fields=None):
         """
         Convierte la tarea a un diccionario.
 
+        Args:
+            fields (list[str], opcional): Campos a incluir (proyección), en el orden de FIELDS; por defecto todos.
         Returns:
             dict: Representación de la tarea como diccionario.
         """
+        if fields is not None:
+            return {
+                field: dict(self.ai_fingerprints) if field == 'ai_fingerprints' else getattr(self, field)
+                for field in self.FIELDS if field in fields
+            }
         return {
             "id": self.id,
             "title": self.title,
@@ -67,7 +84,9 @@ class Task:
             "category": self.category,
             "risk_analysis": self.risk_analysis,
             "risk_mitigation": self.risk_mitigation,
-            "token_usage": self.token_usage
+            "token_usage": self.token_usage,
+            "project": self.project,
+            "ai_fingerprints": dict(self.ai_fingerprints)
         }
 
     @classmethod
@@ -92,7 +111,9 @@ class Task:
             category=data.get("category"),
             risk_analysis=data.get("risk_analysis"),
             risk_mitigation=data.get("risk_mitigation"),
-            token_usage=data.get("token_usage", 0)
+            token_usage=data.get("token_usage", 0),
+            project=data.get("project"),
+            ai_fingerprints=data.get("ai_fingerprints")
         )
 
     def is_ai_enhanced(self):
@@ -115,6 +136,18 @@ class Task:
         """
         return bool(self.risk_analysis and self.risk_mitigation)
 
+    def is_ai_stale(self, operation, fingerprint):
+        """
+        Verifica si las entradas de una operación de IA han cambiado desde su última ejecución.
+        Args:
+            operation (str): Operación de IA ('categorize', 'estimate', 'audit'...).
+            fingerprint (str): Huella actual de las entradas de la operación.
+        Returns:
+            bool: True si la operación se ejecutó con otras entradas (False si nunca se ejecutó).
+        """
+        previous = self.ai_fingerprints.get(operation)
+        return previous is not None and previous != fingerprint
+
     def get_ai_fields_summary(self):
         """
         Devuelve un resumen del estado de los campos IA.
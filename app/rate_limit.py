@@ -0,0 +1,298 @@
+"""
+Control de admisión de la API: limitación de peticiones por cliente y endpoint con cubetas de tokens, y
+límite de peticiones de IA simultáneas con una cola de espera acotada. Las peticiones rechazadas reciben
+429 con la cabecera Retry-After.
+"""
+import functools
+import math
+import os
+import threading
+from flask import g, jsonify, request
+from app.lifecycle import register_shutdown
+from app.repositories.rate_limit_store import MemoryRateLimitStore, SqliteRateLimitStore
+
+RATE_LIMIT_STORES = ('memory', 'sqlite')
+DEFAULT_STORE_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), 'data', 'ratelimit.db'))
+
+_PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+
+def parse_limit(value):
+    """
+    Interpreta un límite con el formato '<n>/<periodo>[:<ráfaga>]', por ejemplo '30/minute' o '30/minute:5'.
+    Sin ráfaga, la cubeta admite hasta n peticiones seguidas.
+
+    Args:
+        value (str): Límite; vacío o '0' para no limitar.
+    Returns:
+        (float, float) or None: Tokens por segundo y capacidad, o None si no hay límite.
+    Raises:
+        ValueError: Si el formato no es válido.
+    """
+    value = (value or '').strip().lower()
+    if value in ('', '0', 'none'):
+        return None
+    try:
+        amount, rest = value.split('/', 1)
+        period, _, burst = rest.partition(':')
+        amount = float(amount)
+        seconds = _PERIODS[period.strip().rstrip('s')]
+        capacity = float(burst) if burst else amount
+    except (KeyError, ValueError):
+        raise ValueError(f"Límite no válido: '{value}'. Formato: <n>/<second|minute|hour|day>[:<ráfaga>]")
+    if amount <= 0 or capacity < 1:
+        raise ValueError(f"Límite no válido: '{value}'")
+    return amount / seconds, capacity
+
+
+def parse_endpoint_limits(value):
+    """
+    Args:
+        value (str): Límites por endpoint separados por comas ('ai_tasks.audit_task_risks=5/minute,...').
+    Returns:
+        dict: Límite (tokens por segundo, capacidad) o None por nombre de endpoint.
+    """
+    limits = {}
+    for item in (value or '').split(','):
+        if item.strip():
+            endpoint, _, limit = item.partition('=')
+            limits[endpoint.strip()] = parse_limit(limit)
+    return limits
+
+
+def create_store(kind=None, path=None):
+    """
+    Args:
+        kind (str, opcional): 'memory' (por defecto) o 'sqlite'. Por defecto, RATE_LIMIT_STORE.
+        path (str, opcional): Base de datos del almacén SQLite. Por defecto, RATE_LIMIT_STORE_PATH.
+    Returns:
+        IRateLimitStore: Almacén de cubetas.
+    Raises:
+        ValueError: Si el tipo de almacén no existe.
+    """
+    kind = (kind or os.getenv('RATE_LIMIT_STORE') or 'memory').lower()
+    if kind not in RATE_LIMIT_STORES:
+        raise ValueError(f"RATE_LIMIT_STORE no válido: {kind}. Opciones: {', '.join(RATE_LIMIT_STORES)}")
+    if kind == 'sqlite':
+        return SqliteRateLimitStore(path or os.getenv('RATE_LIMIT_STORE_PATH') or DEFAULT_STORE_PATH)
+    return MemoryRateLimitStore()
+
+
+def too_many_requests(message, retry_after):
+    """
+    Args:
+        message (str): Motivo del rechazo.
+        retry_after (float): Segundos recomendados antes de reintentar.
+    Returns:
+        (flask.Response, int): Respuesta 429 con Retry-After (segundos enteros, al menos 1).
+    """
+    response = jsonify({'error': message, 'retry_after': round(retry_after, 3)})
+    response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    return response, 429
+
+
+class RateLimiter:
+    """
+    Limita las peticiones de cada cliente a cada endpoint con una cubeta de tokens. El límite de un endpoint
+    es, por orden: el indicado para él en `endpoint_limits`, `ai_limit` para los POST del blueprint de IA
+    (las operaciones que llaman al modelo) o `default_limit` para el resto.
+    """
+    def __init__(self, store, default_limit=None, ai_limit=None, endpoint_limits=None, client_header=None):
+        """
+        Args:
+            store (IRateLimitStore): Almacén de cubetas.
+            default_limit ((float, float), opcional): Límite por defecto; None para no limitar.
+            ai_limit ((float, float), opcional): Límite de las operaciones de IA.
+            endpoint_limits (dict, opcional): Límites por nombre de endpoint (None desactiva el límite).
+            client_header (str, opcional): Cabecera que identifica al cliente (por ejemplo, 'X-API-Key');
+                si falta o no se indica, se usa la dirección remota.
+        """
+        self.store = store
+        self.default_limit = default_limit
+        self.ai_limit = ai_limit
+        self.endpoint_limits = endpoint_limits or {}
+        self.client_header = client_header
+        self.rejected = 0
+
+    @classmethod
+    def from_env(cls):
+        """
+        Construye el limitador con RATE_LIMIT_DEFAULT, RATE_LIMIT_AI, RATE_LIMIT_ENDPOINTS,
+        RATE_LIMIT_CLIENT_HEADER y el almacén de RATE_LIMIT_STORE.
+        """
+        return cls(
+            create_store(),
+            default_limit=parse_limit(os.getenv('RATE_LIMIT_DEFAULT', '')),
+            ai_limit=parse_limit(os.getenv('RATE_LIMIT_AI', '30/minute:10')),
+            endpoint_limits=parse_endpoint_limits(os.getenv('RATE_LIMIT_ENDPOINTS', '')),
+            client_header=os.getenv('RATE_LIMIT_CLIENT_HEADER') or None
+        )
+
+    def limit_for(self, endpoint, blueprint, method):
+        """
+        Returns:
+            (float, float) or None: Límite aplicable a la petición.
+        """
+        if endpoint in self.endpoint_limits:
+            return self.endpoint_limits[endpoint]
+        if blueprint == 'ai_tasks' and method == 'POST':
+            return self.ai_limit
+        return self.default_limit
+
+    def client_id(self):
+        """
+        Returns:
+            str: Identificador del cliente de la petición en curso.
+        """
+        if self.client_header and request.headers.get(self.client_header):
+            return request.headers[self.client_header].split(',')[0].strip()
+        return request.remote_addr or 'desconocido'
+
+    def check(self):
+        """
+        Consume un token de la cubeta del cliente para el endpoint de la petición en curso (before_request).
+
+        Returns:
+            (flask.Response, int) or None: Respuesta 429 si se supera el límite; None si se admite.
+        """
+        if request.endpoint is None:
+            return None
+        limit = self.limit_for(request.endpoint, request.blueprint, request.method)
+        if limit is None:
+            return None
+        rate, capacity = limit
+        allowed, retry_after, remaining = self.store.consume(f'{self.client_id()}|{request.endpoint}', rate, capacity)
+        g.rate_limit = (capacity, remaining)
+        if not allowed:
+            self.rejected += 1
+            return too_many_requests('Demasiadas peticiones: se ha superado el límite de este endpoint', retry_after)
+        return None
+
+    @staticmethod
+    def add_headers(response):
+        """
+        Añade X-RateLimit-Limit y X-RateLimit-Remaining a las respuestas de endpoints limitados (after_request).
+        """
+        limit = g.get('rate_limit')
+        if limit is not None:
+            capacity, remaining = limit
+            response.headers['X-RateLimit-Limit'] = str(int(capacity))
+            response.headers['X-RateLimit-Remaining'] = str(int(remaining))
+        return response
+
+
+class ConcurrencyLimiter:
+    """
+    Limita las peticiones que se ejecutan a la vez. Las que llegan con el límite ocupado esperan en una cola
+    de como mucho `max_queued` peticiones durante `queue_timeout` segundos; si la cola está llena o se agota
+    la espera, se rechazan con 429 en lugar de acumular hilos bloqueados y latencia.
+    """
+    def __init__(self, max_concurrent, max_queued=0, queue_timeout=0.0):
+        """
+        Args:
+            max_concurrent (int): Peticiones simultáneas; 0 para no limitar.
+            max_queued (int): Peticiones que pueden esperar turno.
+            queue_timeout (float): Segundos máximos de espera en la cola.
+        """
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+        self._semaphore = threading.BoundedSemaphore(max_concurrent) if max_concurrent > 0 else None
+        self._lock = threading.Lock()
+        self.active = 0
+        self.waiting = 0
+        self.rejected = 0
+
+    def acquire(self):
+        """
+        Returns:
+            bool: True si la petición obtiene turno (hay que llamar a release al terminar).
+        """
+        if self._semaphore is None:
+            return True
+        if self._semaphore.acquire(blocking=False):
+            with self._lock:
+                self.active += 1
+            return True
+        with self._lock:
+            if self.waiting >= self.max_queued:
+                self.rejected += 1
+                return False
+            self.waiting += 1
+        acquired = self._semaphore.acquire(timeout=self.queue_timeout) if self.queue_timeout > 0 else False
+        with self._lock:
+            self.waiting -= 1
+            if acquired:
+                self.active += 1
+            else:
+                self.rejected += 1
+        return acquired
+
+    def release(self):
+        if self._semaphore is not None:
+            with self._lock:
+                self.active -= 1
+            self._semaphore.release()
+
+    def rejection(self):
+        """
+        Returns:
+            (flask.Response, int): Respuesta 429 para una petición que no obtiene turno.
+        """
+        return too_many_requests('Servidor ocupado: demasiadas operaciones de IA en curso',
+                                 max(1.0, self.queue_timeout))
+
+    def call(self, view, *args, **kwargs):
+        """
+        Ejecuta la vista si obtiene turno y libera el turno al terminar.
+
+        Returns:
+            Respuesta de la vista, o la de rejection() si no hay turno.
+        """
+        if not self.acquire():
+            return self.rejection()
+        try:
+            return view(*args, **kwargs)
+        finally:
+            self.release()
+
+    def limit(self, view):
+        """
+        Decorador de vistas Flask que aplica el límite de concurrencia.
+        """
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            return self.call(view, *args, **kwargs)
+        return wrapper
+
+    def get_stats(self):
+        """
+        Returns:
+            dict: Configuración y contadores (activas, en cola y rechazadas).
+        """
+        with self._lock:
+            return {
+                'max_concurrent': self.max_concurrent,
+                'max_queued': self.max_queued,
+                'queue_timeout': self.queue_timeout,
+                'active': self.active,
+                'waiting': self.waiting,
+                'rejected': self.rejected
+            }
+
+
+def init_rate_limit(app):
+    """
+    Registra la limitación de peticiones en la aplicación (desactivable con RATE_LIMIT_ENABLED=false).
+    El limitador queda en app.extensions['rate_limiter'].
+
+    Args:
+        app (flask.Flask): Aplicación.
+    """
+    if os.getenv('RATE_LIMIT_ENABLED', 'true').lower() != 'true':
+        return
+    limiter = RateLimiter.from_env()
+    register_shutdown(limiter.store.close)
+    app.extensions['rate_limiter'] = limiter
+    app.before_request(limiter.check)
+    app.after_request(limiter.add_headers)
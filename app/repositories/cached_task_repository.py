@@ -0,0 +1,144 @@
+"""
+Caché en memoria de escritura directa (write-through) sobre otro repositorio de tareas.
+"""
+import threading
+from app.models.task import Task
+from app.repositories.i_task_repository import ITaskRepository
+
+
+class CachedTaskRepository(ITaskRepository):
+    """
+    Mantiene en memoria los diccionarios de las tareas del repositorio envuelto, indexados por id, y escribe
+    cada cambio en él de inmediato. Las lecturas devuelven instancias nuevas de Task, de modo que modificar una
+    tarea leída no altera la caché antes de guardarla.
+
+    Si el almacenamiento del repositorio envuelto cambia desde fuera (otro worker), lo que se detecta con su
+    source_signature(), la caché se recarga en la siguiente lectura.
+
+    Métodos:
+        load_tasks(): Devuelve las tareas desde memoria.
+        get_by_id(task_id): Búsqueda por id en memoria.
+        save_tasks / add_task / update_task / delete_task: Escriben en el repositorio y actualizan la caché.
+    """
+    def __init__(self, repository):
+        """
+        Args:
+            repository (ITaskRepository): Repositorio que persiste las tareas.
+        """
+        self.repository = repository
+        self._tasks = None
+        self._signature = None
+        self._lock = threading.RLock()
+
+    def source_signature(self):
+        return self.repository.source_signature()
+
+    def write_lock(self):
+        return self._lock
+
+    def _cache(self):
+        """
+        Devuelve el diccionario id -> datos de la tarea, cargándolo si hace falta.
+        """
+        signature = self.repository.source_signature()
+        if self._tasks is None or signature != self._signature:
+            self._tasks = {task.id: task.to_dict() for task in self.repository.iter_tasks()}
+            self._signature = signature
+        return self._tasks
+
+    def _remember(self):
+        # Tras una escritura propia, la nueva firma del fichero no implica datos externos
+        self._signature = self.repository.source_signature()
+
+    def load_tasks(self):
+        """
+        Returns:
+            list[Task]: Tareas en memoria, ordenadas por id.
+        """
+        with self._lock:
+            return [Task.from_dict(data) for _, data in sorted(self._cache().items())]
+
+    def get_by_id(self, task_id):
+        """
+        Args:
+            task_id (int): Identificador de la tarea.
+        Returns:
+            Task or None: Tarea encontrada o None si no existe.
+        """
+        with self._lock:
+            data = self._cache().get(task_id)
+        return Task.from_dict(data) if data is not None else None
+
+    def next_id(self):
+        with self._lock:
+            return max(self._cache(), default=0) + 1
+
+    def save_tasks(self, tasks):
+        """
+        Args:
+            tasks (list[Task]): Lista completa de tareas a guardar.
+        """
+        with self._lock:
+            self.repository.save_tasks(tasks)
+            self._tasks = {task.id: task.to_dict() for task in tasks}
+            self._remember()
+
+    def add_task(self, task):
+        """
+        Args:
+            task (Task): Tarea a añadir (se le asigna id si no tiene).
+        Returns:
+            Task: La tarea añadida.
+        """
+        with self._lock:
+            cache = self._cache()
+            if task.id is None:
+                task.id = max(cache, default=0) + 1
+            self.repository.add_task(task)
+            cache[task.id] = task.to_dict()
+            self._remember()
+        return task
+
+    def update_task(self, task_id, task):
+        """
+        Args:
+            task_id (int): ID de la tarea a sustituir.
+            task (Task): Nueva versión de la tarea.
+        Returns:
+            Task or None: La versión anterior de la tarea, o None si no existía.
+        """
+        with self._lock:
+            cache = self._cache()
+            if task_id not in cache:
+                return None
+            previous = self.repository.update_task(task_id, task)
+            if previous is not None:
+                cache[task_id] = task.to_dict()
+            self._remember()
+            return previous
+
+    def delete_task(self, task_id):
+        """
+        Args:
+            task_id (int): ID de la tarea a eliminar.
+        Returns:
+            Task or None: La tarea eliminada, o None si no existía.
+        """
+        with self._lock:
+            cache = self._cache()
+            if task_id not in cache:
+                return None
+            previous = self.repository.delete_task(task_id)
+            cache.pop(task_id, None)
+            self._remember()
+            return previous
+
+    def close(self):
+        """
+        Vacía la caché y cierra el repositorio envuelto si lo admite.
+        """
+        with self._lock:
+            self._tasks = None
+        close = getattr(self.repository, 'close', None)
+        if close:
+            close()
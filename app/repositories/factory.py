@@ -0,0 +1,56 @@
+"""
+Construye el repositorio de tareas configurado (TASKS_STORAGE y TASKS_DATA_PATH).
+"""
+import os
+from app.repositories.json_task_repository import JsonTaskRepository
+
+DEFAULT_DATA_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '../data/tasks.json'))
+STORAGE_BACKENDS = ('json', 'snapshot', 'sharded')
+
+
+def create_repository(storage=None, data_path=None, shards=None, write_behind=None, redistribute=False):
+    """
+    Crea el repositorio de tareas.
+
+    Args:
+        storage (str, opcional): 'json' (por defecto) o 'snapshot' (lecturas desde un snapshot mapeado
+            en memoria junto al JSON, en <data_path>.snap) o 'sharded' (N ficheros en el directorio
+            <data_path sin extensión>_shards, importando el JSON la primera vez). Por defecto, TASKS_STORAGE.
+        data_path (str, opcional): Fichero JSON de tareas. Por defecto, TASKS_DATA_PATH o app/data/tasks.json.
+        shards (int, opcional): Número de shards del backend 'sharded'. Por defecto, TASKS_SHARDS o el guardado
+            en el directorio de shards (8 si es nuevo).
+        write_behind (str, opcional): Si se indica ('none', 'journal' o 'commit'), el repositorio se envuelve en
+            un WriteBehindTaskRepository con ese modo de durabilidad y diario en <data_path>.journal.
+            Por defecto, TASKS_WRITE_BEHIND (vacío = escritura síncrona).
+        redistribute (bool): Con 'sharded', admite un número de shards distinto del de los datos existentes
+            (destino de una migración o compactación que reescribe todas las tareas).
+    Returns:
+        ITaskRepository: Repositorio configurado.
+    Raises:
+        ValueError: Si el backend no existe.
+    """
+    storage = (storage or os.getenv('TASKS_STORAGE') or 'json').lower()
+    data_path = os.path.abspath(data_path or os.getenv('TASKS_DATA_PATH') or DEFAULT_DATA_PATH)
+    if storage not in STORAGE_BACKENDS:
+        raise ValueError(f"TASKS_STORAGE no válido: {storage}. Opciones: {', '.join(STORAGE_BACKENDS)}")
+    if storage == 'sharded':
+        from app.repositories.sharded_task_repository import ShardedTaskRepository
+        shards = shards or os.getenv('TASKS_SHARDS')
+        repository = ShardedTaskRepository(f"{os.path.splitext(data_path)[0]}_shards",
+                                           shards=int(shards) if shards else None,
+                                           legacy_path=data_path, redistribute=redistribute)
+    else:
+        repository = JsonTaskRepository(data_path)
+        if storage == 'snapshot':
+            from app.repositories.snapshot_task_repository import SnapshotTaskRepository
+            repository = SnapshotTaskRepository(repository, f"{data_path}.snap")
+    write_behind = (write_behind or os.getenv('TASKS_WRITE_BEHIND') or '').lower()
+    if write_behind:
+        from app.repositories.write_behind_task_repository import WriteBehindTaskRepository
+        repository = WriteBehindTaskRepository(
+            repository,
+            durability=write_behind,
+            flush_interval=float(os.getenv('TASKS_WRITE_BEHIND_INTERVAL_MS', '5')) / 1000,
+            journal_path=f"{data_path}.journal"
+        )
+    return repository
@@ -0,0 +1,53 @@
+"""
+Cerrojo exclusivo entre hilos y entre procesos (workers de gunicorn) sobre un fichero de bloqueo.
+"""
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    # Windows (waitress): un único proceso, basta el cerrojo entre hilos
+    fcntl = None
+
+
+class FileLock:
+    """
+    Context manager que toma un threading.RLock y, donde hay fcntl, un flock exclusivo sobre lock_path.
+    Es reentrante en el mismo hilo: el flock se toma en la adquisición más externa y se libera al salir de ella.
+
+    El fichero se abre en cada adquisición: un descriptor abierto antes del fork (preload_app) lo compartirían
+    todos los workers y el flock no los excluiría entre sí.
+    """
+    def __init__(self, lock_path):
+        """
+        Args:
+            lock_path (str): Fichero de bloqueo (se crea si no existe; su contenido no se usa).
+        """
+        self.lock_path = lock_path
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._file = None
+
+    def __enter__(self):
+        self._lock.acquire()
+        if self._depth == 0 and fcntl is not None:
+            try:
+                self._file = open(self.lock_path, 'a')
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+            except BaseException:
+                if self._file is not None:
+                    self._file.close()
+                    self._file = None
+                self._lock.release()
+                raise
+        self._depth += 1
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._depth -= 1
+        if self._depth == 0 and self._file is not None:
+            # Cerrar el descriptor libera el flock
+            self._file.close()
+            self._file = None
+        self._lock.release()
+        return False
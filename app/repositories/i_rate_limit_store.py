@@ -0,0 +1,61 @@
+"""
+Interfaz para los almacenes de cubetas de tokens (token buckets) de la limitación de peticiones.
+"""
+from abc import ABC, abstractmethod
+from typing import Optional, Tuple
+
+
+class IRateLimitStore(ABC):
+    """
+    Interfaz abstracta para almacenes de cubetas de tokens.
+
+    Cada clave tiene una cubeta con capacidad `capacity` que se rellena a `rate` tokens por segundo; cada
+    petición consume `cost` tokens. Un almacén en memoria limita cada worker por separado; uno compartido
+    (SQLite en local, Redis o similar en un despliegue con varias máquinas) aplica el límite a todos.
+    """
+    @abstractmethod
+    def consume(self, key: str, rate: float, capacity: float, cost: float = 1,
+                now: Optional[float] = None) -> Tuple[bool, float, float]:
+        """
+        Intenta consumir tokens de la cubeta de una clave.
+
+        Args:
+            key (str): Clave de la cubeta (cliente y endpoint).
+            rate (float): Tokens que se recuperan por segundo.
+            capacity (float): Tokens máximos (ráfaga permitida).
+            cost (float): Tokens que consume la petición.
+            now (float, opcional): Instante actual (time.time()).
+        Returns:
+            (bool, float, float): Si se admite la petición, segundos hasta que se podría admitir
+            (0 si se admite) y tokens restantes.
+        """
+        pass
+
+    def close(self):
+        """
+        Libera los recursos del almacén.
+        """
+        pass
+
+
+def refill(tokens, updated, rate, capacity, cost, now):
+    """
+    Calcula el nuevo estado de una cubeta tras rellenarla hasta `now` e intentar consumir `cost` tokens.
+
+    Args:
+        tokens (float or None): Tokens tras la última petición (None si la cubeta no existe: está llena).
+        updated (float): Instante de la última petición.
+        rate (float): Tokens por segundo.
+        capacity (float): Capacidad de la cubeta.
+        cost (float): Tokens a consumir.
+        now (float): Instante actual.
+    Returns:
+        (bool, float, float): Admitida, segundos de espera y tokens restantes.
+    """
+    if tokens is None:
+        tokens = capacity
+    else:
+        tokens = min(capacity, tokens + max(0.0, now - updated) * rate)
+    if tokens >= cost:
+        return True, 0.0, tokens - cost
+    return False, (cost - tokens) / rate, tokens
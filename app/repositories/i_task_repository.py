@@ -1,8 +1,9 @@
 """
 Interfaz para los repositorios de tareas. Permite desacoplar la lógica de negocio de la persistencia.
 """
+import threading
 from abc import ABC, abstractmethod
-from typing import List
+from typing import Iterable, Iterator, List, Optional
 from app.models.task import Task
 
 class ITaskRepository(ABC):
@@ -30,3 +31,125 @@ class ITaskRepository(ABC):
             tasks (list[Task]): Lista de tareas a guardar.
         """
         pass
+
+    def get_by_id(self, task_id: int) -> Optional[Task]:
+        """
+        Devuelve una tarea por su ID. La implementación por defecto recorre load_tasks();
+        los repositorios con índice (por ejemplo, el snapshot) la sobrescriben.
+
+        Args:
+            task_id (int): Identificador de la tarea.
+        Returns:
+            Task or None: Tarea encontrada o None si no existe.
+        """
+        for task in self.load_tasks():
+            if task.id == task_id:
+                return task
+        return None
+
+    def iter_tasks(self) -> Iterator[Task]:
+        """
+        Recorre todas las tareas. Los repositorios particionados las cargan partición a partición.
+
+        Yields:
+            Task: Cada tarea almacenada.
+        """
+        return iter(self.load_tasks())
+
+    def save_tasks_iter(self, tasks: Iterable[Task]) -> int:
+        """
+        Guarda las tareas de un iterable sustituyendo las existentes. La implementación por defecto las reúne
+        en una lista; los repositorios en fichero JSON las escriben de una en una con memoria acotada.
+
+        Args:
+            tasks (Iterable[Task]): Tareas a guardar.
+        Returns:
+            int: Número de tareas guardadas.
+        """
+        tasks = list(tasks)
+        self.save_tasks(tasks)
+        return len(tasks)
+
+    def source_signature(self) -> Optional[tuple]:
+        """
+        Firma del almacenamiento (inode, mtime y tamaño de sus ficheros) para que las cachés en memoria
+        detecten los cambios hechos por otros procesos. La implementación por defecto devuelve None (sin fuente
+        externa que vigilar).
+
+        Returns:
+            tuple or None: Firma actual del almacenamiento.
+        """
+        return None
+
+    def write_lock(self):
+        """
+        Cerrojo que serializa la lectura-modificación-escritura de add_task, update_task y delete_task, para
+        que dos escrituras concurrentes no se pisen. TaskManager lo mantiene también mientras publica el cambio,
+        de modo que los índices reciben los eventos en el orden en que se guardaron. Es reentrante.
+        La implementación por defecto es un cerrojo entre hilos propio de la instancia; los repositorios en
+        fichero devuelven un FileLock, que también excluye a los demás workers.
+
+        Returns:
+            Context manager del cerrojo.
+        """
+        return self.__dict__.setdefault('_write_lock', threading.RLock())
+
+    def next_id(self) -> int:
+        """
+        Returns:
+            int: Siguiente id libre (el mayor id almacenado más uno).
+        """
+        return max((task.id for task in self.iter_tasks()), default=0) + 1
+
+    def add_task(self, task: Task) -> Task:
+        """
+        Añade una tarea, asignándole un id si no tiene.
+
+        Args:
+            task (Task): Tarea a añadir.
+        Returns:
+            Task: La tarea añadida.
+        """
+        with self.write_lock():
+            tasks = self.load_tasks()
+            if task.id is None:
+                task.id = max((t.id for t in tasks), default=0) + 1
+            tasks.append(task)
+            self.save_tasks(tasks)
+        return task
+
+    def update_task(self, task_id: int, task: Task) -> Optional[Task]:
+        """
+        Sustituye una tarea existente.
+
+        Args:
+            task_id (int): ID de la tarea a sustituir.
+            task (Task): Nueva versión de la tarea.
+        Returns:
+            Task or None: La versión anterior de la tarea, o None si no existía.
+        """
+        with self.write_lock():
+            tasks = self.load_tasks()
+            for idx, current in enumerate(tasks):
+                if current.id == task_id:
+                    tasks[idx] = task
+                    self.save_tasks(tasks)
+                    return current
+        return None
+
+    def delete_task(self, task_id: int) -> Optional[Task]:
+        """
+        Elimina una tarea.
+
+        Args:
+            task_id (int): ID de la tarea a eliminar.
+        Returns:
+            Task or None: La tarea eliminada, o None si no existía.
+        """
+        with self.write_lock():
+            tasks = self.load_tasks()
+            remaining = [task for task in tasks if task.id != task_id]
+            if len(remaining) == len(tasks):
+                return None
+            self.save_tasks(remaining)
+        return next(task for task in tasks if task.id == task_id)
@@ -3,16 +3,79 @@ Repositorio para la persistencia de tareas en un archivo JSON.
 """
 import json
 import os
+import re
+import tempfile
+from app import tracing
 from app.models.task import Task
+from app.repositories.file_lock import FileLock
 from app.repositories.i_task_repository import ITaskRepository
 
+_SEPARATORS_RE = re.compile(r'[\s,]*')
+
+# Caracteres leídos de cada vez al recorrer el fichero con iter_tasks
+READ_CHUNK_SIZE = 1 << 16
+
+
+class JsonTaskWriter:
+    """
+    Escribe un fichero JSON de tareas tarea a tarea, con el mismo formato que save_tasks, en un fichero temporal
+    que sustituye al original al confirmar (commit) o se descarta (abort).
+    """
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self.count = 0
+        directory, name = os.path.split(filepath)
+        fd, self._tmp_path = tempfile.mkstemp(prefix=f'.{name}.', suffix='.tmp', dir=directory or '.')
+        self._file = os.fdopen(fd, 'w', encoding='utf-8')
+
+    def write(self, task):
+        """
+        Args:
+            task (Task): Tarea a añadir al fichero.
+        """
+        item = json.dumps(task.to_dict(), ensure_ascii=False, indent=2).replace('\n', '\n  ')
+        self._file.write(('[\n  ' if self.count == 0 else ',\n  ') + item)
+        self.count += 1
+
+    def commit(self):
+        """
+        Cierra el fichero temporal y sustituye con él al original.
+        """
+        try:
+            self._file.write('\n]' if self.count else '[]')
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            if os.path.exists(self.filepath):
+                # mkstemp crea el fichero con permisos 0600: se conservan los del original
+                os.chmod(self._tmp_path, os.stat(self.filepath).st_mode & 0o777)
+            os.replace(self._tmp_path, self.filepath)
+        except BaseException:
+            self.abort()
+            raise
+
+    def abort(self):
+        """
+        Descarta el fichero temporal.
+        """
+        if not self._file.closed:
+            self._file.close()
+        if os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
+
+
 class JsonTaskRepository(ITaskRepository):
     """
     Repositorio para la persistencia de tareas en un archivo JSON.
 
     Métodos:
         load_tasks(): Carga todas las tareas desde el archivo JSON.
+        iter_tasks(): Recorre el archivo tarea a tarea, sin cargarlo entero.
         save_tasks(tasks): Guarda la lista de tareas en el archivo JSON.
+        save_tasks_iter(tasks): Guarda las tareas de un iterable sin materializar la lista.
+
+    add_task, update_task y delete_task cargan, modifican y guardan el fichero con un FileLock sobre
+    <filepath>.lock, compartido por los hilos y los workers que usan el mismo fichero.
     """
     def __init__(self, filepath):
         """
@@ -22,10 +85,29 @@ class JsonTaskRepository(ITaskRepository):
             filepath (str): Ruta al archivo JSON donde se almacenan las tareas.
         """
         self.filepath = filepath
+        self._write_lock = FileLock(f'{filepath}.lock')
         if not os.path.exists(self.filepath):
             with open(self.filepath, 'w', encoding='utf-8') as f:
                 json.dump([], f)
 
+    def write_lock(self):
+        """
+        Returns:
+            FileLock: Cerrojo entre hilos y procesos sobre <filepath>.lock.
+        """
+        return self._write_lock
+
+    def source_signature(self):
+        """
+        Returns:
+            tuple or None: (inode, mtime_ns, tamaño) del fichero; cambia con cada guardado (os.replace).
+        """
+        try:
+            stat = os.stat(self.filepath)
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
     def load_tasks(self):
         """
         Carga todas las tareas desde el archivo JSON.
@@ -33,18 +115,100 @@ class JsonTaskRepository(ITaskRepository):
         Returns:
             list[Task]: Lista de instancias de Task.
         """
-        if os.path.getsize(self.filepath) == 0:
-            return []
+        with tracing.span('JsonTaskRepository.load_tasks', **{'db.system': 'json', 'db.file': self.filepath}) as span:
+            if os.path.getsize(self.filepath) == 0:
+                return []
+            with open(self.filepath, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            span.set_attribute('tasks.count', len(data))
+            return [Task.from_dict(item) for item in data]
+
+    def iter_tasks(self):
+        """
+        Recorre el archivo decodificando los objetos del array JSON de uno en uno, con memoria acotada
+        por el tamaño de lectura y no por el número de tareas.
+
+        Yields:
+            Task: Cada tarea almacenada.
+        Raises:
+            ValueError: Si el fichero no contiene un array JSON válido.
+        """
+        if os.name == 'nt':
+            # En Windows no se puede sustituir un fichero abierto: mantenerlo abierto mientras se recorre
+            # bloquearía los guardados concurrentes
+            yield from self.load_tasks()
+            return
+        decoder = json.JSONDecoder()
         with open(self.filepath, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        return [Task.from_dict(item) for item in data]
+            buffer = f.read(READ_CHUNK_SIZE).lstrip()
+            if not buffer:
+                return
+            if not buffer.startswith('['):
+                raise ValueError(f'{self.filepath} no contiene un array JSON')
+            position = 1
+            eof = False
+            while True:
+                position = _SEPARATORS_RE.match(buffer, position).end()
+                if position < len(buffer) and buffer[position] == ']':
+                    return
+                try:
+                    item, end = decoder.raw_decode(buffer, position)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                    chunk = f.read(READ_CHUNK_SIZE)
+                    eof = not chunk
+                    buffer = buffer[position:] + chunk
+                    position = 0
+                    continue
+                yield Task.from_dict(item)
+                position = end
+
+    def save_tasks_iter(self, tasks):
+        """
+        Guarda las tareas de un iterable escribiéndolas de una en una (sustitución atómica del fichero).
+
+        Args:
+            tasks (Iterable[Task]): Tareas a guardar.
+        Returns:
+            int: Número de tareas guardadas.
+        """
+        with tracing.span('JsonTaskRepository.save_tasks_iter', **{'db.system': 'json', 'db.file': self.filepath}) as span:
+            writer = JsonTaskWriter(self.filepath)
+            try:
+                for task in tasks:
+                    writer.write(task)
+            except BaseException:
+                writer.abort()
+                raise
+            writer.commit()
+            span.set_attribute('tasks.count', writer.count)
+            return writer.count
 
     def save_tasks(self, tasks):
         """
-        Guarda la lista de tareas en el archivo JSON.
+        Guarda la lista de tareas en el archivo JSON. Se escribe en un fichero temporal que después
+        sustituye al original, de modo que una lectura concurrente o una caída a mitad de escritura
+        nunca ven un JSON incompleto.
 
         Args:
             tasks (list[Task]): Lista de tareas a guardar.
         """
-        with open(self.filepath, 'w', encoding='utf-8') as f:
-            json.dump([task.to_dict() for task in tasks], f, ensure_ascii=False, indent=2)
+        with tracing.span('JsonTaskRepository.save_tasks', **{'db.system': 'json', 'db.file': self.filepath}) as span:
+            data = [task.to_dict() for task in tasks]
+            span.set_attribute('tasks.count', len(data))
+            directory, name = os.path.split(self.filepath)
+            fd, tmp_path = tempfile.mkstemp(prefix=f'.{name}.', suffix='.tmp', dir=directory or '.')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, ensure_ascii=False, indent=2)
+                    f.flush()
+                    os.fsync(f.fileno())
+                if os.path.exists(self.filepath):
+                    # mkstemp crea el fichero con permisos 0600: se conservan los del original
+                    os.chmod(tmp_path, os.stat(self.filepath).st_mode & 0o777)
+                os.replace(tmp_path, self.filepath)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
@@ -0,0 +1,106 @@
+"""
+Almacenes de cubetas de tokens: en memoria (por worker) y en SQLite (compartido por los workers de una máquina).
+"""
+import os
+import sqlite3
+import threading
+import time
+from app.repositories.i_rate_limit_store import IRateLimitStore, refill
+
+# Cada cuántas peticiones se eliminan las cubetas que ya estarían llenas (equivalen a no tener entrada)
+PRUNE_EVERY = 1000
+
+
+class MemoryRateLimitStore(IRateLimitStore):
+    """
+    Cubetas en un diccionario protegido por un cerrojo. Cada worker limita por separado: con N workers,
+    un cliente puede llegar a N veces el límite.
+    """
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self._calls = 0
+
+    def consume(self, key, rate, capacity, cost=1, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            tokens, updated, _full_at = self._buckets.get(key, (None, now, now))
+            allowed, retry_after, tokens = refill(tokens, updated, rate, capacity, cost, now)
+            self._buckets[key] = (tokens, now, now + (capacity - tokens) / rate)
+            self._calls += 1
+            if self._calls % PRUNE_EVERY == 0:
+                self._buckets = {k: v for k, v in self._buckets.items() if v[2] > now}
+        return allowed, retry_after, tokens
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class SqliteRateLimitStore(IRateLimitStore):
+    """
+    Cubetas en una tabla SQLite compartida por todos los workers de la máquina. Cada consumo es una
+    transacción BEGIN IMMEDIATE, que serializa las lecturas y escrituras de la cubeta entre procesos.
+    Sirve de sustituto local de un almacén compartido en red con la misma interfaz.
+    """
+    def __init__(self, filepath):
+        """
+        Args:
+            filepath (str): Ruta de la base de datos SQLite (se crea si no existe).
+        """
+        self.filepath = filepath
+        directory = os.path.dirname(filepath)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        # Todas las conexiones abiertas (una por hilo), para cerrarlas en close()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        self._calls = 0
+        conn = self._connection()
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS buckets ('
+            ' key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL, full_at REAL NOT NULL)'
+        )
+
+    def _connection(self):
+        # Una conexión por hilo: las conexiones de sqlite3 no se comparten entre hilos
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # check_same_thread=False solo para que close() pueda cerrarla desde el hilo de apagado
+            conn = sqlite3.connect(self.filepath, timeout=30, isolation_level=None, check_same_thread=False)
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def consume(self, key, rate, capacity, cost=1, now=None):
+        now = time.time() if now is None else now
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT tokens, updated FROM buckets WHERE key = ?', (key,)).fetchone()
+            tokens, updated = row if row else (None, now)
+            allowed, retry_after, tokens = refill(tokens, updated, rate, capacity, cost, now)
+            conn.execute(
+                'INSERT OR REPLACE INTO buckets (key, tokens, updated, full_at) VALUES (?, ?, ?, ?)',
+                (key, tokens, now, now + (capacity - tokens) / rate)
+            )
+            self._calls += 1
+            if self._calls % PRUNE_EVERY == 0:
+                conn.execute('DELETE FROM buckets WHERE full_at <= ?', (now,))
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return allowed, retry_after, tokens
+
+    def close(self):
+        """
+        Cierra las conexiones de todos los hilos.
+        """
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
@@ -0,0 +1,316 @@
+"""
+Repositorio de tareas particionado en varios ficheros JSON por id.
+"""
+import json
+import os
+import re
+import tempfile
+from app import tracing
+from app.repositories.file_lock import FileLock
+from app.repositories.i_task_repository import ITaskRepository
+from app.repositories.json_task_repository import JsonTaskRepository, JsonTaskWriter
+
+_SHARD_FILE_RE = re.compile(r'^tasks-\d+\.json$')
+
+
+DEFAULT_SHARDS = 8
+MANIFEST_NAME = 'shards.json'
+LAST_ID_NAME = 'last_id'
+
+
+class ShardedTaskRepository(ITaskRepository):
+    """
+    Reparte las tareas en N ficheros JSON (shard = id % N), cada uno con su propio cerrojo. Las lecturas y
+    escrituras de una tarea solo cargan y reescriben su shard, de modo que el tamaño de cada escritura y la
+    contención entre peticiones se dividen por el número de shards.
+
+    Los cerrojos de los shards y el contador de ids (fichero last_id) se comparten entre procesos con flock,
+    así que varios workers pueden escribir a la vez sin repetir ids ni perder cambios. El número de shards
+    se guarda en shards.json: abrir el directorio con otro número es un error, salvo con redistribute=True
+    (compact --shards), que lee con el número guardado y reparte de nuevo en el siguiente guardado completo.
+
+    Métodos:
+        load_tasks(): Carga todas las tareas (unión de los shards, ordenada por id).
+        iter_tasks(): Recorre las tareas shard a shard, sin cargarlas todas a la vez.
+        get_by_id(task_id): Lee solo el shard de la tarea.
+        add_task(task) / update_task(task_id, task) / delete_task(task_id): Reescriben solo un shard.
+        save_tasks(tasks): Reparte la lista completa entre los shards.
+        save_tasks_iter(tasks): Reparte las tareas de un iterable sin reunirlas en memoria.
+    """
+    def __init__(self, directory, shards=None, legacy_path=None, redistribute=False):
+        """
+        Args:
+            directory (str): Directorio de los ficheros tasks-XX.json.
+            shards (int, opcional): Número de shards. Por defecto, el guardado en shards.json (u 8 si el
+                directorio es nuevo).
+            legacy_path (str, opcional): JSON único del que importar las tareas si el directorio está vacío.
+            redistribute (bool): Admite un número de shards distinto del guardado; las tareas se reparten con
+                el nuevo número en el siguiente save_tasks o save_tasks_iter.
+        Raises:
+            ValueError: Si el número de shards no es válido o no coincide con el de los datos existentes.
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        stored = self._stored_shard_count()
+        if shards is None:
+            shards = stored or DEFAULT_SHARDS
+        if shards < 1:
+            raise ValueError('El número de shards debe ser al menos 1')
+        if stored is not None and stored != shards and not redistribute:
+            raise ValueError(
+                f"{directory} tiene {stored} shards y se han pedido {shards}. Usa TASKS_SHARDS={stored} o "
+                f"redistribuye las tareas con 'flask compact --shards {shards}'"
+            )
+        self.shard_count = shards
+        self.shards = self._open_shards(shards)
+        self._locks = self._shard_locks(self.shards)
+        self._id_lock = FileLock(os.path.join(directory, f'{LAST_ID_NAME}.lock'))
+        # Con redistribute, las lecturas usan la distribución guardada hasta el siguiente guardado completo
+        self._pending = None
+        if stored is not None and stored != shards:
+            self._pending = self._open_shards(stored)
+            self._pending_locks = self._shard_locks(self._pending)
+        elif not os.path.exists(self._manifest_path()):
+            self._write_manifest()
+        if stored is None and legacy_path and os.path.exists(legacy_path):
+            self.save_tasks(JsonTaskRepository(legacy_path).load_tasks())
+
+    def _manifest_path(self):
+        return os.path.join(self.directory, MANIFEST_NAME)
+
+    def _stored_shard_count(self):
+        """
+        Returns:
+            int or None: Shards de los datos existentes (shards.json, o el número de ficheros tasks-XX.json
+                en directorios creados antes del manifiesto); None si el directorio no tiene datos.
+        """
+        try:
+            with open(self._manifest_path(), 'r', encoding='utf-8') as f:
+                return int(json.load(f)['shards'])
+        except FileNotFoundError:
+            pass
+        existing = [name for name in os.listdir(self.directory) if _SHARD_FILE_RE.match(name)]
+        return len(existing) or None
+
+    def _write_manifest(self):
+        fd, tmp_path = tempfile.mkstemp(prefix=f'.{MANIFEST_NAME}.', suffix='.tmp', dir=self.directory)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({'shards': self.shard_count}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._manifest_path())
+
+    def _open_shards(self, count):
+        return [JsonTaskRepository(os.path.join(self.directory, f'tasks-{index:02d}.json')) for index in range(count)]
+
+    @staticmethod
+    def _shard_locks(shards):
+        return [shard.write_lock() for shard in shards]
+
+    def _shard_index(self, task_id):
+        if self._pending is not None:
+            raise RuntimeError('Redistribución de shards pendiente: guarda todas las tareas con save_tasks_iter')
+        return task_id % self.shard_count
+
+    def _finish_redistribution(self):
+        """
+        Tras un guardado completo con el nuevo número de shards, guarda el manifiesto y borra los shards sobrantes.
+        """
+        if self._pending is None:
+            return
+        self._write_manifest()
+        for shard in self._pending[self.shard_count:]:
+            for path in (shard.filepath, f'{shard.filepath}.lock'):
+                if os.path.exists(path):
+                    os.remove(path)
+        self._pending = None
+        self._pending_locks = None
+
+    def _read_last_id(self):
+        """
+        Último id asignado según el fichero last_id (debe llamarse con _id_lock). Si no existe o está dañado,
+        se calcula recorriendo los shards.
+        """
+        try:
+            with open(os.path.join(self.directory, LAST_ID_NAME), 'r', encoding='utf-8') as f:
+                return int(f.read())
+        except (FileNotFoundError, ValueError):
+            return max((task.id for task in self.iter_tasks()), default=0)
+
+    def _write_last_id(self, value):
+        with open(os.path.join(self.directory, LAST_ID_NAME), 'w', encoding='utf-8') as f:
+            f.write(str(value))
+            f.flush()
+            os.fsync(f.fileno())
+
+    def source_signature(self):
+        """
+        Returns:
+            tuple: Firmas de los ficheros de todos los shards.
+        """
+        return tuple(shard.source_signature() for shard in self.shards)
+
+    def iter_tasks(self):
+        """
+        Returns:
+            Iterator[Task]: Las tareas de cada shard, cargando un shard cada vez.
+        """
+        attributes = {'db.system': 'json', 'db.shards': self.shard_count}
+        return tracing.traced_iter('ShardedTaskRepository.iter_tasks', self._iter_shards(),
+                                   count_attribute='tasks.count', **attributes)
+
+    def _iter_shards(self):
+        shards, locks = self.shards, self._locks
+        if self._pending is not None:
+            shards, locks = self._pending, self._pending_locks
+        for shard, lock in zip(shards, locks):
+            with lock:
+                tasks = shard.load_tasks()
+            yield from tasks
+
+    def load_tasks(self):
+        """
+        Carga todas las tareas de todos los shards.
+
+        Returns:
+            list[Task]: Lista de tareas ordenada por id.
+        """
+        attributes = {'db.system': 'json', 'db.shards': self.shard_count}
+        with tracing.span('ShardedTaskRepository.load_tasks', **attributes) as span:
+            tasks = sorted(self._iter_shards(), key=lambda task: task.id)
+            span.set_attribute('tasks.count', len(tasks))
+            return tasks
+
+    def save_tasks(self, tasks):
+        """
+        Reparte la lista completa de tareas entre los shards, reescribiéndolos todos.
+
+        Args:
+            tasks (list[Task]): Lista de tareas a guardar.
+        """
+        partitions = [[] for _ in range(self.shard_count)]
+        for task in tasks:
+            partitions[task.id % self.shard_count].append(task)
+        for index, shard in enumerate(self.shards):
+            with self._locks[index]:
+                shard.save_tasks(partitions[index])
+        with self._id_lock:
+            self._write_last_id(max((task.id for task in tasks), default=0))
+        self._finish_redistribution()
+
+    def save_tasks_iter(self, tasks):
+        """
+        Reparte las tareas de un iterable entre los shards escribiendo cada una en el fichero de su shard
+        según llega, sin reunirlas en memoria. Los shards se sustituyen al terminar.
+
+        Args:
+            tasks (Iterable[Task]): Tareas a guardar.
+        Returns:
+            int: Número de tareas guardadas.
+        """
+        writers = [JsonTaskWriter(shard.filepath) for shard in self.shards]
+        max_id = 0
+        try:
+            for task in tasks:
+                writers[task.id % self.shard_count].write(task)
+                max_id = max(max_id, task.id)
+        except BaseException:
+            for writer in writers:
+                writer.abort()
+            raise
+        for index, writer in enumerate(writers):
+            with self._locks[index]:
+                writer.commit()
+        with self._id_lock:
+            self._write_last_id(max_id)
+        self._finish_redistribution()
+        return sum(writer.count for writer in writers)
+
+    def get_by_id(self, task_id):
+        """
+        Devuelve una tarea leyendo solo su shard.
+
+        Args:
+            task_id (int): Identificador de la tarea.
+        Returns:
+            Task or None: Tarea encontrada o None si no existe.
+        """
+        index = self._shard_index(task_id)
+        attributes = {'db.system': 'json', 'db.shard': index, 'task.id': task_id}
+        with tracing.span('ShardedTaskRepository.get_by_id', **attributes):
+            with self._locks[index]:
+                tasks = self.shards[index].load_tasks()
+            return next((task for task in tasks if task.id == task_id), None)
+
+    def next_id(self):
+        """
+        Reserva el siguiente id incrementando el contador del fichero last_id bajo un cerrojo entre procesos,
+        de modo que dos workers nunca reciben el mismo id.
+
+        Returns:
+            int: Siguiente id libre.
+        """
+        with self._id_lock:
+            task_id = self._read_last_id() + 1
+            self._write_last_id(task_id)
+            return task_id
+
+    def add_task(self, task):
+        """
+        Añade una tarea a su shard, asignándole un id si no tiene.
+
+        Args:
+            task (Task): Tarea a añadir.
+        Returns:
+            Task: La tarea añadida.
+        """
+        if task.id is None:
+            task.id = self.next_id()
+        else:
+            with self._id_lock:
+                if task.id > self._read_last_id():
+                    self._write_last_id(task.id)
+        index = self._shard_index(task.id)
+        with self._locks[index]:
+            tasks = self.shards[index].load_tasks()
+            tasks.append(task)
+            self.shards[index].save_tasks(tasks)
+        return task
+
+    def update_task(self, task_id, task):
+        """
+        Sustituye una tarea reescribiendo solo su shard.
+
+        Args:
+            task_id (int): ID de la tarea a sustituir.
+            task (Task): Nueva versión de la tarea.
+        Returns:
+            Task or None: La versión anterior de la tarea, o None si no existía.
+        """
+        index = self._shard_index(task_id)
+        with self._locks[index]:
+            tasks = self.shards[index].load_tasks()
+            for position, current in enumerate(tasks):
+                if current.id == task_id:
+                    tasks[position] = task
+                    self.shards[index].save_tasks(tasks)
+                    return current
+        return None
+
+    def delete_task(self, task_id):
+        """
+        Elimina una tarea reescribiendo solo su shard.
+
+        Args:
+            task_id (int): ID de la tarea a eliminar.
+        Returns:
+            Task or None: La tarea eliminada, o None si no existía.
+        """
+        index = self._shard_index(task_id)
+        with self._locks[index]:
+            tasks = self.shards[index].load_tasks()
+            remaining = [task for task in tasks if task.id != task_id]
+            if len(remaining) == len(tasks):
+                return None
+            self.shards[index].save_tasks(remaining)
+        return next(task for task in tasks if task.id == task_id)
@@ -0,0 +1,251 @@
+"""
+Snapshot binario de solo lectura de las tareas, pensado para abrirse con mmap.
+
+Formato (little-endian):
+    cabecera  : magic b'TASKSNP1' (8 bytes), versión (uint32), número de registros (uint32)
+    índice    : un registro de ancho fijo por tarea (id int64, offset uint64, longitud uint32), ordenado por id
+    heap      : el JSON UTF-8 de cada tarea, referenciado por offset y longitud desde el índice
+
+Un worker localiza una tarea por búsqueda binaria sobre el índice y decodifica solo su JSON, sin cargar el
+resto. Como el fichero se mapea en memoria, varios workers comparten sus páginas a través de la caché del
+sistema operativo.
+"""
+import json
+import mmap
+import os
+import struct
+import tempfile
+import threading
+from app import tracing
+from app.models.task import Task
+from app.repositories.i_task_repository import ITaskRepository
+
+MAGIC = b'TASKSNP1'
+VERSION = 1
+HEADER = struct.Struct('<8sII')
+INDEX_ENTRY = struct.Struct('<qQI')
+
+
+def write_snapshot(filepath, tasks):
+    """
+    Escribe el snapshot de forma atómica (fichero temporal único + fsync + os.replace).
+
+    Args:
+        filepath (str): Ruta del snapshot.
+        tasks (Iterable[Task]): Tareas a guardar.
+    """
+    records = sorted(
+        ((task.id, json.dumps(task.to_dict(), ensure_ascii=False).encode('utf-8')) for task in tasks),
+        key=lambda record: record[0]
+    )
+    heap_start = HEADER.size + INDEX_ENTRY.size * len(records)
+    # Un temporal único por escritura: dos workers que regeneran el snapshot a la vez no se pisan
+    directory, name = os.path.split(filepath)
+    fd, tmp_path = tempfile.mkstemp(prefix=f'.{name}.', suffix='.tmp', dir=directory or '.')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, len(records)))
+            offset = heap_start
+            for task_id, payload in records:
+                f.write(INDEX_ENTRY.pack(task_id, offset, len(payload)))
+                offset += len(payload)
+            for _, payload in records:
+                f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(filepath):
+            # mkstemp crea el fichero con permisos 0600: se conservan los del original
+            os.chmod(tmp_path, os.stat(filepath).st_mode & 0o777)
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class SnapshotReader:
+    """
+    Lector perezoso de un snapshot mapeado en memoria.
+
+    Métodos:
+        get(task_id): Devuelve una tarea por búsqueda binaria en el índice, o None.
+        ids(): Devuelve los ids en orden.
+        iter_tasks(): Recorre las tareas decodificándolas una a una.
+        close(): Libera el mapeo.
+    """
+    def __init__(self, filepath):
+        """
+        Args:
+            filepath (str): Ruta del snapshot.
+        Raises:
+            ValueError: Si el fichero no es un snapshot válido.
+        """
+        self.filepath = filepath
+        with open(filepath, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            self.signature = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if stat.st_size else None
+        if self._mmap is None or stat.st_size < HEADER.size:
+            self.close()
+            raise ValueError(f'Snapshot vacío o truncado: {filepath}')
+        magic, version, self.count = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f'Formato de snapshot no soportado: {filepath}')
+
+    def __len__(self):
+        return self.count
+
+    def _entry(self, position):
+        return INDEX_ENTRY.unpack_from(self._mmap, HEADER.size + position * INDEX_ENTRY.size)
+
+    def _decode(self, offset, length):
+        return Task.from_dict(json.loads(self._mmap[offset:offset + length].decode('utf-8')))
+
+    def get(self, task_id):
+        """
+        Args:
+            task_id (int): Identificador de la tarea.
+        Returns:
+            Task or None: Tarea encontrada o None si no existe.
+        """
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            entry_id, offset, length = self._entry(middle)
+            if entry_id == task_id:
+                return self._decode(offset, length)
+            if entry_id < task_id:
+                low = middle + 1
+            else:
+                high = middle
+        return None
+
+    def ids(self):
+        """
+        Returns:
+            list[int]: Ids de las tareas en orden ascendente.
+        """
+        return [self._entry(position)[0] for position in range(self.count)]
+
+    def iter_tasks(self):
+        """
+        Yields:
+            Task: Cada tarea del snapshot, en orden de id.
+        """
+        for position in range(self.count):
+            _, offset, length = self._entry(position)
+            yield self._decode(offset, length)
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+
+class SnapshotTaskRepository(ITaskRepository):
+    """
+    Repositorio que sirve las lecturas desde un snapshot mapeado en memoria y delega las escrituras en otro
+    repositorio (la fuente de verdad, normalmente JsonTaskRepository), regenerando el snapshot tras cada
+    guardado. Si otro proceso regenera el snapshot, se detecta por su inode/mtime y se vuelve a mapear.
+
+    Métodos:
+        load_tasks(): Carga todas las tareas desde el snapshot.
+        get_by_id(task_id): Localiza una tarea por offset sin cargar el resto.
+        save_tasks(tasks): Guarda en la fuente y regenera el snapshot.
+    """
+    def __init__(self, source, filepath):
+        """
+        Args:
+            source (ITaskRepository): Repositorio de escritura (fuente de verdad).
+            filepath (str): Ruta del snapshot. Se genera desde la fuente si no existe o está desfasado.
+        """
+        self.source = source
+        self.filepath = filepath
+        self._reader = None
+        self._lock = threading.Lock()
+        if self._is_stale():
+            write_snapshot(self.filepath, self.source.load_tasks())
+
+    def _is_stale(self):
+        if not os.path.exists(self.filepath):
+            return True
+        source_path = getattr(self.source, 'filepath', None)
+        return bool(source_path) and os.path.exists(source_path) and \
+            os.path.getmtime(source_path) > os.path.getmtime(self.filepath)
+
+    def _current_reader(self):
+        """
+        Devuelve el lector del snapshot vigente, volviendo a mapearlo si el fichero ha cambiado.
+        """
+        stat = os.stat(self.filepath)
+        signature = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            if self._reader is None or self._reader.signature != signature:
+                # El mapeo anterior no se cierra: lo liberará el recolector cuando terminen las lecturas en curso
+                self._reader = SnapshotReader(self.filepath)
+            return self._reader
+
+    def source_signature(self):
+        """
+        Returns:
+            tuple or None: Firma de la fuente, que se guarda antes que el snapshot.
+        """
+        return self.source.source_signature()
+
+    def write_lock(self):
+        """
+        Returns:
+            Cerrojo de la fuente: el snapshot se regenera dentro de la misma lectura-modificación-escritura.
+        """
+        return self.source.write_lock()
+
+    def load_tasks(self):
+        """
+        Carga todas las tareas desde el snapshot.
+
+        Returns:
+            list[Task]: Lista de instancias de Task.
+        """
+        attributes = {'db.system': 'snapshot', 'db.file': self.filepath}
+        with tracing.span('SnapshotTaskRepository.load_tasks', **attributes) as span:
+            tasks = list(self._current_reader().iter_tasks())
+            span.set_attribute('tasks.count', len(tasks))
+            return tasks
+
+    def get_by_id(self, task_id):
+        """
+        Devuelve una tarea por su ID con una búsqueda binaria sobre el índice del snapshot.
+
+        Args:
+            task_id (int): Identificador de la tarea.
+        Returns:
+            Task or None: Tarea encontrada o None si no existe.
+        """
+        attributes = {'db.system': 'snapshot', 'db.file': self.filepath, 'task.id': task_id}
+        with tracing.span('SnapshotTaskRepository.get_by_id', **attributes):
+            return self._current_reader().get(task_id)
+
+    def save_tasks(self, tasks):
+        """
+        Guarda la lista de tareas en la fuente y regenera el snapshot.
+
+        Args:
+            tasks (list[Task]): Lista de tareas a guardar.
+        """
+        self.source.save_tasks(tasks)
+        with self._lock:
+            # En Windows no se puede reemplazar un fichero mapeado: se libera antes el mapeo propio
+            if self._reader is not None and os.name == 'nt':
+                self._reader.close()
+            self._reader = None
+            write_snapshot(self.filepath, tasks)
+
+    def close(self):
+        """
+        Libera el mapeo del snapshot.
+        """
+        with self._lock:
+            if self._reader is not None:
+                self._reader.close()
+                self._reader = None
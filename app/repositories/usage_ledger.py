@@ -0,0 +1,234 @@
+"""
+Registro persistente (SQLite, solo anexado) del consumo de cada llamada de IA, con escrituras
+agrupadas en segundo plano y consultas agregadas por día, operación, modelo y persona asignada.
+"""
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+
+class UsageLedger:
+    """
+    Ledger de uso de IA respaldado por SQLite.
+
+    Las llamadas a record() solo encolan el registro; un hilo en segundo plano lo escribe en lotes
+    (executemany en una transacción) cada flush_interval segundos o al llegar a batch_size registros.
+
+    Métodos:
+        record(...): Encola el registro de una llamada.
+        flush(): Espera a que todos los registros encolados estén escritos.
+        close(): Vacía el buffer y detiene el hilo de escritura.
+        rollup(group_by, since, until): Devuelve totales agregados.
+    """
+    GROUP_COLUMNS = ('day', 'operation', 'model', 'assigned_to')
+    COLUMNS = ('ts', 'day', 'operation', 'model', 'task_id', 'assigned_to', 'input_tokens',
+               'output_tokens', 'total_tokens', 'latency', 'cost')
+
+    def __init__(self, filepath, batch_size=100, flush_interval=0.5):
+        """
+        Inicializa el ledger y crea la tabla si no existe.
+
+        Args:
+            filepath (str): Ruta del archivo SQLite.
+            batch_size (int): Registros máximos por transacción.
+            flush_interval (float): Segundos máximos que un registro espera en el buffer.
+        """
+        self.filepath = filepath
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue()
+        self._closed = False
+        conn = self._connect()
+        try:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS usage (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    ts REAL NOT NULL,
+                    day TEXT NOT NULL,
+                    operation TEXT NOT NULL,
+                    model TEXT,
+                    task_id INTEGER,
+                    assigned_to TEXT,
+                    input_tokens INTEGER NOT NULL DEFAULT 0,
+                    output_tokens INTEGER NOT NULL DEFAULT 0,
+                    total_tokens INTEGER NOT NULL DEFAULT 0,
+                    latency REAL,
+                    cost REAL NOT NULL DEFAULT 0
+                )''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_usage_day ON usage (day)')
+            conn.commit()
+        finally:
+            conn.close()
+        self._writer = None
+        self._writer_pid = None
+        self._writer_lock = threading.Lock()
+
+    def _ensure_writer(self):
+        """
+        Arranca el hilo de escritura en el proceso actual. Se hace de forma perezosa porque los hilos
+        no sobreviven a un fork: con preload_app, el ledger se crea en el proceso maestro del servidor
+        y cada worker arranca su propio hilo con su primer registro.
+        """
+        if self._writer_pid == os.getpid():
+            return
+        with self._writer_lock:
+            if self._writer_pid != os.getpid():
+                self._queue = queue.Queue()
+                self._writer = threading.Thread(target=self._write_loop, name='usage-ledger-writer', daemon=True)
+                self._writer.start()
+                self._writer_pid = os.getpid()
+
+    def _connect(self):
+        return sqlite3.connect(self.filepath, timeout=30)
+
+    def record(self, operation, model=None, task_id=None, assigned_to=None, input_tokens=0,
+               output_tokens=0, total_tokens=0, latency=None, cost=0.0, ts=None):
+        """
+        Encola el registro de una llamada de IA (no bloquea la petición).
+
+        Args:
+            operation (str): Operación ('describe', 'categorize', 'estimate', 'audit', 'mitigation_plan').
+            model (str): Modelo usado.
+            task_id (int): Tarea procesada.
+            assigned_to (str): Persona asignada a la tarea.
+            input_tokens (int): Tokens de entrada.
+            output_tokens (int): Tokens de salida.
+            total_tokens (int): Tokens totales.
+            latency (float): Segundos de procesamiento.
+            cost (float): Coste estimado en USD.
+            ts (float, opcional): Marca de tiempo Unix (por defecto, ahora).
+        """
+        if self._closed:
+            raise RuntimeError('El ledger de uso está cerrado')
+        self._ensure_writer()
+        ts = time.time() if ts is None else ts
+        day = datetime.fromtimestamp(ts, tz=timezone.utc).strftime('%Y-%m-%d')
+        self._queue.put((ts, day, operation, model, task_id, assigned_to, input_tokens or 0,
+                         output_tokens or 0, total_tokens or 0, latency, cost or 0.0))
+
+    def _write_loop(self):
+        conn = self._connect()
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    self._queue.task_done()
+                    return
+                batch = [item]
+                deadline = time.monotonic() + self.flush_interval
+                stop = False
+                while len(batch) < self.batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = self._queue.get(timeout=remaining)
+                    except queue.Empty:
+                        break
+                    if item is None:
+                        stop = True
+                        break
+                    batch.append(item)
+                placeholders = ', '.join('?' for _ in self.COLUMNS)
+                try:
+                    with conn:
+                        conn.executemany(
+                            f"INSERT INTO usage ({', '.join(self.COLUMNS)}) VALUES ({placeholders})", batch
+                        )
+                except sqlite3.Error:
+                    logger.exception("No se pudo escribir un lote de %d registros de uso", len(batch))
+                for _ in range(len(batch) + stop):
+                    self._queue.task_done()
+                if stop:
+                    return
+        finally:
+            conn.close()
+
+    def flush(self):
+        """
+        Bloquea hasta que todos los registros encolados estén escritos en SQLite.
+        """
+        self._queue.join()
+
+    def close(self):
+        """
+        Escribe los registros pendientes y detiene el hilo de escritura. Es idempotente.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        if self._writer_pid == os.getpid():
+            self._queue.put(None)
+            self._writer.join()
+
+    def rollup(self, group_by=('day',), since=None, until=None):
+        """
+        Devuelve el consumo agregado.
+
+        Args:
+            group_by (Iterable[str]): Columnas de agrupación (day, operation, model, assigned_to).
+            since (str, opcional): Día inicial incluido (YYYY-MM-DD).
+            until (str, opcional): Día final incluido (YYYY-MM-DD).
+        Returns:
+            list[dict]: Una fila por grupo con calls, tokens, coste y latencia media.
+        Raises:
+            ValueError: Si se pide una agrupación no soportada.
+        """
+        group_by = list(group_by)
+        unknown = [column for column in group_by if column not in self.GROUP_COLUMNS]
+        if not group_by or unknown:
+            raise ValueError(f"Agrupación no soportada: {', '.join(unknown) or '(vacía)'}")
+        conditions, params = [], []
+        if since:
+            conditions.append('day >= ?')
+            params.append(since)
+        if until:
+            conditions.append('day <= ?')
+            params.append(until)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        columns = ', '.join(group_by)
+        sql = f'''
+            SELECT {columns}, COUNT(*), SUM(input_tokens), SUM(output_tokens), SUM(total_tokens),
+                   SUM(cost), AVG(latency)
+            FROM usage {where}
+            GROUP BY {columns}
+            ORDER BY {columns}'''
+        conn = self._connect()
+        try:
+            rows = conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+        n = len(group_by)
+        return [
+            {
+                **dict(zip(group_by, row[:n])),
+                "calls": row[n],
+                "input_tokens": row[n + 1],
+                "output_tokens": row[n + 2],
+                "total_tokens": row[n + 3],
+                "cost": round(row[n + 4] or 0.0, 6),
+                "avg_latency": round(row[n + 5], 3) if row[n + 5] is not None else None
+            }
+            for row in rows
+        ]
+
+    def tokens_by_task(self):
+        """
+        Returns:
+            dict: Tokens totales registrados por tarea ({task_id: total_tokens}).
+        """
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                'SELECT task_id, SUM(total_tokens) FROM usage WHERE task_id IS NOT NULL GROUP BY task_id'
+            ).fetchall()
+        finally:
+            conn.close()
+        return {task_id: total or 0 for task_id, total in rows}
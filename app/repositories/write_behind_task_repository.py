@@ -0,0 +1,291 @@
+"""
+Repositorio con escritura diferida (write-behind): aplica los cambios en memoria, responde enseguida y un
+hilo en segundo plano los agrupa y los guarda en el repositorio subyacente cada pocos milisegundos.
+"""
+import contextlib
+import json
+import logging
+import os
+import threading
+from app.models.task import Task
+from app.repositories.i_task_repository import ITaskRepository
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindTaskRepository(ITaskRepository):
+    """
+    Envuelve otro repositorio y agrupa las escrituras (group commit): muchas mutaciones concurrentes se
+    persisten con un único save_tasks.
+
+    Modos de durabilidad (cuándo se devuelve el control a la petición):
+        'none':    en cuanto el cambio está en memoria. Una caída puede perder los últimos milisegundos.
+        'journal': tras añadir el cambio a un diario (JSON lines con fsync). Tras una caída, el diario se
+                   reaplica al arrancar.
+        'commit':  tras el group commit que incluye el cambio. Las peticiones concurrentes comparten el guardado.
+
+    El repositorio asume un único proceso escritor sobre el almacenamiento subyacente.
+
+    Métodos:
+        load_tasks() / get_by_id(task_id): Lecturas desde memoria.
+        add_task / update_task / delete_task / save_tasks: Cambios en memoria con persistencia diferida.
+        flush(): Bloquea hasta que todos los cambios estén guardados.
+        close(): Guarda lo pendiente y detiene el hilo de escritura.
+    """
+    DURABILITY_MODES = ('none', 'journal', 'commit')
+
+    def __init__(self, repository, durability='journal', flush_interval=0.005, journal_path=None):
+        """
+        Args:
+            repository (ITaskRepository): Repositorio donde se guardan los cambios.
+            durability (str): 'none', 'journal' o 'commit'.
+            flush_interval (float): Segundos que se esperan para agrupar cambios antes de cada guardado.
+            journal_path (str, opcional): Fichero del diario; obligatorio con durability='journal'. Si existe
+                al arrancar, se reaplica sobre el repositorio (recuperación tras una caída).
+        Raises:
+            ValueError: Si el modo de durabilidad no es válido o falta el diario.
+        """
+        if durability not in self.DURABILITY_MODES:
+            raise ValueError(f"Modo de durabilidad no válido: {durability}")
+        if durability == 'journal' and not journal_path:
+            raise ValueError("El modo 'journal' necesita journal_path")
+        self.repository = repository
+        self.durability = durability
+        self.flush_interval = flush_interval
+        self.journal_path = journal_path
+        self.commits = 0
+        self._tasks = {task.id: task.to_dict() for task in repository.iter_tasks()}
+        self._seq = 0
+        self._committed_seq = 0
+        self._error = None
+        self._closed = False
+        self._cond = threading.Condition()
+        self._commit_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._journal = None
+        self._writer = None
+        self._writer_pid = None
+        if journal_path:
+            self._recover()
+            self._journal = open(journal_path, 'a', encoding='utf-8')
+
+    def _recover(self):
+        """
+        Reaplica las entradas del diario que no llegaron a guardarse y lo vacía.
+        """
+        if not os.path.exists(self.journal_path) or os.path.getsize(self.journal_path) == 0:
+            return
+        replayed = 0
+        with open(self.journal_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # Última línea a medio escribir: el cambio no llegó a confirmarse
+                    logger.warning("Entrada incompleta al final del diario %s", self.journal_path)
+                    break
+                self._apply(entry)
+                replayed += 1
+        self.repository.save_tasks(self._snapshot())
+        open(self.journal_path, 'w').close()
+        logger.info("Recuperados %d cambios del diario %s", replayed, self.journal_path)
+
+    def _apply(self, entry):
+        if entry['op'] == 'upsert':
+            self._tasks[entry['task']['id']] = entry['task']
+        elif entry['op'] == 'delete':
+            self._tasks.pop(entry['id'], None)
+        elif entry['op'] == 'replace':
+            self._tasks = {data['id']: data for data in entry['tasks']}
+
+    def _snapshot(self):
+        return [Task.from_dict(data) for _, data in sorted(self._tasks.items())]
+
+    def _ensure_writer(self):
+        # Como en UsageLedger, el hilo se arranca de forma perezosa en cada proceso (preload + fork)
+        if self._writer_pid == os.getpid():
+            return
+        self._writer_pid = os.getpid()
+        self._writer = threading.Thread(target=self._write_loop, name='task-write-behind', daemon=True)
+        self._writer.start()
+
+    def _mutate(self, entry):
+        """
+        Aplica un cambio en memoria y espera el punto de durabilidad configurado (debe llamarse con _cond).
+        """
+        if self._closed:
+            raise RuntimeError('El repositorio está cerrado')
+        self._ensure_writer()
+        self._apply(entry)
+        self._seq += 1
+        seq = self._seq
+        if self._journal is not None:
+            self._journal.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            self._journal.flush()
+            if self.durability == 'journal':
+                os.fsync(self._journal.fileno())
+        self._cond.notify_all()
+        if self.durability == 'commit':
+            self._wait_committed(seq)
+
+    def _wait_committed(self, seq):
+        while self._committed_seq < seq:
+            if self._error is not None:
+                raise RuntimeError(f'No se pudieron guardar las tareas: {self._error}')
+            self._cond.wait()
+
+    def _write_loop(self):
+        while True:
+            with self._cond:
+                while self._committed_seq == self._seq and not self._stop.is_set():
+                    self._cond.wait()
+                if self._committed_seq == self._seq and self._stop.is_set():
+                    return
+            # Espera breve para agrupar en un mismo guardado los cambios que lleguen mientras tanto
+            if not self._stop.is_set():
+                self._stop.wait(self.flush_interval)
+            if not self._commit() and not self._stop.is_set():
+                # Pausa antes de reintentar un guardado fallido
+                self._stop.wait(max(self.flush_interval, 0.5))
+
+    def _commit(self):
+        """
+        Guarda el estado actual en el repositorio y vacía el diario si no quedan cambios posteriores.
+
+        Returns:
+            bool: False si el guardado ha fallado.
+        """
+        with self._commit_lock:
+            with self._cond:
+                seq = self._seq
+                if seq == self._committed_seq:
+                    return True
+                tasks = self._snapshot()
+            try:
+                self.repository.save_tasks(tasks)
+            except Exception as e:
+                logger.exception("Error en el group commit de %d tareas", len(tasks))
+                with self._cond:
+                    self._error = e
+                    self._cond.notify_all()
+                return False
+            with self._cond:
+                self._committed_seq = seq
+                self._error = None
+                self.commits += 1
+                if self._journal is not None and self._seq == seq:
+                    self._journal.truncate(0)
+                    self._journal.seek(0)
+                self._cond.notify_all()
+            return True
+
+    def write_lock(self):
+        """
+        Los cambios ya se ordenan en memoria con _cond; mantener un cerrojo mientras se espera el guardado
+        impediría que las peticiones concurrentes compartan el group commit.
+
+        Returns:
+            Context manager vacío.
+        """
+        return contextlib.nullcontext()
+
+    def load_tasks(self):
+        """
+        Returns:
+            list[Task]: Tareas en memoria (incluidos los cambios aún no guardados), ordenadas por id.
+        """
+        with self._cond:
+            return self._snapshot()
+
+    def get_by_id(self, task_id):
+        """
+        Args:
+            task_id (int): Identificador de la tarea.
+        Returns:
+            Task or None: Tarea encontrada o None si no existe.
+        """
+        with self._cond:
+            data = self._tasks.get(task_id)
+        return Task.from_dict(data) if data is not None else None
+
+    def next_id(self):
+        with self._cond:
+            return max(self._tasks, default=0) + 1
+
+    def save_tasks(self, tasks):
+        """
+        Args:
+            tasks (list[Task]): Lista completa de tareas.
+        """
+        with self._cond:
+            self._mutate({'op': 'replace', 'tasks': [task.to_dict() for task in tasks]})
+
+    def add_task(self, task):
+        """
+        Args:
+            task (Task): Tarea a añadir (se le asigna id si no tiene).
+        Returns:
+            Task: La tarea añadida.
+        """
+        with self._cond:
+            if task.id is None:
+                task.id = max(self._tasks, default=0) + 1
+            self._mutate({'op': 'upsert', 'task': task.to_dict()})
+        return task
+
+    def update_task(self, task_id, task):
+        """
+        Args:
+            task_id (int): ID de la tarea a sustituir.
+            task (Task): Nueva versión de la tarea.
+        Returns:
+            Task or None: La versión anterior de la tarea, o None si no existía.
+        """
+        with self._cond:
+            previous = self._tasks.get(task_id)
+            if previous is None:
+                return None
+            self._mutate({'op': 'upsert', 'task': {**task.to_dict(), 'id': task_id}})
+        return Task.from_dict(previous)
+
+    def delete_task(self, task_id):
+        """
+        Args:
+            task_id (int): ID de la tarea a eliminar.
+        Returns:
+            Task or None: La tarea eliminada, o None si no existía.
+        """
+        with self._cond:
+            previous = self._tasks.get(task_id)
+            if previous is None:
+                return None
+            self._mutate({'op': 'delete', 'id': task_id})
+        return Task.from_dict(previous)
+
+    def flush(self):
+        """
+        Guarda de inmediato los cambios pendientes y espera a que estén en el repositorio.
+
+        Raises:
+            RuntimeError: Si el guardado falla.
+        """
+        self._commit()
+        with self._cond:
+            if self._committed_seq < self._seq:
+                raise RuntimeError(f'No se pudieron guardar las tareas: {self._error}')
+
+    def close(self):
+        """
+        Guarda los cambios pendientes, detiene el hilo de escritura y cierra el diario. Es idempotente.
+        """
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._stop.set()
+            self._cond.notify_all()
+        if self._writer is not None and self._writer_pid == os.getpid():
+            self._writer.join()
+        self._commit()
+        if self._journal is not None:
+            self._journal.close()
@@ -1,36 +1,122 @@
 """
 Rutas para los endpoints de IA que utilizan AITaskManager y devuelven el campo token_usage actualizado.
 """
-from flask import Blueprint, request, jsonify
-from app.services.ai_task_manager import AITaskManager
+import functools
+from flask import Blueprint, current_app, request, jsonify
+from app.config.ai_config import AIConfig
+from app.extensions import get_services
+from app.services.local_ai_service import LocalFallbackAIService
 
 ai_bp = Blueprint('ai_tasks', __name__)
-ai_manager = AITaskManager()
+
+@ai_bp.before_app_request
+def start_enrichment_scheduler():
+    # Se arranca con la primera petición de cada worker: los hilos no sobreviven al fork de preload_app
+    if AIConfig.ENRICHMENT_ENABLED:
+        get_services().enrichment_scheduler.start()
+
+def limit_concurrency(view):
+    """
+    Aplica a la vista el límite de operaciones de IA simultáneas de la aplicación (ver ConcurrencyLimiter).
+    El limitador es de cada aplicación, así que se obtiene en cada petición.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        return get_services().ai_concurrency.call(view, *args, **kwargs)
+    return wrapper
+
+def _local_model_enabled(services):
+    # Sin AI_LOCAL_MODEL_ENABLED no hace falta crear el servicio de IA para comprobarlo
+    return AIConfig.LOCAL_MODEL_ENABLED and isinstance(services.ai_service, LocalFallbackAIService)
+
+def _force_requested():
+    """
+    Indica si la petición pide repetir la operación aunque las entradas no hayan cambiado
+    (?force=true o {"force": true} en el cuerpo).
+    """
+    if request.args.get('force', '').lower() in ('1', 'true', 'yes'):
+        return True
+    body = request.get_json(silent=True)
+    return isinstance(body, dict) and body.get('force') is True
 
 @ai_bp.route('/ai/tasks/describe/<int:task_id>', methods=['POST'])
+@limit_concurrency
 def describe_task(task_id):
-    task, error = ai_manager.describe_task(task_id)
+    task, error = get_services().ai_manager.describe_task(task_id, force=_force_requested())
     if error:
         return jsonify({'error': error}), 400
     return jsonify(task.to_dict()), 200
 
 @ai_bp.route('/ai/tasks/categorize/<int:task_id>', methods=['POST'])
+@limit_concurrency
 def categorize_task(task_id):
-    task, error = ai_manager.categorize_task(task_id)
+    task, error = get_services().ai_manager.categorize_task(task_id, force=_force_requested())
     if error:
         return jsonify({'error': error}), 400
     return jsonify(task.to_dict()), 200
 
 @ai_bp.route('/ai/tasks/estimate/<int:task_id>', methods=['POST'])
+@limit_concurrency
 def estimate_task_effort(task_id):
-    task, error = ai_manager.estimate_task_effort(task_id)
+    task, error = get_services().ai_manager.estimate_task_effort(task_id, force=_force_requested())
     if error:
         return jsonify({'error': error}), 400
     return jsonify(task.to_dict()), 200
 
 @ai_bp.route('/ai/tasks/audit/<int:task_id>', methods=['POST'])
+@limit_concurrency
 def audit_task_risks(task_id):
-    task, error = ai_manager.audit_task_risks(task_id)
+    task, error = get_services().ai_manager.audit_task_risks(task_id, force=_force_requested())
     if error:
         return jsonify({'error': error}), 400
     return jsonify(task.to_dict()), 200
+
+@ai_bp.route('/ai/local-model/metrics', methods=['GET'])
+def local_model_metrics():
+    services = get_services()
+    if not _local_model_enabled(services):
+        return jsonify({'enabled': False}), 200
+    return jsonify({'enabled': True, 'operations': services.ai_service.metrics()}), 200
+
+@ai_bp.route('/ai/local-model/train', methods=['POST'])
+@limit_concurrency
+def train_local_model():
+    services = get_services()
+    if not _local_model_enabled(services):
+        return jsonify({'error': 'El modelo local no está habilitado (AI_LOCAL_MODEL_ENABLED)'}), 400
+    samples = services.ai_service.train(services.task_manager.get_all())
+    return jsonify({'samples': samples}), 200
+
+@ai_bp.route('/ai/usage', methods=['GET'])
+def get_ai_usage():
+    group_by = request.args.get('group_by', 'day').split(',')
+    try:
+        rows = get_services().usage_ledger.rollup(
+            group_by, since=request.args.get('since'), until=request.args.get('until')
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'group_by': group_by, 'rows': rows}), 200
+
+@ai_bp.route('/ai/enrichment', methods=['GET'])
+def get_enrichment_status():
+    enrichment_scheduler = get_services().enrichment_scheduler
+    status = enrichment_scheduler.status()
+    status['enabled'] = AIConfig.ENRICHMENT_ENABLED
+    status['pending'] = len(enrichment_scheduler.pending())
+    return jsonify(status), 200
+
+@ai_bp.route('/ai/enrichment/run', methods=['POST'])
+@limit_concurrency
+def run_enrichment():
+    if not AIConfig.ENRICHMENT_ENABLED:
+        return jsonify({'error': 'El enriquecimiento automático no está habilitado (AI_ENRICHMENT_ENABLED)'}), 400
+    return jsonify({'operations': get_services().enrichment_scheduler.run_once()}), 200
+
+@ai_bp.route('/ai/admission', methods=['GET'])
+def get_admission_status():
+    limiter = current_app.extensions.get('rate_limiter')
+    return jsonify({
+        'concurrency': get_services().ai_concurrency.get_stats(),
+        'rate_limit': {'enabled': limiter is not None, 'rejected': limiter.rejected if limiter else 0}
+    }), 200
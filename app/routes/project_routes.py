@@ -0,0 +1,97 @@
+"""
+Rutas de tareas por proyecto (/projects/<project>/tasks). Cada proyecto tiene su propio almacenamiento,
+que se carga al primer uso y se descarga cuando queda inactivo (ver ProjectRegistry).
+"""
+from flask import Blueprint, request, jsonify
+from app.extensions import get_services
+from app.services.project_registry import is_valid_project_name
+from app.schemas.task_schema import TaskCreateSchema, TaskSchema
+from app.models.task import Task
+from app.routes.routes import requested_fields
+
+projects_bp = Blueprint('projects', __name__)
+
+
+def _project_manager(project, create=False):
+    """
+    Devuelve (TaskManager, respuesta de error). Solo se crea el almacenamiento de un proyecto nuevo
+    al añadirle su primera tarea.
+    """
+    if not is_valid_project_name(project):
+        return None, (jsonify({'error': 'Nombre de proyecto no válido'}), 400)
+    project_registry = get_services().project_registry
+    if not create and not project_registry.exists(project):
+        return None, (jsonify({'error': 'Proyecto no encontrado'}), 404)
+    return project_registry.get(project), None
+
+@projects_bp.route('/projects', methods=['GET'])
+def get_projects():
+    return jsonify(get_services().project_registry.stats()), 200
+
+@projects_bp.route('/projects/<project>/tasks', methods=['GET'])
+def get_project_tasks(project):
+    manager, error = _project_manager(project)
+    if error:
+        return error
+    try:
+        fields = requested_fields()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify([task.to_dict(fields) for task in manager.get_all()]), 200
+
+@projects_bp.route('/projects/<project>/tasks/<int:task_id>', methods=['GET'])
+def get_project_task(project, task_id):
+    manager, error = _project_manager(project)
+    if error:
+        return error
+    try:
+        fields = requested_fields()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    task = manager.get_by_id(task_id)
+    if not task:
+        return jsonify({'error': 'Tarea no encontrada'}), 404
+    return jsonify(task.to_dict(fields)), 200
+
+@projects_bp.route('/projects/<project>/tasks', methods=['POST'])
+def create_project_task(project):
+    manager, error = _project_manager(project, create=True)
+    if error:
+        return error
+    try:
+        validated = TaskCreateSchema(**request.get_json())
+        task = Task.from_dict({**validated.dict(), 'project': project})
+        manager.create(task)
+        return jsonify(task.to_dict()), 201
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+
+@projects_bp.route('/projects/<project>/tasks/<int:task_id>', methods=['PUT'])
+def update_project_task(project, task_id):
+    manager, error = _project_manager(project)
+    if error:
+        return error
+    try:
+        data = request.get_json()
+        validated = TaskSchema(**data)
+        updated_task = Task.from_dict({**validated.dict(), 'project': project})
+        if 'ai_fingerprints' not in data:
+            # Conserva las huellas de IA para detectar después si el título o la descripción cambiaron
+            existing = manager.get_by_id(task_id)
+            if existing:
+                updated_task.ai_fingerprints = existing.ai_fingerprints
+        result = manager.update(task_id, updated_task)
+        if not result:
+            return jsonify({'error': 'Tarea no encontrada'}), 404
+        return jsonify(result.to_dict()), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+
+@projects_bp.route('/projects/<project>/tasks/<int:task_id>', methods=['DELETE'])
+def delete_project_task(project, task_id):
+    manager, error = _project_manager(project)
+    if error:
+        return error
+    if not manager.delete(task_id):
+        return jsonify({'error': 'Tarea no encontrada'}), 404
+    return jsonify({'message': 'Tarea eliminada'}), 200
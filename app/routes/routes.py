@@ -1,25 +1,110 @@
 """
 Define las rutas y controladores principales de la API Flask para la gestión de tareas.
 """
-from flask import Blueprint, request, jsonify
-from app.services.task_manager import TaskManager
+import json
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from app.extensions import get_services
+from app.services import columnar_io
 from app.schemas.task_schema import TaskSchema
 from app.models.task import Task
 
 bp = Blueprint('tasks', __name__)
-task_manager = TaskManager()
+
+# Máximo de resultados por página en /tasks/search
+SEARCH_MAX_PER_PAGE = 100
+
+# Segundos sin cambios tras los que se envía un comentario keep-alive por el stream SSE
+SSE_KEEPALIVE_SECONDS = 15
+
+# Campos por los que se puede filtrar GET /tasks (?status=pendiente&assigned_to=Ana)
+LIST_FILTERS = ('status', 'priority', 'assigned_to', 'category')
+
+def requested_fields():
+    """
+    Interpreta el parámetro de proyección ?fields=title,status. El id se incluye siempre.
+
+    Returns:
+        list[str] or None: Campos pedidos, o None si no se indica el parámetro (todos los campos).
+    Raises:
+        ValueError: Si algún campo no existe.
+    """
+    value = request.args.get('fields')
+    if value is None:
+        return None
+    fields = [field.strip() for field in value.split(',') if field.strip()]
+    unknown = [field for field in fields if field not in Task.FIELDS]
+    if unknown:
+        raise ValueError(f"Campos no válidos: {', '.join(unknown)} (disponibles: {', '.join(Task.FIELDS)})")
+    return ['id'] + fields
+
+def requested_filters():
+    """
+    Interpreta los filtros de igualdad de GET /tasks (ver LIST_FILTERS).
+
+    Returns:
+        tuple: Pares (campo, valor) ordenados por campo; vacío si no se filtra.
+    """
+    return tuple((field, request.args[field]) for field in LIST_FILTERS if field in request.args)
+
+def filter_tasks(tasks, filters):
+    """
+    Args:
+        tasks (list[Task]): Tareas.
+        filters (tuple): Pares (campo, valor) de requested_filters().
+    Returns:
+        list[Task]: Tareas cuyos campos coinciden con todos los filtros.
+    """
+    return [task for task in tasks if all(getattr(task, field) == value for field, value in filters)]
+
+def json_response(data, cache=None, slot=None):
+    """
+    Args:
+        data (bytes): JSON ya serializado (de la caché).
+        cache (SerializedTaskCache, opcional): Caché de la que vienen los bytes; compress_response guarda en ella
+            el cuerpo comprimido para no comprimirlo de nuevo en cada petición.
+        slot (tuple, opcional): Entrada de la caché ('task', task_id, fields) o ('list', view, fields).
+    Returns:
+        flask.Response: Respuesta application/json, igual que la de jsonify.
+    """
+    response = Response(data + b'\n', mimetype='application/json')
+    if cache is not None:
+        response.compressed_body = lambda encoding, compress: cache.compressed(slot, data, encoding, compress)
+    return response
 
 @bp.route('/tasks', methods=['GET'])
 def get_tasks():
-    tasks = task_manager.get_all()
-    return jsonify([task.to_dict() for task in tasks]), 200
+    try:
+        fields = requested_fields()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    filters = requested_filters()
+    services = get_services()
+
+    def load_tasks():
+        return filter_tasks(services.task_manager.get_all(), filters)
+
+    if services.json_cache is not None:
+        view = filters or 'all'
+        data = services.json_cache.list_bytes(view, fields, load_tasks)
+        return json_response(data, services.json_cache, ('list', view, fields)), 200
+    return jsonify([task.to_dict(fields) for task in load_tasks()]), 200
 
 @bp.route('/tasks/<int:task_id>', methods=['GET'])
 def get_task(task_id):
-    task = task_manager.get_by_id(task_id)
+    try:
+        fields = requested_fields()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    services = get_services()
+    if services.json_cache is not None:
+        data = services.json_cache.task_bytes(task_id, fields, lambda: services.task_manager.get_by_id(task_id))
+        if data is None:
+            return jsonify({'error': 'Tarea no encontrada'}), 404
+        return json_response(data, services.json_cache, ('task', task_id, fields)), 200
+    task = services.task_manager.get_by_id(task_id)
     if not task:
         return jsonify({'error': 'Tarea no encontrada'}), 404
-    return jsonify(task.to_dict()), 200
+    return jsonify(task.to_dict(fields)), 200
 
 @bp.route('/tasks', methods=['POST'])
 def create_task():
@@ -29,7 +114,7 @@ def create_task():
         validated = TaskCreateSchema(**data)
         # El id se generará automáticamente en TaskManager
         task = Task.from_dict(validated.dict())
-        task_manager.create(task)
+        get_services().task_manager.create(task)
         return jsonify(task.to_dict()), 201
     except Exception as e:
         return jsonify({'error': str(e)}), 400
@@ -40,6 +125,12 @@ def update_task(task_id):
         data = request.get_json()
         validated = TaskSchema(**data)
         updated_task = Task.from_dict(validated.dict())
+        task_manager = get_services().task_manager
+        if 'ai_fingerprints' not in data:
+            # Conserva las huellas de IA para detectar después si el título o la descripción cambiaron
+            existing = task_manager.get_by_id(task_id)
+            if existing:
+                updated_task.ai_fingerprints = existing.ai_fingerprints
         result = task_manager.update(task_id, updated_task)
         if not result:
             return jsonify({'error': 'Tarea no encontrada'}), 404
@@ -49,7 +140,136 @@ def update_task(task_id):
 
 @bp.route('/tasks/<int:task_id>', methods=['DELETE'])
 def delete_task(task_id):
-    result = task_manager.delete(task_id)
+    result = get_services().task_manager.delete(task_id)
     if not result:
         return jsonify({'error': 'Tarea no encontrada'}), 404
     return jsonify({'message': 'Tarea eliminada'}), 200
+
+@bp.route('/tasks/export', methods=['GET'])
+def export_tasks():
+    """
+    Exporta todas las tareas en Parquet (por defecto) o Arrow IPC (stream), enviadas por lotes.
+    """
+    fmt = request.args.get('format', 'parquet')
+    if fmt not in columnar_io.FORMATS:
+        return jsonify({'error': f"Formato no válido: {fmt}. Opciones: {', '.join(columnar_io.FORMATS)}"}), 400
+    try:
+        batch_size = int(request.args.get('batch_size', columnar_io.DEFAULT_BATCH_SIZE))
+    except ValueError:
+        return jsonify({'error': 'batch_size debe ser un entero'}), 400
+    try:
+        columnar_io.require_pyarrow()
+    except RuntimeError as e:
+        return jsonify({'error': str(e)}), 501
+    chunks = columnar_io.stream_tasks(get_services().task_manager.iter_all(), fmt=fmt, batch_size=batch_size)
+    mimetype = 'application/vnd.apache.parquet' if fmt == 'parquet' else 'application/vnd.apache.arrow.stream'
+    return Response(
+        stream_with_context(chunks),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename=tasks.{fmt}'}
+    )
+
+@bp.route('/tasks/import', methods=['POST'])
+def import_tasks():
+    """
+    Importa tareas desde el cuerpo de la petición (Parquet o Arrow). `mode=merge` (por defecto) sustituye
+    las tareas con el mismo id y añade el resto; `mode=replace` sustituye la colección completa.
+    """
+    services = get_services()
+    try:
+        count = columnar_io.import_tasks(
+            services.repository,
+            request.get_data(),
+            fmt=request.args.get('format', 'parquet'),
+            mode=request.args.get('mode', 'merge')
+        )
+    except RuntimeError as e:
+        return jsonify({'error': str(e)}), 501
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+    services.rebuild_indexes()
+    # Los demás workers reconstruyen los suyos al ver el aviso
+    services.request_index_rebuild()
+    return jsonify({'imported': count}), 200
+
+@bp.route('/tasks/changes', methods=['GET'])
+def stream_task_changes():
+    """
+    Stream SSE con las mutaciones de tareas. Acepta `since` (o la cabecera Last-Event-ID)
+    para reanudar desde una secuencia; sin él, solo se envían los cambios nuevos.
+    """
+    change_feed = get_services().change_feed
+    since = request.args.get('since', request.headers.get('Last-Event-ID'))
+    try:
+        since = int(since) if since is not None else change_feed.last_seq
+    except ValueError:
+        return jsonify({'error': 'El parámetro since debe ser un entero'}), 400
+
+    def generate(since):
+        yield 'retry: 3000\n\n'
+        if since > change_feed.last_seq:
+            # Secuencia de otro proceso (p. ej. antes de un reinicio): el cliente debe resincronizar
+            since = change_feed.last_seq
+            yield f'event: reset\ndata: {json.dumps({"seq": since})}\n\n'
+        while True:
+            events, complete = change_feed.wait_for_events(since, timeout=SSE_KEEPALIVE_SECONDS)
+            if not complete:
+                # Parte de los cambios ya salió del buffer: el cliente debe recargar GET /tasks
+                yield f'event: reset\ndata: {json.dumps({"seq": change_feed.last_seq})}\n\n'
+            if not events:
+                yield ': keep-alive\n\n'
+                continue
+            for event in events:
+                data = json.dumps(event.to_dict(), ensure_ascii=False)
+                yield f'id: {event.seq}\nevent: {event.type}\ndata: {data}\n\n'
+            since = events[-1].seq
+
+    return Response(
+        stream_with_context(generate(since)),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@bp.route('/tasks/stats', methods=['GET'])
+def get_task_stats():
+    group_by = request.args.get('group_by')
+    try:
+        stats = get_services().task_stats.snapshot(group_by.split(',') if group_by else None)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(stats), 200
+
+@bp.route('/tasks/search', methods=['GET'])
+def search_tasks():
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'error': 'El parámetro q es obligatorio'}), 400
+    try:
+        page = int(request.args.get('page', 1))
+        per_page = int(request.args.get('per_page', 20))
+    except ValueError:
+        return jsonify({'error': 'page y per_page deben ser enteros'}), 400
+    if page < 1 or not 1 <= per_page <= SEARCH_MAX_PER_PAGE:
+        return jsonify({'error': f'page debe ser >= 1 y per_page estar entre 1 y {SEARCH_MAX_PER_PAGE}'}), 400
+    total, results = get_services().search_index.search(query, page=page, per_page=per_page)
+    return jsonify({
+        'query': query,
+        'total': total,
+        'page': page,
+        'per_page': per_page,
+        'results': results
+    }), 200
+
+@bp.route('/tasks/<int:task_id>/similar', methods=['GET'])
+def get_similar_tasks(task_id):
+    try:
+        k = int(request.args.get('k', 5))
+        min_score = float(request.args.get('min_score', 0.0))
+    except ValueError:
+        return jsonify({'error': 'k debe ser entero y min_score numérico'}), 400
+    if not 1 <= k <= SEARCH_MAX_PER_PAGE:
+        return jsonify({'error': f'k debe estar entre 1 y {SEARCH_MAX_PER_PAGE}'}), 400
+    results = get_services().similarity_index.similar(task_id, k=k, min_score=min_score)
+    if results is None:
+        return jsonify({'error': 'Tarea no encontrada'}), 404
+    return jsonify({'task_id': task_id, 'results': results}), 200
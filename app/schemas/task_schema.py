@@ -3,9 +3,12 @@ Define el esquema de validación TaskSchema usando Pydantic para validar los dat
 """
 
 from pydantic import BaseModel, Field, field_validator
-from typing import Literal, Optional
+from typing import Dict, Literal, Optional
 from enum import Enum
 
+# Nombres de proyecto válidos: minúsculas, dígitos, '-' y '_' (se usan como nombre de fichero)
+PROJECT_NAME_PATTERN = r'^[a-z0-9][a-z0-9_-]{0,63}$'
+
 
 class TaskCategory(str, Enum):
     FRONTEND = "Frontend"
@@ -37,6 +40,8 @@ class TaskCreateSchema(BaseModel):
     risk_analysis: Optional[str] = Field(None, min_length=1, description="Análisis de riesgos generado por IA")
     risk_mitigation: Optional[str] = Field(None, min_length=1, description="Plan de mitigación de riesgos generado por IA")
     token_usage: int = Field(0, ge=0, description="Tokens acumulados consumidos por la tarea")
+    project: Optional[str] = Field(None, pattern=PROJECT_NAME_PATTERN, description="Proyecto al que pertenece la tarea")
+    ai_fingerprints: Dict[str, str] = Field(default_factory=dict, description="Huella de las entradas de cada operación de IA")
 
     @field_validator('title', 'description', 'assigned_to', 'risk_analysis', 'risk_mitigation')
     @classmethod
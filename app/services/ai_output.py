@@ -0,0 +1,185 @@
+"""
+Salida estructurada de las operaciones de IA: esquemas JSON (response_format) para categorize y estimate
+e interpretación tolerante de las respuestas (números dentro de texto, categorías aproximadas o en español),
+para que casi todas las llamadas den un resultado utilizable al primer intento.
+"""
+import difflib
+import json
+import re
+from app.schemas.task_schema import TaskCategory
+from app.services.text_analysis import fold_accents
+
+# Campo del objeto JSON que devuelve cada operación con salida estructurada
+RESULT_KEYS = {
+    'categorize': 'category',
+    'estimate': 'hours'
+}
+
+_NUMBER_RE = re.compile(r'(\d+(?:[.,]\d+)?)')
+_RANGE_RE = re.compile(r'(\d+(?:[.,]\d+)?)\s*(?:-|–|a|y|to)\s*(\d+(?:[.,]\d+)?)')
+# '8 horas y 30 minutos', '8h30m', '8 y 30 min': se interpretan antes que los rangos, que también usan 'y'
+_HOURS_MINUTES_RE = re.compile(
+    r'(\d+(?:[.,]\d+)?)(?:\s*(?:horas?|hours?|hrs?|h)\.?|\s)\s*(?:(?:,|y|and)\s*)?'
+    r'(\d+)\s*(?:minutos?|minutes?|mins?|m)\b',
+    re.IGNORECASE
+)
+_MINUTES_RE = re.compile(r'(\d+(?:[.,]\d+)?)\s*(?:minutos?|minutes?|mins?)\b', re.IGNORECASE)
+# Unidad que sigue a un número o rango: días y semanas se convierten a horas; meses y años se descartan
+_UNIT_RE = re.compile(
+    r'\s*(?:(?P<days>d[ií]as?|days?|jornadas?)|(?P<weeks>semanas?|weeks?)'
+    r'|(?P<coarse>mes(?:es)?|months?|a[ñn]os?|years?))\b',
+    re.IGNORECASE
+)
+
+# Horas de una jornada laboral y de una semana laboral, para convertir estimaciones en días o semanas
+WORKDAY_HOURS = 8
+WORKWEEK_HOURS = 5 * WORKDAY_HOURS
+
+_CATEGORIES = {fold_accents(category.value): category.value for category in TaskCategory}
+
+# Nombres alternativos (ya sin acentos) con los que el modelo suele responder en español
+CATEGORY_ALIASES = {
+    'base de datos': 'Database',
+    'bases de datos': 'Database',
+    'documentacion': 'Documentation',
+    'seguridad': 'Security',
+    'rendimiento': 'Performance',
+    'pruebas': 'Testing',
+    'correccion de errores': 'Bug Fix',
+    'bug': 'Bug Fix',
+    'bugfix': 'Bug Fix',
+    'error': 'Bug Fix',
+    'funcionalidad': 'Feature',
+    'nueva funcionalidad': 'Feature',
+    'infraestructura': 'DevOps',
+    'interfaz': 'Frontend'
+}
+
+
+def response_format(operation):
+    """
+    Args:
+        operation (str): Operación de IA.
+    Returns:
+        dict or None: Parámetro response_format (json_schema estricto) de la operación, o None si no tiene.
+    """
+    if operation == 'categorize':
+        properties = {'category': {'type': 'string', 'enum': [category.value for category in TaskCategory]}}
+    elif operation == 'estimate':
+        properties = {'hours': {'type': 'number'}}
+    else:
+        return None
+    return {
+        'type': 'json_schema',
+        'json_schema': {
+            'name': f'{operation}_result',
+            'strict': True,
+            'schema': {
+                'type': 'object',
+                'properties': properties,
+                'required': list(properties),
+                'additionalProperties': False
+            }
+        }
+    }
+
+
+def unwrap_structured(operation, text):
+    """
+    Extrae el valor de una respuesta estructurada ('{"category": "Backend"}' -> 'Backend'). Si la respuesta
+    no es el objeto JSON esperado (modelo sin salida estructurada), la devuelve tal cual.
+
+    Args:
+        operation (str): Operación de IA.
+        text (str): Contenido devuelto por el modelo.
+    Returns:
+        str: Valor de la respuesta.
+    """
+    key = RESULT_KEYS.get(operation)
+    if key is None or not text or not text.lstrip().startswith('{'):
+        return text
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return text
+    if isinstance(data, dict) and data.get(key) is not None:
+        return str(data[key])
+    return text
+
+
+def parse_effort_hours(value):
+    """
+    Interpreta una estimación de horas: '8', '8.5', 'Unas 12 horas', '6-8 horas' (punto medio), '3,5h',
+    '8 horas y 30 minutos' o '90 minutos'. Los días y las semanas se convierten con WORKDAY_HOURS y
+    WORKWEEK_HOURS ('2 a 3 días' -> 20); las estimaciones en meses o años son demasiado gruesas para
+    guardarlas como horas y se descartan.
+
+    Args:
+        value (object): Respuesta del modelo (texto o número).
+    Returns:
+        float or None: Horas positivas, o None si la respuesta no contiene un número válido o viene en meses o años.
+    """
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        hours = float(value)
+    else:
+        text = unwrap_structured('estimate', str(value or ''))
+        duration = _HOURS_MINUTES_RE.search(text)
+        minutes = _MINUTES_RE.search(text)
+        match = _RANGE_RE.search(text)
+        if duration:
+            hours = float(duration.group(1).replace(',', '.')) + int(duration.group(2)) / 60
+        elif minutes and not _NUMBER_RE.search(text[:minutes.start()]):
+            hours = float(minutes.group(1).replace(',', '.')) / 60
+        elif match:
+            low, high = (float(part.replace(',', '.')) for part in match.groups())
+            hours = (low + high) / 2 * _unit_hours(text, match.end())
+        else:
+            match = _NUMBER_RE.search(text)
+            if not match:
+                return None
+            hours = float(match.group(1).replace(',', '.')) * _unit_hours(text, match.end())
+    return hours if hours > 0 else None
+
+
+def _unit_hours(text, position):
+    """
+    Args:
+        text (str): Respuesta del modelo.
+        position (int): Fin del número o rango.
+    Returns:
+        float: Horas por unidad según la palabra que sigue a position (1 si no hay unidad o son horas,
+            0 para meses y años, que parse_effort_hours descarta).
+    """
+    unit = _UNIT_RE.match(text, position)
+    if unit is None:
+        return 1
+    if unit.group('days'):
+        return WORKDAY_HOURS
+    if unit.group('weeks'):
+        return WORKWEEK_HOURS
+    return 0
+
+
+def match_category(value, cutoff=0.75):
+    """
+    Asocia la respuesta del modelo a una categoría de TaskCategory sin distinguir mayúsculas ni acentos:
+    coincidencia exacta, alias en español, categoría mencionada en el texto o parecido (difflib).
+
+    Args:
+        value (str): Respuesta del modelo.
+        cutoff (float): Similitud mínima (0-1) para la coincidencia aproximada.
+    Returns:
+        str or None: Valor de la categoría, o None si no se reconoce ninguna.
+    """
+    text = fold_accents(unwrap_structured('categorize', str(value or ''))).strip(' \t\n.:"\'*`')
+    if not text:
+        return None
+    known = {**CATEGORY_ALIASES, **_CATEGORIES}
+    if text in known:
+        return known[text]
+    # Respuestas como 'Categoría: Backend.': gana el nombre más largo que aparezca como palabra completa
+    for name in sorted(known, key=len, reverse=True):
+        if re.search(rf'\b{re.escape(name)}\b', text):
+            return known[name]
+    close = difflib.get_close_matches(text, list(known), n=1, cutoff=cutoff)
+    return known[close[0]] if close else None
@@ -5,7 +5,10 @@ import time
 from typing import Any, Dict, Optional
 from openai import OpenAI, OpenAIError
 import tiktoken
+from app import tracing
 from app.config.ai_config import AIConfig
+from app.services.prompt_builder import PromptBuilder
+from app.services.ai_output import response_format, unwrap_structured
 
 class OpenAIService:
     """
@@ -15,6 +18,10 @@ class OpenAIService:
         self.client = AIConfig.get_client()
         self.model = AIConfig.DEFAULT_MODEL
         self.tokenizer = tiktoken.encoding_for_model(self.model)
+        # Prompts del sistema normalizados una sola vez y plantillas de usuario compactas
+        self.prompts = PromptBuilder(self.tokenizer)
+        # Modelos que han rechazado response_format: se les pide texto libre sin volver a intentarlo
+        self._unstructured_models = set()
 
     def _count_tokens(self, text: str) -> int:
         """Cuenta el número de tokens en un texto usando tiktoken."""
@@ -38,77 +45,83 @@ class OpenAIService:
             default = AIConfig.get_model_params(operation)
             default.update(params)
             params = default
-        start = time.time()
-        try:
-            response = self.client.chat.completions.create(
-                messages=messages,
-                **params
-            )
-            end = time.time()
-            usage = response.usage if hasattr(response, 'usage') else None
-            return {
-                "result": response.choices[0].message.content.strip(),
-                "input_tokens": usage.prompt_tokens if usage else None,
-                "output_tokens": usage.completion_tokens if usage else None,
-                "total_tokens": usage.total_tokens if usage else None,
-                "processing_time": round(end - start, 3),
-                "model": params["model"]
-            }
-        except OpenAIError as e:
-            return {"error": str(e)}
-        except Exception as e:
-            return {"error": f"Error inesperado: {e}"}
+        with tracing.span('OpenAIService._call_openai', kind='CLIENT',
+                          **{'ai.operation': operation, 'ai.model': params.get('model')}) as span:
+            start = time.time()
+            try:
+                response = self.client.chat.completions.create(
+                    messages=messages,
+                    **params
+                )
+                end = time.time()
+                usage = response.usage if hasattr(response, 'usage') else None
+                result = {
+                    "result": response.choices[0].message.content.strip(),
+                    "input_tokens": usage.prompt_tokens if usage else None,
+                    "output_tokens": usage.completion_tokens if usage else None,
+                    "total_tokens": usage.total_tokens if usage else None,
+                    "processing_time": round(end - start, 3),
+                    "model": params["model"]
+                }
+                span.set_attribute('ai.input_tokens', result['input_tokens'])
+                span.set_attribute('ai.output_tokens', result['output_tokens'])
+                span.set_attribute('ai.total_tokens', result['total_tokens'])
+                return result
+            except OpenAIError as e:
+                span.set_error(str(e))
+                return {"error": str(e)}
+            except Exception as e:
+                span.set_error(f"Error inesperado: {e}")
+                return {"error": f"Error inesperado: {e}"}
+
+    def _call_structured(self, messages: list, operation: str) -> Dict[str, Any]:
+        """
+        Llama a OpenAI pidiendo salida estructurada (json_schema) y devuelve en "result" solo el valor
+        ('Backend', '8'). Si el modelo no admite response_format, se recuerda y se repite la llamada sin él.
+        """
+        model = AIConfig.get_model_params(operation)['model']
+        if not AIConfig.STRUCTURED_OUTPUT_ENABLED or model in self._unstructured_models:
+            return self._call_openai(messages, operation=operation)
+        result = self._call_openai(messages, operation=operation,
+                                   params={'response_format': response_format(operation)})
+        if 'error' in result and 'response_format' in result['error']:
+            self._unstructured_models.add(model)
+            return self._call_openai(messages, operation=operation)
+        if 'result' in result:
+            result['result'] = unwrap_structured(operation, result['result'])
+        return result
 
     def generate_description(self, task_data: dict) -> dict:
         """
         Genera una descripción para una tarea usando IA.
         """
-        system_prompt = AIConfig.get_system_prompt('describe')
-        user_prompt = f"Título: {task_data.get('title')}\nPrioridad: {task_data.get('priority')}\nPersona asignada: {task_data.get('assigned_to')}\nCategoría: {task_data.get('category', 'No especificada')}"
-        messages = self._build_prompt(system_prompt, user_prompt)
+        messages = self.prompts.build('describe', task_data)
         return self._call_openai(messages, operation='describe')
 
     def categorize_task(self, task_data: dict) -> dict:
         """
         Clasifica una tarea por categoría usando IA.
         """
-        system_prompt = AIConfig.get_system_prompt('categorize')
-        user_prompt = f"Título: {task_data.get('title')}\nDescripción: {task_data.get('description')}"
-        messages = self._build_prompt(system_prompt, user_prompt)
-        return self._call_openai(messages, operation='categorize')
+        messages = self.prompts.build('categorize', task_data)
+        return self._call_structured(messages, operation='categorize')
 
     def estimate_effort(self, task_data: dict) -> dict:
         """
         Estima el esfuerzo en horas para una tarea usando IA.
         """
-        system_prompt = AIConfig.get_system_prompt('estimate')
-        user_prompt = f"Título: {task_data.get('title')}\nDescripción: {task_data.get('description')}\nCategoría: {task_data.get('category', 'No especificada')}"
-        messages = self._build_prompt(system_prompt, user_prompt)
-        return self._call_openai(messages, operation='estimate')
+        messages = self.prompts.build('estimate', task_data)
+        return self._call_structured(messages, operation='estimate')
 
     def analyze_risks(self, task_data: dict) -> dict:
         """
         Genera solo el análisis de riesgos usando IA.
         """
-        system_prompt = AIConfig.get_system_prompt('audit')
-        user_prompt = (
-            f"Título: {task_data.get('title')}\n"
-            f"Descripción: {task_data.get('description')}\n"
-            f"Categoría: {task_data.get('category', 'No especificada')}"
-        )
-        messages = self._build_prompt(system_prompt, user_prompt)
+        messages = self.prompts.build('audit', task_data)
         return self._call_openai(messages, operation='audit')
 
     def generate_mitigation(self, task_data: dict, risk_analysis: str) -> dict:
         """
         Genera solo el plan de mitigación de riesgos usando IA, tomando en cuenta el análisis de riesgos previo.
         """
-        system_prompt = AIConfig.get_system_prompt('mitigation_plan')
-        user_prompt = (
-            f"Título: {task_data.get('title')}\n"
-            f"Descripción: {task_data.get('description')}\n"
-            f"Categoría: {task_data.get('category', 'No especificada')}\n"
-            f"Análisis de riesgos: {risk_analysis}"
-        )
-        messages = self._build_prompt(system_prompt, user_prompt)
+        messages = self.prompts.build('mitigation_plan', {**task_data, 'risk_analysis': risk_analysis})
         return self._call_openai(messages, operation='mitigation_plan')
@@ -1,107 +1,239 @@
 """
 AITaskManager: Orquesta operaciones de IA y actualiza el campo token_usage en cada tarea.
 """
+import hashlib
+import json
+from app import tracing
+from app.config.ai_config import AIConfig
 from app.services.ai_service import OpenAIService
 from app.services.task_manager import TaskManager
+from app.services.single_flight import SingleFlight
+from app.services.prompt_builder import PromptBuilder
+from app.services.ai_output import match_category, parse_effort_hours
 from app.models.task import Task
 
 class AITaskManager:
-    def __init__(self, task_manager=None, ai_service=None):
+    def __init__(self, task_manager=None, ai_service=None, single_flight=None, usage_ledger=None):
         self.task_manager = task_manager or TaskManager()
         self.ai_service = ai_service or OpenAIService()
+        # Peticiones concurrentes idénticas (operación, tarea y contenido) comparten una sola llamada a OpenAI
+        self.single_flight = single_flight or SingleFlight()
+        # Ledger opcional donde se registra el consumo de cada llamada (UsageLedger)
+        self.usage_ledger = usage_ledger
+        self.prompts = PromptBuilder()
+        # Operaciones resueltas con el resultado guardado, sin llamar a la IA
+        self.skipped = 0
 
-    def describe_task(self, task_id):
+    def fingerprint(self, operation, task):
+        """
+        Huella de las entradas que usa la operación sobre la tarea (ver PromptBuilder.fingerprint).
+
+        Args:
+            operation (str): 'describe', 'categorize', 'estimate' o 'audit'.
+            task (Task): Tarea.
+        Returns:
+            str: Huella de las entradas.
+        """
+        return self.prompts.fingerprint(operation, task.to_dict())
+
+    def is_fresh(self, operation, task):
+        """
+        Indica si el resultado guardado de la operación sigue siendo válido: la tarea tiene el campo de salida
+        y la huella de las entradas coincide con la de su última ejecución.
+
+        Args:
+            operation (str): 'describe', 'categorize', 'estimate' o 'audit'.
+            task (Task): Tarea.
+        Returns:
+            bool: True si volver a llamar a la IA produciría una respuesta para las mismas entradas.
+        """
+        stored = task.ai_fingerprints.get(operation)
+        if stored is None or stored != self.fingerprint(operation, task):
+            return False
+        outputs = {
+            'describe': lambda: bool(task.description),
+            'categorize': lambda: bool(task.category),
+            'estimate': lambda: task.effort_hours is not None,
+            'audit': task.has_risk_analysis
+        }
+        return outputs[operation]()
+
+    def _record_usage(self, operation, task, result):
+        """
+        Registra en el ledger de uso la llamada de IA, si hay uno configurado.
+        """
+        if self.usage_ledger is None or 'error' in result:
+            return
+        model = result.get('model')
+        input_tokens = result.get('input_tokens') or 0
+        output_tokens = result.get('output_tokens') or 0
+        self.usage_ledger.record(
+            operation,
+            model=model,
+            task_id=task.id,
+            assigned_to=task.assigned_to,
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            total_tokens=result.get('total_tokens') or 0,
+            latency=result.get('processing_time'),
+            cost=AIConfig.get_token_cost(model, input_tokens, output_tokens)
+        )
+
+    @staticmethod
+    def _record_result(task, operation, fingerprint, result, value):
+        """
+        Guarda en ai_fingerprints, junto a la huella de las entradas, el modelo que produjo el resultado
+        ('<operación>.model') y el valor guardado ('<operación>.value'). El modelo local solo aprende de los
+        resultados de OpenAI que siguen intactos en la tarea (ver LocalTaskModel.train).
+        """
+        task.ai_fingerprints[operation] = fingerprint
+        task.ai_fingerprints[f'{operation}.model'] = str(result.get('model') or '')
+        task.ai_fingerprints[f'{operation}.value'] = str(value)
+
+    @staticmethod
+    def _content_hash(task):
+        """
+        Calcula un hash estable del contenido de la tarea.
+        """
+        payload = json.dumps(task.to_dict(), sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _run(self, operation, task_id, handler, force=False):
+        """
+        Carga la tarea y ejecuta handler(task) deduplicando las ejecuciones concurrentes
+        con la misma clave (operación, task_id, hash del contenido). Si las entradas de la operación no han
+        cambiado desde su última ejecución, devuelve la tarea guardada sin llamar a la IA (salvo con force).
+
+        Returns:
+            (Task, str): La tarea actualizada y un mensaje de error (None si no hay error).
+        """
+        with tracing.span(f'AITaskManager.{operation}', **{'ai.operation': operation, 'task.id': task_id}) as span:
+            task = self.task_manager.get_by_id(task_id)
+            if not task:
+                return None, 'Tarea no encontrada'
+            if not force and self.is_fresh(operation, task):
+                self.skipped += 1
+                span.set_attribute('ai.skipped', True)
+                return task, None
+            key = (operation, task_id, self._content_hash(task))
+            result, shared = self.single_flight.do(key, lambda: handler(task))
+            span.set_attribute('ai.shared', shared)
+            if result[1]:
+                span.set_error(result[1])
+            return result
+
+    def describe_task(self, task_id, force=False):
         """
         Genera una descripción para la tarea indicada usando IA, actualiza el campo description,
         acumula los tokens consumidos en token_usage y persiste la tarea actualizada.
         Args:
             task_id (int): ID de la tarea a procesar.
+            force (bool): Llama a la IA aunque las entradas no hayan cambiado desde la última ejecución.
         Returns:
             (Task, str): La tarea actualizada y un mensaje de error (None si no hay error).
         """
-        task = self.task_manager.get_by_id(task_id)
-        if not task:
-            return None, 'Tarea no encontrada'
+        return self._run('describe', task_id, self._describe, force=force)
+
+    def _describe(self, task):
+        fingerprint = self.fingerprint('describe', task)
         result = self.ai_service.generate_description(task.to_dict())
+        self._record_usage('describe', task, result)
         if 'error' in result:
             return None, result['error']
         task.description = result['result']
+        task.ai_fingerprints['describe'] = fingerprint
         tokens = result.get('total_tokens', 0) or 0
         task.token_usage = (task.token_usage or 0) + tokens
-        self.task_manager.update(task_id, task)
+        self.task_manager.update(task.id, task, source='ai:describe')
         return task, None
 
-    def categorize_task(self, task_id):
+    def categorize_task(self, task_id, force=False):
         """
         Clasifica la tarea indicada usando IA, actualiza el campo category,
         acumula los tokens consumidos en token_usage y persiste la tarea actualizada.
         Args:
             task_id (int): ID de la tarea a procesar.
+            force (bool): Llama a la IA aunque las entradas no hayan cambiado desde la última ejecución.
         Returns:
             (Task, str): La tarea actualizada y un mensaje de error (None si no hay error).
         """
-        task = self.task_manager.get_by_id(task_id)
-        if not task:
-            return None, 'Tarea no encontrada'
+        return self._run('categorize', task_id, self._categorize, force=force)
+
+    def _categorize(self, task):
+        fingerprint = self.fingerprint('categorize', task)
         result = self.ai_service.categorize_task(task.to_dict())
+        self._record_usage('categorize', task, result)
         if 'error' in result:
             return None, result['error']
-        task.category = result['result']
+        category = match_category(result['result'])
+        if category is None:
+            return None, f"Categoría no reconocida: {result['result']}"
+        task.category = category
+        self._record_result(task, 'categorize', fingerprint, result, category)
         tokens = result.get('total_tokens', 0) or 0
         task.token_usage = (task.token_usage or 0) + tokens
-        self.task_manager.update(task_id, task)
+        self.task_manager.update(task.id, task, source='ai:categorize')
         return task, None
 
-    def estimate_task_effort(self, task_id):
+    def estimate_task_effort(self, task_id, force=False):
         """
         Estima el esfuerzo en horas para la tarea indicada usando IA, actualiza el campo effort_hours,
         acumula los tokens consumidos en token_usage y persiste la tarea actualizada.
         Args:
             task_id (int): ID de la tarea a procesar.
+            force (bool): Llama a la IA aunque las entradas no hayan cambiado desde la última ejecución.
         Returns:
             (Task, str): La tarea actualizada y un mensaje de error (None si no hay error).
         """
-        task = self.task_manager.get_by_id(task_id)
-        if not task:
-            return None, 'Tarea no encontrada'
+        return self._run('estimate', task_id, self._estimate, force=force)
+
+    def _estimate(self, task):
+        fingerprint = self.fingerprint('estimate', task)
         result = self.ai_service.estimate_effort(task.to_dict())
+        self._record_usage('estimate', task, result)
         if 'error' in result:
             return None, result['error']
-        try:
-            task.effort_hours = float(result['result'])
-        except Exception:
+        hours = parse_effort_hours(result['result'])
+        if hours is None:
             return None, 'No se pudo parsear el esfuerzo estimado'
+        task.effort_hours = hours
+        self._record_result(task, 'estimate', fingerprint, result, hours)
         tokens = result.get('total_tokens', 0) or 0
         task.token_usage = (task.token_usage or 0) + tokens
-        self.task_manager.update(task_id, task)
+        self.task_manager.update(task.id, task, source='ai:estimate')
         return task, None
 
-    def audit_task_risks(self, task_id):
+    def audit_task_risks(self, task_id, force=False):
         """
         Genera el análisis de riesgos y el plan de mitigación para la tarea indicada usando IA,
         actualiza los campos risk_analysis y risk_mitigation, acumula los tokens consumidos en token_usage
         y persiste la tarea actualizada.
         Args:
             task_id (int): ID de la tarea a procesar.
+            force (bool): Llama a la IA aunque las entradas no hayan cambiado desde la última ejecución.
         Returns:
             (Task, str): La tarea actualizada y un mensaje de error (None si no hay error).
         """
-        task = self.task_manager.get_by_id(task_id)
-        if not task:
-            return None, 'Tarea no encontrada'
+        return self._run('audit', task_id, self._audit, force=force)
+
+    def _audit(self, task):
+        fingerprint = self.fingerprint('audit', task)
         # 1. Análisis de riesgos
         result_risk = self.ai_service.analyze_risks(task.to_dict())
+        self._record_usage('audit', task, result_risk)
         if 'error' in result_risk:
             return None, result_risk['error']
         task.risk_analysis = result_risk['result']
         tokens_risk = result_risk.get('total_tokens', 0) or 0
         # 2. Plan de mitigación
         result_mitigation = self.ai_service.generate_mitigation(task.to_dict(), task.risk_analysis)
+        self._record_usage('mitigation_plan', task, result_mitigation)
         if 'error' in result_mitigation:
             return None, result_mitigation['error']
         task.risk_mitigation = result_mitigation['result']
+        task.ai_fingerprints['audit'] = fingerprint
         tokens_mitigation = result_mitigation.get('total_tokens', 0) or 0
         # Acumular ambos consumos
         task.token_usage = (task.token_usage or 0) + tokens_risk + tokens_mitigation
-        self.task_manager.update(task_id, task)
+        self.task_manager.update(task.id, task, source='ai:audit')
         return task, None
@@ -0,0 +1,156 @@
+"""
+Implementa ChangeFeed, un hub de publicación/suscripción en proceso que difunde las mutaciones
+de tareas (creación, actualización y borrado) a los suscriptores internos y al stream SSE.
+"""
+import logging
+import threading
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+class ChangeEvent:
+    """
+    Representa una mutación de tarea publicada en el ChangeFeed.
+
+    Atributos:
+        seq (int): Número de secuencia monótono asignado por el hub.
+        type (str): Tipo de cambio ('created', 'updated', 'deleted').
+        task_id (int): ID de la tarea afectada.
+        task (dict): Estado de la tarea tras el cambio (None si fue eliminada).
+        previous (dict): Estado de la tarea antes del cambio (None si fue creada).
+        source (str): Origen del cambio, por ejemplo 'ai:categorize' (None para escrituras normales).
+    """
+    def __init__(self, seq, type, task_id, task=None, previous=None, source=None):
+        self.seq = seq
+        self.type = type
+        self.task_id = task_id
+        self.task = task
+        self.previous = previous
+        self.source = source
+
+    def to_dict(self):
+        """
+        Convierte el evento a un diccionario (sin el estado previo, que solo usan los suscriptores internos).
+
+        Returns:
+            dict: Representación del evento.
+        """
+        return {
+            "seq": self.seq,
+            "type": self.type,
+            "task_id": self.task_id,
+            "task": self.task,
+            "source": self.source
+        }
+
+
+class ChangeFeed:
+    """
+    Hub de cambios con número de secuencia y buffer circular acotado.
+
+    Los suscriptores síncronos (índices, agregados, cachés) reciben cada evento en orden de secuencia.
+    Los consumidores remotos (SSE) leen del buffer circular a partir de un número de secuencia,
+    lo que permite reanudar la conexión sin perder cambios mientras sigan en el buffer.
+
+    Métodos:
+        publish(type, task_id, task, previous, source): Publica un cambio.
+        subscribe(callback): Registra un suscriptor síncrono.
+        unsubscribe(callback): Elimina un suscriptor.
+        events_since(since): Devuelve los eventos posteriores a una secuencia.
+        wait_for_events(since, timeout): Espera a que haya eventos posteriores a una secuencia.
+    """
+    def __init__(self, capacity=1000):
+        """
+        Inicializa el hub.
+
+        Args:
+            capacity (int): Número máximo de eventos retenidos en el buffer circular.
+        """
+        self._events = deque(maxlen=capacity)
+        self._subscribers = []
+        self._lock = threading.RLock()
+        self._condition = threading.Condition(self._lock)
+        self._last_seq = 0
+
+    @property
+    def last_seq(self):
+        """int: Secuencia del último evento publicado (0 si no hay ninguno)."""
+        return self._last_seq
+
+    def publish(self, type, task_id, task=None, previous=None, source=None):
+        """
+        Publica un cambio, lo guarda en el buffer y lo entrega a los suscriptores en orden.
+
+        Args:
+            type (str): Tipo de cambio ('created', 'updated', 'deleted').
+            task_id (int): ID de la tarea afectada.
+            task (dict, opcional): Estado de la tarea tras el cambio.
+            previous (dict, opcional): Estado de la tarea antes del cambio.
+            source (str, opcional): Origen del cambio.
+        Returns:
+            ChangeEvent: El evento publicado.
+        """
+        with self._condition:
+            self._last_seq += 1
+            event = ChangeEvent(self._last_seq, type, task_id, task, previous, source)
+            self._events.append(event)
+            for callback in list(self._subscribers):
+                try:
+                    callback(event)
+                except Exception:
+                    logger.exception("Error en suscriptor del ChangeFeed")
+            self._condition.notify_all()
+        return event
+
+    def subscribe(self, callback):
+        """
+        Registra un suscriptor síncrono que recibe cada ChangeEvent.
+
+        Args:
+            callback (callable): Función que recibe el evento publicado.
+        """
+        with self._lock:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        """
+        Elimina un suscriptor previamente registrado.
+
+        Args:
+            callback (callable): Suscriptor a eliminar.
+        """
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def events_since(self, since):
+        """
+        Devuelve los eventos con secuencia mayor que `since`.
+
+        Args:
+            since (int): Última secuencia conocida por el consumidor.
+        Returns:
+            (list[ChangeEvent], bool): Eventos pendientes y si la lista está completa
+            (False si parte de los eventos ya salió del buffer y el cliente debe resincronizar).
+        """
+        with self._lock:
+            if since >= self._last_seq:
+                return [], True
+            oldest = self._events[0].seq if self._events else self._last_seq + 1
+            complete = since >= oldest - 1
+            return [event for event in self._events if event.seq > since], complete
+
+    def wait_for_events(self, since, timeout=None):
+        """
+        Bloquea hasta que haya eventos posteriores a `since` o venza el timeout.
+
+        Args:
+            since (int): Última secuencia conocida por el consumidor.
+            timeout (float, opcional): Segundos máximos de espera.
+        Returns:
+            (list[ChangeEvent], bool): Igual que events_since.
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._last_seq > since, timeout=timeout)
+            return self.events_since(since)
@@ -0,0 +1,341 @@
+"""
+Exportación e importación de tareas en formato columnar (Parquet o Arrow IPC) por lotes de registros,
+para cargas analíticas (pandas, polars, DuckDB...) sin pasar por la API JSON ni por Task.to_dict.
+
+Requiere el paquete opcional `pyarrow`.
+"""
+import itertools
+import json
+import os
+from pydantic import ValidationError
+from app.models.task import Task
+from app.schemas.task_schema import TaskCreateSchema, TaskSchema
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+FORMATS = ('parquet', 'arrow')
+IMPORT_MODES = ('merge', 'replace')
+DEFAULT_BATCH_SIZE = 10000
+
+# Máximo de filas no válidas que se detallan en el error de importación
+MAX_INVALID_ROWS = 10
+
+# Extensiones reconocidas al deducir el formato de un fichero
+_EXTENSIONS = {'.parquet': 'parquet', '.pq': 'parquet', '.arrow': 'arrow', '.feather': 'arrow', '.ipc': 'arrow'}
+_STRING_FIELDS = ('title', 'description', 'priority', 'status', 'assigned_to', 'category', 'risk_analysis',
+                  'risk_mitigation', 'project')
+
+
+def require_pyarrow():
+    """
+    Raises:
+        RuntimeError: Si pyarrow no está instalado.
+    """
+    if pa is None:
+        raise RuntimeError('La exportación columnar necesita pyarrow (pip install pyarrow)')
+
+
+def task_schema():
+    """
+    Returns:
+        pyarrow.Schema: Esquema de las tareas, con las columnas en el orden de Task.FIELDS.
+    """
+    require_pyarrow()
+    types = {'id': pa.int64(), 'effort_hours': pa.float64(), 'token_usage': pa.int64(),
+             'ai_fingerprints': pa.map_(pa.string(), pa.string())}
+    return pa.schema([(field, types.get(field, pa.string())) for field in Task.FIELDS])
+
+
+def detect_format(path, default='parquet'):
+    """
+    Args:
+        path (str): Ruta del fichero.
+        default (str): Formato si la extensión no es conocida.
+    Returns:
+        str: 'parquet' o 'arrow'.
+    """
+    return _EXTENSIONS.get(os.path.splitext(path)[1].lower(), default)
+
+
+def _batches(tasks, batch_size):
+    iterator = iter(tasks)
+    while True:
+        chunk = list(itertools.islice(iterator, batch_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _record_batch(tasks, schema):
+    """
+    Construye un RecordBatch columna a columna leyendo los atributos de las tareas.
+    """
+    columns = []
+    for field in Task.FIELDS:
+        if field == 'ai_fingerprints':
+            values = [list(task.ai_fingerprints.items()) for task in tasks]
+        elif field in _STRING_FIELDS:
+            # Los enums de los esquemas (TaskCategory...) se guardan por su valor
+            values = [getattr(value, 'value', value) for value in (getattr(task, field) for task in tasks)]
+        else:
+            values = [getattr(task, field) for task in tasks]
+        columns.append(pa.array(values, type=schema.field(field).type))
+    return pa.RecordBatch.from_arrays(columns, schema=schema)
+
+
+def write_tasks(tasks, sink, fmt='parquet', batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Escribe las tareas en Parquet (un grupo de filas por lote) o en un fichero Arrow IPC.
+
+    Args:
+        tasks (Iterable[Task]): Tareas a exportar (p. ej. repository.iter_tasks()).
+        sink (str or file): Ruta o fichero binario de destino.
+        fmt (str): 'parquet' o 'arrow'.
+        batch_size (int): Tareas por lote; acota la memoria usada.
+    Returns:
+        int: Número de tareas exportadas.
+    Raises:
+        ValueError: Si el formato no es válido.
+    """
+    require_pyarrow()
+    if fmt not in FORMATS:
+        raise ValueError(f"Formato no válido: {fmt}. Opciones: {', '.join(FORMATS)}")
+    schema = task_schema()
+    writer = pq.ParquetWriter(sink, schema) if fmt == 'parquet' else pa.ipc.new_file(sink, schema)
+    count = 0
+    try:
+        for chunk in _batches(tasks, batch_size):
+            writer.write_batch(_record_batch(chunk, schema))
+            count += len(chunk)
+    finally:
+        writer.close()
+    return count
+
+
+class _ChunkSink:
+    """
+    Fichero de solo escritura que acumula los bytes escritos para entregarlos por trozos (respuestas en streaming).
+    """
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def stream_tasks(tasks, fmt='parquet', batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Genera la exportación por trozos de bytes, uno por lote, para enviarla sin construir el fichero entero.
+    En Arrow se usa el formato de streaming IPC.
+
+    Args:
+        tasks (Iterable[Task]): Tareas a exportar.
+        fmt (str): 'parquet' o 'arrow'.
+        batch_size (int): Tareas por lote.
+    Yields:
+        bytes: Siguiente trozo de la exportación.
+    """
+    require_pyarrow()
+    if fmt not in FORMATS:
+        raise ValueError(f"Formato no válido: {fmt}. Opciones: {', '.join(FORMATS)}")
+    schema = task_schema()
+    sink = _ChunkSink()
+    output = pa.PythonFile(sink, mode='w')
+    writer = pq.ParquetWriter(output, schema) if fmt == 'parquet' else pa.ipc.new_stream(output, schema)
+    for chunk in _batches(tasks, batch_size):
+        writer.write_batch(_record_batch(chunk, schema))
+        data = sink.drain()
+        if data:
+            yield data
+    writer.close()
+    yield sink.drain()
+
+
+def read_tasks(source, fmt=None, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Lee tareas de un fichero Parquet o Arrow (fichero o stream IPC) lote a lote.
+
+    Args:
+        source (str, bytes or file): Ruta, contenido o fichero binario.
+        fmt (str, opcional): 'parquet' o 'arrow'; por defecto se deduce de la extensión de la ruta.
+        batch_size (int): Filas por lote en Parquet.
+    Yields:
+        list[Task]: Tareas de cada lote.
+    Raises:
+        ValueError: Si el formato no es válido.
+    """
+    require_pyarrow()
+    if fmt is None:
+        fmt = detect_format(source) if isinstance(source, str) else 'parquet'
+    if fmt not in FORMATS:
+        raise ValueError(f"Formato no válido: {fmt}. Opciones: {', '.join(FORMATS)}")
+    if isinstance(source, (bytes, bytearray)):
+        source = pa.BufferReader(source)
+    if fmt == 'parquet':
+        batches = pq.ParquetFile(source).iter_batches(batch_size=batch_size)
+    else:
+        batches = _read_ipc(source)
+    for batch in batches:
+        yield _tasks_from_batch(batch)
+
+
+def _read_ipc(source):
+    """
+    Abre un fichero Arrow IPC en formato fichero (con pie, 'ARROW1') o en formato stream.
+    """
+    stream = pa.memory_map(source) if isinstance(source, str) else source
+    try:
+        reader = pa.ipc.open_file(stream)
+    except pa.ArrowInvalid:
+        stream.seek(0)
+        yield from pa.ipc.open_stream(stream)
+        return
+    for index in range(reader.num_record_batches):
+        yield reader.get_batch(index)
+
+
+def _tasks_from_batch(batch):
+    columns = batch.to_pydict()
+    present = [field for field in Task.FIELDS if field in columns]
+    tasks = []
+    for values in zip(*(columns[field] for field in present)):
+        data = dict(zip(present, values))
+        fingerprints = data.get('ai_fingerprints')
+        if isinstance(fingerprints, str):
+            data['ai_fingerprints'] = json.loads(fingerprints)
+        elif fingerprints is not None:
+            data['ai_fingerprints'] = dict(fingerprints)
+        tasks.append(Task(**data))
+    return tasks
+
+
+def _validated(tasks):
+    """
+    Recorre las filas importadas validando cada una con las mismas reglas que POST y PUT /tasks (TaskCreateSchema
+    si no tiene id, TaskSchema si lo tiene). Las filas no válidas y los ids repetidos se omiten y, al terminar,
+    se lanza ValueError: quien consume el iterador (save_tasks_iter) descarta entonces lo escrito.
+
+    Args:
+        tasks (Iterable[Task]): Filas leídas del fichero.
+    Yields:
+        Task: Filas válidas.
+    Raises:
+        ValueError: Al agotar las filas, si alguna no era válida.
+    """
+    invalid = 0
+    details = []
+    seen = set()
+    for row, task in enumerate(tasks, 1):
+        data = task.to_dict()
+        problem = None
+        try:
+            if task.id is None:
+                data.pop('id', None)
+                TaskCreateSchema(**data)
+            else:
+                TaskSchema(**data)
+        except ValidationError as e:
+            problem = ', '.join(str(error['loc'][0]) for error in e.errors())
+        if problem is None and task.id is not None:
+            if task.id in seen:
+                problem = 'id repetido'
+            seen.add(task.id)
+        if problem is None:
+            yield task
+            continue
+        invalid += 1
+        if len(details) < MAX_INVALID_ROWS:
+            details.append(f"fila {row} (id {task.id}): {problem}")
+    if invalid:
+        details = '; '.join(details)
+        raise ValueError(f"Importación rechazada: {invalid} filas no cumplen el esquema de tareas. {details}")
+
+
+def _overlay(existing, incoming):
+    """
+    Yields:
+        Task: Las tareas existentes, sustituidas por la importada con el mismo id, y después las importadas nuevas.
+    """
+    for task in existing:
+        yield incoming.pop(task.id, task)
+    yield from incoming.values()
+
+
+def _numbered(tasks, pending):
+    """
+    Yields:
+        Task: Las tareas con id y, al final, las de pending (y las que lleguen sin id) numeradas tras el mayor id.
+    """
+    last_id = 0
+    for task in tasks:
+        if task.id is None:
+            pending.append(task)
+            continue
+        last_id = max(last_id, task.id)
+        yield task
+    for task in pending:
+        last_id += 1
+        task.id = last_id
+        yield task
+
+
+def import_tasks(repository, source, fmt=None, mode='merge', batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Importa tareas de un fichero columnar al repositorio leyéndolo por lotes y guardando con save_tasks_iter,
+    sin reunir toda la colección en memoria: con 'replace' las filas validadas se escriben según se leen; con
+    'merge' solo se retienen las importadas y las existentes se recorren con iter_tasks sustituyendo las que
+    coinciden por id. Las filas sin id (que se retienen hasta el final) reciben ids tras el mayor id final.
+    Todo ocurre con el write_lock del repositorio, para que ninguna escritura concurrente se pierda.
+
+    Args:
+        repository (ITaskRepository): Repositorio de destino.
+        source (str, bytes or file): Ruta, contenido o fichero binario.
+        fmt (str, opcional): 'parquet' o 'arrow'; por defecto se deduce de la extensión.
+        mode (str): 'merge' (sustituye las tareas con el mismo id y añade el resto) o 'replace'
+            (el repositorio queda solo con las tareas importadas).
+        batch_size (int): Filas por lote de lectura.
+    Returns:
+        int: Número de tareas importadas.
+    Raises:
+        ValueError: Si el modo o el formato no son válidos, o si alguna fila no cumple TaskSchema o repite un id
+            (en ese caso no se guarda ninguna).
+    """
+    if mode not in IMPORT_MODES:
+        raise ValueError(f"Modo de importación no válido: {mode}. Opciones: {', '.join(IMPORT_MODES)}")
+    rows = _validated(itertools.chain.from_iterable(read_tasks(source, fmt=fmt, batch_size=batch_size)))
+    pending = []
+    with repository.write_lock():
+        if mode == 'replace':
+            return repository.save_tasks_iter(_numbered(rows, pending))
+        incoming = {}
+        for task in rows:
+            if task.id is None:
+                pending.append(task)
+            else:
+                incoming[task.id] = task
+        count = len(incoming) + len(pending)
+        repository.save_tasks_iter(_numbered(_overlay(repository.iter_tasks(), incoming), pending))
+        return count
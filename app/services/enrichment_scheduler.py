@@ -0,0 +1,238 @@
+"""
+Enriquecimiento automático en segundo plano: categoriza, estima y audita con IA las tareas nuevas o cuyas
+entradas han cambiado desde su último enriquecimiento, por lotes, con límite de llamadas y solo dentro de una
+ventana horaria de poca carga, para que la latencia de OpenAI no recaiga en las peticiones interactivas.
+"""
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+
+def parse_window(value):
+    """
+    Interpreta una ventana horaria 'HH-HH' (por ejemplo '22-6', que cruza la medianoche).
+
+    Args:
+        value (str): Ventana; vacío o None significa sin restricción.
+    Returns:
+        tuple or None: (hora_inicio, hora_fin) o None.
+    Raises:
+        ValueError: Si el formato no es válido.
+    """
+    if not value:
+        return None
+    try:
+        start, end = (int(part) for part in value.split('-'))
+    except ValueError:
+        raise ValueError(f"Ventana horaria no válida: {value} (formato HH-HH)")
+    if not (0 <= start <= 23 and 0 <= end <= 24):
+        raise ValueError(f"Ventana horaria no válida: {value} (formato HH-HH)")
+    return start, end
+
+
+class EnrichmentScheduler:
+    """
+    Planificador de enriquecimiento de tareas con IA.
+
+    Una tarea necesita una operación si:
+        - categorize: no tiene categoría o su título/descripción cambiaron desde la última categorización.
+        - estimate: nunca se ha enriquecido con IA o sus entradas cambiaron desde la última estimación.
+        - audit: no tiene análisis y plan de riesgos (has_risk_analysis) o sus entradas cambiaron.
+    Las operaciones se ejecutan en ese orden, porque estimate y audit usan la categoría.
+
+    Métodos:
+        pending(): Devuelve las tareas pendientes con sus operaciones.
+        run_once(): Procesa un lote si se está dentro de la ventana.
+        start() / stop(): Arranca o detiene el hilo periódico.
+        status(): Configuración y contadores.
+    """
+    def __init__(self, ai_manager, window=None, batch_size=10, calls_per_minute=30, interval=60,
+                 lock_path=None, now=datetime.now, sleep=time.sleep):
+        """
+        Args:
+            ai_manager (AITaskManager): Gestor de IA (y, a través de él, el TaskManager).
+            window (tuple, opcional): (hora_inicio, hora_fin) en hora local; None para cualquier hora.
+            batch_size (int): Máximo de tareas por lote.
+            calls_per_minute (float): Máximo de operaciones de IA por minuto.
+            interval (float): Segundos entre lotes.
+            lock_path (str, opcional): Fichero de cerrojo para que, con varios workers, solo uno enriquezca.
+            now (callable): Reloj (inyectable en las pruebas).
+            sleep (callable): Espera entre llamadas (inyectable en las pruebas).
+        """
+        self.ai_manager = ai_manager
+        self.window = window
+        self.batch_size = batch_size
+        self.calls_per_minute = calls_per_minute
+        self.interval = interval
+        self.lock_path = lock_path
+        self.now = now
+        self.sleep = sleep
+        self.runs = 0
+        self.operations_done = 0
+        self.errors = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock_file = None
+        self._retry_after = {}
+
+    def in_window(self):
+        """
+        Returns:
+            bool: True si la hora actual está dentro de la ventana configurada.
+        """
+        if self.window is None:
+            return True
+        start, end = self.window
+        hour = self.now().hour
+        if start <= end:
+            return start <= hour < end
+        return hour >= start or hour < end
+
+    def operations_for(self, task):
+        """
+        Args:
+            task (Task): Tarea.
+        Returns:
+            list[str]: Operaciones de IA que necesita la tarea, en orden de ejecución.
+        """
+        def stale(operation):
+            return task.is_ai_stale(operation, self.ai_manager.fingerprint(operation, task))
+
+        operations = []
+        if not task.category or stale('categorize'):
+            operations.append('categorize')
+        if not task.is_ai_enhanced() or stale('estimate'):
+            operations.append('estimate')
+        if not task.has_risk_analysis() or stale('audit'):
+            operations.append('audit')
+        return operations
+
+    def pending(self, limit=None):
+        """
+        Args:
+            limit (int, opcional): Máximo de tareas a devolver.
+        Returns:
+            list[tuple]: Pares (task_id, operaciones) de las tareas que necesitan enriquecimiento.
+        """
+        result = []
+        now = time.monotonic()
+        for task in self.ai_manager.task_manager.iter_all():
+            if self._retry_after.get(task.id, 0) > now:
+                continue
+            operations = self.operations_for(task)
+            if operations:
+                result.append((task.id, operations))
+                if limit is not None and len(result) >= limit:
+                    break
+        return result
+
+    def _call(self, operation, task_id):
+        handlers = {
+            'categorize': self.ai_manager.categorize_task,
+            'estimate': self.ai_manager.estimate_task_effort,
+            'audit': self.ai_manager.audit_task_risks
+        }
+        return handlers[operation](task_id)
+
+    def run_once(self):
+        """
+        Procesa un lote de tareas pendientes respetando la ventana y el límite de llamadas por minuto.
+
+        Returns:
+            int: Operaciones de IA ejecutadas con éxito.
+        """
+        if not self.in_window() or not self._is_leader():
+            return 0
+        self.runs += 1
+        spacing = 60.0 / self.calls_per_minute if self.calls_per_minute else 0.0
+        done = 0
+        first = True
+        for task_id, operations in self.pending(limit=self.batch_size):
+            if self._stop.is_set() or not self.in_window():
+                break
+            for operation in operations:
+                if not first and spacing:
+                    self.sleep(spacing)
+                first = False
+                _task, error = self._call(operation, task_id)
+                if error:
+                    self.errors += 1
+                    logger.warning("Enriquecimiento %s de la tarea %s fallido: %s", operation, task_id, error)
+                    # Las operaciones siguientes dependen de esta: la tarea se aparta unos lotes para no
+                    # bloquear a las demás
+                    self._retry_after[task_id] = time.monotonic() + self.interval * 10
+                    break
+                done += 1
+        self.operations_done += done
+        return done
+
+    def _is_leader(self):
+        """
+        Con varios workers, solo enriquece el que consigue el cerrojo exclusivo del fichero lock_path
+        (fcntl; en plataformas sin fcntl, como Windows con waitress, hay un único proceso).
+        """
+        if self.lock_path is None or self._lock_file is not None:
+            return True
+        try:
+            import fcntl
+        except ImportError:
+            return True
+        lock_file = open(self.lock_path, 'a')
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        return True
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception:
+                logger.exception("Error en el lote de enriquecimiento")
+            self._stop.wait(self.interval)
+
+    def start(self):
+        """
+        Arranca el hilo periódico en el proceso actual (una vez por proceso).
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name='ai-enrichment', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Detiene el hilo periódico y libera el cerrojo.
+        """
+        self._stop.set()
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join()
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    def status(self):
+        """
+        Returns:
+            dict: Configuración, estado y contadores del planificador.
+        """
+        return {
+            "running": self._thread is not None and self._thread.is_alive(),
+            "window": f"{self.window[0]}-{self.window[1]}" if self.window else None,
+            "in_window": self.in_window(),
+            "batch_size": self.batch_size,
+            "calls_per_minute": self.calls_per_minute,
+            "interval": self.interval,
+            "runs": self.runs,
+            "operations_done": self.operations_done,
+            "errors": self.errors,
+            "pid": os.getpid()
+        }
@@ -0,0 +1,257 @@
+"""
+Implementa SerializedTaskCache, una caché en memoria del JSON ya serializado (bytes) de cada tarea y de los
+listados, invalidada con los eventos del ChangeFeed y con los cambios del almacenamiento hechos por otros
+procesos, para que las lecturas repetidas no vuelvan a ejecutar Task.to_dict ni la serialización.
+"""
+import json
+import threading
+
+
+def dumps(data):
+    """
+    Serializa como jsonify en producción (claves ordenadas, ASCII y sin espacios).
+
+    Args:
+        data: Objeto serializable.
+    Returns:
+        bytes: JSON codificado.
+    """
+    return json.dumps(data, ensure_ascii=True, sort_keys=True, separators=(',', ':')).encode('ascii')
+
+
+class SerializedTaskCache:
+    """
+    Dos niveles: los bytes de cada tarea por proyección de campos y los bytes de cada listado (el completo y
+    los filtrados por campo), que se compone uniendo los de sus tareas. Un evento de una tarea invalida solo esa tarea y los listados; los
+    listados se recomponen copiando los bytes del resto de tareas sin volver a serializarlas.
+
+    El ChangeFeed solo publica las escrituras del propio proceso: con varios workers, cada lectura compara
+    antes la firma del almacenamiento (source_signature del repositorio) y, si ha cambiado, vacía la caché.
+    Las escrituras propias también cambian la firma, así que al recibir su evento (que TaskManager publica
+    con el write_lock del repositorio, justo tras guardar) se toma la nueva firma como la vigente, como hace
+    CachedTaskRepository: solo los cambios de otros procesos vacían la caché entera.
+
+    Métodos:
+        rebuild(tasks): Vacía la caché (tras cambios masivos que no pasan por el ChangeFeed).
+        apply(event): Invalida la tarea del evento y los listados.
+        task_bytes(task_id, fields, load_task): Bytes de una tarea.
+        list_bytes(view, fields, load_tasks): Bytes de un listado.
+        compressed(slot, data, encoding, compress): Cuerpo comprimido de unos bytes en caché.
+        get_stats(): Aciertos, fallos y tamaño.
+    """
+    def __init__(self, max_projections=8, source_signature=None, max_views=32):
+        """
+        Args:
+            max_projections (int): Proyecciones de campos distintas que se cachean; las demás se serializan
+                en cada petición, para que valores arbitrarios de ?fields= no hagan crecer la memoria.
+            max_views (int): Listados filtrados distintos que se cachean (además de 'all'), por el mismo motivo.
+            source_signature (callable, opcional): Devuelve la firma actual del almacenamiento
+                (ITaskRepository.source_signature); si cambia entre dos lecturas, la caché se vacía.
+        """
+        self.max_projections = max_projections
+        self.max_views = max_views
+        self.source_signature = source_signature
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+        self._signature = None
+        self._reset()
+
+    def _reset(self):
+        self._tasks = {}
+        self._lists = {}
+        self._projections = set()
+        self._views = set()
+        # Cuerpos comprimidos de los bytes en caché: {task_id o view: {(key, encoding): (bytes, comprimido)}}
+        self._encoded_tasks = {}
+        self._encoded_lists = {}
+        # Cambia con cada invalidación: un valor calculado antes no se guarda si la caché cambió entretanto
+        self._generation = 0
+
+    def rebuild(self, tasks=None):
+        """
+        Vacía la caché; se volverá a llenar con las siguientes lecturas.
+
+        Args:
+            tasks (Iterable[Task], opcional): Ignorado; presente por compatibilidad con los demás índices.
+        """
+        signature = self._current_signature()
+        with self._lock:
+            generation = self._generation
+            self._reset()
+            self._generation = generation + 1
+            self._signature = signature
+
+    def apply(self, event):
+        """
+        Invalida la tarea del evento y todos los listados, y registra la firma que ha dejado la escritura.
+
+        Args:
+            event (ChangeEvent): Evento publicado por el ChangeFeed.
+        """
+        signature = self._current_signature()
+        with self._lock:
+            self._generation += 1
+            self._tasks.pop(event.task_id, None)
+            self._lists.clear()
+            self._encoded_tasks.pop(event.task_id, None)
+            self._encoded_lists.clear()
+            self._signature = signature
+
+    def _check_source(self, signature):
+        """
+        Vacía la caché si el almacenamiento ha cambiado desde la última lectura (debe llamarse con _lock).
+        """
+        if signature == self._signature:
+            return
+        if self._signature is not None:
+            self.reloads += 1
+        generation = self._generation
+        self._reset()
+        self._generation = generation + 1
+        self._signature = signature
+
+    def _current_signature(self):
+        return self.source_signature() if self.source_signature is not None else None
+
+    def _cacheable(self, fields):
+        key = tuple(fields) if fields is not None else None
+        if key in self._projections:
+            return key, True
+        if len(self._projections) < self.max_projections:
+            self._projections.add(key)
+            return key, True
+        return key, False
+
+    def _cacheable_view(self, view):
+        if view == 'all' or view in self._views:
+            return True
+        if len(self._views) < self.max_views:
+            self._views.add(view)
+            return True
+        return False
+
+    def _serialize(self, task, fields, key, cacheable, generation):
+        """
+        Bytes de una tarea leída después de obtener `generation`; solo se guardan si no ha habido
+        invalidaciones desde entonces (la tarea podría ser ya una versión anterior).
+        """
+        with self._lock:
+            cached = self._tasks.get(task.id, {}).get(key)
+        if cached is not None:
+            return cached
+        data = dumps(task.to_dict(fields))
+        if cacheable:
+            with self._lock:
+                if self._generation == generation:
+                    self._tasks.setdefault(task.id, {})[key] = data
+        return data
+
+    def task_bytes(self, task_id, fields, load_task):
+        """
+        Args:
+            task_id (int): ID de la tarea.
+            fields (list[str], opcional): Proyección de campos (ver Task.to_dict).
+            load_task (callable): Devuelve la tarea (o None) si no está en caché.
+        Returns:
+            bytes or None: JSON de la tarea, o None si no existe.
+        """
+        signature = self._current_signature()
+        with self._lock:
+            self._check_source(signature)
+            key, cacheable = self._cacheable(fields)
+            cached = self._tasks.get(task_id, {}).get(key)
+            generation = self._generation
+            if cached is not None:
+                self.hits += 1
+                return cached
+            self.misses += 1
+        task = load_task()
+        if task is None:
+            return None
+        return self._serialize(task, fields, key, cacheable, generation)
+
+    def list_bytes(self, view, fields, load_tasks):
+        """
+        Args:
+            view (str or tuple): Listado: 'all' o los filtros aplicados (por ejemplo, (('status', 'pendiente'),)).
+            fields (list[str], opcional): Proyección de campos.
+            load_tasks (callable): Devuelve las tareas del listado, en orden, si no está en caché.
+        Returns:
+            bytes: JSON del array de tareas.
+        """
+        signature = self._current_signature()
+        with self._lock:
+            self._check_source(signature)
+            key, cacheable = self._cacheable(fields)
+            list_cacheable = cacheable and self._cacheable_view(view)
+            cached = self._lists.get((view, key))
+            generation = self._generation
+            if cached is not None:
+                self.hits += 1
+                return cached
+            self.misses += 1
+        data = b'[' + b','.join(
+            self._serialize(task, fields, key, cacheable, generation) for task in load_tasks()
+        ) + b']'
+        if list_cacheable:
+            with self._lock:
+                if self._generation == generation:
+                    self._lists[(view, key)] = data
+        return data
+
+    def compressed(self, slot, data, encoding, compress):
+        """
+        Cuerpo comprimido de una respuesta servida desde la caché, guardado junto a sus bytes JSON para no volver
+        a comprimirlo en cada petición. Solo se guarda mientras data siga siendo el valor en caché de slot.
+
+        Args:
+            slot (tuple): ('task', task_id, fields) o ('list', view, fields), como en task_bytes y list_bytes.
+            data (bytes): JSON devuelto por task_bytes o list_bytes para esta respuesta.
+            encoding (str): Codificación ('gzip' o 'br').
+            compress (callable): Devuelve el cuerpo comprimido si no está en caché.
+        Returns:
+            bytes: Cuerpo comprimido.
+        """
+        kind, name, fields = slot
+        key = tuple(fields) if fields is not None else None
+        with self._lock:
+            entry = self._encoded(kind, name).get((key, encoding))
+            if entry is not None and entry[0] is data:
+                return entry[1]
+        body = compress()
+        with self._lock:
+            # Solo mientras data siga en caché: unos bytes ya invalidados no dejan variantes huérfanas
+            if self._cached_bytes(kind, name, key) is data:
+                self._encoded(kind, name, create=True)[(key, encoding)] = (data, body)
+        return body
+
+    def _cached_bytes(self, kind, name, key):
+        if kind == 'task':
+            return self._tasks.get(name, {}).get(key)
+        return self._lists.get((name, key))
+
+    def _encoded(self, kind, name, create=False):
+        encoded = self._encoded_tasks if kind == 'task' else self._encoded_lists
+        return encoded.setdefault(name, {}) if create else encoded.get(name, {})
+
+    def get_stats(self):
+        """
+        Returns:
+            dict: Aciertos, fallos, vaciados por cambios del almacenamiento, tareas y listados en caché y bytes
+                ocupados (incluidos los cuerpos comprimidos).
+        """
+        with self._lock:
+            size = sum(len(data) for entries in self._tasks.values() for data in entries.values())
+            size += sum(len(data) for data in self._lists.values())
+            size += sum(len(entry[1]) for entries in self._encoded_tasks.values() for entry in entries.values())
+            size += sum(len(entry[1]) for entries in self._encoded_lists.values() for entry in entries.values())
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'reloads': self.reloads,
+                'tasks': len(self._tasks),
+                'lists': len(self._lists),
+                'bytes': size
+            }
@@ -0,0 +1,290 @@
+"""
+Modelo local (NumPy) para categorizar tareas y estimar su esfuerzo, entrenado con tareas ya
+enriquecidas por OpenAI, y un servicio que lo usa cuando la confianza es alta y recurre a OpenAIService en otro caso.
+"""
+import threading
+import time
+import zlib
+import numpy as np
+from app.schemas.task_schema import TaskCategory
+from app.services.text_analysis import tokenize
+
+
+# Valor de 'model' en los resultados del modelo local (y en ai_fingerprints['<operación>.model'])
+LOCAL_MODEL_NAME = 'local'
+
+
+class LocalTaskModel:
+    """
+    Naive Bayes multinomial para TaskCategory y regresión ridge sobre log(1 + horas) para effort_hours,
+    ambos sobre términos de título y descripción con hashing.
+
+    Métodos:
+        train(tasks): Entrena ambos modelos con las tareas enriquecidas por IA.
+        predict_category(task_data): Devuelve (categoría, confianza) o None.
+        predict_effort(task_data): Devuelve (horas, desviación en escala logarítmica) o None.
+    """
+    CATEGORIES = [category.value for category in TaskCategory]
+    PRIORITIES = ['baja', 'media', 'alta', 'bloqueante']
+
+    def __init__(self, dimensions=256, min_samples=20, alpha=1.0, ridge=1.0):
+        """
+        Args:
+            dimensions (int): Cubos del hashing de términos.
+            min_samples (int): Tareas mínimas para entrenar cada modelo.
+            alpha (float): Suavizado de Laplace del Naive Bayes.
+            ridge (float): Regularización de la regresión.
+        """
+        self.dimensions = dimensions
+        self.min_samples = min_samples
+        self.alpha = alpha
+        self.ridge = ridge
+        self._category_model = None
+        self._effort_model = None
+
+    def _term_counts(self, task_data):
+        terms = tokenize(task_data.get('title')) + tokenize(task_data.get('description'))
+        buckets = [zlib.crc32(term.encode('utf-8')) % self.dimensions for term in terms]
+        return np.bincount(buckets, minlength=self.dimensions).astype(np.float64)
+
+    def _effort_features(self, task_data):
+        counts = self._term_counts(task_data)
+        category = _enum_value(task_data.get('category'))
+        extra = np.zeros(len(self.CATEGORIES) + len(self.PRIORITIES) + 1)
+        if category in self.CATEGORIES:
+            extra[self.CATEGORIES.index(category)] = 1
+        if task_data.get('priority') in self.PRIORITIES:
+            extra[len(self.CATEGORIES) + self.PRIORITIES.index(task_data['priority'])] = 1
+        extra[-1] = 1
+        return np.concatenate([np.log1p(counts), extra])
+
+    @property
+    def is_trained(self):
+        """bool: True si al menos uno de los modelos está entrenado."""
+        return self._category_model is not None or self._effort_model is not None
+
+    def train(self, tasks):
+        """
+        Entrena cada modelo con las tareas cuya categoría o esfuerzo actual es el que devolvió un modelo de
+        OpenAI, según ai_fingerprints (ver _from_openai): no aprende de valores escritos por los usuarios ni de
+        sus propias predicciones anteriores.
+
+        Args:
+            tasks (Iterable[Task]): Tareas candidatas.
+        Returns:
+            dict: Número de muestras usadas por cada modelo.
+        """
+        candidates = [task.to_dict() for task in tasks]
+        categorized = [t for t in candidates if _enum_value(t.get('category')) in self.CATEGORIES
+                       and _from_openai(t, 'categorize', 'category')]
+        estimated = [t for t in candidates if (t.get('effort_hours') or 0) > 0
+                     and _from_openai(t, 'estimate', 'effort_hours')]
+
+        category_model = None
+        labels = sorted({_enum_value(t['category']) for t in categorized})
+        if len(categorized) >= self.min_samples and len(labels) >= 2:
+            X = np.stack([self._term_counts(t) for t in categorized])
+            y = np.array([labels.index(_enum_value(t['category'])) for t in categorized])
+            counts = np.stack([X[y == c].sum(axis=0) for c in range(len(labels))])
+            smoothed = counts + self.alpha
+            category_model = {
+                "labels": labels,
+                "log_prior": np.log(np.bincount(y, minlength=len(labels)) / len(y)),
+                "log_likelihood": np.log(smoothed / smoothed.sum(axis=1, keepdims=True))
+            }
+
+        effort_model = None
+        if len(estimated) >= self.min_samples:
+            X = np.stack([self._effort_features(t) for t in estimated])
+            y = np.log1p(np.array([t['effort_hours'] for t in estimated], dtype=np.float64))
+            penalty = self.ridge * np.eye(X.shape[1])
+            penalty[-1, -1] = 0  # el término independiente no se regulariza
+            inverse = np.linalg.inv(X.T @ X + penalty)
+            weights = inverse @ X.T @ y
+            residuals = y - X @ weights
+            dof = max(len(y) - 1, 1)
+            effort_model = {
+                "weights": weights,
+                "inverse": inverse,
+                "variance": float(residuals @ residuals) / dof
+            }
+        self._category_model, self._effort_model = category_model, effort_model
+        return {"categorize": len(categorized), "estimate": len(estimated)}
+
+    def predict_category(self, task_data):
+        """
+        Args:
+            task_data (dict): Datos de la tarea.
+        Returns:
+            (str, float) or None: Categoría y probabilidad a posteriori, o None si no hay modelo.
+        """
+        model = self._category_model
+        if model is None:
+            return None
+        scores = model["log_likelihood"] @ self._term_counts(task_data) + model["log_prior"]
+        probabilities = np.exp(scores - scores.max())
+        probabilities /= probabilities.sum()
+        best = int(probabilities.argmax())
+        return model["labels"][best], float(probabilities[best])
+
+    def predict_effort(self, task_data):
+        """
+        Args:
+            task_data (dict): Datos de la tarea.
+        Returns:
+            (float, float) or None: Horas estimadas y desviación típica de la predicción
+            en escala log(1 + horas), o None si no hay modelo.
+        """
+        model = self._effort_model
+        if model is None:
+            return None
+        x = self._effort_features(task_data)
+        prediction = float(x @ model["weights"])
+        std = float(np.sqrt(model["variance"] * (1 + x @ model["inverse"] @ x)))
+        return float(np.expm1(prediction)), std
+
+
+class LocalFallbackAIService:
+    """
+    Envuelve OpenAIService: resuelve categorize_task y estimate_effort con LocalTaskModel cuando
+    la confianza supera el umbral y delega en OpenAI en caso contrario. El resto de operaciones se delegan siempre.
+
+    Métodos:
+        categorize_task(task_data): Categoriza en local o con OpenAI.
+        estimate_effort(task_data): Estima en local o con OpenAI.
+        train(tasks): Reentrena el modelo local.
+        metrics(): Tasa de aciertos locales, latencias y tokens ahorrados por operación.
+    """
+    def __init__(self, ai_service, model=None, min_confidence=0.8, max_log_std=0.35):
+        """
+        Args:
+            ai_service (OpenAIService): Servicio remoto al que se recurre.
+            model (LocalTaskModel, opcional): Modelo local (se crea uno vacío si no se indica).
+            min_confidence (float): Probabilidad mínima para aceptar la categoría local.
+            max_log_std (float): Desviación máxima (escala log) para aceptar la estimación local.
+        """
+        self.ai_service = ai_service
+        self.model = model or LocalTaskModel()
+        self.min_confidence = min_confidence
+        self.max_log_std = max_log_std
+        self._lock = threading.Lock()
+        self._metrics = {
+            operation: {"local": 0, "remote": 0, "local_time": 0.0, "remote_time": 0.0, "remote_tokens": 0}
+            for operation in ('categorize', 'estimate')
+        }
+
+    def __getattr__(self, name):
+        if name == 'ai_service':
+            raise AttributeError(name)
+        return getattr(self.ai_service, name)
+
+    def train(self, tasks):
+        """
+        Reentrena el modelo local.
+
+        Args:
+            tasks (Iterable[Task]): Tareas candidatas.
+        Returns:
+            dict: Muestras usadas por cada modelo.
+        """
+        return self.model.train(tasks)
+
+    def _record(self, operation, source, elapsed, tokens=0):
+        with self._lock:
+            metrics = self._metrics[operation]
+            metrics[source] += 1
+            metrics[f"{source}_time"] += elapsed
+            metrics["remote_tokens"] += tokens
+
+    def _local_result(self, result, elapsed, **extra):
+        return {
+            "result": result,
+            "input_tokens": 0,
+            "output_tokens": 0,
+            "total_tokens": 0,
+            "processing_time": round(elapsed, 3),
+            "model": LOCAL_MODEL_NAME,
+            **extra
+        }
+
+    def _remote(self, operation, method, task_data):
+        start = time.perf_counter()
+        result = method(task_data)
+        self._record(operation, "remote", time.perf_counter() - start, result.get("total_tokens") or 0)
+        return result
+
+    def categorize_task(self, task_data):
+        """
+        Clasifica la tarea con el modelo local si su confianza es suficiente; si no, con OpenAI.
+        """
+        start = time.perf_counter()
+        prediction = self.model.predict_category(task_data)
+        if prediction and prediction[1] >= self.min_confidence:
+            elapsed = time.perf_counter() - start
+            self._record('categorize', 'local', elapsed)
+            return self._local_result(prediction[0], elapsed, confidence=round(prediction[1], 4))
+        return self._remote('categorize', self.ai_service.categorize_task, task_data)
+
+    def estimate_effort(self, task_data):
+        """
+        Estima el esfuerzo con el modelo local si su incertidumbre es baja; si no, con OpenAI.
+        """
+        start = time.perf_counter()
+        prediction = self.model.predict_effort(task_data)
+        if prediction and prediction[1] <= self.max_log_std:
+            elapsed = time.perf_counter() - start
+            self._record('estimate', 'local', elapsed)
+            hours = max(1, round(prediction[0]))
+            return self._local_result(str(hours), elapsed, log_std=round(prediction[1], 4))
+        return self._remote('estimate', self.ai_service.estimate_effort, task_data)
+
+    def metrics(self):
+        """
+        Returns:
+            dict: Por operación, llamadas locales y remotas, tasa de aciertos locales,
+            latencia media (ms) y tokens ahorrados estimados con la media de tokens de las llamadas remotas.
+        """
+        with self._lock:
+            report = {}
+            for operation, m in self._metrics.items():
+                total = m["local"] + m["remote"]
+                avg_remote_tokens = m["remote_tokens"] / m["remote"] if m["remote"] else 0
+                report[operation] = {
+                    "local_calls": m["local"],
+                    "remote_calls": m["remote"],
+                    "hit_rate": round(m["local"] / total, 4) if total else 0.0,
+                    "avg_local_latency_ms": round(1000 * m["local_time"] / m["local"], 3) if m["local"] else None,
+                    "avg_remote_latency_ms": round(1000 * m["remote_time"] / m["remote"], 3) if m["remote"] else None,
+                    "tokens_saved": round(avg_remote_tokens * m["local"])
+                }
+            return report
+
+
+def _enum_value(value):
+    return getattr(value, 'value', value)
+
+
+def _from_openai(task_data, operation, field):
+    """
+    Indica si el valor actual del campo es el resultado de la operación que guardó AITaskManager con un modelo
+    de OpenAI: hay huella de la operación, el modelo registrado no es el local y el valor no ha cambiado después.
+
+    Args:
+        task_data (dict): Datos de la tarea.
+        operation (str): 'categorize' o 'estimate'.
+        field (str): Campo de salida ('category' o 'effort_hours').
+    Returns:
+        bool: True si la tarea es una muestra válida para la operación.
+    """
+    fingerprints = task_data.get('ai_fingerprints') or {}
+    model = fingerprints.get(f'{operation}.model')
+    stored = fingerprints.get(f'{operation}.value')
+    if not fingerprints.get(operation) or not model or model == LOCAL_MODEL_NAME or stored is None:
+        return False
+    value = _enum_value(task_data.get(field))
+    if field == 'effort_hours':
+        try:
+            return float(stored) == float(value)
+        except (TypeError, ValueError):
+            return False
+    return stored == str(value)
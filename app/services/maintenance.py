@@ -0,0 +1,328 @@
+"""
+Operaciones de mantenimiento masivo sobre el almacenamiento de tareas (migración entre backends,
+compactación, verificación de integridad, reconstrucción de índices y benchmark). Todas recorren las
+tareas con iter_tasks y las guardan con save_tasks_iter, de modo que la memoria no crece con el número de
+tareas en los backends JSON y particionados. Las usan los comandos de app/cli.py.
+"""
+import os
+import random
+import time
+from pydantic import ValidationError
+from app.schemas.task_schema import TaskSchema
+
+DEFAULT_BATCH_SIZE = 10000
+
+# Antigüedad mínima (segundos) de un temporal para considerarlo abandonado por un guardado interrumpido
+STALE_TEMP_SECONDS = 3600
+
+# Máximo de ejemplos de cada problema que se incluyen en el informe de integridad
+MAX_EXAMPLES = 20
+
+
+def with_progress(tasks, batch_size=DEFAULT_BATCH_SIZE, progress=None):
+    """
+    Recorre las tareas llamando a progress(n) cada batch_size tareas.
+
+    Args:
+        tasks (Iterable[Task]): Tareas.
+        batch_size (int): Tareas entre avisos de progreso.
+        progress (callable, opcional): Función que recibe el número de tareas procesadas.
+    Yields:
+        Task: Las mismas tareas.
+    """
+    count = 0
+    for task in tasks:
+        yield task
+        count += 1
+        if progress is not None and count % batch_size == 0:
+            progress(count)
+
+
+def unwrap_repository(repository):
+    """
+    Recorre los envoltorios (caché, escritura diferida, snapshot) hasta el repositorio que guarda los datos.
+
+    Args:
+        repository (ITaskRepository): Repositorio, posiblemente envuelto.
+    Returns:
+        list[ITaskRepository]: La cadena de repositorios, del exterior al interior.
+    """
+    chain = [repository]
+    while True:
+        inner = getattr(chain[-1], 'repository', None) or getattr(chain[-1], 'source', None)
+        if inner is None:
+            return chain
+        chain.append(inner)
+
+
+def data_files(repository):
+    """
+    Ficheros propios del almacenamiento: el JSON, los shards, el snapshot y el diario de escritura diferida.
+    No incluye otros ficheros del directorio de datos (ledger de uso, límites de peticiones...).
+
+    Args:
+        repository (ITaskRepository): Repositorio configurado.
+    Returns:
+        list[str]: Rutas absolutas, sin repetir.
+    """
+    files = []
+    for layer in unwrap_repository(repository):
+        paths = [shard.filepath for shard in getattr(layer, 'shards', None) or []]
+        paths += [getattr(layer, 'filepath', None), getattr(layer, 'journal_path', None)]
+        for path in paths:
+            if path and os.path.abspath(path) not in files:
+                files.append(os.path.abspath(path))
+    return files
+
+
+def storage_size(files):
+    """
+    Args:
+        files (list[str]): Ficheros del almacenamiento (ver data_files).
+    Returns:
+        int: Bytes ocupados por los que existen.
+    """
+    return sum(os.path.getsize(path) for path in files if os.path.isfile(path))
+
+
+def migrate_storage(source, target, batch_size=DEFAULT_BATCH_SIZE, progress=None):
+    """
+    Copia todas las tareas de un repositorio a otro (que queda solo con ellas).
+
+    Args:
+        source (ITaskRepository): Repositorio de origen.
+        target (ITaskRepository): Repositorio de destino.
+        batch_size (int): Tareas entre avisos de progreso.
+        progress (callable, opcional): Función que recibe el número de tareas copiadas.
+    Returns:
+        int: Número de tareas copiadas.
+    """
+    return target.save_tasks_iter(with_progress(source.iter_tasks(), batch_size, progress))
+
+
+def is_temp_file(name, data_file):
+    """
+    Args:
+        name (str): Nombre de un fichero del directorio de datos.
+        data_file (str): Fichero del almacenamiento.
+    Returns:
+        bool: Si es un temporal de un guardado de data_file ('.<fichero>.XXXX.tmp' de mkstemp o '<fichero>.tmp').
+    """
+    base = os.path.basename(data_file)
+    return name == f'{base}.tmp' or (name.startswith(f'.{base}.') and name.endswith('.tmp'))
+
+
+def remove_stale_temp_files(files, max_age=STALE_TEMP_SECONDS, now=None):
+    """
+    Elimina los temporales de guardados interrumpidos de los ficheros del almacenamiento. Solo se borran los
+    nombres que generan los repositorios, junto a cada fichero y sin recorrer subdirectorios, de modo que un
+    directorio de datos compartido no pierde ficheros de otros programas.
+
+    Args:
+        files (list[str]): Ficheros del almacenamiento (ver data_files).
+        max_age (float): Antigüedad mínima en segundos, para no borrar los de un guardado en curso.
+        now (float, opcional): Instante de referencia (time.time()).
+    Returns:
+        int: Número de temporales eliminados.
+    """
+    now = time.time() if now is None else now
+    removed = 0
+    for directory in sorted({os.path.dirname(path) for path in files}):
+        if not os.path.isdir(directory):
+            continue
+        own = [path for path in files if os.path.dirname(path) == directory]
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            if not any(is_temp_file(name, data_file) for data_file in own) or not os.path.isfile(path):
+                continue
+            if now - os.path.getmtime(path) >= max_age:
+                os.remove(path)
+                removed += 1
+    return removed
+
+
+def compact(repository, batch_size=DEFAULT_BATCH_SIZE, progress=None, shards=None):
+    """
+    Reescribe el almacenamiento: vuelca los cambios pendientes de la escritura diferida, elimina ids
+    duplicados (se conserva la primera aparición), redistribuye los shards y borra temporales abandonados.
+    Con shards, el backend particionado se reparte en ese número de shards.
+
+    Args:
+        repository (ITaskRepository): Repositorio configurado.
+        batch_size (int): Tareas entre avisos de progreso.
+        progress (callable, opcional): Función que recibe el número de tareas procesadas.
+        shards (int, opcional): Nuevo número de shards del backend 'sharded'.
+    Returns:
+        dict: tasks, duplicates_removed, temp_files_removed, bytes_before y bytes_after (solo de los ficheros
+            del almacenamiento).
+    Raises:
+        ValueError: Si se pide redistribuir shards y el almacenamiento no es 'sharded'.
+    """
+    for layer in unwrap_repository(repository):
+        if hasattr(layer, 'flush'):
+            layer.flush()
+    files = data_files(repository)
+    if shards is not None:
+        from app.repositories.sharded_task_repository import ShardedTaskRepository
+        sharded = [layer for layer in unwrap_repository(repository) if isinstance(layer, ShardedTaskRepository)]
+        if not sharded:
+            raise ValueError("--shards solo se aplica al almacenamiento 'sharded'")
+        repository = ShardedTaskRepository(sharded[0].directory, shards=shards, redistribute=True)
+        files += [path for path in data_files(repository) if path not in files]
+    bytes_before = storage_size(files)
+    seen = set()
+    duplicates = 0
+
+    def unique(tasks):
+        nonlocal duplicates
+        for task in tasks:
+            if task.id in seen:
+                duplicates += 1
+                continue
+            seen.add(task.id)
+            yield task
+
+    count = repository.save_tasks_iter(with_progress(unique(repository.iter_tasks()), batch_size, progress))
+    temp_files = remove_stale_temp_files(files)
+    return {
+        "tasks": count,
+        "duplicates_removed": duplicates,
+        "temp_files_removed": temp_files,
+        "bytes_before": bytes_before,
+        "bytes_after": storage_size(files)
+    }
+
+
+def verify_integrity(repository, ledger_tokens=None, fix=False, batch_size=DEFAULT_BATCH_SIZE, progress=None):
+    """
+    Comprueba las tareas: ids ausentes o duplicados, campos que no cumplen TaskSchema y token_usage
+    inferior al consumo registrado en el ledger de uso de IA.
+
+    Con fix=True se eliminan los duplicados (se conserva la primera aparición) y se recalcula token_usage
+    con el total del ledger cuando es mayor (el ledger empezó después que algunas tareas, así que solo se
+    corrigen los contadores que se quedaron cortos). Los campos no válidos solo se informan.
+
+    Args:
+        repository (ITaskRepository): Repositorio configurado.
+        ledger_tokens (dict, opcional): Tokens por tarea del ledger (UsageLedger.tokens_by_task()).
+        fix (bool): Corrige lo que se pueda reescribiendo el almacenamiento.
+        batch_size (int): Tareas entre avisos de progreso.
+        progress (callable, opcional): Función que recibe el número de tareas revisadas.
+    Returns:
+        dict: Contadores y ejemplos de cada problema, y si se ha corregido.
+    """
+    ledger_tokens = ledger_tokens or {}
+    report = {"tasks": 0, "missing_ids": 0, "duplicate_ids": [], "invalid": [], "token_usage_mismatches": [],
+              "fixed": False}
+    seen = set()
+    duplicates = 0
+    invalid = 0
+    mismatches = 0
+    for task in with_progress(repository.iter_tasks(), batch_size, progress):
+        report["tasks"] += 1
+        if not isinstance(task.id, int) or task.id < 1:
+            report["missing_ids"] += 1
+            continue
+        if task.id in seen:
+            duplicates += 1
+            if len(report["duplicate_ids"]) < MAX_EXAMPLES:
+                report["duplicate_ids"].append(task.id)
+            continue
+        seen.add(task.id)
+        try:
+            TaskSchema(**task.to_dict())
+        except ValidationError as e:
+            invalid += 1
+            if len(report["invalid"]) < MAX_EXAMPLES:
+                report["invalid"].append({"id": task.id, "errors": [error['loc'][0] for error in e.errors()]})
+        recorded = ledger_tokens.get(task.id)
+        if recorded is not None and recorded > (task.token_usage or 0):
+            mismatches += 1
+            if len(report["token_usage_mismatches"]) < MAX_EXAMPLES:
+                report["token_usage_mismatches"].append(
+                    {"id": task.id, "token_usage": task.token_usage, "ledger": recorded}
+                )
+    report["duplicates"] = duplicates
+    report["invalid_count"] = invalid
+    report["token_usage_mismatch_count"] = mismatches
+    if fix and (duplicates or mismatches):
+        repository.save_tasks_iter(_fixed(repository.iter_tasks(), ledger_tokens))
+        report["fixed"] = True
+    return report
+
+
+def _fixed(tasks, ledger_tokens):
+    seen = set()
+    for task in tasks:
+        if task.id in seen:
+            continue
+        seen.add(task.id)
+        recorded = ledger_tokens.get(task.id)
+        if recorded is not None and recorded > (task.token_usage or 0):
+            task.token_usage = recorded
+        yield task
+
+
+def rebuild_indexes(repository, indexes):
+    """
+    Regenera el snapshot en disco (si el almacenamiento lo usa) y reconstruye los índices en memoria
+    indicados, midiendo cuánto tarda cada uno.
+
+    Args:
+        repository (ITaskRepository): Repositorio configurado.
+        indexes (dict): Índices por nombre (objetos con rebuild(tasks)).
+    Returns:
+        dict: Segundos empleados por cada índice.
+    """
+    from app.repositories.snapshot_task_repository import SnapshotTaskRepository, write_snapshot
+    timings = {}
+    for layer in unwrap_repository(repository):
+        if isinstance(layer, SnapshotTaskRepository):
+            start = time.perf_counter()
+            write_snapshot(layer.filepath, layer.source.iter_tasks())
+            timings["snapshot"] = round(time.perf_counter() - start, 4)
+    for name, index in indexes.items():
+        start = time.perf_counter()
+        index.rebuild(repository.iter_tasks())
+        timings[name] = round(time.perf_counter() - start, 4)
+    return timings
+
+
+def benchmark(repository, indexes=None, sample=1000, query='tarea', seed=None):
+    """
+    Mide las operaciones de lectura del almacenamiento configurado y la construcción de los índices.
+
+    Args:
+        repository (ITaskRepository): Repositorio configurado.
+        indexes (dict, opcional): Índices por nombre (objetos con rebuild(tasks)); 'search' también se consulta.
+        sample (int): Número de lecturas por id aleatorias.
+        query (str): Consulta para medir la búsqueda.
+        seed (int, opcional): Semilla para elegir los ids.
+    Returns:
+        dict: Para cada operación, segundos totales y operaciones por segundo.
+    """
+    def measure(operations, seconds):
+        return {"operations": operations, "seconds": round(seconds, 4),
+                "ops_per_second": round(operations / seconds, 1) if seconds > 0 else None}
+
+    results = {}
+    start = time.perf_counter()
+    ids = [task.id for task in repository.iter_tasks()]
+    results["iter_tasks"] = measure(len(ids), time.perf_counter() - start)
+    if ids:
+        chosen = random.Random(seed).choices(ids, k=sample)
+        start = time.perf_counter()
+        for task_id in chosen:
+            repository.get_by_id(task_id)
+        results["get_by_id"] = measure(len(chosen), time.perf_counter() - start)
+    for name, index in (indexes or {}).items():
+        start = time.perf_counter()
+        index.rebuild(repository.iter_tasks())
+        results[f"rebuild_{name}"] = measure(len(ids), time.perf_counter() - start)
+    search = (indexes or {}).get('search')
+    if search is not None:
+        start = time.perf_counter()
+        for _ in range(100):
+            search.search(query)
+        results["search"] = measure(100, time.perf_counter() - start)
+    return results
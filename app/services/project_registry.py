@@ -0,0 +1,157 @@
+"""
+Registro de proyectos: cada proyecto tiene su propio repositorio de tareas (con caché en memoria) y su
+TaskManager, que se cargan al primer uso y se descargan cuando el proyecto queda inactivo.
+"""
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from app.repositories.cached_task_repository import CachedTaskRepository
+from app.repositories.factory import create_repository
+from app.schemas.task_schema import PROJECT_NAME_PATTERN
+from app.services.task_manager import TaskManager
+
+_PROJECT_NAME_RE = re.compile(PROJECT_NAME_PATTERN)
+
+
+def is_valid_project_name(name):
+    """
+    Args:
+        name (str): Nombre del proyecto.
+    Returns:
+        bool: True si el nombre es válido (minúsculas, dígitos, '-' y '_'; hasta 64 caracteres).
+    """
+    # fullmatch: con match, el $ del patrón admitiría un salto de línea final ("foo\n")
+    return bool(name) and _PROJECT_NAME_RE.fullmatch(name) is not None
+
+
+class ProjectRegistry:
+    """
+    Mantiene los TaskManager de los proyectos activos. La memoria y la E/S dependen de los proyectos en uso,
+    no del total: un proyecto se carga en su primera petición y se descarga al superar `idle_seconds` sin
+    uso o cuando hay más de `max_active` cargados (se descarta el usado hace más tiempo).
+
+    Métodos:
+        get(project): Devuelve el TaskManager del proyecto, cargándolo si hace falta.
+        exists(project): Indica si el proyecto tiene datos almacenados.
+        evict_idle(): Descarga los proyectos inactivos.
+        stats(): Proyectos cargados y contadores de cargas y descargas.
+        close(): Descarga todos los proyectos.
+    """
+    def __init__(self, data_dir, max_active=32, idle_seconds=600, storage=None, clock=time.monotonic):
+        """
+        Args:
+            data_dir (str): Directorio donde se guarda un fichero (o directorio de shards) por proyecto.
+            max_active (int): Máximo de proyectos cargados a la vez.
+            idle_seconds (float): Segundos sin uso tras los que se descarga un proyecto.
+            storage (str, opcional): Backend de cada proyecto (ver create_repository); por defecto TASKS_STORAGE.
+            clock (callable): Reloj monotónico (inyectable en las pruebas).
+        """
+        self.data_dir = data_dir
+        self.max_active = max_active
+        self.idle_seconds = idle_seconds
+        self.storage = storage
+        self.clock = clock
+        self.loads = 0
+        self.evictions = 0
+        self._active = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(data_dir, exist_ok=True)
+
+    def _data_path(self, project):
+        return os.path.join(self.data_dir, f"{project}.json")
+
+    def exists(self, project):
+        """
+        Args:
+            project (str): Nombre del proyecto.
+        Returns:
+            bool: True si el proyecto está cargado o tiene datos en disco.
+        """
+        base = os.path.splitext(self._data_path(project))[0]
+        return project in self._active or os.path.exists(self._data_path(project)) or \
+            os.path.isdir(f"{base}_shards")
+
+    def get(self, project):
+        """
+        Devuelve el TaskManager del proyecto, cargándolo si no está activo.
+
+        Args:
+            project (str): Nombre del proyecto.
+        Returns:
+            TaskManager: Gestor de tareas del proyecto.
+        Raises:
+            ValueError: Si el nombre del proyecto no es válido.
+        """
+        if not is_valid_project_name(project):
+            raise ValueError('Nombre de proyecto no válido')
+        now = self.clock()
+        evicted = []
+        with self._lock:
+            entry = self._active.get(project)
+            if entry is None:
+                repository = CachedTaskRepository(
+                    create_repository(storage=self.storage, data_path=self._data_path(project))
+                )
+                entry = [TaskManager(repository=repository), now]
+                self._active[project] = entry
+                self.loads += 1
+            entry[1] = now
+            self._active.move_to_end(project)
+            evicted = self._collect_evictions(now)
+        for manager in evicted:
+            self._close(manager)
+        return entry[0]
+
+    def _collect_evictions(self, now):
+        """
+        Retira del registro los proyectos inactivos y los que exceden max_active (debe llamarse con el cerrojo).
+        """
+        evicted = []
+        for project, (manager, last_used) in list(self._active.items()):
+            if now - last_used > self.idle_seconds or len(self._active) > self.max_active:
+                del self._active[project]
+                evicted.append(manager)
+        self.evictions += len(evicted)
+        return evicted
+
+    @staticmethod
+    def _close(manager):
+        close = getattr(manager.repository, 'close', None)
+        if close:
+            close()
+
+    def evict_idle(self):
+        """
+        Descarga los proyectos que llevan más de idle_seconds sin uso.
+
+        Returns:
+            int: Número de proyectos descargados.
+        """
+        with self._lock:
+            evicted = self._collect_evictions(self.clock())
+        for manager in evicted:
+            self._close(manager)
+        return len(evicted)
+
+    def stats(self):
+        """
+        Returns:
+            dict: Proyectos activos (con segundos desde su último uso) y contadores de cargas y descargas.
+        """
+        now = self.clock()
+        with self._lock:
+            active = {project: round(now - last_used, 1) for project, (_, last_used) in self._active.items()}
+        return {"active": active, "loads": self.loads, "evictions": self.evictions,
+                "max_active": self.max_active, "idle_seconds": self.idle_seconds}
+
+    def close(self):
+        """
+        Descarga todos los proyectos.
+        """
+        with self._lock:
+            managers = [manager for manager, _ in self._active.values()]
+            self._active.clear()
+        for manager in managers:
+            self._close(manager)
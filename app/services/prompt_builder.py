@@ -0,0 +1,126 @@
+"""
+Capa de construcción de prompts: normaliza los prompts del sistema de AIConfig, aplica plantillas
+compactas por operación y mide los tokens de los mensajes resultantes.
+"""
+import hashlib
+import re
+from app.config.ai_config import AIConfig
+
+_BLANK_LINES_RE = re.compile(r'\n{3,}')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def compact_system_prompt(text):
+    """
+    Colapsa el relleno de espacios que dejan las continuaciones de línea de SYSTEM_PROMPTS
+    ('Backend  \\' seguido de la sangría) en un único espacio.
+
+    Args:
+        text (str): Prompt original.
+    Returns:
+        str: Prompt normalizado.
+    """
+    return _WHITESPACE_RE.sub(' ', text).strip()
+
+
+def compact_value(value):
+    """
+    Normaliza el texto de un campo de la tarea: espacios al final de línea y bloques de más de una línea
+    en blanco. La sangría se conserva, porque da estructura a las listas anidadas y bloques de código.
+
+    Args:
+        value (object): Valor del campo.
+    Returns:
+        str: Valor normalizado.
+    """
+    text = getattr(value, 'value', value)
+    lines = (line.rstrip() for line in str(text).splitlines())
+    return _BLANK_LINES_RE.sub('\n\n', '\n'.join(lines)).strip('\n')
+
+
+class PromptBuilder:
+    """
+    Construye los mensajes de cada operación a partir de prompts del sistema normalizados (calculados
+    una vez al crear el builder) y de plantillas de usuario que omiten los campos vacíos.
+
+    Métodos:
+        build(operation, task_data): Devuelve los mensajes en formato chat.
+        fingerprint(operation, task_data): Huella de las entradas de la operación.
+        count_tokens(messages): Cuenta los tokens de los mensajes.
+    """
+    # Campos (etiqueta, clave) que cada operación envía en el prompt de usuario
+    USER_TEMPLATES = {
+        'describe': [('Título', 'title'), ('Prioridad', 'priority'), ('Asignada a', 'assigned_to'), ('Categoría', 'category')],
+        'categorize': [('Título', 'title'), ('Descripción', 'description')],
+        'estimate': [('Título', 'title'), ('Descripción', 'description'), ('Categoría', 'category')],
+        'audit': [('Título', 'title'), ('Descripción', 'description'), ('Categoría', 'category')],
+        'mitigation_plan': [('Título', 'title'), ('Descripción', 'description'), ('Categoría', 'category'),
+                            ('Análisis de riesgos', 'risk_analysis')]
+    }
+
+    def __init__(self, tokenizer=None):
+        """
+        Args:
+            tokenizer (object, opcional): Codificador con método encode (p. ej. el de tiktoken) para medir prompts.
+        """
+        self.tokenizer = tokenizer
+        self.system_prompts = {
+            operation: compact_system_prompt(AIConfig.get_system_prompt(operation))
+            for operation in self.USER_TEMPLATES
+        }
+
+    def user_prompt(self, operation, task_data):
+        """
+        Args:
+            operation (str): Operación de IA.
+            task_data (dict): Datos de la tarea.
+        Returns:
+            str: Prompt de usuario con una línea 'Etiqueta: valor' por campo no vacío.
+        """
+        lines = []
+        for label, field in self.USER_TEMPLATES[operation]:
+            value = task_data.get(field)
+            if value is None or str(getattr(value, 'value', value)).strip() == '':
+                continue
+            lines.append(f"{label}: {compact_value(value)}")
+        return '\n'.join(lines)
+
+    def build(self, operation, task_data):
+        """
+        Args:
+            operation (str): Operación de IA ('describe', 'categorize', 'estimate', 'audit', 'mitigation_plan').
+            task_data (dict): Datos de la tarea.
+        Returns:
+            list: Mensajes system y user para la API de chat.
+        """
+        return [
+            {"role": "system", "content": self.system_prompts[operation]},
+            {"role": "user", "content": self.user_prompt(operation, task_data)}
+        ]
+
+    def fingerprint(self, operation, task_data):
+        """
+        Huella de las entradas de una operación: cambia si lo hace alguno de los campos que usa su plantilla
+        o su prompt del sistema, y no le afectan los demás campos de la tarea.
+
+        Args:
+            operation (str): Operación de IA.
+            task_data (dict): Datos de la tarea.
+        Returns:
+            str: Hash SHA-256 abreviado (16 caracteres hexadecimales).
+        """
+        payload = '\x00'.join((operation, self.system_prompts[operation], self.user_prompt(operation, task_data)))
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+    def count_tokens(self, messages):
+        """
+        Args:
+            messages (list): Mensajes en formato chat.
+        Returns:
+            int: Tokens del contenido de los mensajes.
+        Raises:
+            ValueError: Si el builder no tiene tokenizador.
+        """
+        if self.tokenizer is None:
+            raise ValueError('PromptBuilder sin tokenizador')
+        return sum(len(self.tokenizer.encode(message["content"])) for message in messages)
@@ -0,0 +1,132 @@
+"""
+Implementa SearchIndex, un índice invertido en memoria sobre título, descripción y campos de riesgo,
+actualizado de forma incremental con los eventos del ChangeFeed y con ranking BM25.
+"""
+import heapq
+import math
+import threading
+from collections import Counter
+from app.services.text_analysis import tokenize
+
+
+class SearchIndex:
+    """
+    Índice invertido de tareas con ranking BM25 y paginación.
+
+    Métodos:
+        rebuild(tasks): Reconstruye el índice desde cero.
+        apply(event): Aplica un ChangeEvent de forma incremental.
+        search(query, page, per_page): Busca y devuelve resultados ordenados por relevancia.
+    """
+    # Peso de cada campo en la frecuencia de términos (el título pesa más que el resto)
+    FIELD_WEIGHTS = {
+        'title': 3,
+        'description': 1,
+        'risk_analysis': 1,
+        'risk_mitigation': 1
+    }
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._postings = {}
+        self._doc_terms = {}
+        self._doc_lengths = {}
+        self._titles = {}
+        self._total_length = 0
+
+    def _analyze(self, task_data):
+        """
+        Calcula la frecuencia ponderada de cada término de la tarea.
+        """
+        frequencies = Counter()
+        for field, weight in self.FIELD_WEIGHTS.items():
+            for term in tokenize(task_data.get(field)):
+                frequencies[term] += weight
+        return frequencies
+
+    def _add(self, task_data):
+        task_id = task_data["id"]
+        frequencies = self._analyze(task_data)
+        for term, tf in frequencies.items():
+            self._postings.setdefault(term, {})[task_id] = tf
+        length = sum(frequencies.values())
+        self._doc_terms[task_id] = tuple(frequencies)
+        self._doc_lengths[task_id] = length
+        self._titles[task_id] = task_data.get("title")
+        self._total_length += length
+
+    def _remove(self, task_id):
+        for term in self._doc_terms.pop(task_id, ()):
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(task_id, None)
+                if not postings:
+                    del self._postings[term]
+        self._total_length -= self._doc_lengths.pop(task_id, 0)
+        self._titles.pop(task_id, None)
+
+    def rebuild(self, tasks):
+        """
+        Reconstruye el índice recorriendo todas las tareas.
+
+        Args:
+            tasks (Iterable[Task]): Tareas actuales.
+        """
+        with self._lock:
+            self._reset()
+            for task in tasks:
+                self._add(task.to_dict())
+
+    def apply(self, event):
+        """
+        Reindexa solo la tarea afectada por un ChangeEvent.
+
+        Args:
+            event (ChangeEvent): Evento publicado por el ChangeFeed.
+        """
+        with self._lock:
+            self._remove(event.task_id)
+            if event.task:
+                self._add(event.task)
+
+    def search(self, query, page=1, per_page=20):
+        """
+        Busca tareas que contengan alguno de los términos de la consulta, ordenadas por BM25.
+
+        Args:
+            query (str): Texto de búsqueda.
+            page (int): Página solicitada (empieza en 1).
+            per_page (int): Resultados por página.
+        Returns:
+            (int, list[dict]): Total de coincidencias y resultados de la página ({id, title, score}).
+        """
+        terms = set(tokenize(query))
+        with self._lock:
+            doc_count = len(self._doc_lengths)
+            if not terms or not doc_count:
+                return 0, []
+            avg_length = self._total_length / doc_count or 1
+            doc_lengths = self._doc_lengths
+            base = self.K1 * (1 - self.B)
+            slope = self.K1 * self.B / avg_length
+            scores = {}
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                weight = idf * (self.K1 + 1)
+                for task_id, tf in postings.items():
+                    score = weight * tf / (tf + base + slope * doc_lengths[task_id])
+                    scores[task_id] = scores.get(task_id, 0.0) + score
+            top = heapq.nlargest(page * per_page, scores.items(), key=lambda item: (item[1], -item[0]))
+            results = [
+                {"id": task_id, "title": self._titles.get(task_id), "score": round(score, 4)}
+                for task_id, score in top[(page - 1) * per_page:]
+            ]
+        return len(scores), results
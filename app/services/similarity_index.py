@@ -0,0 +1,171 @@
+"""
+Implementa SimilarityIndex, un detector local de tareas casi duplicadas basado en vectores TF-IDF
+con hashing de términos (NumPy) y similitud coseno vectorizada, sin llamadas a OpenAI.
+"""
+import threading
+import zlib
+import numpy as np
+from app.services.text_analysis import tokenize
+
+
+class SimilarityIndex:
+    """
+    Matriz de vectores TF (sublineal) por tarea, mantenida de forma incremental con el ChangeFeed.
+    El IDF se calcula en cada consulta a partir de las frecuencias de documento acumuladas.
+
+    Métodos:
+        rebuild(tasks): Reconstruye la matriz desde cero.
+        apply(event): Aplica un ChangeEvent de forma incremental.
+        similar(task_id, k, min_score): Devuelve las k tareas más parecidas a una tarea.
+    """
+    # Filas de la matriz procesadas por bloque al recalcular normas (limita la memoria temporal)
+    NORM_CHUNK_ROWS = 8192
+
+    def __init__(self, dimensions=512, initial_capacity=1024):
+        """
+        Inicializa el índice.
+
+        Args:
+            dimensions (int): Número de cubos del hashing de términos (ancho de cada vector).
+            initial_capacity (int): Filas reservadas inicialmente; la matriz crece al doble cuando se llena.
+        """
+        self.dimensions = dimensions
+        self._initial_capacity = initial_capacity
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._matrix = np.zeros((self._initial_capacity, self.dimensions), dtype=np.float32)
+        self._ids = np.full(self._initial_capacity, -1, dtype=np.int64)
+        self._df = np.zeros(self.dimensions, dtype=np.int64)
+        self._rows = {}
+        self._titles = {}
+        self._free_rows = []
+        self._size = 0
+        self._norms = None
+
+    def _vectorize(self, task_data):
+        """
+        Convierte título y descripción en un vector de términos y bigramas con TF sublineal (1 + log tf).
+        """
+        terms = tokenize(task_data.get('title')) + tokenize(task_data.get('description'))
+        features = terms + [f"{a} {b}" for a, b in zip(terms, terms[1:])]
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        if features:
+            buckets = np.fromiter(
+                (zlib.crc32(feature.encode('utf-8')) % self.dimensions for feature in features),
+                dtype=np.int64,
+                count=len(features)
+            )
+            counts = np.bincount(buckets, minlength=self.dimensions)
+            present = counts > 0
+            vector[present] = 1 + np.log(counts[present])
+        return vector
+
+    def _allocate_row(self):
+        if self._free_rows:
+            return self._free_rows.pop()
+        if self._size == len(self._ids):
+            capacity = len(self._ids) * 2
+            matrix = np.zeros((capacity, self.dimensions), dtype=np.float32)
+            matrix[:self._size] = self._matrix[:self._size]
+            ids = np.full(capacity, -1, dtype=np.int64)
+            ids[:self._size] = self._ids[:self._size]
+            self._matrix, self._ids = matrix, ids
+        self._size += 1
+        return self._size - 1
+
+    def _add(self, task_data):
+        row = self._allocate_row()
+        vector = self._vectorize(task_data)
+        self._matrix[row] = vector
+        self._ids[row] = task_data['id']
+        self._df += vector > 0
+        self._rows[task_data['id']] = row
+        self._titles[task_data['id']] = task_data.get('title')
+        self._norms = None
+
+    def _remove(self, task_id):
+        row = self._rows.pop(task_id, None)
+        if row is None:
+            return
+        self._df -= self._matrix[row] > 0
+        self._matrix[row] = 0
+        self._ids[row] = -1
+        self._titles.pop(task_id, None)
+        self._free_rows.append(row)
+        self._norms = None
+
+    def rebuild(self, tasks):
+        """
+        Reconstruye la matriz recorriendo todas las tareas.
+
+        Args:
+            tasks (Iterable[Task]): Tareas actuales.
+        """
+        with self._lock:
+            self._reset()
+            for task in tasks:
+                self._add(task.to_dict())
+
+    def apply(self, event):
+        """
+        Revectoriza solo la tarea afectada por un ChangeEvent.
+
+        Args:
+            event (ChangeEvent): Evento publicado por el ChangeFeed.
+        """
+        with self._lock:
+            self._remove(event.task_id)
+            if event.task:
+                self._add(event.task)
+
+    def _weighted_norms(self, weights):
+        """
+        Normas de las filas ponderadas por IDF, cacheadas hasta la siguiente escritura.
+        """
+        if self._norms is None:
+            norms = np.empty(self._size, dtype=np.float32)
+            for start in range(0, self._size, self.NORM_CHUNK_ROWS):
+                chunk = self._matrix[start:min(start + self.NORM_CHUNK_ROWS, self._size)]
+                norms[start:start + len(chunk)] = np.sqrt(np.square(chunk) @ weights)
+            self._norms = norms
+        return self._norms
+
+    def similar(self, task_id, k=5, min_score=0.0):
+        """
+        Devuelve las k tareas con mayor similitud coseno TF-IDF respecto a una tarea.
+
+        Args:
+            task_id (int): ID de la tarea de referencia.
+            k (int): Número máximo de resultados.
+            min_score (float): Similitud mínima (0-1) para incluir un resultado.
+        Returns:
+            list[dict] or None: Resultados ({id, title, score}) o None si la tarea no está indexada.
+        """
+        with self._lock:
+            row = self._rows.get(task_id)
+            if row is None:
+                return None
+            doc_count = len(self._rows)
+            idf = np.log((1 + doc_count) / (1 + self._df)).astype(np.float32) + 1
+            weights = idf * idf
+            norms = self._weighted_norms(weights)
+            query = self._matrix[row]
+            query_norm = norms[row]
+            if query_norm == 0:
+                return []
+            with np.errstate(divide='ignore', invalid='ignore'):
+                scores = (self._matrix[:self._size] @ (query * weights)) / (norms * query_norm)
+            scores[~np.isfinite(scores)] = -1
+            scores[row] = -1
+            k = min(k, self._size)
+            if k <= 0:
+                return []
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top], kind='stable')]
+            return [
+                {"id": int(self._ids[i]), "title": self._titles.get(int(self._ids[i])), "score": round(float(scores[i]), 4)}
+                for i in top
+                if self._ids[i] >= 0 and scores[i] >= min_score and scores[i] > 0
+            ]
@@ -0,0 +1,67 @@
+"""
+Implementa SingleFlight, que agrupa llamadas concurrentes con la misma clave en una única ejecución
+cuyo resultado comparten todos los llamantes.
+"""
+import threading
+
+
+class _Call:
+    """Ejecución en curso de una clave."""
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Deduplicación de llamadas en vuelo: mientras una llamada con una clave está en ejecución,
+    las llamadas concurrentes con la misma clave esperan y reciben su resultado (o su excepción).
+
+    Métodos:
+        do(key, fn): Ejecuta fn o espera al resultado de la ejecución en curso con la misma clave.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        """
+        Ejecuta fn() una sola vez por clave entre llamadas concurrentes.
+
+        Args:
+            key (hashable): Clave que identifica la operación.
+            fn (callable): Función sin argumentos a ejecutar.
+        Returns:
+            (object, bool): Resultado de fn y si fue compartido con otra llamada (True para quienes esperaron).
+        Raises:
+            Exception: La excepción lanzada por fn, propagada también a quienes esperaban.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    def in_flight(self):
+        """
+        Returns:
+            int: Número de claves con una ejecución en curso.
+        """
+        with self._lock:
+            return len(self._calls)
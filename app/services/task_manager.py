@@ -2,10 +2,11 @@
 Implementa la clase TaskManager, responsable de la lógica de negocio y la gestión de tareas,
 incluyendo la persistencia en archivo JSON.
 """
-import os
+from app import tracing
 from app.models.task import Task
-from app.repositories.json_task_repository import JsonTaskRepository
+from app.repositories.factory import create_repository
 from app.repositories.i_task_repository import ITaskRepository
+from app.services.change_feed import ChangeFeed
 
 class TaskManager:
     """
@@ -13,23 +14,43 @@ class TaskManager:
 
     Métodos:
         get_all(): Devuelve todas las tareas.
+        iter_all(): Recorre todas las tareas sin materializarlas a la vez (según el repositorio).
         get_by_id(task_id): Devuelve una tarea por su ID.
         create(task): Crea una nueva tarea.
         update(task_id, updated_task): Actualiza una tarea existente.
         delete(task_id): Elimina una tarea por su ID.
     """
-    def __init__(self, repository: ITaskRepository = None):
+    def __init__(self, repository: ITaskRepository = None, change_feed: ChangeFeed = None):
         """
         Inicializa el TaskManager con un repositorio de tareas.
 
         Args:
-            repository (ITaskRepository, opcional): Repositorio de tareas a utilizar. Si no se proporciona, se usa JsonTaskRepository por defecto.
+            repository (ITaskRepository, opcional): Repositorio de tareas a utilizar. Si no se proporciona, se usa el
+                configurado con TASKS_STORAGE y TASKS_DATA_PATH (por defecto JsonTaskRepository sobre app/data/tasks.json).
+            change_feed (ChangeFeed, opcional): Hub donde se publican las mutaciones de tareas.
         """
         if repository is None:
-            data_path = os.path.join(os.path.dirname(__file__), '../data/tasks.json')
-            repository = JsonTaskRepository(os.path.abspath(data_path))
+            repository = create_repository()
         self.repository = repository
+        self.change_feed = change_feed
 
+    def _publish(self, type, task_id, task=None, previous=None, source=None):
+        """
+        Publica una mutación en el ChangeFeed, si hay uno configurado. Se llama con el write_lock del
+        repositorio tras una escritura que ha llegado a guardarse, de modo que los índices (estadísticas,
+        búsqueda, similitud) reciben solo cambios persistidos y en el mismo orden en que se guardaron.
+        """
+        if self.change_feed is None:
+            return
+        self.change_feed.publish(
+            type,
+            task_id,
+            task=task.to_dict() if task else None,
+            previous=previous.to_dict() if previous else None,
+            source=source
+        )
+
+    @tracing.traced('TaskManager.get_all')
     def get_all(self):
         """
         Devuelve todas las tareas almacenadas.
@@ -39,6 +60,17 @@ class TaskManager:
         """
         return self.repository.load_tasks()
 
+    def iter_all(self):
+        """
+        Recorre todas las tareas. Con repositorios particionados se cargan partición a partición,
+        útil para reconstruir índices sin tener la colección completa en memoria.
+
+        Returns:
+            Iterator[Task]: Iterador de tareas.
+        """
+        return tracing.traced_iter('TaskManager.iter_all', self.repository.iter_tasks(), count_attribute='tasks.count')
+
+    @tracing.traced('TaskManager.get_by_id')
     def get_by_id(self, task_id):
         """
         Devuelve una tarea por su ID.
@@ -48,12 +80,9 @@ class TaskManager:
         Returns:
             Task or None: Tarea encontrada o None si no existe.
         """
-        tasks = self.repository.load_tasks()
-        for task in tasks:
-            if task.id == task_id:
-                return task
-        return None
+        return self.repository.get_by_id(task_id)
 
+    @tracing.traced('TaskManager.create')
     def create(self, task):
         """
         Crea una nueva tarea y la almacena. Si el id es None, lo autogenera.
@@ -63,32 +92,31 @@ class TaskManager:
         Returns:
             Task: La tarea creada.
         """
-        tasks = self.repository.load_tasks()
-        if task.id is None:
-            max_id = max((t.id for t in tasks), default=0)
-            task.id = max_id + 1
-        tasks.append(task)
-        self.repository.save_tasks(tasks)
+        with self.repository.write_lock():
+            task = self.repository.add_task(task)
+            self._publish('created', task.id, task=task)
         return task
 
-    def update(self, task_id, updated_task):
+    @tracing.traced('TaskManager.update')
+    def update(self, task_id, updated_task, source=None):
         """
         Actualiza una tarea existente.
 
         Args:
             task_id (int): ID de la tarea a actualizar.
             updated_task (Task): Nueva información de la tarea.
+            source (str, opcional): Origen del cambio que se publica en el ChangeFeed (por ejemplo, 'ai:audit').
         Returns:
             Task or None: Tarea actualizada o None si no existe.
         """
-        tasks = self.repository.load_tasks()
-        for idx, task in enumerate(tasks):
-            if task.id == task_id:
-                tasks[idx] = updated_task
-                self.repository.save_tasks(tasks)
-                return updated_task
-        return None
+        with self.repository.write_lock():
+            previous = self.repository.update_task(task_id, updated_task)
+            if previous is None:
+                return None
+            self._publish('updated', task_id, task=updated_task, previous=previous, source=source)
+        return updated_task
 
+    @tracing.traced('TaskManager.delete')
     def delete(self, task_id):
         """
         Elimina una tarea por su ID.
@@ -98,9 +126,9 @@ class TaskManager:
         Returns:
             bool: True si la tarea fue eliminada, False si no existía.
         """
-        tasks = self.repository.load_tasks()
-        new_tasks = [task for task in tasks if task.id != task_id]
-        if len(new_tasks) == len(tasks):
-            return False
-        self.repository.save_tasks(new_tasks)
+        with self.repository.write_lock():
+            previous = self.repository.delete_task(task_id)
+            if previous is None:
+                return False
+            self._publish('deleted', task_id, previous=previous)
         return True
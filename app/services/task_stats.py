@@ -0,0 +1,117 @@
+"""
+Implementa TaskStats, un agregado de estadísticas de tareas mantenido de forma incremental
+a partir de los eventos del ChangeFeed, para servir informes en O(1) sin recorrer todas las tareas.
+"""
+import threading
+from enum import Enum
+from app.models.task import Task
+
+# Valor usado para agrupar las tareas cuyo campo de agrupación está vacío
+UNSPECIFIED = "sin_especificar"
+
+
+class TaskStats:
+    """
+    Contadores y sumas de effort_hours y token_usage agrupados por estado, prioridad, categoría,
+    persona asignada y estado de enriquecimiento IA.
+
+    Métodos:
+        rebuild(tasks): Recalcula los agregados desde cero.
+        apply(event): Aplica un ChangeEvent de forma incremental.
+        snapshot(group_by): Devuelve una copia de los agregados.
+    """
+    GROUP_FIELDS = ('status', 'priority', 'category', 'assigned_to')
+    AI_FIELDS = ('ai_enhanced', 'risk_complete')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._totals = self._empty_bucket()
+        self._groups = {name: {} for name in self.GROUP_FIELDS + self.AI_FIELDS}
+
+    @staticmethod
+    def _empty_bucket():
+        return {"count": 0, "effort_hours": 0.0, "token_usage": 0}
+
+    @staticmethod
+    def _add(bucket, task, sign):
+        bucket["count"] += sign
+        bucket["effort_hours"] += sign * (task.effort_hours or 0)
+        bucket["token_usage"] += sign * (task.token_usage or 0)
+
+    def _contribute(self, task_data, sign):
+        """
+        Suma (sign=1) o resta (sign=-1) la contribución de una tarea a todos los agregados.
+        """
+        task = Task.from_dict(task_data)
+        self._add(self._totals, task, sign)
+        summary = task.get_ai_fields_summary()
+        keys = {name: getattr(task, name) for name in self.GROUP_FIELDS}
+        keys.update({name: summary[name] for name in self.AI_FIELDS})
+        for name, value in keys.items():
+            if isinstance(value, bool):
+                value = str(value).lower()
+            elif isinstance(value, Enum):
+                value = value.value
+            elif value is None or value == "":
+                value = UNSPECIFIED
+            group = self._groups[name]
+            bucket = group.setdefault(str(value), self._empty_bucket())
+            self._add(bucket, task, sign)
+            if bucket["count"] <= 0:
+                del group[str(value)]
+
+    def rebuild(self, tasks):
+        """
+        Recalcula los agregados recorriendo todas las tareas (solo al arrancar o reindexar).
+
+        Args:
+            tasks (Iterable[Task]): Tareas actuales.
+        """
+        with self._lock:
+            self._reset()
+            for task in tasks:
+                self._contribute(task.to_dict(), 1)
+
+    def apply(self, event):
+        """
+        Actualiza los agregados con un ChangeEvent: resta el estado previo y suma el nuevo.
+
+        Args:
+            event (ChangeEvent): Evento publicado por el ChangeFeed.
+        """
+        with self._lock:
+            if event.previous:
+                self._contribute(event.previous, -1)
+            if event.task:
+                self._contribute(event.task, 1)
+
+    def snapshot(self, group_by=None):
+        """
+        Devuelve una copia de los agregados.
+
+        Args:
+            group_by (list[str], opcional): Agrupaciones a incluir. Por defecto, todas.
+        Returns:
+            dict: Totales y agregados por grupo.
+        Raises:
+            ValueError: Si se pide una agrupación desconocida.
+        """
+        names = group_by or list(self._groups)
+        unknown = [name for name in names if name not in self._groups]
+        if unknown:
+            raise ValueError(f"Agrupación no soportada: {', '.join(unknown)}")
+        with self._lock:
+            return {
+                "totals": self._round(self._totals),
+                "groups": {
+                    name: {key: self._round(bucket) for key, bucket in self._groups[name].items()}
+                    for name in names
+                }
+            }
+
+    @staticmethod
+    def _round(bucket):
+        return {**bucket, "effort_hours": round(bucket["effort_hours"], 2)}
@@ -0,0 +1,63 @@
+"""
+Utilidades de análisis de texto en español: normalización de acentos, tokenización,
+palabras vacías y un stemming ligero de plurales. Las comparten la búsqueda y la detección de similitud.
+"""
+import re
+import unicodedata
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Palabras vacías del español (ya sin acentos) que no aportan a la búsqueda
+SPANISH_STOPWORDS = frozenset("""
+a al algo algunas algunos ante antes como con contra cual cuando de del desde donde durante e el
+ella ellas ellos en entre era es esa esas ese eso esos esta estas este esto estos fue ha hay la
+las le les lo los mas me mi mientras muy no nos o otra otras otro otros para pero por porque que
+se sea ser si sin sobre su sus tambien te tiene tienen todo todos tu un una unas uno unos y ya
+""".split())
+
+
+def fold_accents(text):
+    """
+    Pasa el texto a minúsculas y elimina acentos y diacríticos ('Análisis' -> 'analisis').
+
+    Args:
+        text (str): Texto original.
+    Returns:
+        str: Texto normalizado.
+    """
+    decomposed = unicodedata.normalize('NFKD', text.casefold())
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def stem(token):
+    """
+    Stemming ligero de plurales en español ('tareas' -> 'tarea', 'funciones' -> 'funcion').
+
+    Args:
+        token (str): Token normalizado.
+    Returns:
+        str: Raíz aproximada del token.
+    """
+    if len(token) > 4 and token.endswith('es') and token[-3] in 'nrld':
+        return token[:-2]
+    if len(token) > 3 and token.endswith('s'):
+        return token[:-1]
+    return token
+
+
+def tokenize(text):
+    """
+    Convierte un texto en la lista de términos indexables (sin acentos, sin palabras vacías y con stemming).
+
+    Args:
+        text (str): Texto a tokenizar (puede ser None).
+    Returns:
+        list[str]: Términos en orden de aparición.
+    """
+    if not text:
+        return []
+    return [
+        stem(token)
+        for token in _TOKEN_RE.findall(fold_accents(text))
+        if len(token) > 1 and token not in SPANISH_STOPWORDS
+    ]
@@ -0,0 +1,542 @@
+"""
+Trazas distribuidas compatibles con OpenTelemetry: spans de cada petición HTTP, de los métodos de TaskManager,
+de las lecturas y escrituras del repositorio y de las llamadas a OpenAI, con atributos como task.id,
+ai.operation, ai.model y los tokens consumidos.
+
+El exportador se elige con TRACING_EXPORTER:
+- '' (por defecto): trazas desactivadas; span() no hace nada y apenas cuesta.
+- 'memory': los spans terminados se guardan en memoria (InMemorySpanExporter), útil en pruebas.
+- 'file': cada span terminado se escribe como una línea JSON en TRACING_FILE_PATH.
+- 'otel': se delega en el SDK de OpenTelemetry (paquete opcional `opentelemetry-api`), que exporta según su
+  propia configuración (OTLP, consola...).
+
+Los identificadores siguen el formato de W3C Trace Context y las peticiones con cabecera `traceparent`
+continúan la traza del cliente.
+"""
+import contextvars
+import functools
+import inspect
+import json
+import os
+import random
+import re
+import threading
+import time
+
+try:
+    from opentelemetry import trace as otel_trace
+except ImportError:
+    otel_trace = None
+
+TRACING_EXPORTERS = ('memory', 'file', 'otel')
+DEFAULT_FILE_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), 'data', 'traces.jsonl'))
+
+_TRACEPARENT_RE = re.compile(r'^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$')
+
+# Span activo del hilo o petición en curso
+_current = contextvars.ContextVar('current_span', default=None)
+
+
+class Span:
+    """
+    Operación medida, con el mismo modelo de datos que un span de OpenTelemetry (ids de traza y de span,
+    span padre, tiempos en nanosegundos, atributos y estado).
+    """
+    def __init__(self, name, trace_id, parent_id=None, kind='INTERNAL', attributes=None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = f'{random.getrandbits(64):016x}'
+        self.parent_id = parent_id
+        self.kind = kind
+        self.attributes = dict(attributes or {})
+        self.status = 'UNSET'
+        self.status_description = None
+        self.start_time = time.time_ns()
+        self.end_time = None
+
+    def set_attribute(self, key, value):
+        """
+        Args:
+            key (str): Nombre del atributo (convención de OpenTelemetry, p. ej. 'http.status_code').
+            value: Valor (str, bool, int o float); None se ignora.
+        """
+        if value is not None:
+            self.attributes[key] = value
+
+    def record_exception(self, exception):
+        """
+        Marca el span como erróneo con el tipo y el mensaje de la excepción.
+        """
+        self.status = 'ERROR'
+        self.status_description = f'{type(exception).__name__}: {exception}'
+        self.attributes['exception.type'] = type(exception).__name__
+
+    def set_error(self, description):
+        """
+        Marca el span como erróneo sin excepción (p. ej. un error devuelto por la API de OpenAI).
+        """
+        self.status = 'ERROR'
+        self.status_description = description
+
+    @property
+    def duration_ms(self):
+        return round(((self.end_time or time.time_ns()) - self.start_time) / 1e6, 3)
+
+    def to_dict(self):
+        """
+        Returns:
+            dict: Representación JSON del span, con los nombres de campo de OpenTelemetry.
+        """
+        return {
+            'name': self.name,
+            'context': {'trace_id': self.trace_id, 'span_id': self.span_id},
+            'parent_id': self.parent_id,
+            'kind': self.kind,
+            'start_time': self.start_time,
+            'end_time': self.end_time,
+            'duration_ms': self.duration_ms,
+            'attributes': self.attributes,
+            'status': {'status_code': self.status, 'description': self.status_description}
+        }
+
+
+class _NoopSpan:
+    """
+    Span que no registra nada: se usa con las trazas desactivadas o en trazas no muestreadas.
+    """
+    def set_attribute(self, key, value):
+        pass
+
+    def record_exception(self, exception):
+        pass
+
+    def set_error(self, description):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class _OtelSpan:
+    """
+    Adapta un span del SDK de OpenTelemetry a la interfaz de Span (set_error no existe en OpenTelemetry).
+    """
+    __slots__ = ('span',)
+
+    def __init__(self, span):
+        self.span = span
+
+    def set_attribute(self, key, value):
+        if value is not None:
+            self.span.set_attribute(key, value)
+
+    def record_exception(self, exception):
+        self.span.record_exception(exception)
+        self.set_error(f'{type(exception).__name__}: {exception}')
+
+    def set_error(self, description):
+        self.span.set_status(otel_trace.Status(otel_trace.StatusCode.ERROR, description))
+
+
+class InMemorySpanExporter:
+    """
+    Guarda los spans terminados en una lista (como el exportador en memoria del SDK de OpenTelemetry).
+    """
+    def __init__(self, max_spans=10000):
+        self.max_spans = max_spans
+        self._spans = []
+        self._lock = threading.Lock()
+
+    def export(self, span):
+        with self._lock:
+            self._spans.append(span)
+            if len(self._spans) > self.max_spans:
+                del self._spans[:len(self._spans) - self.max_spans]
+
+    def get_finished_spans(self):
+        """
+        Returns:
+            list[Span]: Spans terminados, en orden de finalización.
+        """
+        with self._lock:
+            return list(self._spans)
+
+    def clear(self):
+        with self._lock:
+            self._spans.clear()
+
+    def shutdown(self):
+        pass
+
+
+class FileSpanExporter:
+    """
+    Escribe cada span terminado como una línea JSON (formato JSON Lines) en un fichero.
+    """
+    def __init__(self, filepath):
+        """
+        Args:
+            filepath (str): Fichero de salida (se añade al final).
+        """
+        self.filepath = filepath
+        directory = os.path.dirname(filepath)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(filepath, 'a', encoding='utf-8')
+        self._lock = threading.Lock()
+
+    def export(self, span):
+        line = json.dumps(span.to_dict(), ensure_ascii=False, default=str)
+        with self._lock:
+            if not self._file.closed:
+                self._file.write(line + '\n')
+                self._file.flush()
+
+    def shutdown(self):
+        with self._lock:
+            self._file.close()
+
+
+class Tracer:
+    """
+    Crea spans anidados por contexto (contextvars): el span activo de cada hilo o petición es el padre de los
+    que se abren dentro. Con sample_ratio < 1 solo se registra esa fracción de las trazas, decidida en el span raíz.
+    """
+    def __init__(self, exporter=None, sample_ratio=1.0, otel_tracer=None):
+        """
+        Args:
+            exporter (InMemorySpanExporter o FileSpanExporter, opcional): Destino de los spans; None desactiva.
+            sample_ratio (float): Fracción de trazas registradas (0 a 1).
+            otel_tracer (opentelemetry.trace.Tracer, opcional): Tracer del SDK en el que delegar.
+        """
+        self.exporter = exporter
+        self.sample_ratio = sample_ratio
+        self.otel_tracer = otel_tracer
+
+    @property
+    def enabled(self):
+        return self.exporter is not None or self.otel_tracer is not None
+
+    def start_span(self, name, kind='INTERNAL', attributes=None, parent=None):
+        """
+        Abre un span hijo del span activo (o de `parent`, si se indica) sin activarlo.
+
+        Args:
+            name (str): Nombre de la operación.
+            kind (str): 'INTERNAL', 'SERVER' o 'CLIENT'.
+            attributes (dict, opcional): Atributos iniciales.
+            parent ((str, str), opcional): (trace_id, span_id) remotos, p. ej. de la cabecera traceparent.
+        Returns:
+            Span or _NoopSpan: Span abierto.
+        """
+        current = _current.get()
+        if current is _NOOP_SPAN:
+            return _NOOP_SPAN
+        if isinstance(current, Span) and parent is None:
+            return Span(name, current.trace_id, current.span_id, kind, attributes)
+        if parent is None and self.sample_ratio < 1 and random.random() >= self.sample_ratio:
+            return _NOOP_SPAN
+        trace_id, parent_id = parent or (f'{random.getrandbits(128):032x}', None)
+        return Span(name, trace_id, parent_id, kind, attributes)
+
+    def end_span(self, span):
+        """
+        Cierra el span y lo envía al exportador.
+        """
+        if isinstance(span, Span) and span.end_time is None:
+            span.end_time = time.time_ns()
+            if span.status == 'UNSET':
+                span.status = 'OK'
+            self.exporter.export(span)
+
+
+_tracer = Tracer()
+
+
+def configure(exporter=None, sample_ratio=1.0, use_otel=False):
+    """
+    Configura el tracer del proceso.
+
+    Args:
+        exporter (opcional): Exportador de spans; None desactiva las trazas propias.
+        sample_ratio (float): Fracción de trazas registradas.
+        use_otel (bool): Delega en el SDK de OpenTelemetry (requiere el paquete opentelemetry-api).
+    Returns:
+        Tracer: El tracer anterior (para restaurarlo en pruebas).
+    Raises:
+        RuntimeError: Si se pide OpenTelemetry y no está instalado.
+    """
+    global _tracer
+    otel_tracer = None
+    if use_otel:
+        if otel_trace is None:
+            raise RuntimeError('TRACING_EXPORTER=otel requiere el paquete opentelemetry-api')
+        otel_tracer = otel_trace.get_tracer('flask-task-manager')
+    previous = _tracer
+    _tracer = Tracer(exporter, sample_ratio=sample_ratio, otel_tracer=otel_tracer)
+    return previous
+
+
+def get_tracer():
+    """
+    Returns:
+        Tracer: Tracer del proceso.
+    """
+    return _tracer
+
+
+def current_span():
+    """
+    Returns:
+        Span or _NoopSpan: Span activo, o uno que no registra nada si no hay ninguno.
+    """
+    if _tracer.otel_tracer is not None:
+        return _OtelSpan(otel_trace.get_current_span())
+    return _current.get() or _NOOP_SPAN
+
+
+class _SpanContext:
+    __slots__ = ('name', 'kind', 'attributes', '_span', '_token', '_otel')
+
+    def __init__(self, name, kind, attributes):
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes
+
+    def __enter__(self):
+        tracer = _tracer
+        if tracer.otel_tracer is not None:
+            kind = getattr(otel_trace.SpanKind, self.kind)
+            self._otel = tracer.otel_tracer.start_as_current_span(self.name, kind=kind, attributes=self.attributes)
+            return _OtelSpan(self._otel.__enter__())
+        self._otel = None
+        self._span = tracer.start_span(self.name, self.kind, self.attributes)
+        self._token = _current.set(self._span)
+        return self._span
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._otel is not None:
+            return self._otel.__exit__(exc_type, exc, tb)
+        _current.reset(self._token)
+        if exc is not None:
+            self._span.record_exception(exc)
+        _tracer.end_span(self._span)
+        return False
+
+
+class _NoopContext:
+    __slots__ = ()
+
+    def __enter__(self):
+        return _NOOP_SPAN
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP_CONTEXT = _NoopContext()
+
+
+def span(name, kind='INTERNAL', **attributes):
+    """
+    Context manager que abre un span hijo del activo y lo cierra al salir (registrando la excepción, si la hay).
+
+        with tracing.span('JsonTaskRepository.load_tasks', **{'db.file': path}) as s:
+            ...
+            s.set_attribute('tasks.count', len(tasks))
+
+    Args:
+        name (str): Nombre de la operación.
+        kind (str): 'INTERNAL', 'SERVER' o 'CLIENT'.
+        **attributes: Atributos iniciales (los None se ignoran).
+    Returns:
+        Context manager que devuelve el span.
+    """
+    if not _tracer.enabled:
+        return _NOOP_CONTEXT
+    return _SpanContext(name, kind, {key: value for key, value in attributes.items() if value is not None})
+
+
+def traced(name=None):
+    """
+    Decorador que mide cada llamada a la función en un span. Si la función tiene un parámetro task_id,
+    su valor se añade como atributo task.id.
+
+    Args:
+        name (str, opcional): Nombre del span; por defecto, el nombre calificado de la función.
+    """
+    def decorator(func):
+        span_name = name or func.__qualname__
+        parameters = list(inspect.signature(func).parameters)
+        task_id_index = parameters.index('task_id') if 'task_id' in parameters else None
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _tracer.enabled:
+                return func(*args, **kwargs)
+            task_id = kwargs.get('task_id')
+            if task_id is None and task_id_index is not None and task_id_index < len(args):
+                task_id = args[task_id_index]
+            with span(span_name, **{'task.id': task_id}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def traced_iter(name, iterable, count_attribute=None, **attributes):
+    """
+    Recorre un iterable dentro de un span que se abre al pedir el primer elemento y se cierra al agotarlo (o al
+    cerrar el iterador), para medir recorridos perezosos como TaskManager.iter_all. El span solo está activo
+    mientras se produce cada elemento: los spans que se abren ahí (la carga de cada shard) cuelgan de él y los
+    del consumidor entre elementos no.
+
+    Args:
+        name (str): Nombre de la operación.
+        iterable (Iterable): Elementos a recorrer.
+        count_attribute (str, opcional): Atributo en el que se anota cuántos elementos se han recorrido.
+        **attributes: Atributos iniciales (los None se ignoran).
+    Returns:
+        Iterator: Los mismos elementos.
+    """
+    if not _tracer.enabled:
+        return iter(iterable)
+    return _traced_iter(name, iter(iterable), count_attribute,
+                        {key: value for key, value in attributes.items() if value is not None})
+
+
+def _traced_iter(name, iterator, count_attribute, attributes):
+    tracer = _tracer
+    if tracer.otel_tracer is not None:
+        otel_span = tracer.otel_tracer.start_span(name, attributes=attributes)
+        span_ = _OtelSpan(otel_span)
+        activate = lambda: otel_trace.use_span(otel_span, end_on_exit=False)
+    else:
+        span_ = tracer.start_span(name, attributes=attributes)
+        activate = lambda: _Activation(span_)
+    count = 0
+    try:
+        while True:
+            with activate():
+                item = next(iterator, _EXHAUSTED)
+            if item is _EXHAUSTED:
+                break
+            count += 1
+            yield item
+    except GeneratorExit:
+        raise
+    except BaseException as exc:
+        span_.record_exception(exc)
+        raise
+    finally:
+        if count_attribute is not None:
+            span_.set_attribute(count_attribute, count)
+        if tracer.otel_tracer is not None:
+            otel_span.end()
+        else:
+            tracer.end_span(span_)
+
+
+_EXHAUSTED = object()
+
+
+class _Activation:
+    """
+    Activa un span ya abierto mientras dura el bloque, sin cerrarlo al salir.
+    """
+    __slots__ = ('span', '_token')
+
+    def __init__(self, span):
+        self.span = span
+
+    def __enter__(self):
+        self._token = _current.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        _current.reset(self._token)
+        return False
+
+
+def parse_traceparent(value):
+    """
+    Args:
+        value (str): Cabecera traceparent de W3C Trace Context ('00-<trace_id>-<span_id>-<flags>').
+    Returns:
+        (str, str) or None: (trace_id, span_id) del llamante, o None si la cabecera no es válida.
+    """
+    match = _TRACEPARENT_RE.match((value or '').strip().lower())
+    if not match or set(match.group(1)) == {'0'} or set(match.group(2)) == {'0'}:
+        return None
+    return match.group(1), match.group(2)
+
+
+def init_tracing(app):
+    """
+    Configura el tracer con TRACING_EXPORTER, TRACING_FILE_PATH y TRACING_SAMPLE_RATIO (de app.config o del
+    entorno) y abre un span SERVER por petición HTTP. El exportador queda en app.extensions['tracing'].
+
+    Args:
+        app (flask.Flask): Aplicación.
+    """
+    from flask import g, request
+    from app.lifecycle import register_shutdown
+
+    def setting(name, default=''):
+        value = app.config.get(name)
+        return os.getenv(name, default) if value is None else value
+
+    kind = str(setting('TRACING_EXPORTER')).lower()
+    if not kind:
+        return
+    if kind not in TRACING_EXPORTERS:
+        raise ValueError(f"TRACING_EXPORTER no válido: {kind}. Opciones: {', '.join(TRACING_EXPORTERS)}")
+    exporter = None
+    if kind == 'memory':
+        exporter = InMemorySpanExporter()
+    elif kind == 'file':
+        exporter = FileSpanExporter(setting('TRACING_FILE_PATH') or DEFAULT_FILE_PATH)
+        register_shutdown(exporter.shutdown)
+    configure(exporter, sample_ratio=float(setting('TRACING_SAMPLE_RATIO', '1')), use_otel=kind == 'otel')
+    app.extensions['tracing'] = exporter
+
+    @app.before_request
+    def start_request_span():
+        if _tracer.otel_tracer is not None:
+            # Con el SDK de OpenTelemetry, las peticiones se instrumentan con opentelemetry-instrumentation-flask
+            return
+        route = request.url_rule.rule if request.url_rule else request.path
+        span_ = _tracer.start_span(
+            f'{request.method} {route}',
+            kind='SERVER',
+            attributes={'http.method': request.method, 'http.route': route, 'http.target': request.full_path},
+            parent=parse_traceparent(request.headers.get('traceparent'))
+        )
+        g.trace_span = span_
+        g.trace_token = _current.set(span_)
+
+    @app.after_request
+    def annotate_request_span(response):
+        span_ = g.get('trace_span')
+        if span_ is not None:
+            span_.set_attribute('http.status_code', response.status_code)
+            if response.status_code >= 500:
+                span_.set_error(f'HTTP {response.status_code}')
+            if isinstance(span_, Span):
+                response.headers['traceresponse'] = f'00-{span_.trace_id}-{span_.span_id}-01'
+        return response
+
+    @app.teardown_request
+    def end_request_span(exc):
+        span_ = g.pop('trace_span', None)
+        token = g.pop('trace_token', None)
+        if span_ is None:
+            return
+        if exc is not None:
+            span_.record_exception(exc)
+        if token is not None:
+            try:
+                _current.reset(token)
+            except ValueError:
+                # La respuesta en streaming termina en otro contexto
+                _current.set(None)
+        _tracer.end_span(span_)
@@ -0,0 +1,39 @@
+"""
+Configuración de gunicorn para producción: gunicorn -c gunicorn.conf.py wsgi:app
+
+Todos los valores se pueden ajustar con variables de entorno (WEB_BIND, WEB_WORKERS, WEB_THREADS,
+WEB_TIMEOUT, WEB_GRACEFUL_TIMEOUT, WEB_KEEPALIVE, WEB_MAX_REQUESTS).
+"""
+import os
+
+bind = os.getenv('WEB_BIND', '0.0.0.0:8000')
+
+# Workers con hilos: las peticiones de IA pasan casi todo el tiempo esperando a OpenAI, así que la
+# concurrencia se consigue con WEB_THREADS (los repositorios serializan cada lectura-modificación-escritura
+# con un flock). Un solo worker por defecto: los índices en memoria (estadísticas, búsqueda, similitud)
+# solo siguen las escrituras de su propio worker.
+worker_class = 'gthread'
+workers = int(os.getenv('WEB_WORKERS', '1'))
+threads = int(os.getenv('WEB_THREADS', '8'))
+
+# La aplicación (índices, agregados, modelo local) se carga una vez en el maestro y los workers
+# comparten esas páginas de memoria por copy-on-write. Los hilos en segundo plano (p. ej. el del
+# ledger de uso) se arrancan de forma perezosa en cada worker.
+preload_app = True
+
+timeout = int(os.getenv('WEB_TIMEOUT', '120'))
+graceful_timeout = int(os.getenv('WEB_GRACEFUL_TIMEOUT', '30'))
+keepalive = int(os.getenv('WEB_KEEPALIVE', '5'))
+
+# Reciclar workers periódicamente acota el crecimiento de memoria
+max_requests = int(os.getenv('WEB_MAX_REQUESTS', '0'))
+max_requests_jitter = max_requests // 10
+
+accesslog = '-'
+errorlog = '-'
+
+
+def worker_exit(server, worker):
+    """Vacía las escrituras pendientes del worker (ledger de uso, buffers) antes de terminar."""
+    from app.lifecycle import shutdown
+    shutdown()
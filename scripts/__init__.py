@@ -0,0 +1 @@
+# Scripts de soporte (servidor stub de OpenAI, benchmarks y pruebas de carga).
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Benchmark del cliente OpenAI compartido (AIConfig.get_client) frente a crear un cliente por llamada,
+contra el servidor stub local (en otro proceso). Mide el tiempo de cada llamada, incluida la creación
+del cliente cuando corresponde, y las conexiones TCP que abre el servidor.
+
+Uso:
+    python scripts/bench_openai_client.py --requests 200 --threads 8 --latency 0.005
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from openai import OpenAI
+from app.config.ai_config import AIConfig
+from scripts.openai_stub_server import start_subprocess
+
+MESSAGES = [{"role": "user", "content": "Título: Benchmark"}]
+
+
+def per_call_client(_):
+    # Comportamiento anterior: cliente y pool HTTP nuevos, sin reutilizar conexiones
+    start = time.perf_counter()
+    client = OpenAI(api_key=AIConfig.OPENAI_API_KEY, base_url=AIConfig.OPENAI_BASE_URL)
+    try:
+        client.chat.completions.create(model=AIConfig.DEFAULT_MODEL, messages=MESSAGES, max_tokens=10)
+    finally:
+        client.close()
+    return time.perf_counter() - start
+
+
+def shared_client(_):
+    start = time.perf_counter()
+    AIConfig.get_client().chat.completions.create(model=AIConfig.DEFAULT_MODEL, messages=MESSAGES, max_tokens=10)
+    return time.perf_counter() - start
+
+
+def stub_connections(base_url):
+    with urllib.request.urlopen(base_url.replace('/v1', '/stub/stats')) as response:
+        return json.load(response)["connections"]
+
+
+def run(name, fn, base_url, requests, threads):
+    before = stub_connections(base_url)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        latencies = sorted(pool.map(fn, range(requests)))
+    elapsed = time.perf_counter() - start
+    connections = stub_connections(base_url) - before - 1
+    p95 = latencies[max(0, int(len(latencies) * 0.95) - 1)]
+    print(f"{name:<20} {requests / elapsed:>9.1f} {statistics.mean(latencies) * 1000:>9.2f} "
+          f"{statistics.median(latencies) * 1000:>9.2f} {p95 * 1000:>9.2f} {connections:>11}")
+    return statistics.mean(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--latency', type=float, default=0.005, help='Latencia simulada del stub (s)')
+    args = parser.parse_args()
+
+    process, base_url = start_subprocess(None, '--latency', str(args.latency))
+    try:
+        AIConfig.OPENAI_API_KEY = AIConfig.OPENAI_API_KEY or 'sk-stub'
+        AIConfig.OPENAI_BASE_URL = base_url
+        AIConfig.close_clients()
+        print(f"{'modo':<20} {'req/s':>9} {'media ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'conexiones':>11}")
+        run('calentamiento', shared_client, base_url, args.threads, args.threads)
+        baseline = run('cliente por llamada', per_call_client, base_url, args.requests, args.threads)
+        pooled = run('cliente compartido', shared_client, base_url, args.requests, args.threads)
+        print(f"Reducción de latencia media: {(1 - pooled / baseline) * 100:.1f}%")
+    finally:
+        AIConfig.close_clients()
+        process.terminate()
+        process.wait()
+
+
+if __name__ == '__main__':
+    main()
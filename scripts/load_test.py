@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Prueba de carga HTTP contra la API: lanza N hilos concurrentes, cada uno con su propia sesión keep-alive,
+que recorren los endpoints indicados durante un tiempo fijo, e informa de throughput, percentiles de
+latencia y tasa de errores por endpoint.
+
+Las rutas pueden incluir `{id}`, que se sustituye en cada petición por el id de una tarea existente.
+
+Contra un servidor ya arrancado (por ejemplo el de producción de wsgi.py):
+    gunicorn -c gunicorn.conf.py wsgi:app
+    python scripts/load_test.py --base-url http://127.0.0.1:8000 --concurrency 32 --duration 30 \\
+        --endpoint "GET /tasks" --endpoint "GET /tasks/{id}" --endpoint "GET /tasks/stats"
+
+Extremo a extremo sin coste (--spawn): arranca el stub de OpenAI y la aplicación (waitress) en procesos
+aparte, con una copia temporal de los datos, siembra tareas y mezcla endpoints de tareas y de IA:
+    python scripts/load_test.py --spawn --concurrency 16 --duration 20 \\
+        --stub-latency 0.3 --stub-jitter 0.1 --stub-error-rate 0.02
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+import requests
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts.openai_stub_server import start_subprocess as start_stub
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+DEFAULT_ENDPOINTS = ["GET /tasks", "GET /tasks/{id}", "GET /tasks/stats", "GET /tasks/search?q=pruebas"]
+AI_ENDPOINTS = [
+    "POST /ai/tasks/describe/{id}",
+    "POST /ai/tasks/categorize/{id}",
+    "POST /ai/tasks/estimate/{id}",
+    "POST /ai/tasks/audit/{id}"
+]
+
+
+def with_force(endpoints):
+    """
+    Añade ?force=true a los endpoints de IA: sin él, tras la primera petición por tarea las operaciones devuelven
+    el resultado guardado (huella de entradas sin cambios) y la carga no llegaría a OpenAI ni al stub.
+
+    Args:
+        endpoints (list[str]): Endpoints "MÉTODO /ruta".
+    Returns:
+        list[str]: Los mismos endpoints, con force en los de /ai/tasks/.
+    """
+    forced = []
+    for endpoint in endpoints:
+        method, path = endpoint.split(' ', 1)
+        if path.startswith('/ai/tasks/') and 'force=' not in path:
+            path += ('&' if '?' in path else '?') + 'force=true'
+        forced.append(f"{method} {path}")
+    return forced
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class LoadTest:
+    """
+    Ejecuta la carga y acumula latencias y errores por endpoint.
+    """
+    def __init__(self, base_url, endpoints, concurrency, duration, task_ids=None, timeout=60):
+        self.base_url = base_url.rstrip('/')
+        self.endpoints = [endpoint.split(' ', 1) for endpoint in endpoints]
+        self.concurrency = concurrency
+        self.duration = duration
+        self.task_ids = task_ids or [1]
+        self.timeout = timeout
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(lambda: defaultdict(int))
+        self._lock = threading.Lock()
+
+    def _worker(self, offset, deadline):
+        session = requests.Session()
+        rng = random.Random(offset)
+        index = offset
+        while time.monotonic() < deadline:
+            method, path = self.endpoints[index % len(self.endpoints)]
+            index += 1
+            key = f"{method} {path}"
+            url = self.base_url + path.replace('{id}', str(rng.choice(self.task_ids)))
+            start = time.perf_counter()
+            try:
+                response = session.request(method, url, timeout=self.timeout)
+                error = None if response.status_code < 400 else str(response.status_code)
+            except requests.RequestException as e:
+                error = type(e).__name__
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.latencies[key].append(elapsed)
+                if error:
+                    self.errors[key][error] += 1
+        session.close()
+
+    def run(self):
+        """
+        Returns:
+            dict: Resultados por endpoint (requests, errores, tasa de error, req/s y percentiles en ms).
+        """
+        deadline = time.monotonic() + self.duration
+        threads = [
+            threading.Thread(target=self._worker, args=(i, deadline))
+            for i in range(self.concurrency)
+        ]
+        start = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - start
+        report = {}
+        for key, values in self.latencies.items():
+            values.sort()
+            error_count = sum(self.errors[key].values())
+            report[key] = {
+                "requests": len(values),
+                "errors": dict(self.errors[key]),
+                "error_rate": error_count / len(values),
+                "rps": len(values) / elapsed,
+                "p50_ms": percentile(values, 0.50) * 1000,
+                "p95_ms": percentile(values, 0.95) * 1000,
+                "p99_ms": percentile(values, 0.99) * 1000,
+                "max_ms": values[-1] * 1000,
+            }
+        return report
+
+
+def print_report(report):
+    print(f"{'endpoint':<40} {'reqs':>7} {'err%':>6} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}")
+    for key, r in sorted(report.items()):
+        print(f"{key:<40} {r['requests']:>7} {100 * r['error_rate']:>5.1f}% {r['rps']:>8.1f} "
+              f"{r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} {r['p99_ms']:>8.1f} {r['max_ms']:>8.1f}")
+        if r["errors"]:
+            print(f"{'':<40} errores: {r['errors']}")
+    total = sum(r['requests'] for r in report.values())
+    errors = sum(sum(r['errors'].values()) for r in report.values())
+    if total:
+        print(f"{'TOTAL':<40} {total:>7} {100 * errors / total:>5.1f}% {sum(r['rps'] for r in report.values()):>8.1f}")
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_up(url, process, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'La aplicación terminó al arrancar (código {process.returncode})')
+        try:
+            requests.get(url, timeout=1)
+            return
+        except requests.RequestException:
+            time.sleep(0.2)
+    raise RuntimeError('La aplicación no arrancó a tiempo')
+
+
+def start_app(stub_url, workdir, threads, log_path=None):
+    """
+    Arranca wsgi.py (waitress) apuntando al stub, con datos y ledger en un directorio temporal.
+
+    Returns:
+        (subprocess.Popen, str): El proceso y la URL base de la API.
+    """
+    port = free_port()
+    env = dict(
+        os.environ,
+        OPENAI_BASE_URL=stub_url,
+        OPENAI_API_KEY='sk-stub',
+        TASKS_DATA_PATH=os.path.join(workdir, 'tasks.json'),
+        AI_USAGE_LEDGER_PATH=os.path.join(workdir, 'usage.db'),
+        WEB_BIND=f'127.0.0.1:{port}',
+        WEB_THREADS=str(threads),
+        # Se mide la capacidad del servidor: sin límite de peticiones por cliente
+        RATE_LIMIT_ENABLED='false'
+    )
+    log = open(log_path, 'w', encoding='utf-8') if log_path else subprocess.DEVNULL
+    process = subprocess.Popen([sys.executable, os.path.join(ROOT, 'wsgi.py')], cwd=ROOT, env=env,
+                               stdout=log, stderr=subprocess.STDOUT)
+    base_url = f'http://127.0.0.1:{port}'
+    wait_until_up(base_url + '/tasks', process)
+    return process, base_url
+
+
+def seed_tasks(base_url, count):
+    """
+    Crea tareas de prueba hasta tener al menos `count` y devuelve sus ids.
+    """
+    ids = [task['id'] for task in requests.get(base_url + '/tasks', timeout=30).json()]
+    priorities = ['baja', 'media', 'alta', 'bloqueante']
+    for i in range(len(ids), count):
+        response = requests.post(base_url + '/tasks', json={
+            "title": f"Tarea de carga {i}",
+            "description": f"Implementar y probar el endpoint número {i} de la API de pruebas",
+            "priority": priorities[i % len(priorities)],
+            "effort_hours": 1 + i % 8,
+            "status": "pendiente",
+            "assigned_to": f"usuario{i % 5}"
+        }, timeout=30)
+        response.raise_for_status()
+        ids.append(response.json()['id'])
+    return ids
+
+
+def stub_stats(stub_url):
+    return requests.get(stub_url.replace('/v1', '/stub/stats'), timeout=5).json()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=10, help='Segundos de carga')
+    parser.add_argument('--endpoint', action='append', help='"MÉTODO /ruta" (repetible; admite {id})')
+    parser.add_argument('--json', help='Guarda el informe en este fichero JSON')
+    parser.add_argument('--force-ai', action=argparse.BooleanOptionalAction, default=None,
+                        help='Añade ?force=true a los endpoints de IA para que siempre llamen al modelo '
+                             '(por defecto, activado con --spawn)')
+    spawn = parser.add_argument_group('modo --spawn (stub de OpenAI + aplicación locales)')
+    spawn.add_argument('--spawn', action='store_true', help='Arranca el stub y la aplicación en procesos aparte')
+    spawn.add_argument('--seed-tasks', type=int, default=50, help='Tareas a crear antes de la carga')
+    spawn.add_argument('--app-threads', type=int, default=16, help='Hilos de waitress de la aplicación')
+    spawn.add_argument('--app-log', help='Fichero donde guardar la salida de la aplicación')
+    spawn.add_argument('--stub-latency', type=float, default=0.3)
+    spawn.add_argument('--stub-jitter', type=float, default=0.1)
+    spawn.add_argument('--stub-error-rate', type=float, default=0.0)
+    spawn.add_argument('--stub-error-status', type=int, default=500)
+    spawn.add_argument('--stub-prompt-tokens', default='auto', help="Tokens de entrada o 'auto' (estimados del prompt)")
+    spawn.add_argument('--stub-completion-tokens', type=int, default=40)
+    args = parser.parse_args()
+
+    processes = []
+    workdir = None
+    try:
+        stub_url = None
+        if args.spawn:
+            stub_args = ['--latency', str(args.stub_latency), '--jitter', str(args.stub_jitter),
+                         '--error-rate', str(args.stub_error_rate), '--error-status', str(args.stub_error_status),
+                         '--prompt-tokens', args.stub_prompt_tokens, '--completion-tokens', str(args.stub_completion_tokens)]
+            stub, stub_url = start_stub(None, *stub_args)
+            processes.append(stub)
+            workdir = tempfile.mkdtemp(prefix='load_test_')
+            app, args.base_url = start_app(stub_url, workdir, args.app_threads, args.app_log)
+            processes.append(app)
+        endpoints = args.endpoint or (DEFAULT_ENDPOINTS + AI_ENDPOINTS if args.spawn else DEFAULT_ENDPOINTS)
+        if args.spawn if args.force_ai is None else args.force_ai:
+            endpoints = with_force(endpoints)
+        if args.spawn:
+            task_ids = seed_tasks(args.base_url, args.seed_tasks)
+        else:
+            task_ids = [task['id'] for task in requests.get(args.base_url + '/tasks', timeout=30).json()]
+        test = LoadTest(args.base_url, endpoints, args.concurrency, args.duration, task_ids=task_ids)
+        report = test.run()
+        print_report(report)
+        if stub_url:
+            print(f"Stub de OpenAI: {stub_stats(stub_url)}")
+        if args.json:
+            with open(args.json, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+    finally:
+        for process in reversed(processes):
+            process.terminate()
+            process.wait()
+        if workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
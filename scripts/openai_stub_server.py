@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Servidor local compatible con la API de OpenAI (POST /v1/chat/completions y GET /v1/models)
+para benchmarks, pruebas de carga y pruebas sin coste ni red.
+
+Responde a cada operación con un contenido que la aplicación sabe interpretar (una categoría válida,
+un número de horas o texto libre), con latencia, tasa de errores y recuento de tokens configurables.
+
+Uso:
+    python scripts/openai_stub_server.py --port 8001 --latency 0.05 --jitter 0.02 --error-rate 0.05
+    OPENAI_BASE_URL=http://127.0.0.1:8001/v1 OPENAI_API_KEY=sk-stub python run.py
+"""
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubConfig:
+    """
+    Comportamiento configurable del servidor stub.
+
+    Atributos:
+        latency (float): Segundos de espera antes de responder cada completion.
+        jitter (float): Variación aleatoria uniforme (+/- segundos) sobre la latencia.
+        error_rate (float): Fracción de completions que responden con error_status.
+        error_status (int): Código HTTP de los errores simulados (429 o 5xx; el cliente los reintenta).
+        prompt_tokens (int): Tokens de entrada informados; None los estima a partir de los mensajes.
+        completion_tokens (int): Tokens de salida informados.
+        structured_output (bool): Si es False, rechaza con 400 las peticiones con response_format
+            (como los modelos sin salida estructurada).
+    """
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, error_status=500, prompt_tokens=50,
+                 completion_tokens=10, seed=None, structured_output=True):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = completion_tokens
+        self.structured_output = structured_output
+        self.connections = 0
+        self.requests = 0
+        self.errors = 0
+        self.prompt_tokens_total = 0
+        self.completion_tokens_total = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def count(self, field, amount=1):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + amount)
+
+    def next_delay(self):
+        with self._lock:
+            jitter = self._random.uniform(-self.jitter, self.jitter) if self.jitter else 0.0
+        return max(0.0, self.latency + jitter)
+
+    def should_fail(self):
+        if not self.error_rate:
+            return False
+        with self._lock:
+            return self._random.random() < self.error_rate
+
+    def stats(self):
+        return {
+            "connections": self.connections,
+            "requests": self.requests,
+            "errors": self.errors,
+            "prompt_tokens": self.prompt_tokens_total,
+            "completion_tokens": self.completion_tokens_total
+        }
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Atiende las peticiones con respuestas fijas en el formato de la API de OpenAI."""
+    # HTTP/1.1 para que el cliente pueda reutilizar la conexión (keep-alive)
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        self.server.config.count('connections')
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.rstrip('/') == '/stub/stats':
+            self._send_json(200, self.server.config.stats())
+        elif self.path.rstrip('/').endswith('/models'):
+            self._send_json(200, {"object": "list", "data": [{"id": "gpt-4o-mini", "object": "model"}]})
+        else:
+            self._send_json(404, {"error": {"message": "Not found"}})
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        request = json.loads(self.rfile.read(length) or b'{}')
+        if not self.path.rstrip('/').endswith('/chat/completions'):
+            self._send_json(404, {"error": {"message": "Not found"}})
+            return
+        config = self.server.config
+        config.count('requests')
+        if request.get('response_format') and not config.structured_output:
+            config.count('errors')
+            self._send_json(400, {"error": {
+                "message": "Invalid parameter: 'response_format' is not supported with this model.",
+                "type": "invalid_request_error", "param": "response_format", "code": None
+            }})
+            return
+        delay = config.next_delay()
+        if delay:
+            time.sleep(delay)
+        if config.should_fail():
+            config.count('errors')
+            self._send_json(config.error_status, {"error": {
+                "message": "Error simulado por el servidor stub", "type": "server_error", "code": None
+            }})
+            return
+        prompt_tokens = config.prompt_tokens
+        if prompt_tokens is None:
+            prompt_tokens = estimate_prompt_tokens(request)
+        content = reply_for(request, config.completion_tokens)
+        config.count('prompt_tokens_total', prompt_tokens)
+        config.count('completion_tokens_total', config.completion_tokens)
+        self._send_json(200, completion_payload(request, content, prompt_tokens, config.completion_tokens))
+
+
+def estimate_prompt_tokens(request):
+    """
+    Aproxima los tokens de entrada (unos 4 caracteres por token) sin depender de tiktoken.
+    """
+    characters = sum(len(message.get("content") or "") for message in request.get("messages", []))
+    return max(1, characters // 4)
+
+
+def reply_for(request, completion_tokens):
+    """
+    Elige un contenido que la aplicación puede interpretar según el prompt del sistema de la operación:
+    un número de horas para estimate, una categoría para categorize y texto libre para el resto.
+    """
+    system = next((m.get("content") or "" for m in request.get("messages", []) if m.get("role") == "system"), "")
+    # Con response_format json_schema se responde con el objeto JSON que pide el esquema
+    structured = (request.get("response_format") or {}).get("type") == "json_schema"
+    if "número entero de horas" in system:
+        return json.dumps({"hours": 8}) if structured else "8"
+    if "categorías exactas" in system:
+        return json.dumps({"category": "Backend"}) if structured else "Backend"
+    return " ".join(["Respuesta"] + ["simulada"] * max(0, completion_tokens - 1))
+
+
+def completion_payload(request, content="Backend", prompt_tokens=50, completion_tokens=10):
+    """
+    Construye una respuesta de chat completion con el formato de la API de OpenAI.
+    """
+    return {
+        "id": "chatcmpl-stub",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": request.get("model", "gpt-4o-mini"),
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop"
+        }],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens
+        }
+    }
+
+
+def make_server(host='127.0.0.1', port=0, config=None):
+    """
+    Crea el servidor stub (port=0 elige un puerto libre).
+
+    Returns:
+        ThreadingHTTPServer: Servidor con el atributo `config` (StubConfig).
+    """
+    server = ThreadingHTTPServer((host, port), StubHandler)
+    server.daemon_threads = True
+    server.config = config or StubConfig()
+    return server
+
+
+def start_in_background(**kwargs):
+    """
+    Arranca el servidor en un hilo daemon.
+
+    Returns:
+        (ThreadingHTTPServer, str): El servidor y su URL base (terminada en /v1).
+    """
+    server = make_server(**kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address[:2]
+    return server, f"http://{host}:{port}/v1"
+
+
+def start_subprocess(port=None, *args):
+    """
+    Arranca el servidor en un proceso aparte (sin competir por el GIL con el cliente medido)
+    y espera a que acepte conexiones.
+
+    Args:
+        port (int, opcional): Puerto; por defecto uno libre.
+        *args (str): Argumentos adicionales de línea de comandos (por ejemplo '--latency', '0.01').
+    Returns:
+        (subprocess.Popen, str): El proceso y la URL base (terminada en /v1).
+    """
+    if port is None:
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            port = sock.getsockname()[1]
+    process = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), '--port', str(port), *args],
+        stdout=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.2).close()
+            return process, f"http://127.0.0.1:{port}/v1"
+        except OSError:
+            time.sleep(0.05)
+    process.kill()
+    raise RuntimeError('El servidor stub no arrancó a tiempo')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--latency', type=float, default=0.0, help='Segundos de espera por completion')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Variación aleatoria de la latencia (+/- s)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fracción de completions con error')
+    parser.add_argument('--error-status', type=int, default=500, help='Código HTTP de los errores simulados')
+    parser.add_argument('--prompt-tokens', default='50', help="Tokens de entrada por completion, o 'auto' para estimarlos")
+    parser.add_argument('--completion-tokens', type=int, default=10, help='Tokens de salida por completion')
+    parser.add_argument('--no-structured-output', action='store_true',
+                        help='Rechaza las peticiones con response_format (modelo sin salida estructurada)')
+    parser.add_argument('--seed', type=int, default=None, help='Semilla para latencias y errores reproducibles')
+    args = parser.parse_args()
+    config = StubConfig(
+        latency=args.latency, jitter=args.jitter, error_rate=args.error_rate, error_status=args.error_status,
+        prompt_tokens=None if args.prompt_tokens == 'auto' else int(args.prompt_tokens), completion_tokens=args.completion_tokens, seed=args.seed,
+        structured_output=not args.no_structured_output
+    )
+    server = make_server(args.host, args.port, config)
+    print(f"Stub de OpenAI escuchando en http://{args.host}:{args.port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+"""
+Pruebas del registro de clientes OpenAI compartido por proceso y de la reutilización de conexiones.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+import threading
+from app.config.ai_config import AIConfig
+from scripts.openai_stub_server import start_in_background
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    server, base_url = start_in_background()
+    monkeypatch.setattr(AIConfig, 'OPENAI_API_KEY', 'sk-stub')
+    monkeypatch.setattr(AIConfig, 'OPENAI_BASE_URL', base_url)
+    AIConfig.close_clients()
+    yield server
+    AIConfig.close_clients()
+    server.shutdown()
+
+def test_get_client_is_shared_across_threads(stub):
+    print("[TEST] Compartiendo el cliente OpenAI entre hilos...")
+    clients = []
+    threads = [threading.Thread(target=lambda: clients.append(AIConfig.get_client())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len({id(client) for client in clients}) == 1
+    print("[OK] test_get_client_is_shared_across_threads completado")
+
+def test_services_reuse_keepalive_connections(stub):
+    print("[TEST] Reutilizando conexiones keep-alive entre servicios...")
+    from app.services.ai_service import OpenAIService
+    first, second = OpenAIService(), OpenAIService()
+    assert first.client is second.client
+    for service in (first, second, first):
+        result = service.categorize_task({"title": "API", "description": "Endpoint REST"})
+        assert result["result"] == "Backend" and result["total_tokens"] == 60
+    assert stub.config.requests == 3
+    assert stub.config.connections == 1
+    print("[OK] test_services_reuse_keepalive_connections completado")
@@ -0,0 +1,90 @@
+"""
+Pruebas de las huellas de entradas por operación de IA: reutilización del resultado guardado y force.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+import tempfile
+from app.models.task import Task
+from app.services.task_manager import TaskManager
+from app.services.ai_task_manager import AITaskManager
+from app.repositories.json_task_repository import JsonTaskRepository
+
+
+class CountingAIService:
+    """Sustituto de OpenAIService que cuenta las llamadas por operación."""
+    def __init__(self):
+        self.calls = {}
+
+    def _answer(self, operation, result):
+        self.calls[operation] = self.calls.get(operation, 0) + 1
+        return {"result": result, "total_tokens": 10}
+
+    def generate_description(self, task_data):
+        return self._answer('describe', 'Descripción generada')
+
+    def categorize_task(self, task_data):
+        return self._answer('categorize', 'Backend')
+
+    def estimate_effort(self, task_data):
+        return self._answer('estimate', '8')
+
+    def analyze_risks(self, task_data):
+        return self._answer('audit', 'Riesgos')
+
+    def generate_mitigation(self, task_data, risk_analysis):
+        return {"result": "Mitigación", "total_tokens": 5}
+
+@pytest.fixture
+def ai_manager():
+    fd, path = tempfile.mkstemp(suffix='.json')
+    os.close(fd)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('[]')
+    task_manager = TaskManager(repository=JsonTaskRepository(path))
+    task_manager.create(Task(title="Migrar base de datos", description="Pasar a PostgreSQL", priority="alta",
+                             effort_hours=1, status="pendiente", assigned_to="Ana"))
+    yield AITaskManager(task_manager=task_manager, ai_service=CountingAIService())
+    os.remove(path)
+
+def test_unchanged_inputs_return_stored_result(ai_manager):
+    print("\n[TEST] Reutilizando el resultado guardado cuando las entradas no cambian...")
+    first, error = ai_manager.categorize_task(1)
+    assert error is None and first.token_usage == 10
+    second, error = ai_manager.categorize_task(1)
+    assert error is None
+    assert second.category == 'Backend' and second.token_usage == 10
+    assert ai_manager.ai_service.calls['categorize'] == 1
+    assert ai_manager.skipped == 1
+    print("[OK] test_unchanged_inputs_return_stored_result completado")
+
+def test_changed_inputs_call_ai_again(ai_manager):
+    print("\n[TEST] Volviendo a llamar a la IA cuando cambian las entradas de la operación...")
+    ai_manager.estimate_task_effort(1)
+    task = ai_manager.task_manager.get_by_id(1)
+    # El estado no forma parte del prompt de estimate
+    task.status = "en progreso"
+    ai_manager.task_manager.update(1, task)
+    ai_manager.estimate_task_effort(1)
+    assert ai_manager.ai_service.calls['estimate'] == 1
+    task = ai_manager.task_manager.get_by_id(1)
+    task.description = "Pasar a PostgreSQL y migrar los datos históricos"
+    ai_manager.task_manager.update(1, task)
+    ai_manager.estimate_task_effort(1)
+    assert ai_manager.ai_service.calls['estimate'] == 2
+    print("[OK] test_changed_inputs_call_ai_again completado")
+
+def test_force_and_missing_output(ai_manager):
+    print("\n[TEST] Forzando la operación y repitiéndola si falta su resultado...")
+    ai_manager.audit_task_risks(1)
+    task, error = ai_manager.audit_task_risks(1, force=True)
+    assert error is None and task.token_usage == 30
+    assert ai_manager.ai_service.calls['audit'] == 2
+    # Si se borra el resultado, la huella coincide pero la operación se repite
+    task.risk_mitigation = None
+    ai_manager.task_manager.update(1, task)
+    ai_manager.audit_task_risks(1)
+    assert ai_manager.ai_service.calls['audit'] == 3
+    print("[OK] test_force_and_missing_output completado")
@@ -0,0 +1,99 @@
+"""
+Pruebas de la salida estructurada de IA y de la interpretación tolerante de categorías y horas.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from app.config.ai_config import AIConfig
+from app.services.ai_output import match_category, parse_effort_hours, response_format, unwrap_structured
+from scripts.openai_stub_server import StubConfig, start_in_background
+
+
+def _stub(monkeypatch, **config):
+    server, base_url = start_in_background(config=StubConfig(**config))
+    monkeypatch.setattr(AIConfig, 'OPENAI_API_KEY', 'sk-stub')
+    monkeypatch.setattr(AIConfig, 'OPENAI_BASE_URL', base_url)
+    AIConfig.close_clients()
+    return server
+
+@pytest.fixture
+def stub(monkeypatch):
+    server = _stub(monkeypatch)
+    yield server
+    AIConfig.close_clients()
+    server.shutdown()
+
+@pytest.fixture
+def unstructured_stub(monkeypatch):
+    server = _stub(monkeypatch, structured_output=False)
+    yield server
+    AIConfig.close_clients()
+    server.shutdown()
+
+def test_parse_effort_hours():
+    print("\n[TEST] Extrayendo horas de respuestas con texto adicional...")
+    assert parse_effort_hours('8') == 8
+    assert parse_effort_hours(5) == 5
+    assert parse_effort_hours('Unas 12 horas aproximadamente.') == 12
+    assert parse_effort_hours('3,5h') == 3.5
+    assert parse_effort_hours('Entre 6 y 8 horas') == 7
+    assert parse_effort_hours('6-10 horas') == 8
+    # 'y' entre horas y minutos no es un rango
+    assert parse_effort_hours('8 horas y 30 minutos') == 8.5
+    assert parse_effort_hours('8 y 30 minutos') == 8.5
+    assert parse_effort_hours('8h30m') == 8.5
+    assert parse_effort_hours('90 minutos') == 1.5
+    assert parse_effort_hours('{"hours": 16}') == 16
+    assert parse_effort_hours('2 a 3 días') == 20
+    assert parse_effort_hours('1 a 2 semanas') == 60
+    assert parse_effort_hours('Unos 2 days') == 16
+    assert parse_effort_hours('12 meses') is None
+    assert parse_effort_hours('0') is None
+    assert parse_effort_hours('No es posible estimarlo') is None
+    print("[OK] test_parse_effort_hours completado")
+
+def test_match_category():
+    print("\n[TEST] Asociando respuestas a categorías válidas...")
+    assert match_category('Backend') == 'Backend'
+    assert match_category('backend.') == 'Backend'
+    assert match_category('Categoría: Bug Fix') == 'Bug Fix'
+    assert match_category('Documentación') == 'Documentation'
+    assert match_category('Base de datos') == 'Database'
+    assert match_category('Devops') == 'DevOps'
+    assert match_category('Bakend') == 'Backend'
+    assert match_category('{"category": "Security"}') == 'Security'
+    assert match_category('Marketing') is None
+    assert match_category('') is None
+    print("[OK] test_match_category completado")
+
+def test_response_format_schemas():
+    print("\n[TEST] Construyendo los esquemas de salida estructurada...")
+    schema = response_format('categorize')['json_schema']['schema']
+    assert 'Bug Fix' in schema['properties']['category']['enum']
+    assert response_format('estimate')['json_schema']['schema']['required'] == ['hours']
+    assert response_format('describe') is None
+    assert unwrap_structured('estimate', '{"hours": 8}') == '8'
+    assert unwrap_structured('estimate', 'Unas 8 horas') == 'Unas 8 horas'
+    print("[OK] test_response_format_schemas completado")
+
+def test_service_requests_structured_output(stub):
+    print("\n[TEST] Pidiendo salida estructurada a OpenAI...")
+    from app.services.ai_service import OpenAIService
+    service = OpenAIService()
+    assert service.categorize_task({"title": "API", "description": "Endpoint REST"})["result"] == "Backend"
+    assert service.estimate_effort({"title": "API", "description": "Endpoint REST"})["result"] == "8"
+    assert stub.config.errors == 0
+    print("[OK] test_service_requests_structured_output completado")
+
+def test_service_falls_back_without_structured_output(unstructured_stub):
+    print("\n[TEST] Volviendo a texto libre con modelos sin salida estructurada...")
+    from app.services.ai_service import OpenAIService
+    service = OpenAIService()
+    assert service.categorize_task({"title": "API"})["result"] == "Backend"
+    assert unstructured_stub.config.requests == 2
+    # El rechazo se recuerda: las siguientes llamadas no vuelven a pedir response_format
+    assert service.estimate_effort({"title": "API"})["result"] == "8"
+    assert unstructured_stub.config.requests == 3
+    print("[OK] test_service_falls_back_without_structured_output completado")
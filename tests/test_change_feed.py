@@ -0,0 +1,87 @@
+"""
+Pruebas del ChangeFeed: publicación, buffer circular, reanudación por secuencia y stream SSE.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+import tempfile
+from app.models.task import Task
+from app.services.task_manager import TaskManager
+from app.services.change_feed import ChangeFeed
+from app.repositories.json_task_repository import JsonTaskRepository
+
+
+@pytest.fixture
+def temp_json_repo():
+    fd, path = tempfile.mkstemp(suffix='.json')
+    os.close(fd)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('[]')
+    repo = JsonTaskRepository(path)
+    yield repo
+    os.remove(path)
+
+@pytest.fixture
+def sample_task():
+    return Task(
+        title="Tarea de prueba",
+        description="Descripción de prueba",
+        priority="media",
+        effort_hours=2.5,
+        status="pendiente",
+        assigned_to="Carlos"
+    )
+
+def test_task_manager_publishes_mutations(temp_json_repo, sample_task):
+    print("[TEST] Publicando mutaciones de TaskManager...")
+    feed = ChangeFeed()
+    received = []
+    feed.subscribe(received.append)
+    manager = TaskManager(repository=temp_json_repo, change_feed=feed)
+    task = manager.create(sample_task)
+    updated = Task.from_dict({**task.to_dict(), "status": "completada"})
+    manager.update(task.id, updated, source='ai:audit')
+    manager.delete(task.id)
+    assert [e.type for e in received] == ['created', 'updated', 'deleted']
+    assert [e.seq for e in received] == [1, 2, 3]
+    assert received[1].previous["status"] == "pendiente"
+    assert received[1].task["status"] == "completada"
+    assert received[1].source == 'ai:audit'
+    assert received[2].task is None and received[2].previous["id"] == task.id
+    print("[OK] test_task_manager_publishes_mutations completado")
+
+def test_events_since_resume_and_gap():
+    print("[TEST] Reanudando desde una secuencia con buffer acotado...")
+    feed = ChangeFeed(capacity=3)
+    for i in range(5):
+        feed.publish('created', i + 1)
+    events, complete = feed.events_since(3)
+    assert [e.seq for e in events] == [4, 5] and complete
+    events, complete = feed.events_since(0)
+    assert [e.seq for e in events] == [3, 4, 5] and not complete
+    assert feed.events_since(5) == ([], True)
+    assert feed.wait_for_events(5, timeout=0.01) == ([], True)
+    print("[OK] test_events_since_resume_and_gap completado")
+
+def test_sse_endpoint_streams_deltas():
+    print("[TEST] Leyendo el stream SSE de cambios...")
+    from app import create_app
+    app = create_app()
+    client = app.test_client()
+    change_feed = app.extensions['services'].change_feed
+    since = change_feed.last_seq
+    change_feed.publish('updated', 42, task={"id": 42, "title": "SSE"})
+    resp = client.get(f'/tasks/changes?since={since}', buffered=False)
+    assert resp.status_code == 200
+    assert resp.mimetype == 'text/event-stream'
+    chunks = resp.response
+    assert next(chunks).decode().startswith('retry:')
+    chunk = next(chunks).decode()
+    assert f'id: {since + 1}' in chunk
+    assert 'event: updated' in chunk
+    assert '"task_id": 42' in chunk
+    resp.close()
+    assert client.get('/tasks/changes?since=abc').status_code == 400
+    print("[OK] test_sse_endpoint_streams_deltas completado")
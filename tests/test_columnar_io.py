@@ -0,0 +1,123 @@
+"""
+Pruebas de la exportación e importación de tareas en Parquet y Arrow (requieren pyarrow).
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+import tempfile
+from app.models.task import Task
+from app.services import columnar_io
+from app.repositories.json_task_repository import JsonTaskRepository
+
+pa = pytest.importorskip('pyarrow')
+pq = pytest.importorskip('pyarrow.parquet')
+
+
+def _tasks(count):
+    return [Task(id=i, title=f"Tarea {i}", description="Descripción", priority="media", effort_hours=i / 2,
+                 status="pendiente", assigned_to="Ana", category="Backend" if i % 2 else None,
+                 token_usage=i, ai_fingerprints={'categorize': f'h{i}'} if i % 2 else None)
+            for i in range(1, count + 1)]
+
+@pytest.fixture
+def tmp_dir():
+    with tempfile.TemporaryDirectory() as path:
+        yield path
+
+@pytest.fixture
+def repository(tmp_dir):
+    repository = JsonTaskRepository(os.path.join(tmp_dir, 'tasks.json'))
+    repository.save_tasks(_tasks(25))
+    return repository
+
+def test_roundtrip_files(tmp_dir, repository):
+    print("\n[TEST] Exportando e importando ficheros Parquet y Arrow...")
+    for name in ('tasks.parquet', 'tasks.arrow'):
+        path = os.path.join(tmp_dir, name)
+        fmt = columnar_io.detect_format(path)
+        assert columnar_io.write_tasks(repository.iter_tasks(), path, fmt=fmt, batch_size=10) == 25
+        imported = [task for chunk in columnar_io.read_tasks(path, batch_size=10) for task in chunk]
+        assert [task.to_dict() for task in imported] == [task.to_dict() for task in repository.load_tasks()]
+    metadata = pq.ParquetFile(os.path.join(tmp_dir, 'tasks.parquet')).metadata
+    assert metadata.num_rows == 25 and metadata.num_row_groups == 3
+    table = pq.read_table(os.path.join(tmp_dir, 'tasks.parquet'), columns=['id', 'effort_hours'])
+    assert table.column('effort_hours').to_pylist()[:2] == [0.5, 1.0]
+    print("[OK] test_roundtrip_files completado")
+
+def test_import_modes(tmp_dir, repository):
+    print("\n[TEST] Importando en modo merge y replace...")
+    path = os.path.join(tmp_dir, 'nuevas.parquet')
+    incoming = [Task(id=2, title="Sustituida", description="Nueva", priority="alta", effort_hours=1,
+                     status="pendiente", assigned_to="Luis"),
+                Task(title="Sin id", description="Nueva", priority="baja", effort_hours=1,
+                     status="pendiente", assigned_to="Luis")]
+    columnar_io.write_tasks(incoming, path)
+    assert columnar_io.import_tasks(repository, path, mode='merge') == 2
+    tasks = {task.id: task for task in repository.load_tasks()}
+    assert len(tasks) == 26 and tasks[2].title == "Sustituida" and tasks[26].title == "Sin id"
+    assert columnar_io.import_tasks(repository, path, mode='replace') == 2
+    assert [task.id for task in repository.load_tasks()] == [2, 3]
+    with pytest.raises(ValueError):
+        columnar_io.import_tasks(repository, path, mode='append')
+    print("[OK] test_import_modes completado")
+
+def test_import_streams_batches(tmp_dir, repository, monkeypatch):
+    print("\n[TEST] Importando por lotes con save_tasks_iter...")
+    path = os.path.join(tmp_dir, 'lotes.parquet')
+    columnar_io.write_tasks(_tasks(40)[20:], path, batch_size=5)
+    saves = []
+    monkeypatch.setattr(repository, 'save_tasks', lambda tasks: saves.append(tasks))
+    assert columnar_io.import_tasks(repository, path, mode='merge', batch_size=5) == 20
+    assert saves == [] and [task.id for task in repository.iter_tasks()] == list(range(1, 41))
+    assert columnar_io.import_tasks(repository, path, mode='replace', batch_size=5) == 20
+    assert [task.id for task in repository.iter_tasks()] == list(range(21, 41))
+    # Un id repetido en el fichero rechaza la importación y el fichero temporal se descarta
+    columnar_io.write_tasks(_tasks(3) + _tasks(1), path)
+    with pytest.raises(ValueError, match='id repetido'):
+        columnar_io.import_tasks(repository, path, mode='replace')
+    assert [task.id for task in repository.iter_tasks()] == list(range(21, 41))
+    assert not [name for name in os.listdir(tmp_dir) if name.endswith('.tmp')]
+    print("[OK] test_import_streams_batches completado")
+
+def test_export_and_import_endpoints(repository):
+    print("\n[TEST] Exportando e importando por HTTP en streaming...")
+    from app import create_app
+    client = create_app({'TASK_REPOSITORY': repository}).test_client()
+    response = client.get('/tasks/export?format=arrow&batch_size=10')
+    assert response.status_code == 200 and response.mimetype == 'application/vnd.apache.arrow.stream'
+    table = pa.ipc.open_stream(response.data).read_all()
+    assert table.num_rows == 25 and table.column('title').to_pylist()[0] == "Tarea 1"
+    parquet = client.get('/tasks/export').data
+    assert client.get('/tasks/export?format=csv').status_code == 400
+
+    repository.save_tasks([])
+    imported = client.post('/tasks/import?format=parquet', data=parquet)
+    assert imported.get_json() == {'imported': 25}
+    assert len(client.get('/tasks').get_json()) == 25
+    assert client.get('/tasks/stats').get_json()['totals']['count'] == 25
+    assert client.post('/tasks/import', data=b'no es parquet').status_code == 400
+
+    # Una fila que no cumple TaskSchema rechaza la importación entera sin tocar el repositorio
+    invalid = os.path.join(os.path.dirname(repository.filepath), 'invalidas.parquet')
+    columnar_io.write_tasks(_tasks(2) + [Task(id=3, title="", description="Vacía", priority="media",
+                                              effort_hours=0, status="pendiente", assigned_to="Ana")], invalid)
+    with open(invalid, 'rb') as f:
+        rejected = client.post('/tasks/import?format=parquet&mode=replace', data=f.read())
+    assert rejected.status_code == 400 and 'fila 3' in rejected.get_json()['error']
+    assert len(client.get('/tasks').get_json()) == 25
+    print("[OK] test_export_and_import_endpoints completado")
+
+def test_cli_commands(tmp_dir, repository):
+    print("\n[TEST] Ejecutando los comandos export-tasks e import-tasks...")
+    from app import create_app
+    runner = create_app({'TASK_REPOSITORY': repository}).test_cli_runner()
+    path = os.path.join(tmp_dir, 'export.arrow')
+    result = runner.invoke(args=['export-tasks', path, '--batch-size', '7'])
+    assert result.exit_code == 0 and 'Exportadas 25 tareas' in result.output
+    repository.save_tasks([])
+    result = runner.invoke(args=['import-tasks', path, '--mode', 'replace'])
+    assert result.exit_code == 0 and 'Importadas 25 tareas' in result.output
+    assert len(repository.load_tasks()) == 25
+    print("[OK] test_cli_commands completado")
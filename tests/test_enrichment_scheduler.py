@@ -0,0 +1,149 @@
+"""
+Pruebas del enriquecimiento automático de tareas en segundo plano (EnrichmentScheduler).
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+import tempfile
+from datetime import datetime
+from app.models.task import Task
+from app.services.task_manager import TaskManager
+from app.services.ai_task_manager import AITaskManager
+from app.services.enrichment_scheduler import EnrichmentScheduler, parse_window
+from app.repositories.json_task_repository import JsonTaskRepository
+
+
+class FakeAIService:
+    """Sustituto de OpenAIService que registra las llamadas y puede fallar para un título concreto."""
+    def __init__(self, fail_title=None):
+        self.calls = []
+        self.fail_title = fail_title
+
+    def _answer(self, operation, task_data, result):
+        self.calls.append((operation, task_data['id']))
+        if task_data['title'] == self.fail_title:
+            return {"error": "Servicio no disponible"}
+        return {"result": result, "total_tokens": 10}
+
+    def categorize_task(self, task_data):
+        return self._answer('categorize', task_data, 'Backend')
+
+    def estimate_effort(self, task_data):
+        return self._answer('estimate', task_data, '8')
+
+    def analyze_risks(self, task_data):
+        return self._answer('audit', task_data, 'Riesgos')
+
+    def generate_mitigation(self, task_data, risk_analysis):
+        return {"result": "Mitigación", "total_tokens": 5}
+
+@pytest.fixture
+def task_manager():
+    fd, path = tempfile.mkstemp(suffix='.json')
+    os.close(fd)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('[]')
+    manager = TaskManager(repository=JsonTaskRepository(path))
+    for title in ("Migrar base de datos", "Revisar logs"):
+        manager.create(Task(title=title, description="Descripción", priority="alta", effort_hours=1,
+                            status="pendiente", assigned_to="Ana"))
+    yield manager
+    os.remove(path)
+
+def _scheduler(task_manager, ai_service, **kwargs):
+    sleeps = []
+    scheduler = EnrichmentScheduler(AITaskManager(task_manager=task_manager, ai_service=ai_service),
+                                    sleep=sleeps.append, **kwargs)
+    return scheduler, sleeps
+
+def test_parse_window():
+    print("\n[TEST] Interpretando ventanas horarias...")
+    assert parse_window('') is None
+    assert parse_window('22-6') == (22, 6)
+    with pytest.raises(ValueError):
+        parse_window('noche')
+    with pytest.raises(ValueError):
+        parse_window('25-3')
+    print("[OK] test_parse_window completado")
+
+def test_window_across_midnight(task_manager):
+    print("\n[TEST] Respetando la ventana horaria que cruza la medianoche...")
+    clock = {'now': datetime(2024, 1, 1, 23, 0)}
+    ai_service = FakeAIService()
+    scheduler, _ = _scheduler(task_manager, ai_service, window=(22, 6), now=lambda: clock['now'])
+    assert scheduler.in_window()
+    clock['now'] = datetime(2024, 1, 2, 5, 59)
+    assert scheduler.in_window()
+    clock['now'] = datetime(2024, 1, 2, 12, 0)
+    assert not scheduler.in_window()
+    assert scheduler.run_once() == 0
+    assert ai_service.calls == []
+    print("[OK] test_window_across_midnight completado")
+
+def test_run_once_enriches_batch_with_rate_limit(task_manager):
+    print("\n[TEST] Enriqueciendo un lote con límite de llamadas por minuto...")
+    ai_service = FakeAIService()
+    scheduler, sleeps = _scheduler(task_manager, ai_service, batch_size=1, calls_per_minute=30)
+    assert scheduler.run_once() == 3
+    assert ai_service.calls == [('categorize', 1), ('estimate', 1), ('audit', 1)]
+    # Dos esperas de 60/30 segundos entre las tres llamadas
+    assert sleeps == [2.0, 2.0]
+    task = task_manager.get_by_id(1)
+    assert task.category == 'Backend' and task.effort_hours == 8 and task.has_risk_analysis()
+    assert set(task.ai_fingerprints) == {'categorize', 'estimate', 'audit', 'categorize.model', 'categorize.value',
+                                         'estimate.model', 'estimate.value'}
+    assert task.ai_fingerprints['categorize.value'] == 'Backend'
+    assert scheduler.pending() == [(2, ['categorize', 'estimate', 'audit'])]
+    assert scheduler.run_once() == 3
+    assert scheduler.pending() == []
+    assert scheduler.status()['operations_done'] == 6
+    print("[OK] test_run_once_enriches_batch_with_rate_limit completado")
+
+def test_changed_inputs_are_re_enriched(task_manager):
+    print("\n[TEST] Reenriqueciendo las tareas cuyo título cambió...")
+    ai_service = FakeAIService()
+    scheduler, _ = _scheduler(task_manager, ai_service)
+    scheduler.run_once()
+    task = task_manager.get_by_id(1)
+    task.title = "Migrar base de datos a PostgreSQL"
+    task_manager.update(1, task)
+    assert scheduler.pending() == [(1, ['categorize', 'estimate', 'audit'])]
+    # Cambiar un campo que no entra en los prompts no invalida el enriquecimiento
+    task = task_manager.get_by_id(2)
+    task.status = "completada"
+    task_manager.update(2, task)
+    assert [task_id for task_id, _ in scheduler.pending()] == [1]
+    print("[OK] test_changed_inputs_are_re_enriched completado")
+
+def test_failed_task_is_backed_off(task_manager):
+    print("\n[TEST] Apartando temporalmente las tareas cuyo enriquecimiento falla...")
+    ai_service = FakeAIService(fail_title="Migrar base de datos")
+    scheduler, _ = _scheduler(task_manager, ai_service)
+    assert scheduler.run_once() == 3
+    assert ai_service.calls[0] == ('categorize', 1)
+    assert scheduler.errors == 1
+    assert scheduler.pending() == []
+    assert scheduler.run_once() == 0
+    print("[OK] test_failed_task_is_backed_off completado")
+
+def test_only_one_leader_per_lock_file(task_manager):
+    print("\n[TEST] Eligiendo un único worker que enriquece...")
+    fd, lock_path = tempfile.mkstemp(suffix='.lock')
+    os.close(fd)
+    try:
+        leader, _ = _scheduler(task_manager, FakeAIService(), lock_path=lock_path)
+        follower_ai = FakeAIService()
+        follower, _ = _scheduler(task_manager, follower_ai, lock_path=lock_path)
+        assert leader.run_once() == 6
+        assert follower.run_once() == 0
+        leader.stop()
+        task = task_manager.get_by_id(1)
+        task.description = "Nueva descripción"
+        task_manager.update(1, task)
+        assert follower.run_once() == 3
+    finally:
+        follower.stop()
+        os.remove(lock_path)
+    print("[OK] test_only_one_leader_per_lock_file completado")
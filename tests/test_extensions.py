@@ -0,0 +1,82 @@
+"""
+Pruebas del contenedor de servicios que create_app construye para cada aplicación.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+import tempfile
+from app import create_app
+from app.models.task import Task
+from app.repositories.json_task_repository import JsonTaskRepository
+
+
+class FixedAIService:
+    """Sustituto de OpenAIService que siempre categoriza como Backend."""
+    def categorize_task(self, task_data):
+        return {"result": "Backend", "total_tokens": 10}
+
+
+@pytest.fixture
+def tmp_dir():
+    with tempfile.TemporaryDirectory() as path:
+        yield path
+
+def _repository(tmp_dir, name, titles):
+    repository = JsonTaskRepository(os.path.join(tmp_dir, f'{name}.json'))
+    repository.save_tasks([Task(id=i, title=title, description="Descripción", priority="media", effort_hours=1,
+                                status="pendiente", assigned_to="Ana") for i, title in enumerate(titles, 1)])
+    return repository
+
+def test_apps_do_not_share_services(tmp_dir):
+    print("\n[TEST] Aislando los servicios de cada aplicación...")
+    app_a = create_app({'TASK_REPOSITORY': _repository(tmp_dir, 'a', ["Tarea A"]),
+                        'AI_USAGE_LEDGER_PATH': os.path.join(tmp_dir, 'usage.db')})
+    app_b = create_app({'TASKS_DATA_PATH': _repository(tmp_dir, 'b', ["Tarea B", "Otra B"]).filepath,
+                        'AI_USAGE_LEDGER_PATH': os.path.join(tmp_dir, 'usage.db')})
+    services_a, services_b = app_a.extensions['services'], app_b.extensions['services']
+    assert services_a.task_manager is not services_b.task_manager
+    assert [t['title'] for t in app_a.test_client().get('/tasks').get_json()] == ["Tarea A"]
+    assert len(app_b.test_client().get('/tasks').get_json()) == 2
+    assert services_b.task_stats.snapshot()['totals']['count'] == 2
+    assert services_a.setting('TASKS_JSON_CACHE_MAX_PROJECTIONS', 8) == 8
+    print("[OK] test_apps_do_not_share_services completado")
+
+def test_ai_service_is_lazy_and_shared(tmp_dir):
+    print("\n[TEST] Creando el servicio de IA al primer uso y compartiendo el TaskManager...")
+    ai_service = FixedAIService()
+    app = create_app({'TASK_REPOSITORY': _repository(tmp_dir, 'tasks', ["Migrar base de datos"]),
+                      'AI_SERVICE': ai_service, 'AI_USAGE_LEDGER_PATH': os.path.join(tmp_dir, 'usage.db')})
+    services = app.extensions['services']
+    assert services._ai_manager is None
+    client = app.test_client()
+    assert client.get('/tasks/1?fields=category').get_json() == {'id': 1, 'category': None}
+    response = client.post('/ai/tasks/categorize/1')
+    assert response.status_code == 200 and response.get_json()['category'] == 'Backend'
+    assert services.ai_manager.ai_service is ai_service and services.ai_manager.task_manager is services.task_manager
+    # El resultado de IA pasa por el ChangeFeed compartido: la caché de JSON y las estadísticas se actualizan
+    assert client.get('/tasks/1?fields=category').get_json() == {'id': 1, 'category': 'Backend'}
+    assert services.task_stats.snapshot(['category'])['groups']['category'] == {
+        'Backend': {'count': 1, 'effort_hours': 1.0, 'token_usage': 10}
+    }
+    print("[OK] test_ai_service_is_lazy_and_shared completado")
+
+def test_indexes_are_built_on_first_use(tmp_dir):
+    print("\n[TEST] Construyendo los índices al primer uso y no en los comandos de la CLI...")
+    app = create_app({'TASK_REPOSITORY': _repository(tmp_dir, 'tasks', ["Migrar base de datos", "Otra"]),
+                      'AI_USAGE_LEDGER_PATH': os.path.join(tmp_dir, 'usage.db')})
+    services = app.extensions['services']
+    result = app.test_cli_runner().invoke(args=['verify-integrity', '--no-ledger'])
+    assert result.exit_code == 0 and services._indexes == {}
+    client = app.test_client()
+    client.post('/tasks', json={"title": "Nueva", "description": "Antes de los índices", "priority": "alta",
+                                "effort_hours": 2, "status": "pendiente", "assigned_to": "Luis"})
+    assert client.get('/tasks/stats').get_json()['totals']['count'] == 3
+    assert list(services._indexes) == ['stats']
+    client.delete('/tasks/1')
+    assert services.task_stats.snapshot()['totals']['count'] == 2
+    assert client.get('/tasks/search?q=nueva').get_json()['total'] == 1
+    services.build_indexes()
+    assert sorted(services._indexes) == ['search', 'similarity', 'stats']
+    print("[OK] test_indexes_are_built_on_first_use completado")
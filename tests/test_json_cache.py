@@ -0,0 +1,146 @@
+"""
+Pruebas de la caché de JSON serializado de tareas y listados.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import json
+import pytest
+import tempfile
+from app.models.task import Task
+from app.services.change_feed import ChangeFeed
+from app.services.json_cache import SerializedTaskCache
+from app.services.task_manager import TaskManager
+from app.repositories.json_task_repository import JsonTaskRepository
+
+
+@pytest.fixture
+def manager():
+    with tempfile.TemporaryDirectory() as path:
+        manager = TaskManager(repository=JsonTaskRepository(os.path.join(path, 'tasks.json')),
+                              change_feed=ChangeFeed())
+        for i in range(5):
+            manager.create(Task(title=f"Tarea {i}", description="Descripción ñ", priority="media",
+                                effort_hours=1, status="pendiente", assigned_to="Ana"))
+        yield manager
+
+def test_cache_invalidated_by_change_feed(manager):
+    print("\n[TEST] Invalidando la caché con el ChangeFeed...")
+    cache = SerializedTaskCache()
+    manager.change_feed.subscribe(cache.apply)
+    loads = []
+
+    def load_all():
+        loads.append(1)
+        return manager.get_all()
+
+    first = cache.list_bytes('all', None, load_all)
+    assert json.loads(first) == [task.to_dict() for task in manager.get_all()]
+    assert cache.list_bytes('all', None, load_all) is first and len(loads) == 1
+    assert json.loads(cache.list_bytes('all', ['id', 'title'], load_all))[0] == {'id': 1, 'title': 'Tarea 0'}
+    assert cache.get_stats()['tasks'] == 5 and cache.get_stats()['lists'] == 2
+
+    task = manager.get_by_id(3)
+    task.title = "Cambiada"
+    manager.update(3, task, source='ai:describe')
+    stats = cache.get_stats()
+    assert stats['tasks'] == 4 and stats['lists'] == 0
+    assert json.loads(cache.list_bytes('all', None, load_all))[2]['title'] == "Cambiada"
+    assert json.loads(cache.task_bytes(3, None, lambda: manager.get_by_id(3)))['title'] == "Cambiada"
+    manager.delete(5)
+    assert cache.task_bytes(5, None, lambda: manager.get_by_id(5)) is None
+    assert len(json.loads(cache.list_bytes('all', None, load_all))) == 4
+    print("[OK] test_cache_invalidated_by_change_feed completado")
+
+def test_stale_read_is_not_cached(manager):
+    print("\n[TEST] Descartando lecturas que se cruzan con una escritura...")
+    cache = SerializedTaskCache()
+    manager.change_feed.subscribe(cache.apply)
+    old = manager.get_by_id(1)
+
+    def load_then_write():
+        # La tarea se lee y, antes de guardarla en caché, otra petición la modifica
+        updated = Task.from_dict(old.to_dict())
+        updated.title = "Nueva"
+        manager.update(1, updated)
+        return old
+
+    assert json.loads(cache.task_bytes(1, None, load_then_write))['title'] == "Tarea 0"
+    assert json.loads(cache.task_bytes(1, None, lambda: manager.get_by_id(1)))['title'] == "Nueva"
+    print("[OK] test_stale_read_is_not_cached completado")
+
+def test_projection_limit():
+    print("\n[TEST] Limitando las proyecciones cacheadas...")
+    cache = SerializedTaskCache(max_projections=1)
+    task = Task(id=1, title="A")
+    cache.task_bytes(1, None, lambda: task)
+    cache.task_bytes(1, ['id', 'title'], lambda: task)
+    assert cache.get_stats()['tasks'] == 1
+    assert cache.task_bytes(1, None, lambda: None) is not None
+    assert cache.task_bytes(1, ['id', 'title'], lambda: None) is None
+    print("[OK] test_projection_limit completado")
+
+def test_endpoints_serve_cached_bytes(manager):
+    print("\n[TEST] Sirviendo GET /tasks desde la caché...")
+    from app import create_app
+    app = create_app({'TASK_REPOSITORY': manager.repository})
+    cache = app.extensions['services'].json_cache
+    client = app.test_client()
+    listed = client.get('/tasks')
+    assert listed.status_code == 200 and listed.mimetype == 'application/json'
+    assert listed.get_json() == [task.to_dict() for task in manager.get_all()]
+    assert client.get('/tasks').data == listed.data
+    assert client.get('/tasks/2?fields=status').get_json() == {'id': 2, 'status': 'pendiente'}
+    assert client.get('/tasks/99').status_code == 404
+    assert client.put('/tasks/2', json=dict(manager.get_by_id(2).to_dict(), status='completada')).status_code == 200
+    assert client.get('/tasks/2?fields=status').get_json()['status'] == 'completada'
+    assert client.get('/tasks').get_json()[1]['status'] == 'completada'
+    assert cache.get_stats()['hits'] >= 1
+
+    # Una escritura propia solo invalida su tarea: las demás siguen en caché
+    assert client.get('/tasks/3').status_code == 200
+    hits = cache.get_stats()['hits']
+    created = client.post('/tasks', json={"title": "Otra", "description": "Sin relación", "priority": "baja",
+                                          "effort_hours": 1, "status": "pendiente", "assigned_to": "Luis"})
+    assert created.status_code == 201
+    assert client.get('/tasks/3').status_code == 200
+    stats = cache.get_stats()
+    assert stats['hits'] == hits + 1 and stats['reloads'] == 0
+    print("[OK] test_endpoints_serve_cached_bytes completado")
+
+def test_filtered_views(manager):
+    print("\n[TEST] Cacheando los listados filtrados...")
+    from app import create_app
+    manager.update(2, Task.from_dict(dict(manager.get_by_id(2).to_dict(), status='completada')))
+    app = create_app({'TASK_REPOSITORY': manager.repository, 'TASKS_JSON_CACHE_MAX_VIEWS': 1})
+    cache = app.extensions['services'].json_cache
+    client = app.test_client()
+    done = client.get('/tasks?status=completada&fields=title')
+    assert done.get_json() == [{'id': 2, 'title': 'Tarea 1'}]
+    assert client.get('/tasks?status=completada&fields=title').data == done.data
+    assert cache.get_stats()['lists'] == 1 and cache.get_stats()['hits'] == 1
+    assert len(client.get('/tasks?status=pendiente&assigned_to=Ana').get_json()) == 4
+    assert client.get('/tasks?assigned_to=Nadie').get_json() == []
+    # Solo se cachea max_views listados filtrados; el resto se compone en cada petición
+    assert cache.get_stats()['lists'] == 1
+    assert client.put('/tasks/3', json=dict(manager.get_by_id(3).to_dict(), status='completada')).status_code == 200
+    assert [task['id'] for task in client.get('/tasks?status=completada').get_json()] == [2, 3]
+    print("[OK] test_filtered_views completado")
+
+def test_cache_sees_writes_from_other_workers():
+    print("\n[TEST] Vaciando la caché cuando otro worker escribe en el mismo fichero...")
+    from app import create_app
+    with tempfile.TemporaryDirectory() as path:
+        config = {'TASKS_DATA_PATH': os.path.join(path, 'tasks.json'),
+                  'AI_USAGE_LEDGER_PATH': os.path.join(path, 'usage.db')}
+        worker_a, worker_b = create_app(dict(config)).test_client(), create_app(dict(config)).test_client()
+        assert worker_b.get('/tasks').get_json() == []
+        assert worker_b.get('/tasks/1').status_code == 404
+        created = worker_a.post('/tasks', json={"title": "Nueva", "description": "Desde otro worker",
+                                                "priority": "alta", "effort_hours": 2, "status": "pendiente",
+                                                "assigned_to": "Ana"})
+        assert created.status_code == 201
+        assert [task['title'] for task in worker_b.get('/tasks').get_json()] == ["Nueva"]
+        assert worker_b.get('/tasks/1?fields=title').get_json() == {'id': 1, 'title': 'Nueva'}
+    print("[OK] test_cache_sees_writes_from_other_workers completado")
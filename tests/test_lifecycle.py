@@ -0,0 +1,43 @@
+"""
+Pruebas del registro de apagado ordenado y del hilo de escritura perezoso del ledger de uso.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import tempfile
+from app import lifecycle
+from app.repositories.usage_ledger import UsageLedger
+
+
+def test_shutdown_runs_callbacks_in_reverse_order_once():
+    print("\n[TEST] Apagado en orden inverso y una sola vez")
+    calls = []
+    lifecycle.register_shutdown(lambda: calls.append('primero'))
+
+    @lifecycle.register_shutdown
+    def failing():
+        calls.append('falla')
+        raise RuntimeError('error de cierre')
+
+    lifecycle.register_shutdown(lambda: calls.append('ultimo'))
+    lifecycle.shutdown()
+    lifecycle.shutdown()
+    assert calls == ['ultimo', 'falla', 'primero']
+    print("[OK] Apagado en orden inverso y una sola vez completado")
+
+
+def test_usage_ledger_starts_writer_lazily_and_flushes_on_shutdown():
+    print("\n[TEST] Ledger con escritor perezoso vaciado al apagar")
+    with tempfile.TemporaryDirectory() as tmp:
+        ledger = UsageLedger(os.path.join(tmp, 'usage.db'))
+        assert ledger._writer is None
+        ledger.flush()
+        ledger.record('categorize', model='gpt-4o-mini', task_id=1, total_tokens=30)
+        assert ledger._writer is not None and ledger._writer.is_alive()
+        lifecycle.register_shutdown(ledger.close)
+        lifecycle.shutdown()
+        assert not ledger._writer.is_alive()
+        rows = ledger.rollup(group_by=('operation',))
+        assert rows[0]['total_tokens'] == 30
+    print("[OK] Ledger con escritor perezoso vaciado al apagar completado")
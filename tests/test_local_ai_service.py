@@ -0,0 +1,88 @@
+"""
+Pruebas del modelo local de categorización/estimación y de su servicio con respaldo en OpenAI.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from app.models.task import Task
+from app.services.local_ai_service import LocalTaskModel, LocalFallbackAIService
+
+
+class FakeOpenAIService:
+    """Sustituto de OpenAIService que cuenta las llamadas remotas."""
+    def __init__(self):
+        self.calls = []
+
+    def categorize_task(self, task_data):
+        self.calls.append('categorize')
+        return {"result": "Feature", "total_tokens": 120}
+
+    def estimate_effort(self, task_data):
+        self.calls.append('estimate')
+        return {"result": "8", "total_tokens": 90}
+
+    def generate_description(self, task_data):
+        self.calls.append('describe')
+        return {"result": "desc", "total_tokens": 200}
+
+def _openai_fingerprints(category, hours, model="gpt-4o-mini"):
+    # Lo que guarda AITaskManager tras categorizar y estimar con un modelo
+    return {'categorize': 'h1', 'categorize.model': model, 'categorize.value': category,
+            'estimate': 'h2', 'estimate.model': model, 'estimate.value': str(hours)}
+
+@pytest.fixture
+def enriched_tasks():
+    tasks = []
+    for i in range(15):
+        tasks.append(Task(id=i, title=f"Diseñar pantalla de login {i}", description="Formulario y estilos CSS del frontend",
+                          priority="media", effort_hours=4.0, category="Frontend", token_usage=100,
+                          ai_fingerprints=_openai_fingerprints("Frontend", 4.0)))
+        tasks.append(Task(id=100 + i, title=f"Crear tabla de usuarios {i}", description="Migración SQL e índices de la base de datos",
+                          priority="alta", effort_hours=12.0, category="Database", token_usage=100,
+                          ai_fingerprints=_openai_fingerprints("Database", 12.0)))
+    tasks.append(Task(id=999, title="Sin IA", description="No debe usarse", effort_hours=50.0, category="Security",
+                      token_usage=100))
+    # Predicción anterior del propio modelo local y valores que el usuario cambió tras la IA
+    tasks.append(Task(id=998, title="Local", description="No debe usarse", effort_hours=3.0, category="Security",
+                      token_usage=100, ai_fingerprints=_openai_fingerprints("Security", 3.0, model="local")))
+    tasks.append(Task(id=997, title="Editada", description="No debe usarse", effort_hours=80.0, category="Security",
+                      token_usage=100, ai_fingerprints=_openai_fingerprints("Frontend", 4.0)))
+    return tasks
+
+def test_model_trains_only_on_enriched_tasks(enriched_tasks):
+    print("[TEST] Entrenando el modelo local...")
+    model = LocalTaskModel()
+    assert model.train(enriched_tasks) == {"categorize": 30, "estimate": 30}
+    category, confidence = model.predict_category({"title": "Pantalla de login", "description": "Estilos CSS"})
+    assert category == "Frontend" and confidence > 0.9
+    hours, std = model.predict_effort({"title": "Tabla de usuarios", "description": "Migración SQL",
+                                       "category": "Database", "priority": "alta"})
+    assert 9 < hours < 15 and std < 0.35
+    assert LocalTaskModel().predict_category({"title": "x"}) is None
+    print("[OK] test_model_trains_only_on_enriched_tasks completado")
+
+def test_fallback_service_uses_local_model_when_confident(enriched_tasks):
+    print("[TEST] Usando el modelo local y recurriendo a OpenAI...")
+    remote = FakeOpenAIService()
+    service = LocalFallbackAIService(remote, min_confidence=0.9)
+    # Sin entrenar: todo va a OpenAI
+    assert service.categorize_task({"title": "Pantalla de login"})["result"] == "Feature"
+    service.train(enriched_tasks)
+    result = service.categorize_task({"title": "Pantalla de login", "description": "Estilos CSS"})
+    assert result["result"] == "Frontend" and result["total_tokens"] == 0 and result["model"] == "local"
+    assert float(service.estimate_effort({"title": "Tabla de usuarios", "description": "Migración SQL",
+                                          "category": "Database", "priority": "alta"})["result"]) >= 9
+    service.min_confidence = 1.01
+    service.categorize_task({"title": "Pantalla de login"})
+    service.generate_description({"title": "x"})
+    assert remote.calls == ['categorize', 'categorize', 'describe']
+
+    metrics = service.metrics()
+    assert metrics["categorize"]["local_calls"] == 1
+    assert metrics["categorize"]["remote_calls"] == 2
+    assert metrics["categorize"]["hit_rate"] == pytest.approx(1 / 3, abs=1e-4)
+    assert metrics["categorize"]["tokens_saved"] == 120
+    assert metrics["estimate"]["local_calls"] == 1 and metrics["estimate"]["tokens_saved"] == 0
+    print("[OK] test_fallback_service_uses_local_model_when_confident completado")
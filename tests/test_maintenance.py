@@ -0,0 +1,166 @@
+"""
+Pruebas de las operaciones de mantenimiento masivo y de sus comandos de la CLI.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import json
+import time
+import pytest
+import tempfile
+from app.models.task import Task
+from app.services import maintenance
+from app.services.search_index import SearchIndex
+from app.services.task_stats import TaskStats
+from app.repositories import json_task_repository
+from app.repositories.json_task_repository import JsonTaskRepository
+from app.repositories.sharded_task_repository import ShardedTaskRepository
+
+
+def _tasks(count):
+    return [Task(id=i, title=f"Tarea {i}", description="Descripción con acentos: ñ", priority="media",
+                 effort_hours=1, status="pendiente", assigned_to="Ana", token_usage=10)
+            for i in range(1, count + 1)]
+
+@pytest.fixture
+def tmp_dir():
+    with tempfile.TemporaryDirectory() as path:
+        yield path
+
+@pytest.fixture
+def repository(tmp_dir):
+    repository = JsonTaskRepository(os.path.join(tmp_dir, 'tasks.json'))
+    repository.save_tasks(_tasks(30))
+    return repository
+
+def test_streaming_iter_and_save(tmp_dir, repository, monkeypatch):
+    print("\n[TEST] Recorriendo y guardando el JSON tarea a tarea...")
+    monkeypatch.setattr(json_task_repository, 'READ_CHUNK_SIZE', 64)
+    with open(repository.filepath, encoding='utf-8') as f:
+        original = f.read()
+    assert [task.to_dict() for task in repository.iter_tasks()] == [t.to_dict() for t in repository.load_tasks()]
+    assert repository.save_tasks_iter(iter(repository.load_tasks())) == 30
+    with open(repository.filepath, encoding='utf-8') as f:
+        assert f.read() == original
+    assert repository.save_tasks_iter([]) == 0
+    assert list(repository.iter_tasks()) == []
+    assert not [name for name in os.listdir(tmp_dir) if name.endswith('.tmp')]
+    print("[OK] test_streaming_iter_and_save completado")
+
+def test_migrate_json_to_sharded(tmp_dir, repository):
+    print("\n[TEST] Migrando de JSON a particionado...")
+    target = ShardedTaskRepository(os.path.join(tmp_dir, 'shards'), shards=4)
+    progress = []
+    assert maintenance.migrate_storage(repository, target, batch_size=10, progress=progress.append) == 30
+    assert progress == [10, 20, 30]
+    assert [task.id for task in target.load_tasks()] == list(range(1, 31))
+    assert len(target.shards[1].load_tasks()) == 8
+    assert target.add_task(Task(title="Nueva")).id == 31
+    print("[OK] test_migrate_json_to_sharded completado")
+
+def test_compact_removes_duplicates_and_temp_files(tmp_dir, repository):
+    print("\n[TEST] Compactando el almacenamiento...")
+    repository.save_tasks(repository.load_tasks() + [Task(id=3, title="Duplicada")])
+    stale = os.path.join(tmp_dir, '.tasks.json.abcd.tmp')
+    fresh = os.path.join(tmp_dir, '.tasks.json.efgh.tmp')
+    # Ficheros de otros programas en el mismo directorio: no se borran ni cuentan en el tamaño
+    os.makedirs(os.path.join(tmp_dir, 'otro'))
+    foreign = [os.path.join(tmp_dir, 'informe.tmp'), os.path.join(tmp_dir, 'otro', '.tasks.json.abcd.tmp')]
+    for path in [stale, fresh] + foreign:
+        open(path, 'w').close()
+    old = time.time() - 2 * maintenance.STALE_TEMP_SECONDS
+    for path in [stale] + foreign:
+        os.utime(path, (old, old))
+    with open(os.path.join(tmp_dir, 'usage.db'), 'wb') as f:
+        f.write(b'x' * 100000)
+    result = maintenance.compact(repository)
+    assert result['tasks'] == 30 and result['duplicates_removed'] == 1 and result['temp_files_removed'] == 1
+    assert result['bytes_after'] < result['bytes_before'] < 100000
+    assert result['bytes_after'] == os.path.getsize(repository.filepath)
+    assert repository.get_by_id(3).title == "Tarea 3"
+    assert not os.path.exists(stale) and os.path.exists(fresh)
+    assert all(os.path.exists(path) for path in foreign)
+    print("[OK] test_compact_removes_duplicates_and_temp_files completado")
+
+def test_compact_redistributes_shards(tmp_dir, repository):
+    print("\n[TEST] Redistribuyendo los shards al compactar...")
+    sharded = ShardedTaskRepository(os.path.join(tmp_dir, 'shards'), shards=4)
+    maintenance.migrate_storage(repository, sharded)
+    result = maintenance.compact(sharded, shards=2)
+    assert result['tasks'] == 30 and result['bytes_after'] > 0
+    reopened = ShardedTaskRepository(os.path.join(tmp_dir, 'shards'))
+    assert reopened.shard_count == 2 and reopened.get_by_id(29).title == "Tarea 29"
+    assert not os.path.exists(os.path.join(tmp_dir, 'shards', 'tasks-03.json'))
+    with pytest.raises(ValueError):
+        maintenance.compact(repository, shards=2)
+    print("[OK] test_compact_redistributes_shards completado")
+
+def test_verify_integrity_and_fix(repository):
+    print("\n[TEST] Verificando y corrigiendo la integridad...")
+    tasks = repository.load_tasks()
+    tasks[4].priority = "urgentísima"
+    repository.save_tasks(tasks + [Task(id=1, title="Duplicada")])
+    report = maintenance.verify_integrity(repository, ledger_tokens={2: 50, 3: 5})
+    assert report['tasks'] == 31 and report['duplicates'] == 1 and report['duplicate_ids'] == [1]
+    assert report['invalid'] == [{'id': 5, 'errors': ['priority']}]
+    assert report['token_usage_mismatches'] == [{'id': 2, 'token_usage': 10, 'ledger': 50}]
+    assert not report['fixed']
+    fixed = maintenance.verify_integrity(repository, ledger_tokens={2: 50, 3: 5}, fix=True)
+    assert fixed['fixed']
+    assert len(repository.load_tasks()) == 30
+    assert repository.get_by_id(2).token_usage == 50 and repository.get_by_id(3).token_usage == 10
+    print("[OK] test_verify_integrity_and_fix completado")
+
+def test_rebuild_indexes_and_benchmark(repository):
+    print("\n[TEST] Reconstruyendo índices y midiendo...")
+    search = SearchIndex()
+    timings = maintenance.rebuild_indexes(repository, {'stats': TaskStats(), 'search': search})
+    assert set(timings) == {'stats', 'search'}
+    assert search.search('Tarea 7')
+    results = maintenance.benchmark(repository, {'search': SearchIndex()}, sample=50, seed=1)
+    assert results['iter_tasks']['operations'] == 30 and results['get_by_id']['operations'] == 50
+    assert {'rebuild_search', 'search'} <= set(results)
+    print("[OK] test_rebuild_indexes_and_benchmark completado")
+
+def test_rebuild_indexes_command_signals_workers(tmp_dir, repository):
+    print("\n[TEST] Avisando a los workers en marcha para que reconstruyan sus índices...")
+    from app import create_app
+    config = {'TASKS_DATA_PATH': repository.filepath, 'AI_USAGE_LEDGER_PATH': os.path.join(tmp_dir, 'usage.db')}
+    server = create_app(dict(config))
+    client = server.test_client()
+    assert client.get('/tasks/stats').get_json()['totals']['count'] == 30
+    # Cambio masivo que no pasa por el ChangeFeed del servidor
+    repository.save_tasks(_tasks(12))
+    assert client.get('/tasks/stats').get_json()['totals']['count'] == 30
+    result = create_app(dict(config)).test_cli_runner().invoke(args=['rebuild-indexes'])
+    assert result.exit_code == 0 and json.loads(result.stdout)['stamp'] == f'{repository.filepath}.reindex'
+    assert client.get('/tasks/stats').get_json()['totals']['count'] == 12
+    assert client.get('/tasks/search?q=tarea').get_json()['total'] == 12
+    print("[OK] test_rebuild_indexes_command_signals_workers completado")
+
+def test_cli_commands(tmp_dir, repository):
+    print("\n[TEST] Ejecutando los comandos de mantenimiento...")
+    from app import create_app
+    runner = create_app({
+        'TASK_REPOSITORY': repository,
+        'TASKS_DATA_PATH': repository.filepath,
+        'AI_USAGE_LEDGER_PATH': os.path.join(tmp_dir, 'no-existe.db')
+    }).test_cli_runner()
+
+    repository.save_tasks(repository.load_tasks() + [Task(id=4, title="Duplicada")])
+    result = runner.invoke(args=['verify-integrity'])
+    assert result.exit_code == 1 and json.loads(result.stdout)['duplicates'] == 1
+    result = runner.invoke(args=['compact'])
+    assert result.exit_code == 0 and json.loads(result.stdout)['duplicates_removed'] == 1
+    assert runner.invoke(args=['verify-integrity']).exit_code == 0
+
+    result = runner.invoke(args=['migrate-storage', '--to', 'sharded', '--shards', '3'])
+    assert result.exit_code == 0 and 'Migradas 30 tareas' in result.output
+    assert len([name for name in os.listdir(os.path.join(tmp_dir, 'tasks_shards')) if name.startswith('tasks-')
+                and name.endswith('.json')]) == 3
+    assert runner.invoke(args=['migrate-storage', '--from', 'json', '--to', 'json']).exit_code == 2
+
+    result = runner.invoke(args=['benchmark', '--sample', '10', '--seed', '1'])
+    assert result.exit_code == 0 and json.loads(result.stdout)['get_by_id']['operations'] == 10
+    print("[OK] test_cli_commands completado")
@@ -0,0 +1,60 @@
+"""
+Pruebas del servidor stub de OpenAI usado por los benchmarks y la prueba de carga.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+import requests
+from app.config.ai_config import AIConfig
+from scripts.openai_stub_server import StubConfig, start_in_background
+
+
+@pytest.fixture
+def start_stub():
+    servers = []
+
+    def start(**config):
+        server, base_url = start_in_background(config=StubConfig(**config))
+        servers.append(server)
+        return base_url
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def completion(base_url, operation):
+    messages = [
+        {"role": "system", "content": AIConfig.get_system_prompt(operation)},
+        {"role": "user", "content": "Título: Configurar la base de datos"}
+    ]
+    return requests.post(base_url + '/chat/completions', json={"model": "gpt-4o-mini", "messages": messages})
+
+
+def test_stub_replies_per_operation_with_configured_tokens(start_stub):
+    print("\n[TEST] Respuestas por operación y tokens configurados")
+    base_url = start_stub(prompt_tokens=120, completion_tokens=7)
+    estimate = completion(base_url, 'estimate').json()
+    categorize = completion(base_url, 'categorize').json()
+    describe = completion(base_url, 'describe').json()
+    assert estimate["choices"][0]["message"]["content"] == "8"
+    assert categorize["choices"][0]["message"]["content"] == "Backend"
+    assert len(describe["choices"][0]["message"]["content"].split()) == 7
+    assert describe["usage"] == {"prompt_tokens": 120, "completion_tokens": 7, "total_tokens": 127}
+    stats = requests.get(base_url.replace('/v1', '/stub/stats')).json()
+    assert stats["requests"] == 3 and stats["prompt_tokens"] == 360 and stats["completion_tokens"] == 21
+    print("[OK] Respuestas por operación y tokens configurados completado")
+
+
+def test_stub_injects_errors_at_configured_rate(start_stub):
+    print("\n[TEST] Errores simulados según la tasa configurada")
+    base_url = start_stub(error_rate=0.5, error_status=429, seed=7)
+    statuses = [completion(base_url, 'describe').status_code for _ in range(200)]
+    failures = statuses.count(429)
+    assert set(statuses) == {200, 429}
+    assert 60 < failures < 140
+    assert requests.get(base_url.replace('/v1', '/stub/stats')).json()["errors"] == failures
+    print("[OK] Errores simulados según la tasa configurada completado")
@@ -0,0 +1,98 @@
+"""
+Pruebas de la partición de tareas por proyecto: registro con descarga de proyectos inactivos,
+caché de repositorio y rutas /projects/<project>/tasks.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+import tempfile
+from app.models.task import Task
+from app.repositories.json_task_repository import JsonTaskRepository
+from app.repositories.cached_task_repository import CachedTaskRepository
+from app.services.project_registry import ProjectRegistry, is_valid_project_name
+
+TASK_DATA = {"title": "Diseñar API", "description": "Endpoints REST", "priority": "alta",
+             "effort_hours": 3, "status": "pendiente", "assigned_to": "Ana"}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def tmp_dir():
+    with tempfile.TemporaryDirectory() as path:
+        yield path
+
+
+def test_cached_repository_returns_copies_and_reloads_external_changes(tmp_dir):
+    print("\n[TEST] Caché de repositorio con copias y recarga de cambios externos")
+    path = os.path.join(tmp_dir, 'tasks.json')
+    JsonTaskRepository(path).save_tasks([Task.from_dict({**TASK_DATA, "id": 1})])
+    repository = CachedTaskRepository(JsonTaskRepository(path))
+    task = repository.get_by_id(1)
+    task.title = "Modificada sin guardar"
+    assert repository.get_by_id(1).title == "Diseñar API"
+    previous = repository.update_task(1, task)
+    assert previous.title == "Diseñar API" and repository.get_by_id(1).title == "Modificada sin guardar"
+
+    JsonTaskRepository(path).save_tasks([Task.from_dict({**TASK_DATA, "id": 1, "title": "Otro worker"})])
+    os.utime(path, ns=(0, 10 ** 18))
+    assert repository.get_by_id(1).title == "Otro worker"
+    print("[OK] Caché de repositorio con copias y recarga de cambios externos completado")
+
+
+def test_registry_loads_on_demand_and_evicts_idle_and_lru(tmp_dir):
+    print("\n[TEST] Carga bajo demanda y descarga de proyectos")
+    clock = FakeClock()
+    registry = ProjectRegistry(tmp_dir, max_active=2, idle_seconds=60, clock=clock)
+    alpha = registry.get('alpha')
+    alpha.create(Task.from_dict(TASK_DATA))
+    assert registry.get('alpha') is alpha and registry.loads == 1
+
+    clock.now = 10
+    registry.get('beta')
+    registry.get('gamma')
+    assert list(registry.stats()["active"]) == ['beta', 'gamma']
+
+    clock.now = 100
+    assert registry.evict_idle() == 2 and registry.stats()["active"] == {}
+    reloaded = registry.get('alpha')
+    assert reloaded is not alpha and reloaded.get_by_id(1).title == "Diseñar API"
+    assert registry.evictions == 3 and registry.loads == 4
+
+    assert not is_valid_project_name('../etc') and not is_valid_project_name('Mayus')
+    assert not is_valid_project_name('alpha\n') and is_valid_project_name('alpha')
+    with pytest.raises(ValueError):
+        registry.get('../etc')
+    print("[OK] Carga bajo demanda y descarga de proyectos completado")
+
+
+def test_project_routes_are_isolated(tmp_dir):
+    print("\n[TEST] Rutas de proyecto aisladas entre sí")
+    from app import create_app
+    client = create_app({'PROJECTS_DATA_DIR': tmp_dir}).test_client()
+
+    created = client.post('/projects/equipo-a/tasks', json=TASK_DATA)
+    assert created.status_code == 201
+    assert created.get_json()["id"] == 1 and created.get_json()["project"] == 'equipo-a'
+    assert client.post('/projects/equipo-b/tasks', json={**TASK_DATA, "title": "B"}).get_json()["id"] == 1
+
+    assert client.get('/projects/equipo-a/tasks/1').get_json()["title"] == "Diseñar API"
+    assert client.get('/projects/equipo-b/tasks/1').get_json()["title"] == "B"
+    updated = client.put('/projects/equipo-a/tasks/1', json={**TASK_DATA, "id": 1, "status": "completada"})
+    assert updated.get_json()["status"] == "completada"
+    assert client.delete('/projects/equipo-b/tasks/1').status_code == 200
+    assert client.get('/projects/equipo-b/tasks').get_json() == []
+    assert len(client.get('/projects/equipo-a/tasks').get_json()) == 1
+
+    assert client.get('/projects/inexistente/tasks').status_code == 404
+    assert client.post('/projects/No_Valido/tasks', json=TASK_DATA).status_code == 400
+    assert set(client.get('/projects').get_json()["active"]) == {'equipo-a', 'equipo-b'}
+    print("[OK] Rutas de proyecto aisladas entre sí completado")
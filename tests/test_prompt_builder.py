@@ -0,0 +1,63 @@
+"""
+Pruebas de la compactación de prompts y del ahorro de tokens de entrada por operación.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+import tiktoken
+from app.config.ai_config import AIConfig
+from app.services.prompt_builder import PromptBuilder, compact_system_prompt, compact_value
+
+TASK = {
+    "title": "Implementar autenticación de usuarios",
+    "description": "Registro y login   con JWT.\n\n\n\n   - Validar email   \n   - Encriptar contraseña   ",
+    "priority": "alta",
+    "assigned_to": "Luis",
+    "category": None,
+}
+RISK = "Riesgo de fuga de tokens JWT."
+
+
+def legacy_messages(operation, task_data, risk_analysis=None):
+    """Prompts tal y como se construían antes de PromptBuilder."""
+    category = task_data.get('category', 'No especificada')
+    user = {
+        'describe': f"Título: {task_data.get('title')}\nPrioridad: {task_data.get('priority')}\nPersona asignada: {task_data.get('assigned_to')}\nCategoría: {category}",
+        'categorize': f"Título: {task_data.get('title')}\nDescripción: {task_data.get('description')}",
+        'estimate': f"Título: {task_data.get('title')}\nDescripción: {task_data.get('description')}\nCategoría: {category}",
+        'audit': f"Título: {task_data.get('title')}\nDescripción: {task_data.get('description')}\nCategoría: {category}",
+        'mitigation_plan': f"Título: {task_data.get('title')}\nDescripción: {task_data.get('description')}\nCategoría: {category}\nAnálisis de riesgos: {risk_analysis}",
+    }[operation]
+    return [{"role": "system", "content": AIConfig.get_system_prompt(operation)}, {"role": "user", "content": user}]
+
+def test_system_prompts_are_normalized():
+    print("[TEST] Normalizando prompts del sistema...")
+    builder = PromptBuilder()
+    assert "  " not in builder.system_prompts['categorize']
+    assert "- Backend - Testing" in builder.system_prompts['categorize']
+    assert compact_system_prompt("a \\\n        b") == "a \\ b"
+    messages = builder.build('estimate', {**TASK, "category": "Backend"})
+    assert messages[1]["content"].endswith("Categoría: Backend")
+    assert "None" not in builder.build('describe', TASK)[1]["content"]
+    # Se conserva la sangría de listas anidadas y bloques de código
+    description = "Pasos:   \n- Login\n  - Validar email\n\n\n\n```\n    return token\n```\n"
+    assert compact_value(description) == "Pasos:\n- Login\n  - Validar email\n\n```\n    return token\n```"
+    print("[OK] test_system_prompts_are_normalized completado")
+
+def test_token_savings_per_operation():
+    print("[TEST] Midiendo el ahorro de tokens por operación...")
+    tokenizer = tiktoken.encoding_for_model(AIConfig.DEFAULT_MODEL)
+    builder = PromptBuilder(tokenizer)
+    total_before = total_after = 0
+    for operation in PromptBuilder.USER_TEMPLATES:
+        data = {**TASK, "risk_analysis": RISK}
+        before = builder.count_tokens(legacy_messages(operation, TASK, RISK))
+        after = builder.count_tokens(builder.build(operation, data))
+        print(f"  {operation:<16} {before:>4} -> {after:>4} tokens ({before - after} menos)")
+        assert after <= before
+        total_before += before
+        total_after += after
+    assert total_after < total_before
+    print("[OK] test_token_savings_per_operation completado")
@@ -0,0 +1,126 @@
+"""
+Pruebas del control de admisión: cubetas de tokens por cliente y endpoint y límite de concurrencia.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import threading
+import pytest
+import tempfile
+from flask import Flask
+from app.rate_limit import ConcurrencyLimiter, parse_limit
+from app.repositories.rate_limit_store import MemoryRateLimitStore, SqliteRateLimitStore
+
+
+@pytest.fixture
+def tmp_dir():
+    with tempfile.TemporaryDirectory() as path:
+        yield path
+
+def test_parse_limit():
+    print("\n[TEST] Interpretando límites...")
+    assert parse_limit('30/minute') == (0.5, 30)
+    assert parse_limit('10/seconds:3') == (10, 3)
+    assert parse_limit('') is None and parse_limit('0') is None
+    for value in ('30', '30/week', '-1/minute', '5/minute:0'):
+        with pytest.raises(ValueError):
+            parse_limit(value)
+    print("[OK] test_parse_limit completado")
+
+@pytest.mark.parametrize('kind', ['memory', 'sqlite'])
+def test_token_bucket(tmp_dir, kind):
+    print(f"\n[TEST] Consumiendo tokens del almacén {kind}...")
+    store = MemoryRateLimitStore() if kind == 'memory' else SqliteRateLimitStore(os.path.join(tmp_dir, 'rl.db'))
+    results = [store.consume('a|ep', rate=1, capacity=3, now=100) for _ in range(4)]
+    assert [allowed for allowed, _, _ in results] == [True, True, True, False]
+    assert results[3][1] == pytest.approx(1.0)
+    assert store.consume('b|ep', rate=1, capacity=3, now=100)[0]
+    assert not store.consume('a|ep', rate=1, capacity=3, now=100.5)[0]
+    allowed, retry_after, remaining = store.consume('a|ep', rate=1, capacity=3, now=102)
+    assert allowed and retry_after == 0 and remaining == pytest.approx(1.0)
+    if kind == 'sqlite':
+        # Otro proceso (otra instancia) ve las mismas cubetas
+        other = SqliteRateLimitStore(store.filepath)
+        assert other.consume('a|ep', rate=1, capacity=3, now=102)[0]
+        assert not other.consume('a|ep', rate=1, capacity=3, now=102)[0]
+        other.close()
+    store.close()
+    print(f"[OK] test_token_bucket[{kind}] completado")
+
+def test_sqlite_store_closes_every_thread_connection(tmp_dir):
+    print("\n[TEST] Cerrando las conexiones SQLite de todos los hilos...")
+    import sqlite3
+    store = SqliteRateLimitStore(os.path.join(tmp_dir, 'rl.db'))
+    threads = [threading.Thread(target=store.consume, args=(f'c{i}|ep', 1, 3)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    connections = list(store._connections)
+    assert len(connections) == 5
+    store.close()
+    for conn in connections:
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute('SELECT 1')
+    print("[OK] test_sqlite_store_closes_every_thread_connection completado")
+
+def test_rate_limited_endpoint(monkeypatch):
+    print("\n[TEST] Limitando un endpoint por cliente...")
+    from app import create_app
+    monkeypatch.setenv('RATE_LIMIT_ENDPOINTS', 'tasks.get_tasks=2/minute')
+    monkeypatch.setenv('RATE_LIMIT_CLIENT_HEADER', 'X-API-Key')
+    client = create_app().test_client()
+    first = client.get('/tasks?fields=id', headers={'X-API-Key': 'cliente-a'})
+    assert first.status_code == 200 and first.headers['X-RateLimit-Remaining'] == '1'
+    assert client.get('/tasks?fields=id', headers={'X-API-Key': 'cliente-a'}).status_code == 200
+    rejected = client.get('/tasks?fields=id', headers={'X-API-Key': 'cliente-a'})
+    assert rejected.status_code == 429 and int(rejected.headers['Retry-After']) >= 1
+    assert 'error' in rejected.get_json()
+    assert client.get('/tasks?fields=id', headers={'X-API-Key': 'cliente-b'}).status_code == 200
+    assert 'X-RateLimit-Limit' not in client.get('/tasks/stats').headers
+    assert client.get('/ai/admission').get_json()['rate_limit'] == {'enabled': True, 'rejected': 1}
+
+    monkeypatch.setenv('RATE_LIMIT_ENABLED', 'false')
+    assert 'rate_limiter' not in create_app().extensions
+    print("[OK] test_rate_limited_endpoint completado")
+
+def test_concurrency_limiter_queues_and_rejects():
+    print("\n[TEST] Encolando y rechazando por concurrencia...")
+    limiter = ConcurrencyLimiter(1, max_queued=1, queue_timeout=5)
+    started = threading.Event()
+    release = threading.Event()
+    app = Flask(__name__)
+
+    @app.route('/lenta')
+    @limiter.limit
+    def slow():
+        started.set()
+        release.wait(5)
+        return 'ok'
+
+    client = app.test_client()
+    responses = []
+    threads = [threading.Thread(target=lambda: responses.append(client.get('/lenta').status_code))]
+    threads[0].start()
+    assert started.wait(5)
+    threads.append(threading.Thread(target=lambda: responses.append(client.get('/lenta').status_code)))
+    threads[1].start()
+    while limiter.get_stats()['waiting'] == 0:
+        threading.Event().wait(0.01)
+    # Uno en curso y otro en cola: el tercero se rechaza sin esperar
+    rejected = client.get('/lenta')
+    assert rejected.status_code == 429 and rejected.headers['Retry-After'] == '5'
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert responses == [200, 200]
+    assert limiter.get_stats() == {'max_concurrent': 1, 'max_queued': 1, 'queue_timeout': 5,
+                                   'active': 0, 'waiting': 0, 'rejected': 1}
+
+    impatient = ConcurrencyLimiter(1, max_queued=1, queue_timeout=0.05)
+    assert impatient.acquire()
+    assert not impatient.acquire()
+    impatient.release()
+    assert impatient.acquire() and impatient.get_stats()['rejected'] == 1
+    print("[OK] test_concurrency_limiter_queues_and_rejects completado")
@@ -0,0 +1,94 @@
+"""
+Pruebas de la proyección de campos (?fields=) y de la compresión de respuestas negociada con Accept-Encoding.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import gzip
+import json
+import pytest
+import tempfile
+from app.models.task import Task
+from app.services.task_manager import TaskManager
+from app.repositories.json_task_repository import JsonTaskRepository
+
+
+@pytest.fixture
+def client():
+    from app import create_app
+    fd, path = tempfile.mkstemp(suffix='.json')
+    os.close(fd)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('[]')
+    manager = TaskManager(repository=JsonTaskRepository(path))
+    for i in range(20):
+        manager.create(Task(title=f"Tarea {i}", description="Descripción", priority="alta", effort_hours=2,
+                            status="pendiente", assigned_to="Ana", risk_analysis="Riesgo " * 50,
+                            risk_mitigation="Mitigación " * 50))
+    yield create_app({'TASK_REPOSITORY': manager.repository}).test_client()
+    os.remove(path)
+
+def test_task_to_dict_projection():
+    print("\n[TEST] Serializando solo los campos pedidos...")
+    task = Task(id=1, title="A", status="pendiente", ai_fingerprints={'estimate': 'abc'})
+    assert task.to_dict(['status', 'id', 'ai_fingerprints']) == {
+        'id': 1, 'status': 'pendiente', 'ai_fingerprints': {'estimate': 'abc'}
+    }
+    assert list(task.to_dict()) == list(Task.FIELDS)
+    print("[OK] test_task_to_dict_projection completado")
+
+def test_fields_parameter(client):
+    print("\n[TEST] Proyectando campos en GET /tasks y GET /tasks/<id>...")
+    tasks = client.get('/tasks?fields=title,status').get_json()
+    assert len(tasks) == 20
+    assert tasks[0] == {'id': 1, 'title': 'Tarea 0', 'status': 'pendiente'}
+    assert client.get('/tasks/2?fields=title').get_json() == {'id': 2, 'title': 'Tarea 1'}
+    assert 'risk_analysis' in client.get('/tasks/2').get_json()
+    response = client.get('/tasks?fields=title,secreto')
+    assert response.status_code == 400 and 'secreto' in response.get_json()['error']
+    print("[OK] test_fields_parameter completado")
+
+def test_gzip_negotiation(client):
+    print("\n[TEST] Comprimiendo con gzip cuando el cliente lo acepta...")
+    plain = client.get('/tasks')
+    assert 'Content-Encoding' not in plain.headers
+    assert 'Accept-Encoding' in plain.headers['Vary']
+    compressed = client.get('/tasks', headers={'Accept-Encoding': 'gzip, deflate'})
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert int(compressed.headers['Content-Length']) < len(plain.data) / 5
+    assert json.loads(gzip.decompress(compressed.data)) == plain.get_json()
+    # Las respuestas pequeñas y las que el cliente no acepta comprimidas se envían tal cual
+    small = client.get('/tasks/1?fields=title', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in small.headers
+    identity = client.get('/tasks', headers={'Accept-Encoding': 'gzip;q=0, identity'})
+    assert 'Content-Encoding' not in identity.headers
+    print("[OK] test_gzip_negotiation completado")
+
+def test_brotli_preferred_when_available(client):
+    print("\n[TEST] Prefiriendo brotli si está instalado...")
+    brotli = pytest.importorskip('brotli')
+    response = client.get('/tasks', headers={'Accept-Encoding': 'gzip, br'})
+    assert response.headers['Content-Encoding'] == 'br'
+    assert len(json.loads(brotli.decompress(response.data))) == 20
+    print("[OK] test_brotli_preferred_when_available completado")
+
+def test_compressed_body_cached(client, monkeypatch):
+    print("\n[TEST] Reutilizando el cuerpo comprimido de los bytes en caché...")
+    from app import compression
+    calls = []
+    original = compression.compress
+    monkeypatch.setattr(compression, 'compress', lambda data, encoding: calls.append(encoding) or original(data, encoding))
+    headers = {'Accept-Encoding': 'gzip'}
+    first = client.get('/tasks', headers=headers)
+    second = client.get('/tasks', headers=headers)
+    client.get('/tasks/2', headers=headers)
+    client.get('/tasks/2', headers=headers)
+    assert second.data == first.data
+    assert calls == ['gzip', 'gzip']
+    # Una escritura invalida los bytes y con ellos su variante comprimida
+    assert client.put('/tasks/2', json=dict(client.get('/tasks/2').get_json(), title='Renombrada')).status_code == 200
+    updated = client.get('/tasks', headers=headers)
+    assert len(calls) == 3
+    assert json.loads(gzip.decompress(updated.data))[1]['title'] == 'Renombrada'
+    print("[OK] test_compressed_body_cached completado")
@@ -0,0 +1,65 @@
+"""
+Pruebas del índice invertido de búsqueda y del endpoint /tasks/search.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from app.models.task import Task
+from app.services.change_feed import ChangeFeed
+from app.services.search_index import SearchIndex
+from app.services.text_analysis import tokenize
+
+
+def make_task(id, title, description="", **kwargs):
+    return Task(id=id, title=title, description=description, priority="media", effort_hours=1,
+                status="pendiente", assigned_to="Carlos", **kwargs)
+
+def test_tokenize_folds_accents_and_plurals():
+    print("[TEST] Tokenizando texto en español...")
+    assert tokenize("Análisis de las Migraciones") == ["analisi", "migracion"]
+    assert tokenize("TAREAS y tarea") == ["tarea", "tarea"]
+    assert tokenize(None) == []
+    print("[OK] test_tokenize_folds_accents_and_plurals completado")
+
+def test_search_ranks_and_paginates():
+    print("[TEST] Buscando y paginando resultados...")
+    index = SearchIndex()
+    index.rebuild([
+        make_task(1, "Migración de base de datos", "Mover tablas"),
+        make_task(2, "Diseñar interfaz", "Pantallas de login", risk_analysis="Riesgo en la migracion"),
+        make_task(3, "Documentar API", "Sin relación"),
+    ])
+    total, results = index.search("migracion")
+    assert total == 2
+    assert [r["id"] for r in results] == [1, 2]
+    total, page2 = index.search("migraciones", page=2, per_page=1)
+    assert total == 2 and [r["id"] for r in page2] == [2]
+    assert index.search("inexistente") == (0, [])
+    print("[OK] test_search_ranks_and_paginates completado")
+
+def test_search_index_follows_change_feed():
+    print("[TEST] Actualizando el índice con el ChangeFeed...")
+    feed = ChangeFeed()
+    index = SearchIndex()
+    feed.subscribe(index.apply)
+    feed.publish('created', 1, task=make_task(1, "Optimizar consultas").to_dict())
+    assert index.search("consulta")[0] == 1
+    feed.publish('updated', 1, task=make_task(1, "Revisar seguridad").to_dict())
+    assert index.search("consulta")[0] == 0
+    assert index.search("seguridad")[0] == 1
+    feed.publish('deleted', 1)
+    assert index.search("seguridad")[0] == 0
+    print("[OK] test_search_index_follows_change_feed completado")
+
+def test_search_endpoint_validation():
+    print("[TEST] Validando /tasks/search...")
+    from app import create_app
+    client = create_app().test_client()
+    assert client.get('/tasks/search').status_code == 400
+    assert client.get('/tasks/search?q=x&per_page=1000').status_code == 400
+    resp = client.get('/tasks/search?q=pruebas')
+    assert resp.status_code == 200
+    assert set(resp.get_json()) == {'query', 'total', 'page', 'per_page', 'results'}
+    print("[OK] test_search_endpoint_validation completado")
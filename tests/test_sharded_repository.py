@@ -0,0 +1,134 @@
+"""
+Pruebas del repositorio de tareas particionado en varios ficheros.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+import tempfile
+import threading
+from app.models.task import Task
+from app.services.task_manager import TaskManager
+from app.services.change_feed import ChangeFeed
+from app.repositories.json_task_repository import JsonTaskRepository
+from app.repositories.sharded_task_repository import ShardedTaskRepository
+
+
+def make_task(task_id=None, title="Tarea"):
+    return Task(id=task_id, title=title, description="Descripción", priority="media", effort_hours=2,
+                status="pendiente", assigned_to="Ana")
+
+
+@pytest.fixture
+def tmp_dir():
+    with tempfile.TemporaryDirectory() as path:
+        yield path
+
+
+def shard_sizes(repository):
+    return [len(shard.load_tasks()) for shard in repository.shards]
+
+
+def test_writes_touch_only_the_task_shard(tmp_dir):
+    print("\n[TEST] Escrituras limitadas al shard de la tarea")
+    repository = ShardedTaskRepository(os.path.join(tmp_dir, 'shards'), shards=4)
+    feed = ChangeFeed()
+    manager = TaskManager(repository=repository, change_feed=feed)
+    for i in range(10):
+        manager.create(make_task(title=f"Tarea {i}"))
+    assert shard_sizes(repository) == [2, 3, 3, 2]
+    assert [task.id for task in manager.get_all()] == list(range(1, 11))
+
+    before = {shard.filepath: os.path.getmtime(shard.filepath) for shard in repository.shards}
+    os.utime(repository.shards[2].filepath, (0, 0))
+    manager.update(6, make_task(6, title="Actualizada"))
+    assert os.path.getmtime(repository.shards[2].filepath) > 0
+    for shard in (repository.shards[0], repository.shards[1], repository.shards[3]):
+        assert os.path.getmtime(shard.filepath) == before[shard.filepath]
+
+    assert manager.get_by_id(6).title == "Actualizada"
+    assert manager.delete(7) is True and manager.delete(7) is False
+    assert manager.get_by_id(7) is None
+    assert [event.type for event in feed.events_since(0)[0]][-2:] == ['updated', 'deleted']
+    assert feed.events_since(0)[0][-2].previous['title'] == "Tarea 5"
+    print("[OK] Escrituras limitadas al shard de la tarea completado")
+
+
+def test_imports_legacy_file_and_keeps_ids_unique_under_concurrency(tmp_dir):
+    print("\n[TEST] Importación del JSON único e ids únicos con escrituras concurrentes")
+    legacy = os.path.join(tmp_dir, 'tasks.json')
+    JsonTaskRepository(legacy).save_tasks([make_task(i) for i in (1, 2, 5)])
+    repository = ShardedTaskRepository(os.path.join(tmp_dir, 'shards'), shards=3, legacy_path=legacy)
+    assert sorted(task.id for task in repository.iter_tasks()) == [1, 2, 5]
+
+    manager = TaskManager(repository=repository)
+    threads = [threading.Thread(target=lambda: manager.create(make_task())) for _ in range(30)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    ids = [task.id for task in manager.get_all()]
+    assert ids == [1, 2, 5] + list(range(6, 36))
+
+    # Al reabrir, el directorio ya tiene datos y no se vuelve a importar el JSON
+    reopened = ShardedTaskRepository(os.path.join(tmp_dir, 'shards'), shards=3, legacy_path=legacy)
+    assert len(reopened.load_tasks()) == 33 and reopened.next_id() == 36
+    print("[OK] Importación del JSON único e ids únicos con escrituras concurrentes completado")
+
+
+def test_ids_unique_across_instances(tmp_dir):
+    print("\n[TEST] Ids únicos entre repositorios de distintos workers sobre los mismos shards")
+    directory = os.path.join(tmp_dir, 'shards')
+    worker_a = ShardedTaskRepository(directory, shards=4)
+    worker_b = ShardedTaskRepository(directory, shards=4)
+    # Cada worker reserva un id antes de que el otro guarde su tarea
+    ids = [worker_a.next_id(), worker_b.next_id(), worker_a.next_id()]
+    assert ids == [1, 2, 3]
+    worker_b.add_task(make_task(10))
+    assert worker_a.add_task(make_task()).id == 11
+    assert worker_b.get_by_id(11) is not None and worker_a.get_by_id(10) is not None
+    print("[OK] Ids únicos entre repositorios de distintos workers completado")
+
+
+def _create_tasks(directory, count):
+    repository = ShardedTaskRepository(directory)
+    for _ in range(count):
+        repository.add_task(make_task())
+
+
+@pytest.mark.skipif(os.name == 'nt', reason='flock solo está disponible en POSIX')
+def test_concurrent_processes_do_not_lose_tasks(tmp_dir):
+    print("\n[TEST] Varios procesos creando tareas en los mismos shards")
+    import multiprocessing
+    directory = os.path.join(tmp_dir, 'shards')
+    ShardedTaskRepository(directory, shards=2)
+    processes = [multiprocessing.Process(target=_create_tasks, args=(directory, 15)) for _ in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    assert [task.id for task in ShardedTaskRepository(directory).load_tasks()] == list(range(1, 61))
+    print("[OK] Varios procesos creando tareas en los mismos shards completado")
+
+
+def test_shard_count_is_persisted(tmp_dir):
+    print("\n[TEST] Número de shards guardado en el manifiesto y redistribución")
+    directory = os.path.join(tmp_dir, 'shards')
+    repository = ShardedTaskRepository(directory, shards=4)
+    repository.save_tasks([make_task(i) for i in range(1, 11)])
+    with pytest.raises(ValueError):
+        ShardedTaskRepository(directory, shards=3)
+    assert ShardedTaskRepository(directory).shard_count == 4
+
+    resharded = ShardedTaskRepository(directory, shards=3, redistribute=True)
+    assert sorted(task.id for task in resharded.iter_tasks()) == list(range(1, 11))
+    with pytest.raises(RuntimeError):
+        resharded.get_by_id(1)
+    assert resharded.save_tasks_iter(resharded.iter_tasks()) == 10
+    assert sorted(name for name in os.listdir(directory) if name.endswith('.json')) == \
+        ['shards.json', 'tasks-00.json', 'tasks-01.json', 'tasks-02.json']
+    reopened = ShardedTaskRepository(directory, shards=3)
+    assert shard_sizes(reopened) == [3, 4, 3]
+    assert reopened.get_by_id(7).id == 7 and reopened.next_id() == 11
+    print("[OK] Número de shards guardado en el manifiesto y redistribución completado")
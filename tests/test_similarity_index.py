@@ -0,0 +1,60 @@
+"""
+Pruebas de la detección local de tareas similares y del endpoint /tasks/<id>/similar.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from app.models.task import Task
+from app.services.change_feed import ChangeFeed
+from app.services.similarity_index import SimilarityIndex
+
+
+def make_task(id, title, description):
+    return Task(id=id, title=title, description=description, priority="media", effort_hours=1,
+                status="pendiente", assigned_to="Carlos")
+
+@pytest.fixture
+def tasks():
+    return [
+        make_task(1, "Implementar autenticación de usuarios", "Registro, login y recuperación de contraseña con JWT"),
+        make_task(2, "Implementar la autenticación de usuarios", "Login, registro y recuperación de contraseñas usando JWT"),
+        make_task(3, "Diseñar la base de datos", "Modelo entidad relación y migraciones iniciales"),
+        make_task(4, "Crear pruebas unitarias", "Cobertura de los servicios de tareas"),
+    ]
+
+def test_similar_ranks_near_duplicates_first(tasks):
+    print("[TEST] Buscando duplicados cercanos...")
+    index = SimilarityIndex(initial_capacity=2)
+    index.rebuild(tasks)
+    results = index.similar(1, k=3)
+    assert results[0]["id"] == 2
+    assert results[0]["score"] > 0.5
+    assert all(r["id"] != 1 for r in results)
+    assert all(r["score"] < results[0]["score"] for r in results[1:])
+    assert index.similar(1, k=3, min_score=0.5) == results[:1]
+    assert index.similar(999) is None
+    print("[OK] test_similar_ranks_near_duplicates_first completado")
+
+def test_similarity_index_follows_change_feed(tasks):
+    print("[TEST] Actualizando vectores con el ChangeFeed...")
+    feed = ChangeFeed()
+    index = SimilarityIndex()
+    feed.subscribe(index.apply)
+    for task in tasks:
+        feed.publish('created', task.id, task=task.to_dict())
+    feed.publish('deleted', 2)
+    assert all(r["id"] != 2 for r in index.similar(1, k=3))
+    copy = make_task(5, tasks[2].title, tasks[2].description)
+    feed.publish('created', 5, task=copy.to_dict())
+    assert index.similar(3, k=1) == [{"id": 5, "title": copy.title, "score": 1.0}]
+    print("[OK] test_similarity_index_follows_change_feed completado")
+
+def test_similar_endpoint_validation():
+    print("[TEST] Validando /tasks/<id>/similar...")
+    from app import create_app
+    client = create_app().test_client()
+    assert client.get('/tasks/999999/similar').status_code == 404
+    assert client.get('/tasks/1/similar?k=0').status_code == 400
+    print("[OK] test_similar_endpoint_validation completado")
@@ -0,0 +1,78 @@
+"""
+Pruebas de la deduplicación de operaciones de IA concurrentes (single-flight).
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+import tempfile
+import threading
+import time
+from app.models.task import Task
+from app.services.task_manager import TaskManager
+from app.services.ai_task_manager import AITaskManager
+from app.services.change_feed import ChangeFeed
+from app.services.single_flight import SingleFlight
+from app.repositories.json_task_repository import JsonTaskRepository
+
+
+class SlowAIService:
+    """Sustituto de OpenAIService que tarda en responder y cuenta las llamadas."""
+    def __init__(self):
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def analyze_risks(self, task_data):
+        with self.lock:
+            self.calls += 1
+        time.sleep(0.2)
+        return {"result": "Riesgos", "total_tokens": 10}
+
+    def generate_mitigation(self, task_data, risk_analysis):
+        return {"result": "Mitigación", "total_tokens": 5}
+
+@pytest.fixture
+def task_manager():
+    fd, path = tempfile.mkstemp(suffix='.json')
+    os.close(fd)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('[]')
+    manager = TaskManager(repository=JsonTaskRepository(path), change_feed=ChangeFeed())
+    manager.create(Task(title="Auditar", description="Descripción", priority="alta", effort_hours=3,
+                        status="pendiente", assigned_to="Ana"))
+    yield manager
+    os.remove(path)
+
+def test_single_flight_shares_result_and_error():
+    print("[TEST] Compartiendo resultados y errores en SingleFlight...")
+    flight = SingleFlight()
+    assert flight.do('k', lambda: 1) == (1, False)
+    with pytest.raises(ValueError):
+        flight.do('k', lambda: (_ for _ in ()).throw(ValueError("boom")))
+    assert flight.in_flight() == 0
+    print("[OK] test_single_flight_shares_result_and_error completado")
+
+def test_concurrent_audits_share_one_call(task_manager):
+    print("[TEST] Auditando la misma tarea desde varios hilos...")
+    ai_service = SlowAIService()
+    manager = AITaskManager(task_manager=task_manager, ai_service=ai_service)
+    updates = []
+    task_manager.change_feed.subscribe(updates.append)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(manager.audit_task_risks(1))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert ai_service.calls == 1
+    assert len(updates) == 1
+    assert all(error is None and task.token_usage == 15 for task, error in results)
+    assert task_manager.get_by_id(1).token_usage == 15
+    # Una vez terminada, una nueva petición con las mismas entradas reutiliza el resultado guardado
+    manager.audit_task_risks(1)
+    assert ai_service.calls == 1
+    # Y con force vuelve a llamar a la IA
+    manager.audit_task_risks(1, force=True)
+    assert ai_service.calls == 2
+    print("[OK] test_concurrent_audits_share_one_call completado")
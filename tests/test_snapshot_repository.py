@@ -0,0 +1,106 @@
+"""
+Pruebas del snapshot binario mapeado en memoria y de SnapshotTaskRepository.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+import tempfile
+from app.models.task import Task
+from app.services.task_manager import TaskManager
+from app.repositories.json_task_repository import JsonTaskRepository
+from app.repositories.snapshot_task_repository import SnapshotReader, SnapshotTaskRepository, write_snapshot
+
+
+def make_task(task_id, title=None):
+    return Task(id=task_id, title=title or f"Tarea {task_id}", description="Descripción con acentos: migración",
+                priority="media", effort_hours=2, status="pendiente", assigned_to="Ana", category="Backend")
+
+
+@pytest.fixture
+def tmp_dir():
+    with tempfile.TemporaryDirectory() as path:
+        yield path
+
+
+def test_reader_looks_up_tasks_by_offset(tmp_dir):
+    print("\n[TEST] Búsqueda por offset en el snapshot")
+    path = os.path.join(tmp_dir, 'tasks.snap')
+    write_snapshot(path, [make_task(i) for i in (9, 3, 27, 1, 14)])
+    reader = SnapshotReader(path)
+    try:
+        assert len(reader) == 5
+        assert reader.ids() == [1, 3, 9, 14, 27]
+        assert reader.get(14).title == "Tarea 14"
+        assert reader.get(27).description == "Descripción con acentos: migración"
+        assert reader.get(2) is None and reader.get(100) is None
+        assert [task.id for task in reader.iter_tasks()] == [1, 3, 9, 14, 27]
+    finally:
+        reader.close()
+    print("[OK] Búsqueda por offset en el snapshot completado")
+
+
+def test_reader_rejects_invalid_files(tmp_dir):
+    print("\n[TEST] Rechazo de ficheros que no son snapshots")
+    path = os.path.join(tmp_dir, 'tasks.snap')
+    with open(path, 'wb') as f:
+        f.write(b'[{"id": 1}]')
+    with pytest.raises(ValueError):
+        SnapshotReader(path)
+    print("[OK] Rechazo de ficheros que no son snapshots completado")
+
+
+def test_repository_serves_reads_from_snapshot_and_follows_writes(tmp_dir):
+    print("\n[TEST] Repositorio snapshot sincronizado con la fuente JSON")
+    json_path = os.path.join(tmp_dir, 'tasks.json')
+    source = JsonTaskRepository(json_path)
+    source.save_tasks([make_task(1), make_task(2)])
+    repository = SnapshotTaskRepository(source, json_path + '.snap')
+    manager = TaskManager(repository=repository)
+
+    assert manager.get_by_id(2).title == "Tarea 2"
+    manager.create(Task(title="Nueva", description="d", priority="alta", effort_hours=1,
+                        status="pendiente", assigned_to="Luis"))
+    manager.update(1, make_task(1, title="Renombrada"))
+    manager.delete(2)
+
+    assert [task.id for task in manager.get_all()] == [1, 3]
+    assert manager.get_by_id(1).title == "Renombrada"
+    assert manager.get_by_id(2) is None
+    assert [task.id for task in source.load_tasks()] == [1, 3]
+
+    # Otro proceso (otro repositorio sobre los mismos ficheros) ve el snapshot regenerado
+    other = SnapshotTaskRepository(JsonTaskRepository(json_path), json_path + '.snap')
+    assert other.get_by_id(3).title == "Nueva"
+    repository.save_tasks(repository.load_tasks() + [make_task(4)])
+    assert other.get_by_id(4).title == "Tarea 4"
+    repository.close()
+    other.close()
+    print("[OK] Repositorio snapshot sincronizado con la fuente JSON completado")
+
+
+def test_concurrent_snapshot_writers(tmp_dir):
+    print("\n[TEST] Escrituras concurrentes del snapshot con temporales propios")
+    import threading
+    path = os.path.join(tmp_dir, 'tasks.snap')
+    errors = []
+
+    def write(count):
+        try:
+            for _ in range(20):
+                write_snapshot(path, [make_task(i) for i in range(1, count + 1)])
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=write, args=(count,)) for count in (5, 50, 200)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    reader = SnapshotReader(path)
+    assert len(reader.ids()) in (5, 50, 200) and reader.get(5).title == "Tarea 5"
+    reader.close()
+    assert not [name for name in os.listdir(tmp_dir) if name.endswith('.tmp')]
+    print("[OK] Escrituras concurrentes del snapshot con temporales propios completado")
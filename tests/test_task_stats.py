@@ -0,0 +1,96 @@
+"""
+Pruebas de los agregados incrementales de TaskStats y del endpoint /tasks/stats.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+import tempfile
+import threading
+from app.models.task import Task
+from app.services.task_manager import TaskManager
+from app.services.change_feed import ChangeFeed
+from app.services.task_stats import TaskStats, UNSPECIFIED
+from app.repositories.json_task_repository import JsonTaskRepository
+
+
+@pytest.fixture
+def task_manager():
+    fd, path = tempfile.mkstemp(suffix='.json')
+    os.close(fd)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('[]')
+    feed = ChangeFeed()
+    manager = TaskManager(repository=JsonTaskRepository(path), change_feed=feed)
+    yield manager
+    os.remove(path)
+    if os.path.exists(f'{path}.lock'):
+        os.remove(f'{path}.lock')
+
+def make_task(title, status="pendiente", assigned_to="Carlos", effort_hours=2.0, **kwargs):
+    return Task(title=title, description="Descripción", priority="media", effort_hours=effort_hours,
+                status=status, assigned_to=assigned_to, **kwargs)
+
+def test_incremental_stats_match_rebuild(task_manager):
+    print("[TEST] Comparando agregados incrementales con un recálculo completo...")
+    stats = TaskStats()
+    task_manager.change_feed.subscribe(stats.apply)
+    task_manager.create(make_task("A", effort_hours=3.0))
+    b = task_manager.create(make_task("B", assigned_to="Ana", category="Backend", token_usage=100))
+    c = task_manager.create(make_task("C", risk_analysis="r", risk_mitigation="m", token_usage=50))
+    task_manager.update(b.id, make_task("B", status="completada", assigned_to="Ana", category="Backend",
+                                        token_usage=180, id=b.id))
+    task_manager.delete(c.id)
+
+    snapshot = stats.snapshot()
+    assert snapshot["totals"] == {"count": 2, "effort_hours": 5.0, "token_usage": 180}
+    assert snapshot["groups"]["status"]["completada"]["count"] == 1
+    assert snapshot["groups"]["assigned_to"]["Ana"]["token_usage"] == 180
+    assert snapshot["groups"]["category"][UNSPECIFIED]["count"] == 1
+    assert "true" not in snapshot["groups"]["risk_complete"]
+
+    rebuilt = TaskStats()
+    rebuilt.rebuild(task_manager.get_all())
+    assert rebuilt.snapshot() == snapshot
+    print("[OK] test_incremental_stats_match_rebuild completado")
+
+def test_concurrent_writes_match_storage(task_manager):
+    print("[TEST] Comparando los agregados con el almacenamiento tras escrituras concurrentes...")
+    stats = TaskStats()
+    task_manager.change_feed.subscribe(stats.apply)
+    task = task_manager.create(make_task("Compartida"))
+    def write_many(worker):
+        for i in range(10):
+            task_manager.create(make_task(f"T{worker}-{i}", effort_hours=1.0))
+            task_manager.update(task.id, make_task("Compartida", assigned_to=f"P{worker}", effort_hours=i + 1,
+                                                   id=task.id))
+    threads = [threading.Thread(target=write_many, args=(worker,)) for worker in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    rebuilt = TaskStats()
+    rebuilt.rebuild(task_manager.get_all())
+    assert stats.snapshot()['totals']['count'] == 81
+    assert stats.snapshot() == rebuilt.snapshot()
+    print("[OK] test_concurrent_writes_match_storage completado")
+
+def test_snapshot_group_by_validation():
+    print("[TEST] Validando group_by...")
+    stats = TaskStats()
+    assert set(stats.snapshot(["status"])["groups"]) == {"status"}
+    with pytest.raises(ValueError):
+        stats.snapshot(["color"])
+    print("[OK] test_snapshot_group_by_validation completado")
+
+def test_stats_endpoint():
+    print("[TEST] Consultando /tasks/stats...")
+    from app import create_app
+    client = create_app().test_client()
+    resp = client.get('/tasks/stats?group_by=status,category')
+    assert resp.status_code == 200
+    data = resp.get_json()
+    assert set(data["groups"]) == {"status", "category"}
+    assert client.get('/tasks/stats?group_by=color').status_code == 400
+    print("[OK] test_stats_endpoint completado")
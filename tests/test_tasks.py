@@ -10,6 +10,7 @@ from app.models.task import Task
 from app.services.task_manager import TaskManager
 from app.repositories.json_task_repository import JsonTaskRepository
 import tempfile
+import threading
 import json
 
 
@@ -24,6 +25,8 @@ def temp_json_repo():
     repo = JsonTaskRepository(path)
     yield repo
     os.remove(path)
+    if os.path.exists(f'{path}.lock'):
+        os.remove(f'{path}.lock')
 
 @pytest.fixture
 def task_manager(temp_json_repo):
@@ -90,3 +93,17 @@ def test_get_nonexistent_task(task_manager):
     assert task_manager.get_by_id(999) is None
     print("[OK] test_get_nonexistent_task completado")
 
+def test_concurrent_creates_keep_every_task(task_manager):
+    print("[TEST] Creando tareas desde varios hilos a la vez...")
+    def create_many():
+        for i in range(10):
+            task_manager.create(Task(title=f"Tarea {i}", description="Concurrente", priority="media",
+                                     effort_hours=1, status="pendiente", assigned_to="Ana"))
+    threads = [threading.Thread(target=create_many) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    ids = [task.id for task in task_manager.get_all()]
+    assert sorted(ids) == list(range(1, 81))
+    print("[OK] test_concurrent_creates_keep_every_task completado")
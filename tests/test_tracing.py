@@ -0,0 +1,154 @@
+"""
+Pruebas de las trazas de peticiones, TaskManager, repositorio y llamadas a OpenAI.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import json
+import pytest
+import tempfile
+from app import create_app, tracing
+from app.config.ai_config import AIConfig
+from app.models.task import Task
+from app.repositories.json_task_repository import JsonTaskRepository
+from app.repositories.sharded_task_repository import ShardedTaskRepository
+from app.repositories.snapshot_task_repository import SnapshotTaskRepository
+from app.services.task_manager import TaskManager
+from scripts.openai_stub_server import start_in_background
+
+TRACEPARENT = '00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01'
+
+
+@pytest.fixture
+def tmp_dir(monkeypatch):
+    # Cada prueba configura su propio tracer; al terminar se restaura el del proceso
+    monkeypatch.setattr(tracing, '_tracer', tracing.get_tracer())
+    with tempfile.TemporaryDirectory() as path:
+        yield path
+
+@pytest.fixture
+def stub(monkeypatch):
+    server, base_url = start_in_background()
+    monkeypatch.setattr(AIConfig, 'OPENAI_API_KEY', 'sk-stub')
+    monkeypatch.setattr(AIConfig, 'OPENAI_BASE_URL', base_url)
+    AIConfig.close_clients()
+    yield server
+    AIConfig.close_clients()
+    server.shutdown()
+
+def _repository(tmp_dir):
+    repository = JsonTaskRepository(os.path.join(tmp_dir, 'tasks.json'))
+    repository.save_tasks([Task(id=1, title="Crear endpoint REST", description="API de tareas", priority="media",
+                                effort_hours=2, status="pendiente", assigned_to="Ana")])
+    return repository
+
+def _by_name(spans):
+    return {span.name: span for span in spans}
+
+def test_nested_spans(tmp_dir):
+    print("\n[TEST] Anidando los spans de TaskManager y del repositorio...")
+    exporter = tracing.InMemorySpanExporter()
+    tracing.configure(exporter)
+    manager = TaskManager(repository=_repository(tmp_dir))
+    with tracing.span('lote', **{'batch.size': 1}) as root:
+        assert manager.get_by_id(1).title == "Crear endpoint REST"
+    spans = _by_name(exporter.get_finished_spans())
+    load, get = spans['JsonTaskRepository.load_tasks'], spans['TaskManager.get_by_id']
+    assert get.attributes['task.id'] == 1 and load.attributes['tasks.count'] == 1
+    assert load.parent_id == get.span_id and get.parent_id == root.span_id
+    assert load.trace_id == get.trace_id == root.trace_id and len(root.trace_id) == 32
+    assert root.status == 'OK' and root.end_time >= root.start_time
+
+    exporter.clear()
+    with pytest.raises(ValueError):
+        with tracing.span('falla'):
+            raise ValueError("sin tareas")
+    failed = exporter.get_finished_spans()[0]
+    assert failed.status == 'ERROR' and failed.attributes['exception.type'] == 'ValueError'
+    print("[OK] test_nested_spans completado")
+
+def test_iter_all_and_other_repositories(tmp_dir):
+    print("\n[TEST] Trazando iter_all y las lecturas de los repositorios snapshot y particionado...")
+    exporter = tracing.InMemorySpanExporter()
+    tracing.configure(exporter)
+    sharded = ShardedTaskRepository(os.path.join(tmp_dir, 'shards'), shards=2)
+    sharded.save_tasks([Task(id=i, title=f"Tarea {i}") for i in range(1, 6)])
+    exporter.clear()
+    with tracing.span('export') as root:
+        for _ in TaskManager(repository=sharded).iter_all():
+            # Los spans del consumidor entre elementos no cuelgan de iter_all
+            with tracing.span('consumer'):
+                pass
+    spans = exporter.get_finished_spans()
+    iter_all = _by_name(spans)['TaskManager.iter_all']
+    iter_tasks = _by_name(spans)['ShardedTaskRepository.iter_tasks']
+    shard_loads = [span for span in spans if span.name == 'JsonTaskRepository.load_tasks']
+    assert iter_all.parent_id == root.span_id and iter_all.attributes['tasks.count'] == 5
+    assert iter_tasks.parent_id == iter_all.span_id and iter_tasks.attributes['db.shards'] == 2
+    assert len(shard_loads) == 2 and all(span.parent_id == iter_tasks.span_id for span in shard_loads)
+    assert all(span.parent_id == root.span_id for span in spans if span.name == 'consumer')
+    assert iter_all.end_time >= iter_tasks.end_time
+
+    exporter.clear()
+    assert sharded.get_by_id(3).title == "Tarea 3"
+    assert len(sharded.load_tasks()) == 5
+    spans = _by_name(exporter.get_finished_spans())
+    assert spans['ShardedTaskRepository.get_by_id'].attributes['task.id'] == 3
+    assert spans['ShardedTaskRepository.load_tasks'].attributes['tasks.count'] == 5
+
+    snapshot = SnapshotTaskRepository(_repository(tmp_dir), os.path.join(tmp_dir, 'tasks.snapshot'))
+    exporter.clear()
+    assert snapshot.get_by_id(1).title == "Crear endpoint REST"
+    assert len(snapshot.load_tasks()) == 1
+    spans = _by_name(exporter.get_finished_spans())
+    assert spans['SnapshotTaskRepository.get_by_id'].attributes['db.system'] == 'snapshot'
+    assert spans['SnapshotTaskRepository.load_tasks'].attributes['tasks.count'] == 1
+    snapshot.close()
+    print("[OK] test_iter_all_and_other_repositories completado")
+
+def test_disabled_and_sampled(tmp_dir):
+    print("\n[TEST] Sin exportador y con muestreo a cero no se registra nada...")
+    tracing.configure(None)
+    with tracing.span('nada') as span:
+        span.set_attribute('task.id', 1)
+    exporter = tracing.InMemorySpanExporter()
+    tracing.configure(exporter, sample_ratio=0)
+    TaskManager(repository=_repository(tmp_dir)).get_all()
+    assert exporter.get_finished_spans() == []
+    print("[OK] test_disabled_and_sampled completado")
+
+def test_request_spans_continue_traceparent(tmp_dir):
+    print("\n[TEST] Abriendo un span por petición que continúa la traza del cliente...")
+    app = create_app({'TRACING_EXPORTER': 'memory', 'TASK_REPOSITORY': _repository(tmp_dir)})
+    exporter = app.extensions['tracing']
+    response = app.test_client().get('/tasks/1', headers={'traceparent': TRACEPARENT})
+    assert response.status_code == 200
+    spans = _by_name(exporter.get_finished_spans())
+    request = spans['GET /tasks/<int:task_id>']
+    assert request.kind == 'SERVER' and request.trace_id == '0af7651916cd43dd8448eb211c80319c'
+    assert request.parent_id == 'b7ad6b7169203331'
+    assert request.attributes['http.status_code'] == 200 and request.attributes['http.method'] == 'GET'
+    assert spans['TaskManager.get_by_id'].parent_id == request.span_id
+    assert response.headers['traceresponse'] == f'00-{request.trace_id}-{request.span_id}-01'
+    assert tracing.parse_traceparent('00-' + '0' * 32 + '-b7ad6b7169203331-01') is None
+    print("[OK] test_request_spans_continue_traceparent completado")
+
+def test_openai_span_with_tokens(tmp_dir, stub):
+    print("\n[TEST] Registrando modelo y tokens de las llamadas a OpenAI...")
+    trace_path = os.path.join(tmp_dir, 'traces.jsonl')
+    app = create_app({'TRACING_EXPORTER': 'file', 'TRACING_FILE_PATH': trace_path,
+                      'TASK_REPOSITORY': _repository(tmp_dir),
+                      'AI_USAGE_LEDGER_PATH': os.path.join(tmp_dir, 'usage.db')})
+    response = app.test_client().post('/ai/tasks/categorize/1')
+    assert response.status_code == 200 and response.get_json()['category'] == 'Backend'
+    with open(trace_path, encoding='utf-8') as f:
+        spans = {span['name']: span for span in map(json.loads, f)}
+    call, run = spans['OpenAIService._call_openai'], spans['AITaskManager.categorize']
+    assert call['kind'] == 'CLIENT' and call['attributes']['ai.operation'] == 'categorize'
+    assert call['attributes']['ai.model'] == AIConfig.get_model_params('categorize')['model']
+    assert call['attributes']['ai.total_tokens'] == 60
+    assert call['parent_id'] == run['context']['span_id'] and run['attributes']['task.id'] == 1
+    assert spans['POST /ai/tasks/categorize/<int:task_id>']['attributes']['http.status_code'] == 200
+    app.extensions['tracing'].shutdown()
+    print("[OK] test_openai_span_with_tokens completado")
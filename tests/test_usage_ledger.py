@@ -0,0 +1,75 @@
+"""
+Pruebas del ledger persistente de uso de IA (SQLite) y de su integración con AITaskManager.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+import tempfile
+from datetime import datetime, timezone
+from app.models.task import Task
+from app.services.task_manager import TaskManager
+from app.services.ai_task_manager import AITaskManager
+from app.repositories.json_task_repository import JsonTaskRepository
+from app.repositories.usage_ledger import UsageLedger
+
+
+class FakeAIService:
+    """Sustituto de OpenAIService con consumo de tokens fijo."""
+    def _result(self, text):
+        return {"result": text, "input_tokens": 100, "output_tokens": 20, "total_tokens": 120,
+                "processing_time": 0.5, "model": "gpt-4o-mini"}
+
+    def categorize_task(self, task_data):
+        return self._result("Backend")
+
+    def analyze_risks(self, task_data):
+        return self._result("Riesgos")
+
+    def generate_mitigation(self, task_data, risk_analysis):
+        return self._result("Mitigación")
+
+@pytest.fixture
+def ledger():
+    directory = tempfile.mkdtemp()
+    ledger = UsageLedger(os.path.join(directory, 'usage.db'), flush_interval=0.05)
+    yield ledger
+    ledger.close()
+
+def ts(day):
+    return datetime.strptime(day, '%Y-%m-%d').replace(tzinfo=timezone.utc).timestamp() + 3600
+
+def test_rollups_by_day_and_operation(ledger):
+    print("[TEST] Agregando consumo por día y operación...")
+    ledger.record('describe', model='gpt-4o-mini', total_tokens=100, cost=0.01, latency=1.0, ts=ts('2026-01-01'))
+    ledger.record('describe', model='gpt-4o-mini', total_tokens=50, cost=0.02, latency=2.0, ts=ts('2026-01-01'))
+    ledger.record('audit', model='gpt-4o', total_tokens=300, cost=0.5, ts=ts('2026-01-02'))
+    ledger.flush()
+    by_day = ledger.rollup(['day'])
+    assert [(r['day'], r['calls'], r['total_tokens']) for r in by_day] == [('2026-01-01', 2, 150), ('2026-01-02', 1, 300)]
+    assert by_day[0]['cost'] == pytest.approx(0.03) and by_day[0]['avg_latency'] == 1.5
+    assert [r['operation'] for r in ledger.rollup(['operation'], since='2026-01-02')] == ['audit']
+    with pytest.raises(ValueError):
+        ledger.rollup(['task_id; DROP TABLE usage'])
+    print("[OK] test_rollups_by_day_and_operation completado")
+
+def test_ai_task_manager_records_every_call(ledger):
+    print("[TEST] Registrando cada llamada de IA en el ledger...")
+    fd, path = tempfile.mkstemp(suffix='.json')
+    os.close(fd)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('[]')
+    task_manager = TaskManager(repository=JsonTaskRepository(path))
+    task_manager.create(Task(title="T", description="D", priority="alta", effort_hours=1, status="pendiente", assigned_to="Ana"))
+    manager = AITaskManager(task_manager=task_manager, ai_service=FakeAIService(), usage_ledger=ledger)
+    manager.categorize_task(1)
+    manager.audit_task_risks(1)
+    ledger.close()
+    rows = {r['operation']: r for r in ledger.rollup(['operation', 'assigned_to'])}
+    assert set(rows) == {'categorize', 'audit', 'mitigation_plan'}
+    assert rows['audit']['assigned_to'] == 'Ana'
+    assert rows['audit']['input_tokens'] == 100 and rows['audit']['output_tokens'] == 20
+    assert rows['audit']['cost'] == pytest.approx(100 / 1000 * 0.00015 + 20 / 1000 * 0.0006)
+    os.remove(path)
+    print("[OK] test_ai_task_manager_records_every_call completado")
@@ -0,0 +1,113 @@
+"""
+Pruebas del repositorio con escritura diferida (group commit) y de la recuperación tras una caída.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+import tempfile
+import threading
+from app.models.task import Task
+from app.services.task_manager import TaskManager
+from app.repositories.json_task_repository import JsonTaskRepository
+from app.repositories.write_behind_task_repository import WriteBehindTaskRepository
+
+
+def make_task(task_id=None, title="Tarea"):
+    return Task(id=task_id, title=title, description="Descripción", priority="media", effort_hours=2,
+                status="pendiente", assigned_to="Ana")
+
+
+class CountingRepository(JsonTaskRepository):
+    """JsonTaskRepository que cuenta los guardados y puede fallar a petición."""
+    def __init__(self, filepath):
+        super().__init__(filepath)
+        self.saves = 0
+        self.fail = False
+
+    def save_tasks(self, tasks):
+        if self.fail:
+            raise OSError('disco lleno')
+        self.saves += 1
+        super().save_tasks(tasks)
+
+
+@pytest.fixture
+def tmp_dir():
+    with tempfile.TemporaryDirectory() as path:
+        yield path
+
+
+def test_commit_mode_groups_concurrent_writes(tmp_dir):
+    print("\n[TEST] Group commit de escrituras concurrentes")
+    inner = CountingRepository(os.path.join(tmp_dir, 'tasks.json'))
+    repository = WriteBehindTaskRepository(inner, durability='commit', flush_interval=0.02)
+    manager = TaskManager(repository=repository)
+    threads = [threading.Thread(target=lambda: manager.create(make_task())) for _ in range(40)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # Cada create ha vuelto tras un guardado que lo incluye, pero los guardados se comparten
+    assert sorted(task.id for task in inner.load_tasks()) == list(range(1, 41))
+    assert inner.saves < 40
+    repository.close()
+    print("[OK] Group commit de escrituras concurrentes completado")
+
+
+def test_none_mode_acknowledges_before_saving_and_flushes_on_close(tmp_dir):
+    print("\n[TEST] Confirmación inmediata y guardado al cerrar")
+    inner = CountingRepository(os.path.join(tmp_dir, 'tasks.json'))
+    repository = WriteBehindTaskRepository(inner, durability='none', flush_interval=60)
+    manager = TaskManager(repository=repository)
+    manager.create(make_task(title="A"))
+    manager.create(make_task(title="B"))
+    manager.update(1, make_task(1, title="A2"))
+    assert manager.delete(2) is True
+    assert [task.title for task in manager.get_all()] == ["A2"]
+    assert inner.saves == 0 and inner.load_tasks() == []
+    repository.close()
+    assert inner.saves == 1 and [task.title for task in inner.load_tasks()] == ["A2"]
+    with pytest.raises(RuntimeError):
+        manager.create(make_task())
+    print("[OK] Confirmación inmediata y guardado al cerrar completado")
+
+
+def test_journal_recovers_unsaved_changes_after_crash(tmp_dir):
+    print("\n[TEST] Recuperación del diario tras una caída")
+    path = os.path.join(tmp_dir, 'tasks.json')
+    journal = path + '.journal'
+    JsonTaskRepository(path).save_tasks([make_task(1, title="Guardada")])
+    inner = CountingRepository(path)
+    crashed = WriteBehindTaskRepository(inner, durability='journal', flush_interval=60, journal_path=journal)
+    manager = TaskManager(repository=crashed)
+    manager.create(make_task(title="Nueva"))
+    manager.update(1, make_task(1, title="Editada"))
+    # El proceso "cae" antes del group commit: el fichero JSON no tiene los cambios
+    inner.fail = True
+    assert [task.title for task in JsonTaskRepository(path).load_tasks()] == ["Guardada"]
+    with open(journal, 'a', encoding='utf-8') as f:
+        f.write('{"op": "delete", "i')  # última línea a medio escribir
+
+    recovered = WriteBehindTaskRepository(JsonTaskRepository(path), durability='journal', journal_path=journal)
+    assert [(task.id, task.title) for task in recovered.load_tasks()] == [(1, "Editada"), (2, "Nueva")]
+    assert [task.title for task in JsonTaskRepository(path).load_tasks()] == ["Editada", "Nueva"]
+    assert os.path.getsize(journal) == 0
+    recovered.close()
+    print("[OK] Recuperación del diario tras una caída completado")
+
+
+def test_commit_errors_are_reported_and_retried(tmp_dir):
+    print("\n[TEST] Errores de guardado notificados y reintentados")
+    inner = CountingRepository(os.path.join(tmp_dir, 'tasks.json'))
+    repository = WriteBehindTaskRepository(inner, durability='none', flush_interval=60)
+    repository.add_task(make_task())
+    inner.fail = True
+    with pytest.raises(RuntimeError):
+        repository.flush()
+    inner.fail = False
+    repository.flush()
+    assert [task.id for task in inner.load_tasks()] == [1]
+    repository.close()
+    print("[OK] Errores de guardado notificados y reintentados completado")
@@ -0,0 +1,40 @@
+"""
+Punto de entrada de producción (WSGI).
+
+- Linux/macOS (gunicorn, configuración en gunicorn.conf.py):
+    gunicorn -c gunicorn.conf.py wsgi:app
+- Cualquier plataforma, incluido Windows (waitress):
+    python wsgi.py
+"""
+import os
+import signal
+from app import create_app
+from app.lifecycle import shutdown
+
+app = create_app()
+# Índices construidos antes del fork: con preload_app los workers los comparten por copy-on-write
+app.extensions['services'].build_indexes()
+
+
+def serve():
+    """
+    Sirve la aplicación con waitress usando WEB_BIND y WEB_THREADS, y ejecuta el apagado
+    ordenado (escrituras pendientes) al recibir SIGTERM o Ctrl+C.
+    """
+    from waitress import serve as waitress_serve
+
+    def handle_sigterm(signum, frame):
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, handle_sigterm)
+    host, _, port = os.getenv('WEB_BIND', '0.0.0.0:8000').rpartition(':')
+    try:
+        waitress_serve(app, host=host, port=int(port), threads=int(os.getenv('WEB_THREADS', '8')))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        shutdown()
+
+
+if __name__ == "__main__":
+    serve()